@@ -25,6 +25,8 @@ const BROWSER_AUTOMATION_DIR = path.join(ROOT_DIR, 'tools', 'intent-tester', 'br
 
 const coreFiles = [
     { src: path.join(BROWSER_AUTOMATION_DIR, 'midscene_server.js'), dest: 'midscene_server.js' },
+    { src: path.join(BROWSER_AUTOMATION_DIR, 'execution_event_log.js'), dest: 'execution_event_log.js' },
+    { src: path.join(BROWSER_AUTOMATION_DIR, 'wait_engine.js'), dest: 'wait_engine.js' },
     { src: path.join(INTENT_TESTER_DIR, 'package.json'), dest: 'package.json' }
 ];
 
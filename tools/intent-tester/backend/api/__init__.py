@@ -12,6 +12,17 @@ def register_api_routes(app):
     # from .dashboard import dashboard_bp
     from .midscene import midscene_bp
     from .proxy import proxy_bp
+    from .executors import executors_bp
+    from .schedules import schedules_bp
+    from .suites import suites_bp
+    from .fixtures import fixtures_bp
+    from .visual import visual_bp
+    from .replay import replay_bp
+    from .network import network_bp
+    from .ai_cache import ai_cache_bp
+    from .datasets import datasets_bp
+    from .tenants import tenants_bp
+    from .variables import variables_bp
 
     # 注册主API蓝图
     app.register_blueprint(api_bp, url_prefix='/intent-tester/api')
@@ -23,3 +34,14 @@ def register_api_routes(app):
     # app.register_blueprint(dashboard_bp, url_prefix='/intent-tester/api')
     app.register_blueprint(midscene_bp, url_prefix='/intent-tester/api')
     app.register_blueprint(proxy_bp, url_prefix='/intent-tester/api')
+    app.register_blueprint(executors_bp, url_prefix='/intent-tester/api')
+    app.register_blueprint(schedules_bp, url_prefix='/intent-tester/api')
+    app.register_blueprint(suites_bp, url_prefix='/intent-tester/api')
+    app.register_blueprint(fixtures_bp, url_prefix='/intent-tester/api')
+    app.register_blueprint(visual_bp, url_prefix='/intent-tester/api')
+    app.register_blueprint(replay_bp, url_prefix='/intent-tester/api')
+    app.register_blueprint(network_bp, url_prefix='/intent-tester/api')
+    app.register_blueprint(ai_cache_bp, url_prefix='/intent-tester/api')
+    app.register_blueprint(datasets_bp, url_prefix='/intent-tester/api')
+    app.register_blueprint(tenants_bp, url_prefix='/intent-tester/api')
+    app.register_blueprint(variables_bp, url_prefix='/intent-tester/api')
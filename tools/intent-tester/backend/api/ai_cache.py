@@ -0,0 +1,108 @@
+"""
+AI缓存管理API模块
+查看各执行节点上的MidScene缓存及命中率，失效、预热和淘汰缓存
+"""
+
+import logging
+
+from flask import Blueprint, request
+
+from .base import (
+    format_success_response,
+    standard_error_response,
+    log_api_call,
+)
+from backend.models import db, TestCase
+from backend.services.ai_cache_service import get_ai_cache_service
+
+logger = logging.getLogger(__name__)
+
+ai_cache_bp = Blueprint("ai_cache", __name__)
+
+
+@ai_cache_bp.route("/ai-cache", methods=["GET"])
+@log_api_call
+def list_ai_caches():
+    """列出所有节点上的AI缓存，按用例汇总大小和命中率"""
+    try:
+        days = request.args.get("days", 7, type=int)
+        result = get_ai_cache_service().list_caches(
+            testcase_id=request.args.get("testcase_id", type=int), days=max(1, days or 7)
+        )
+        return format_success_response(message="获取成功", data=result)
+
+    except Exception as e:
+        return standard_error_response(f"获取AI缓存失败: {str(e)}")
+
+
+@ai_cache_bp.route("/testcases/<int:testcase_id>/ai-cache", methods=["DELETE"])
+@log_api_call
+def invalidate_ai_cache(testcase_id):
+    """让用例的AI缓存失效，下次执行重新调用模型生成缓存"""
+    try:
+        testcase = TestCase.query.get(testcase_id)
+        if not testcase:
+            return standard_error_response("测试用例不存在", 404)
+
+        result = get_ai_cache_service().invalidate(testcase)
+        return format_success_response(
+            message=f"已删除 {len(result['deleted'])} 个缓存文件", data=result
+        )
+
+    except Exception as e:
+        return standard_error_response(f"使AI缓存失效失败: {str(e)}")
+
+
+@ai_cache_bp.route("/ai-cache/evict", methods=["POST"])
+@log_api_call
+def evict_ai_caches():
+    """
+    淘汰AI缓存
+
+    请求体: {max_age_days, max_total_bytes（每个节点）, include_stale（默认true）}
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        result = get_ai_cache_service().evict(
+            max_age_days=data.get("max_age_days"),
+            max_total_bytes=data.get("max_total_bytes"),
+            include_stale=data.get("include_stale", True),
+        )
+        return format_success_response(
+            message=f"已淘汰 {len(result['deleted'])} 个缓存文件", data=result
+        )
+
+    except ValueError as e:
+        return standard_error_response(str(e), 400)
+    except Exception as e:
+        return standard_error_response(f"淘汰AI缓存失败: {str(e)}")
+
+
+@ai_cache_bp.route("/ai-cache/warm", methods=["POST"])
+@log_api_call
+def warm_ai_caches():
+    """
+    为缺少缓存的用例排队预热执行，只占用节点当前的空闲槽位
+
+    请求体: {testcase_ids（可选，默认全部启用的用例）, max_executions（默认20）}
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        testcase_ids = data.get("testcase_ids")
+        if testcase_ids is not None and (
+            not isinstance(testcase_ids, list)
+            or not all(isinstance(i, int) for i in testcase_ids)
+        ):
+            return standard_error_response("testcase_ids必须是整数数组", 400)
+        max_executions = data.get("max_executions", 20)
+        if not isinstance(max_executions, int) or max_executions < 1:
+            return standard_error_response("max_executions必须是正整数", 400)
+
+        result = get_ai_cache_service().warm(testcase_ids, max_executions=max_executions)
+        return format_success_response(
+            message=f"已排队 {len(result['queued'])} 个预热执行", data=result
+        )
+
+    except Exception as e:
+        db.session.rollback()
+        return standard_error_response(f"预热AI缓存失败: {str(e)}")
@@ -0,0 +1,190 @@
+"""
+数据驱动运行API模块
+包含用例数据集的绑定（内联JSON、CSV上传、查询）、预览，以及按行并行执行的数据驱动运行
+"""
+
+import json
+import logging
+
+from flask import Blueprint, request
+
+from .base import (
+    format_success_response,
+    standard_error_response,
+    log_api_call,
+)
+from backend.models import db, TestCase, DatasetRun
+from backend.services.dataset_service import get_dataset_runner
+
+logger = logging.getLogger(__name__)
+
+datasets_bp = Blueprint("datasets", __name__)
+
+
+def _get_active_testcase(testcase_id):
+    testcase = TestCase.query.get(testcase_id)
+    if testcase is None or not testcase.is_active:
+        return None
+    return testcase
+
+
+@datasets_bp.route("/testcases/<int:testcase_id>/dataset", methods=["PUT"])
+@log_api_call
+def bind_dataset(testcase_id):
+    """绑定内联或查询数据集，请求体为数据集配置"""
+    try:
+        testcase = _get_active_testcase(testcase_id)
+        if testcase is None:
+            return standard_error_response("测试用例不存在", 404)
+
+        spec = request.get_json(silent=True)
+        if not isinstance(spec, dict):
+            return standard_error_response("请求体必须是数据集配置对象", 400)
+        if spec.get("type") == "csv":
+            return standard_error_response("CSV数据集请通过上传接口绑定", 400)
+
+        runner = get_dataset_runner()
+        runner.bind(testcase, spec)
+        return format_success_response(
+            message="数据集已绑定", data=runner.preview(json.loads(testcase.dataset))
+        )
+
+    except ValueError as e:
+        db.session.rollback()
+        return standard_error_response(str(e), 400)
+    except Exception as e:
+        db.session.rollback()
+        return standard_error_response(f"绑定数据集失败: {str(e)}")
+
+
+@datasets_bp.route("/testcases/<int:testcase_id>/dataset/csv", methods=["POST"])
+@log_api_call
+def upload_dataset_csv(testcase_id):
+    """上传CSV数据集（multipart表单的file字段，或直接以请求体上传）并绑定到用例"""
+    try:
+        testcase = _get_active_testcase(testcase_id)
+        if testcase is None:
+            return standard_error_response("测试用例不存在", 404)
+
+        upload = request.files.get("file")
+        if upload is not None:
+            stream, filename = upload.stream, upload.filename
+        else:
+            stream, filename = request.stream, request.args.get("filename")
+
+        runner = get_dataset_runner()
+        runner.store_csv(testcase, stream, filename)
+        return format_success_response(
+            message="CSV数据集已上传", data=runner.preview(json.loads(testcase.dataset))
+        )
+
+    except ValueError as e:
+        db.session.rollback()
+        return standard_error_response(str(e), 400)
+    except Exception as e:
+        db.session.rollback()
+        return standard_error_response(f"上传CSV数据集失败: {str(e)}")
+
+
+@datasets_bp.route("/testcases/<int:testcase_id>/dataset", methods=["GET"])
+@log_api_call
+def get_dataset(testcase_id):
+    """获取用例绑定的数据集概要和前几行"""
+    try:
+        testcase = _get_active_testcase(testcase_id)
+        if testcase is None:
+            return standard_error_response("测试用例不存在", 404)
+        if not testcase.dataset:
+            return standard_error_response("测试用例未绑定数据集", 404)
+
+        limit = min(max(request.args.get("limit", 20, type=int), 1), 100)
+        preview = get_dataset_runner().preview(json.loads(testcase.dataset), limit)
+        return format_success_response(message="获取成功", data=preview)
+
+    except ValueError as e:
+        return standard_error_response(str(e), 400)
+    except Exception as e:
+        return standard_error_response(f"获取数据集失败: {str(e)}")
+
+
+@datasets_bp.route("/testcases/<int:testcase_id>/dataset", methods=["DELETE"])
+@log_api_call
+def unbind_dataset(testcase_id):
+    """解除用例的数据集绑定"""
+    try:
+        testcase = _get_active_testcase(testcase_id)
+        if testcase is None:
+            return standard_error_response("测试用例不存在", 404)
+
+        get_dataset_runner().bind(testcase, None)
+        return format_success_response(message="数据集已解除绑定")
+
+    except Exception as e:
+        db.session.rollback()
+        return standard_error_response(f"解除数据集绑定失败: {str(e)}")
+
+
+@datasets_bp.route("/testcases/<int:testcase_id>/dataset-runs", methods=["POST"])
+@log_api_call
+def create_dataset_run(testcase_id):
+    """
+    创建数据驱动运行
+
+    可选参数：dataset（临时使用的数据集配置，不绑定）、max_parallel、max_rows、mode、browser
+    """
+    try:
+        testcase = _get_active_testcase(testcase_id)
+        if testcase is None:
+            return standard_error_response("测试用例不存在", 404)
+
+        data = request.get_json(silent=True) or {}
+        dataset_run = get_dataset_runner().start_run(testcase, data)
+        return format_success_response(
+            message="数据驱动运行已创建", data=dataset_run.to_dict()
+        )
+
+    except ValueError as e:
+        db.session.rollback()
+        return standard_error_response(str(e), 400)
+    except Exception as e:
+        db.session.rollback()
+        return standard_error_response(f"创建数据驱动运行失败: {str(e)}")
+
+
+@datasets_bp.route("/dataset-runs/<dataset_run_id>", methods=["GET"])
+@log_api_call
+def get_dataset_run(dataset_run_id):
+    """获取数据驱动运行汇总和按行分页的执行结果"""
+    try:
+        dataset_run = DatasetRun.query.filter_by(dataset_run_id=dataset_run_id).first()
+        if not dataset_run:
+            return standard_error_response("数据驱动运行不存在", 404)
+
+        offset = max(request.args.get("offset", 0, type=int), 0)
+        limit = min(max(request.args.get("limit", 100, type=int), 1), 500)
+        rows = get_dataset_runner().row_results(
+            dataset_run, status=request.args.get("status"), offset=offset, limit=limit
+        )
+        data = dataset_run.to_dict()
+        data["rows"] = rows
+        return format_success_response(message="获取成功", data=data)
+
+    except Exception as e:
+        return standard_error_response(f"获取数据驱动运行失败: {str(e)}")
+
+
+@datasets_bp.route("/dataset-runs/<dataset_run_id>/cancel", methods=["POST"])
+@log_api_call
+def cancel_dataset_run(dataset_run_id):
+    """取消数据驱动运行中尚未开始的行"""
+    try:
+        dataset_run = get_dataset_runner().cancel_run(dataset_run_id)
+        return format_success_response(
+            message="数据驱动运行已取消", data=dataset_run.to_dict()
+        )
+
+    except ValueError as e:
+        return standard_error_response(str(e), 404)
+    except Exception as e:
+        db.session.rollback()
+        return standard_error_response(f"取消数据驱动运行失败: {str(e)}")
@@ -6,7 +6,8 @@
 import json
 import uuid
 from datetime import datetime
-from flask import request, jsonify
+import re
+from flask import request, jsonify, Response, send_file
 
 from flask import Blueprint
 
@@ -39,6 +40,15 @@ from backend.utils.common_patterns import (
     APIResponseHelper,
 )
 
+# 导入重复执行合并服务
+from backend.services.execution_coalescer import get_execution_coalescer
+from backend.services.execution_log_store import get_execution_log_store
+from backend.services.execution_video_store import (
+    get_execution_video_store,
+    KeyframeUnavailableError,
+)
+from backend.services.model_usage import aggregate_usage
+
 # 变量管理服务已简化 - 核心变量功能在其他服务中实现
 
 
@@ -63,20 +73,13 @@ def create_execution():
         if not testcase:
             return jsonify({"code": 404, "message": "测试用例不存在"}), 404
 
-        # 创建执行记录
-        execution_id = str(uuid.uuid4())
-        execution = ExecutionHistory(
-            execution_id=execution_id,
-            test_case_id=data["testcase_id"],
-            status="pending",
-            mode=data.get("mode", "headless"),
-            browser=data.get("browser", "chrome"),
-            start_time=datetime.utcnow(),
-            executed_by=data.get("executed_by", "system"),
-        )
-
-        db.session.add(execution)
-        db.session.commit()
+        # 创建执行记录，相同修订号和参数的执行正在进行时合并到该执行
+        try:
+            execution, coalesced = get_execution_coalescer().create_or_coalesce(
+                testcase, data
+            )
+        except ValueError as e:
+            return jsonify({"code": 400, "message": str(e)}), 400
 
         # TODO: 集成实际的执行引擎
         # 异步启动执行任务
@@ -85,12 +88,19 @@ def create_execution():
         return jsonify(
             {
                 "code": 200,
-                "message": "执行任务创建成功",
+                "message": "已合并到进行中的执行" if coalesced else "执行任务创建成功",
                 "data": {
-                    "execution_id": execution_id,
-                    "status": "pending",
+                    "execution_id": execution.execution_id,
+                    "status": execution.status,
                     "testcase_name": testcase.name,
                     "start_time": execution.start_time.isoformat(),
+                    "coalesced": coalesced,
+                    "coalesced_into": execution.coalesced_into,
+                    "deadline_at": (
+                        execution.deadline_at.isoformat()
+                        if execution.deadline_at
+                        else None
+                    ),
                 },
             }
         )
@@ -188,7 +198,7 @@ def stop_execution(execution_id):
         if not execution:
             return standard_error_response("执行记录不存在", 404)
 
-        if execution.status not in ["pending", "running"]:
+        if execution.status not in ["pending", "running", "coalesced"]:
             return standard_error_response("执行已完成，无法停止", 400)
 
         # TODO: 实现实际的停止执行逻辑
@@ -199,6 +209,7 @@ def stop_execution(execution_id):
         execution.status = "stopped"
         execution.end_time = datetime.now()
         execution.error_message = "用户手动停止执行"
+        get_execution_coalescer().propagate_result(execution)
 
         db.session.commit()
 
@@ -227,6 +238,10 @@ def delete_execution(execution_id):
         db.session.delete(execution)
         db.session.commit()
 
+        # 执行日志和录像随执行记录一起清理
+        get_execution_log_store().delete(execution_id)
+        get_execution_video_store().delete(execution_id)
+
         return format_success_response(message="执行记录删除成功")
 
     except Exception as e:
@@ -234,6 +249,249 @@ def delete_execution(execution_id):
         return standard_error_response(f"删除执行记录失败: {str(e)}")
 
 
+# ==================== 执行日志 ====================
+
+MAX_LOG_ENTRIES_PER_REQUEST = 1000
+
+
+@executions_bp.route("/executions/<execution_id>/logs", methods=["POST"])
+@log_api_call
+def append_execution_logs(execution_id):
+    """执行节点批量追加执行日志"""
+    try:
+        execution = ExecutionHistory.query.filter_by(execution_id=execution_id).first()
+        if not execution:
+            return standard_error_response("执行记录不存在", 404)
+
+        data = request.get_json(silent=True) or {}
+        entries = data.get("entries")
+        if not isinstance(entries, list) or not entries:
+            return standard_error_response("entries必须是非空数组", 400)
+        if len(entries) > MAX_LOG_ENTRIES_PER_REQUEST:
+            return standard_error_response(
+                f"单次最多追加{MAX_LOG_ENTRIES_PER_REQUEST}条日志", 400
+            )
+        if not all(isinstance(entry, dict) for entry in entries):
+            return standard_error_response("日志条目必须是对象", 400)
+
+        info = get_execution_log_store().append(execution_id, entries)
+        if execution.logs_path != info["path"]:
+            execution.logs_path = info["path"]
+            db.session.commit()
+
+        return format_success_response(message="日志追加成功", data=info)
+
+    except ValueError as e:
+        db.session.rollback()
+        return standard_error_response(str(e), 400)
+    except Exception as e:
+        db.session.rollback()
+        return standard_error_response(f"追加执行日志失败: {str(e)}")
+
+
+@executions_bp.route("/executions/<execution_id>/logs", methods=["GET"])
+@log_api_call
+def get_execution_logs(execution_id):
+    """
+    按偏移量分页读取执行日志
+
+    offset为未压缩日志流中的行首位置，返回的next_offset可用于继续读取
+    """
+    try:
+        offset = request.args.get("offset", 0, type=int)
+        max_bytes = request.args.get("max_bytes", 64 * 1024, type=int)
+
+        result = get_execution_log_store().read_entries(execution_id, offset, max_bytes)
+        if result is None:
+            return standard_error_response("执行日志不存在", 404)
+        return format_success_response(message="获取成功", data=result)
+
+    except ValueError as e:
+        return standard_error_response(str(e), 400)
+    except Exception as e:
+        return standard_error_response(f"获取执行日志失败: {str(e)}")
+
+
+@executions_bp.route("/executions/<execution_id>/logs/tail", methods=["GET"])
+@log_api_call
+def tail_execution_logs(execution_id):
+    """读取执行日志的最后若干行"""
+    try:
+        lines = request.args.get("lines", 100, type=int)
+
+        result = get_execution_log_store().tail(execution_id, min(lines or 0, 5000))
+        if result is None:
+            return standard_error_response("执行日志不存在", 404)
+        return format_success_response(message="获取成功", data=result)
+
+    except ValueError as e:
+        return standard_error_response(str(e), 400)
+    except Exception as e:
+        return standard_error_response(f"获取执行日志失败: {str(e)}")
+
+
+@executions_bp.route("/executions/<execution_id>/logs/raw", methods=["GET"])
+@log_api_call
+def download_execution_logs(execution_id):
+    """下载解压后的JSON行日志，支持Range请求读取字节区间"""
+    try:
+        store = get_execution_log_store()
+        info = store.info(execution_id)
+        if info is None:
+            return standard_error_response("执行日志不存在", 404)
+
+        size = info["size"]
+        range_header = request.headers.get("Range")
+        if not range_header:
+            # 流式输出，逐段解压，不在内存中拼接整份日志
+            return Response(
+                store.iter_range(execution_id),
+                mimetype="application/x-ndjson",
+                headers={"Content-Length": str(size), "Accept-Ranges": "bytes"},
+            )
+
+        match = re.fullmatch(r"bytes=(\d*)-(\d*)", range_header.strip())
+        if not match or not (match.group(1) or match.group(2)):
+            return standard_error_response("Range格式无效", 416)
+        if match.group(1):
+            start = int(match.group(1))
+            end = int(match.group(2)) + 1 if match.group(2) else size
+        else:
+            # 后缀区间：最后N个字节
+            start = max(0, size - int(match.group(2)))
+            end = size
+        end = min(end, size)
+        if start >= size or start >= end:
+            response = standard_error_response("请求的区间超出日志范围", 416)
+            response[0].headers["Content-Range"] = f"bytes */{size}"
+            return response
+
+        return Response(
+            store.iter_range(execution_id, start, end),
+            status=206,
+            mimetype="application/x-ndjson",
+            headers={
+                "Content-Range": f"bytes {start}-{end - 1}/{size}",
+                "Content-Length": str(end - start),
+                "Accept-Ranges": "bytes",
+            },
+        )
+
+    except ValueError as e:
+        return standard_error_response(str(e), 400)
+    except Exception as e:
+        return standard_error_response(f"下载执行日志失败: {str(e)}")
+
+
+# ==================== 执行录像 ====================
+
+
+@executions_bp.route("/executions/<execution_id>/video", methods=["POST"])
+@log_api_call
+def upload_execution_video(execution_id):
+    """
+    执行节点上传录像模式下录制的视频
+
+    multipart表单：video为录像文件，markers为JSON {steps: [{step_index, start_ms, end_ms}], duration_ms}
+    """
+    try:
+        execution = ExecutionHistory.query.filter_by(execution_id=execution_id).first()
+        if not execution:
+            return standard_error_response("执行记录不存在", 404)
+
+        video = request.files.get("video")
+        if video is None:
+            return standard_error_response("缺少video文件", 400)
+        try:
+            markers = json.loads(request.form.get("markers") or "{}")
+        except json.JSONDecodeError:
+            return standard_error_response("markers不是有效的JSON", 400)
+        if not isinstance(markers, dict):
+            return standard_error_response("markers必须是对象", 400)
+
+        info = get_execution_video_store().save(
+            execution_id,
+            video.read(),
+            markers.get("steps", []),
+            duration_ms=markers.get("duration_ms"),
+        )
+        return format_success_response(message="录像保存成功", data=info)
+
+    except ValueError as e:
+        return standard_error_response(str(e), 400)
+    except Exception as e:
+        return standard_error_response(f"保存执行录像失败: {str(e)}")
+
+
+@executions_bp.route("/executions/<execution_id>/video", methods=["GET"])
+@log_api_call
+def download_execution_video(execution_id):
+    """下载执行录像，支持Range请求便于播放器拖动进度"""
+    try:
+        path = get_execution_video_store().video_path(execution_id)
+        if path is None:
+            return standard_error_response("执行录像不存在", 404)
+        return send_file(path, mimetype="video/webm", conditional=True)
+
+    except ValueError as e:
+        return standard_error_response(str(e), 400)
+    except Exception as e:
+        return standard_error_response(f"下载执行录像失败: {str(e)}")
+
+
+@executions_bp.route("/executions/<execution_id>/video/info", methods=["GET"])
+@log_api_call
+def get_execution_video_info(execution_id):
+    """获取录像大小、时长及各步骤的时间标记"""
+    try:
+        info = get_execution_video_store().info(execution_id)
+        if info is None:
+            return standard_error_response("执行录像不存在", 404)
+        return format_success_response(message="获取成功", data=info)
+
+    except ValueError as e:
+        return standard_error_response(str(e), 400)
+    except Exception as e:
+        return standard_error_response(f"获取执行录像失败: {str(e)}")
+
+
+@executions_bp.route(
+    "/executions/<execution_id>/steps/<int:step_index>/keyframe", methods=["GET"]
+)
+@log_api_call
+def get_step_keyframe(execution_id, step_index):
+    """获取步骤结束时的画面，首次查看时从录像中抽取"""
+    try:
+        path = get_execution_video_store().keyframe(execution_id, step_index)
+        if path is None:
+            return standard_error_response("执行录像或步骤标记不存在", 404)
+        return send_file(path, mimetype="image/jpeg", max_age=86400)
+
+    except KeyframeUnavailableError as e:
+        return standard_error_response(str(e), 503)
+    except ValueError as e:
+        return standard_error_response(str(e), 400)
+    except Exception as e:
+        return standard_error_response(f"获取步骤关键帧失败: {str(e)}")
+
+
+# ==================== 模型用量 ====================
+
+
+@executions_bp.route("/executions/model-usage", methods=["GET"])
+@log_api_call
+def get_model_usage():
+    """按模型级别汇总最近执行的AI步骤数、失败率、平均耗时和成本"""
+    try:
+        days = request.args.get("days", 7, type=int)
+        if not days or days < 1 or days > 90:
+            return standard_error_response("days必须在1到90之间", 400)
+        return format_success_response(message="获取成功", data=aggregate_usage(days))
+
+    except Exception as e:
+        return standard_error_response(f"获取模型用量失败: {str(e)}")
+
+
 @executions_bp.route("/executions/<execution_id>/export", methods=["GET"])
 @log_api_call
 def export_execution(execution_id):
@@ -0,0 +1,165 @@
+"""
+执行节点管理API模块
+包含执行节点注册、心跳、排空、退出交还、容量信号和手动分发
+"""
+
+import logging
+
+from flask import Blueprint, request
+
+from .base import (
+    format_success_response,
+    standard_error_response,
+    log_api_call,
+)
+from backend.models import db
+from backend.services.executor_registry import get_executor_registry
+
+logger = logging.getLogger(__name__)
+
+executors_bp = Blueprint("executors", __name__)
+
+
+@executors_bp.route("/executors/register", methods=["POST"])
+@log_api_call
+def register_executor():
+    """注册执行节点"""
+    try:
+        data = request.get_json(silent=True) or {}
+
+        node = get_executor_registry().register_node(
+            node_id=data.get("node_id"),
+            server_url=data.get("server_url"),
+            total_slots=int(data.get("total_slots", 1)),
+            metadata=data.get("metadata"),
+        )
+        return format_success_response(message="执行节点注册成功", data=node.to_dict())
+
+    except ValueError as e:
+        db.session.rollback()
+        return standard_error_response(str(e), 400)
+    except Exception as e:
+        db.session.rollback()
+        return standard_error_response(f"注册执行节点失败: {str(e)}")
+
+
+@executors_bp.route("/executors/<node_id>/heartbeat", methods=["POST"])
+@log_api_call
+def executor_heartbeat(node_id):
+    """接收节点心跳，响应中返回节点当前状态（用于通知节点排空）"""
+    try:
+        data = request.get_json(silent=True) or {}
+
+        node = get_executor_registry().heartbeat(
+            node_id,
+            free_slots=int(data.get("free_slots", 0)),
+            cpu_percent=data.get("cpu_percent", 0.0),
+            memory_percent=data.get("memory_percent", 0.0),
+            running_executions=data.get("running_executions"),
+        )
+        return format_success_response(
+            message="心跳已接收",
+            data={"node_id": node.node_id, "status": node.status},
+        )
+
+    except ValueError as e:
+        db.session.rollback()
+        return standard_error_response(str(e), 404)
+    except Exception as e:
+        db.session.rollback()
+        return standard_error_response(f"处理心跳失败: {str(e)}")
+
+
+@executors_bp.route("/executors/<node_id>/drain", methods=["POST"])
+@log_api_call
+def drain_executor(node_id):
+    """排空执行节点"""
+    try:
+        node = get_executor_registry().drain_node(node_id)
+        return format_success_response(message="执行节点开始排空", data=node.to_dict())
+
+    except ValueError as e:
+        return standard_error_response(str(e), 404)
+    except Exception as e:
+        db.session.rollback()
+        return standard_error_response(f"排空执行节点失败: {str(e)}")
+
+
+@executors_bp.route("/executors/<node_id>/resume", methods=["POST"])
+@log_api_call
+def resume_executor(node_id):
+    """恢复执行节点接收任务"""
+    try:
+        node = get_executor_registry().resume_node(node_id)
+        return format_success_response(message="执行节点已恢复", data=node.to_dict())
+
+    except ValueError as e:
+        return standard_error_response(str(e), 404)
+    except Exception as e:
+        db.session.rollback()
+        return standard_error_response(f"恢复执行节点失败: {str(e)}")
+
+
+@executors_bp.route("/executors/<node_id>/release", methods=["POST"])
+@log_api_call
+def release_executor(node_id):
+    """节点排空超时退出前交还未完成的执行，重新排队由其他节点执行"""
+    try:
+        requeued = get_executor_registry().release_node(node_id)
+        return format_success_response(
+            message="执行节点已退出", data={"node_id": node_id, "requeued": requeued}
+        )
+
+    except ValueError as e:
+        return standard_error_response(str(e), 404)
+    except Exception as e:
+        db.session.rollback()
+        return standard_error_response(f"执行节点退出失败: {str(e)}")
+
+
+@executors_bp.route("/executors/capacity", methods=["GET"])
+@log_api_call
+def get_executor_capacity():
+    """获取自动扩缩容信号：排队、运行、空闲槽位、平均排队等待和积压清空预测"""
+    try:
+        window = min(max(request.args.get("window_minutes", 15, type=int), 1), 1440)
+        data = get_executor_registry().capacity(window_minutes=window)
+        return format_success_response(message="获取成功", data=data)
+
+    except Exception as e:
+        return standard_error_response(f"获取执行容量失败: {str(e)}")
+
+
+@executors_bp.route("/executors", methods=["GET"])
+@log_api_call
+def list_executors():
+    """获取执行节点列表"""
+    try:
+        registry = get_executor_registry()
+        nodes = registry.list_nodes(status=request.args.get("status"))
+
+        items = []
+        for node in nodes:
+            node_data = node.to_dict()
+            node_data["headroom"] = round(registry.headroom(node), 4)
+            items.append(node_data)
+
+        return format_success_response(
+            message="获取成功", data={"items": items, "total": len(items)}
+        )
+
+    except Exception as e:
+        return standard_error_response(f"获取执行节点失败: {str(e)}")
+
+
+@executors_bp.route("/executors/dispatch", methods=["POST"])
+@log_api_call
+def dispatch_executions():
+    """手动触发一轮失联检测和分发"""
+    try:
+        result = get_executor_registry().run_once()
+        return format_success_response(message="分发完成", data=result)
+
+    except Exception as e:
+        db.session.rollback()
+        return standard_error_response(f"分发执行失败: {str(e)}")
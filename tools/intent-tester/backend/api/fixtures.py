@@ -0,0 +1,171 @@
+"""
+前置夹具API模块
+包含夹具管理，以及执行节点获取和回传浏览器存储状态快照
+"""
+
+import logging
+
+from flask import Blueprint, request
+
+from .base import (
+    format_success_response,
+    standard_error_response,
+    log_api_call,
+)
+from backend.models import db, TestCase, SetupFixture
+from backend.services.fixture_service import get_fixture_service
+
+logger = logging.getLogger(__name__)
+
+fixtures_bp = Blueprint("fixtures", __name__)
+
+
+@fixtures_bp.route("/fixtures", methods=["POST"])
+@log_api_call
+def create_fixture():
+    """创建前置夹具"""
+    try:
+        data = request.get_json(silent=True) or {}
+        fixture = get_fixture_service().create_fixture(data)
+        return format_success_response(message="夹具创建成功", data=fixture.to_dict())
+
+    except ValueError as e:
+        db.session.rollback()
+        return standard_error_response(str(e), 400)
+    except Exception as e:
+        db.session.rollback()
+        return standard_error_response(f"创建夹具失败: {str(e)}")
+
+
+@fixtures_bp.route("/fixtures", methods=["GET"])
+@log_api_call
+def list_fixtures():
+    """获取前置夹具列表"""
+    try:
+        fixtures = SetupFixture.query.order_by(SetupFixture.name).all()
+        items = [fixture.to_dict() for fixture in fixtures]
+        return format_success_response(
+            message="获取成功", data={"items": items, "total": len(items)}
+        )
+
+    except Exception as e:
+        return standard_error_response(f"获取夹具列表失败: {str(e)}")
+
+
+@fixtures_bp.route("/fixtures/<int:fixture_id>", methods=["GET"])
+@log_api_call
+def get_fixture(fixture_id):
+    """获取前置夹具详情"""
+    fixture = SetupFixture.query.get(fixture_id)
+    if not fixture:
+        return standard_error_response("夹具不存在", 404)
+    return format_success_response(message="获取成功", data=fixture.to_dict())
+
+
+@fixtures_bp.route("/fixtures/<int:fixture_id>", methods=["PUT"])
+@log_api_call
+def update_fixture(fixture_id):
+    """更新前置夹具"""
+    try:
+        fixture = SetupFixture.query.get(fixture_id)
+        if not fixture:
+            return standard_error_response("夹具不存在", 404)
+
+        data = request.get_json(silent=True) or {}
+        fixture = get_fixture_service().update_fixture(fixture, data)
+        return format_success_response(message="夹具更新成功", data=fixture.to_dict())
+
+    except ValueError as e:
+        db.session.rollback()
+        return standard_error_response(str(e), 400)
+    except Exception as e:
+        db.session.rollback()
+        return standard_error_response(f"更新夹具失败: {str(e)}")
+
+
+@fixtures_bp.route("/fixtures/<int:fixture_id>", methods=["DELETE"])
+@log_api_call
+def delete_fixture(fixture_id):
+    """删除前置夹具，引用它的测试用例改为从空白浏览器开始"""
+    try:
+        fixture = SetupFixture.query.get(fixture_id)
+        if not fixture:
+            return standard_error_response("夹具不存在", 404)
+
+        TestCase.query.filter_by(setup_fixture_id=fixture_id).update(
+            {"setup_fixture_id": None}, synchronize_session=False
+        )
+        db.session.delete(fixture)
+        db.session.commit()
+        return format_success_response(message="夹具删除成功")
+
+    except Exception as e:
+        db.session.rollback()
+        return standard_error_response(f"删除夹具失败: {str(e)}")
+
+
+@fixtures_bp.route("/fixtures/<int:fixture_id>/resolve", methods=["GET"])
+@log_api_call
+def resolve_fixture(fixture_id):
+    """执行节点获取夹具步骤及有效快照"""
+    try:
+        fixture = SetupFixture.query.get(fixture_id)
+        if not fixture:
+            return standard_error_response("夹具不存在", 404)
+
+        return format_success_response(
+            message="获取成功", data=get_fixture_service().resolve(fixture)
+        )
+
+    except Exception as e:
+        db.session.rollback()
+        return standard_error_response(f"获取夹具失败: {str(e)}")
+
+
+@fixtures_bp.route("/fixtures/<int:fixture_id>/snapshot", methods=["POST"])
+@log_api_call
+def store_fixture_snapshot(fixture_id):
+    """执行节点回传夹具执行后的存储状态快照"""
+    try:
+        fixture = SetupFixture.query.get(fixture_id)
+        if not fixture:
+            return standard_error_response("夹具不存在", 404)
+
+        data = request.get_json(silent=True) or {}
+        if not data.get("revision"):
+            return standard_error_response("revision参数不能为空", 400)
+        if not isinstance(data.get("storage_state"), dict):
+            return standard_error_response("storage_state必须是对象", 400)
+
+        fixture = get_fixture_service().store_snapshot(
+            fixture,
+            storage_state=data.get("storage_state"),
+            url=data.get("url"),
+            revision=data["revision"],
+        )
+        return format_success_response(message="快照保存成功", data=fixture.to_dict())
+
+    except ValueError as e:
+        # 修订号不一致：夹具在执行期间被修改，快照已过时
+        db.session.rollback()
+        return standard_error_response(str(e), 409)
+    except Exception as e:
+        db.session.rollback()
+        return standard_error_response(f"保存快照失败: {str(e)}")
+
+
+@fixtures_bp.route("/fixtures/<int:fixture_id>/snapshot", methods=["DELETE"])
+@log_api_call
+def invalidate_fixture_snapshot(fixture_id):
+    """手动让夹具快照失效（例如测试账号密码变更后）"""
+    try:
+        fixture = SetupFixture.query.get(fixture_id)
+        if not fixture:
+            return standard_error_response("夹具不存在", 404)
+
+        get_fixture_service().invalidate(fixture)
+        return format_success_response(message="快照已失效", data=fixture.to_dict())
+
+    except Exception as e:
+        db.session.rollback()
+        return standard_error_response(f"使快照失效失败: {str(e)}")
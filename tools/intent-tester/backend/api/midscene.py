@@ -10,6 +10,13 @@ import logging
 # 导入数据库模型
 # 导入数据库模型
 from backend.models import db, ExecutionHistory, StepExecution
+from backend.services.execution_coalescer import get_execution_coalescer
+from backend.services.suite_service import get_suite_runner
+from backend.services.dataset_service import get_dataset_runner
+from backend.services.resource_policy import summarize_stats
+from backend.services.model_usage import summarize_usage
+from backend.services.ai_cache_service import summarize_cache_stats
+from midscene_framework import get_singleflight
 
 logger = logging.getLogger(__name__)
 
@@ -59,6 +66,22 @@ def midscene_execution_result():
                 404,
             )
 
+        # 已取消的执行（fail-fast、手动取消）不再被节点回传的结果覆盖
+        if execution.status == "cancelled":
+            print(f"⏹️ 执行已取消，忽略执行结果: {execution_id}")
+            return jsonify(
+                {
+                    "code": 200,
+                    "message": "执行已取消，忽略执行结果",
+                    "data": {
+                        "execution_id": execution_id,
+                        "database_id": execution.id,
+                        "status_updated": False,
+                        "cancelled": True,
+                    },
+                }
+            )
+
         # 解析步骤数据
         steps_data = data.get("step_results", data.get("steps", []))  # 兼容两种字段名
         steps_total = len(steps_data)
@@ -87,6 +110,26 @@ def midscene_execution_result():
         execution.steps_failed = steps_failed
         execution.error_message = data.get("error_message")
 
+        # 资源拦截统计、模型分级用量和AI缓存命中统计记录到结果摘要中
+        reported = {
+            "resource_stats": summarize_stats(data.get("resource_stats")),
+            "model_usage": summarize_usage(data.get("model_usage")),
+            "cache_stats": summarize_cache_stats(data.get("cache_stats")),
+        }
+        if any(reported.values()):
+            summary = json.loads(execution.result_summary) if execution.result_summary else {}
+            summary.update({key: value for key, value in reported.items() if value})
+            execution.result_summary = json.dumps(summary, ensure_ascii=False)
+
+        # 同步结果到合并进来的关联执行记录
+        linked_count = get_execution_coalescer().propagate_result(execution)
+
+        # 更新所属套件运行，必要时触发fail-fast取消剩余队列
+        get_suite_runner().record_result(execution)
+
+        # 更新所属数据驱动运行的行结果计数
+        get_dataset_runner().record_result(execution)
+
         db.session.flush()  # 获取ID
 
         # 创建StepExecution记录
@@ -109,6 +152,12 @@ def midscene_execution_result():
                 "action": step_data.get("action", "unknown"),
                 "result_data": step_data.get("result_data", {}),
             }
+            # 设置了截止时间的执行记录步骤结束时的剩余预算
+            if step_data.get("remaining_budget_ms") is not None:
+                step_metadata["remaining_budget_ms"] = step_data["remaining_budget_ms"]
+                step_metadata["deadline_exceeded"] = bool(
+                    step_data.get("deadline_exceeded", False)
+                )
 
             step_execution = StepExecution(
                 execution_id=execution_id,
@@ -123,6 +172,13 @@ def midscene_execution_result():
                 screenshot_path=step_data.get("screenshot_path"),
                 ai_decision=json.dumps(step_metadata, ensure_ascii=False),
                 error_message=step_data.get("error_message"),
+                # 按步骤重试策略执行时的尝试次数和每次失败尝试的记录
+                attempts=step_data.get("attempts") or 1,
+                attempt_history=(
+                    json.dumps(step_data["attempt_history"], ensure_ascii=False)
+                    if step_data.get("attempt_history")
+                    else None
+                ),
             )
             step_executions.append(step_execution)
             db.session.add(step_execution)
@@ -141,6 +197,7 @@ def midscene_execution_result():
                     "execution_id": execution_id,
                     "database_id": execution.id,
                     "steps_count": len(step_executions),
+                    "linked_executions": linked_count,
                 },
             }
         )
@@ -181,6 +238,23 @@ def midscene_execution_start():
         # 检查是否已存在执行记录
         execution = ExecutionHistory.query.filter_by(execution_id=execution_id).first()
 
+        if execution and execution.status == "cancelled":
+            # 已取消的执行不再恢复为运行中
+            print(f"⏹️ 执行已取消，忽略执行开始通知: {execution_id}")
+            return jsonify(
+                {
+                    "code": 200,
+                    "message": "执行已取消",
+                    "data": {
+                        "execution_id": execution_id,
+                        "database_id": execution.id,
+                        "status_updated": False,
+                        "coalesced": False,
+                        "cancelled": True,
+                    },
+                }
+            )
+
         if execution:
             # 更新现有记录
             execution.status = "running"
@@ -199,21 +273,29 @@ def midscene_execution_start():
             execution.executed_by = data.get("executed_by", "midscene-server")
             print(f"✅ 更新现有执行记录: {execution_id}")
         else:
-            # 创建新的ExecutionHistory记录
-            execution = ExecutionHistory(
-                execution_id=execution_id,
-                test_case_id=testcase_id,
-                status="running",
-                mode=mode,
-                browser=data.get("browser", "chrome"),
-                start_time=datetime.utcnow(),
-                steps_total=data.get("steps_total", 0),
-                steps_passed=0,
-                steps_failed=0,
-                executed_by=data.get("executed_by", "midscene-server"),
-                created_at=datetime.utcnow(),
-            )
-            db.session.add(execution)
+            # 执行节点直接收到的请求：相同修订号和参数的执行正在运行时合并，不再重复执行
+            try:
+                execution, coalesced = get_execution_coalescer().start_or_coalesce(
+                    testcase, execution_id, data
+                )
+            except ValueError as e:
+                return jsonify({"code": 400, "message": str(e)}), 400
+
+            if coalesced:
+                print(f"🔗 执行请求已合并: {execution_id} -> {execution.execution_id}")
+                return jsonify(
+                    {
+                        "code": 200,
+                        "message": "已合并到运行中的执行",
+                        "data": {
+                            "execution_id": execution.execution_id,
+                            "database_id": execution.id,
+                            "status_updated": False,
+                            "coalesced": True,
+                            "coalesced_into": execution.execution_id,
+                        },
+                    }
+                )
             print(f"✅ 创建新的执行记录: {execution_id}")
 
         db.session.commit()
@@ -226,6 +308,7 @@ def midscene_execution_start():
                     "execution_id": execution_id,
                     "database_id": execution.id,
                     "status_updated": True,
+                    "coalesced": False,
                 },
             }
         )
@@ -233,3 +316,12 @@ def midscene_execution_start():
         db.session.rollback()
         print(f"❌ 记录执行开始失败: {str(e)}")
         return jsonify({"code": 500, "message": f"记录执行开始失败: {str(e)}"}), 500
+
+
+@midscene_bp.route("/midscene/singleflight", methods=["GET"])
+@log_api_call
+def midscene_singleflight_stats():
+    """相同模型调用的合并统计：总调用数、实际执行数和共享结果的调用数"""
+    return jsonify(
+        {"code": 200, "message": "获取成功", "data": get_singleflight().get_stats()}
+    )
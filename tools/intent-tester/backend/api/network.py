@@ -0,0 +1,111 @@
+"""
+网络录制API模块
+执行节点上传成功执行时录制的HAR压缩包，回放模式下下载录制内容
+"""
+
+import logging
+
+from flask import Blueprint, Response, request
+
+from .base import (
+    format_success_response,
+    standard_error_response,
+    log_api_call,
+)
+from backend.models import db, TestCase
+from backend.services.network_recording_service import get_network_recording_service
+
+logger = logging.getLogger(__name__)
+
+network_bp = Blueprint("network", __name__)
+
+
+@network_bp.route("/testcases/<int:testcase_id>/network-recording", methods=["POST"])
+@log_api_call
+def upload_network_recording(testcase_id):
+    """
+    执行节点上传HAR压缩包
+
+    请求体为Playwright录制的zip压缩包原始字节，execution_id通过查询参数传递
+    """
+    try:
+        testcase = TestCase.query.get(testcase_id)
+        if not testcase:
+            return standard_error_response("测试用例不存在", 404)
+
+        recording = get_network_recording_service().store_recording(
+            testcase,
+            request.get_data(),
+            execution_id=request.args.get("execution_id"),
+        )
+        return format_success_response(message="网络录制保存成功", data=recording.to_dict())
+
+    except ValueError as e:
+        db.session.rollback()
+        return standard_error_response(str(e), 400)
+    except Exception as e:
+        db.session.rollback()
+        return standard_error_response(f"保存网络录制失败: {str(e)}")
+
+
+@network_bp.route("/testcases/<int:testcase_id>/network-recording", methods=["GET"])
+@log_api_call
+def download_network_recording(testcase_id):
+    """下载HAR压缩包，If-None-Match与当前录制一致时返回304"""
+    try:
+        testcase = TestCase.query.get(testcase_id)
+        if not testcase:
+            return standard_error_response("测试用例不存在", 404)
+
+        service = get_network_recording_service()
+        recording = service.get_recording(testcase)
+        if not recording:
+            return standard_error_response("网络录制不存在", 404)
+
+        service.mark_replayed(recording)
+        etag = f'"{recording.checksum}"'
+        if request.headers.get("If-None-Match") == etag:
+            return Response(status=304, headers={"ETag": etag})
+
+        return Response(
+            recording.archive,
+            mimetype="application/zip",
+            headers={"ETag": etag},
+        )
+
+    except Exception as e:
+        db.session.rollback()
+        return standard_error_response(f"获取网络录制失败: {str(e)}")
+
+
+@network_bp.route("/testcases/<int:testcase_id>/network-recording/info", methods=["GET"])
+@log_api_call
+def get_network_recording_info(testcase_id):
+    """获取网络录制概要"""
+    testcase = TestCase.query.get(testcase_id)
+    if not testcase:
+        return standard_error_response("测试用例不存在", 404)
+
+    recording = get_network_recording_service().get_recording(testcase)
+    if not recording:
+        return standard_error_response("网络录制不存在", 404)
+    return format_success_response(message="获取成功", data=recording.to_dict())
+
+
+@network_bp.route("/testcases/<int:testcase_id>/network-recording", methods=["DELETE"])
+@log_api_call
+def delete_network_recording(testcase_id):
+    """删除网络录制，回放模式下一次成功执行会重新录制"""
+    try:
+        testcase = TestCase.query.get(testcase_id)
+        if not testcase:
+            return standard_error_response("测试用例不存在", 404)
+
+        deleted = get_network_recording_service().delete_recording(testcase)
+        return format_success_response(
+            message="网络录制已删除" if deleted else "没有网络录制"
+        )
+
+    except Exception as e:
+        db.session.rollback()
+        return standard_error_response(f"删除网络录制失败: {str(e)}")
@@ -0,0 +1,104 @@
+"""
+回放轨迹API模块
+执行节点获取用例的有效回放轨迹，并在成功执行后回传录制或更新后的轨迹
+"""
+
+import logging
+
+from flask import Blueprint, request
+
+from .base import (
+    format_success_response,
+    standard_error_response,
+    log_api_call,
+)
+from backend.models import db, TestCase
+from backend.services.replay_trace_service import get_replay_trace_service
+
+logger = logging.getLogger(__name__)
+
+replay_bp = Blueprint("replay", __name__)
+
+
+@replay_bp.route("/testcases/<int:testcase_id>/replay-trace", methods=["GET"])
+@log_api_call
+def get_replay_trace(testcase_id):
+    """
+    获取用例当前修订号及有效回放轨迹
+
+    没有轨迹或轨迹已失效时trace为null，执行节点按当前修订号录制新轨迹
+    """
+    try:
+        testcase = TestCase.query.get(testcase_id)
+        if not testcase:
+            return standard_error_response("测试用例不存在", 404)
+
+        trace = get_replay_trace_service().resolve(testcase)
+        return format_success_response(
+            message="获取成功",
+            data={
+                "revision": testcase.revision,
+                "trace": trace.to_dict() if trace else None,
+            },
+        )
+
+    except Exception as e:
+        db.session.rollback()
+        return standard_error_response(f"获取回放轨迹失败: {str(e)}")
+
+
+@replay_bp.route("/testcases/<int:testcase_id>/replay-trace", methods=["POST"])
+@log_api_call
+def record_replay_trace(testcase_id):
+    """执行节点回传成功执行的回放轨迹"""
+    try:
+        testcase = TestCase.query.get(testcase_id)
+        if not testcase:
+            return standard_error_response("测试用例不存在", 404)
+
+        data = request.get_json(silent=True) or {}
+        if not data.get("revision"):
+            return standard_error_response("revision参数不能为空", 400)
+
+        if data["revision"] != testcase.revision:
+            # 修订号不一致：用例在执行期间被修改，轨迹已过时
+            return standard_error_response(
+                f"测试用例步骤已变更，轨迹修订号 {data['revision']} 与当前 {testcase.revision} 不一致",
+                409,
+            )
+
+        trace = get_replay_trace_service().record(
+            testcase,
+            data.get("steps"),
+            revision=data["revision"],
+            execution_id=data.get("execution_id"),
+            replayed=data.get("replayed", 0),
+            fallbacks=data.get("fallbacks", 0),
+        )
+        return format_success_response(message="回放轨迹保存成功", data=trace.to_dict())
+
+    except ValueError as e:
+        db.session.rollback()
+        return standard_error_response(str(e), 400)
+    except Exception as e:
+        db.session.rollback()
+        return standard_error_response(f"保存回放轨迹失败: {str(e)}")
+
+
+@replay_bp.route("/testcases/<int:testcase_id>/replay-trace", methods=["DELETE"])
+@log_api_call
+def invalidate_replay_trace(testcase_id):
+    """手动让回放轨迹失效（例如页面改版后）"""
+    try:
+        testcase = TestCase.query.get(testcase_id)
+        if not testcase:
+            return standard_error_response("测试用例不存在", 404)
+
+        deleted = get_replay_trace_service().invalidate(testcase)
+        return format_success_response(
+            message="回放轨迹已失效" if deleted else "没有回放轨迹"
+        )
+
+    except Exception as e:
+        db.session.rollback()
+        return standard_error_response(f"使回放轨迹失效失败: {str(e)}")
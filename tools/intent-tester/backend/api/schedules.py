@@ -0,0 +1,223 @@
+"""
+定时执行计划API模块
+包含计划管理、触发时间预览和时间槽负载查询
+"""
+
+import logging
+from datetime import datetime, timedelta, timezone
+
+from flask import Blueprint, request
+
+from .base import (
+    format_success_response,
+    standard_error_response,
+    log_api_call,
+)
+from backend.models import db, ExecutionHistory, ExecutionSchedule
+from backend.services.scheduler_service import get_execution_scheduler
+
+logger = logging.getLogger(__name__)
+
+schedules_bp = Blueprint("schedules", __name__)
+
+# 负载查询的最大时间跨度（小时）
+MAX_LOAD_HOURS = 168
+
+
+def _format_time(dt):
+    return dt.strftime("%Y-%m-%dT%H:%M:%S.%fZ") if dt else None
+
+
+def _serialize_run(run):
+    return dict(
+        run,
+        fire_time=_format_time(run["fire_time"]),
+        planned_time=_format_time(run["planned_time"]),
+    )
+
+
+def _parse_time_arg(name):
+    value = request.args.get(name)
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        raise ValueError(f"{name}时间格式无效: {value}")
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+@schedules_bp.route("/schedules", methods=["POST"])
+@log_api_call
+def create_schedule():
+    """创建执行计划"""
+    try:
+        data = request.get_json(silent=True) or {}
+        schedule = get_execution_scheduler().create_schedule(data)
+        return format_success_response(message="执行计划创建成功", data=schedule.to_dict())
+
+    except ValueError as e:
+        db.session.rollback()
+        return standard_error_response(str(e), 400)
+    except Exception as e:
+        db.session.rollback()
+        return standard_error_response(f"创建执行计划失败: {str(e)}")
+
+
+@schedules_bp.route("/schedules", methods=["GET"])
+@log_api_call
+def list_schedules():
+    """获取执行计划列表"""
+    try:
+        query = ExecutionSchedule.query
+        active = request.args.get("active")
+        if active is not None:
+            query = query.filter(ExecutionSchedule.is_active == (active.lower() == "true"))
+
+        schedules = query.order_by(ExecutionSchedule.id).all()
+        items = [schedule.to_dict() for schedule in schedules]
+        return format_success_response(
+            message="获取成功", data={"items": items, "total": len(items)}
+        )
+
+    except Exception as e:
+        return standard_error_response(f"获取执行计划失败: {str(e)}")
+
+
+@schedules_bp.route("/schedules/<int:schedule_id>", methods=["GET"])
+@log_api_call
+def get_schedule(schedule_id):
+    """获取执行计划详情"""
+    schedule = ExecutionSchedule.query.get(schedule_id)
+    if not schedule:
+        return standard_error_response("执行计划不存在", 404)
+    return format_success_response(message="获取成功", data=schedule.to_dict())
+
+
+@schedules_bp.route("/schedules/<int:schedule_id>", methods=["PUT"])
+@log_api_call
+def update_schedule(schedule_id):
+    """更新执行计划"""
+    try:
+        schedule = ExecutionSchedule.query.get(schedule_id)
+        if not schedule:
+            return standard_error_response("执行计划不存在", 404)
+
+        data = request.get_json(silent=True) or {}
+        schedule = get_execution_scheduler().update_schedule(schedule, data)
+        return format_success_response(message="执行计划更新成功", data=schedule.to_dict())
+
+    except ValueError as e:
+        db.session.rollback()
+        return standard_error_response(str(e), 400)
+    except Exception as e:
+        db.session.rollback()
+        return standard_error_response(f"更新执行计划失败: {str(e)}")
+
+
+@schedules_bp.route("/schedules/<int:schedule_id>", methods=["DELETE"])
+@log_api_call
+def delete_schedule(schedule_id):
+    """删除执行计划（已创建的执行记录保留）"""
+    try:
+        schedule = ExecutionSchedule.query.get(schedule_id)
+        if not schedule:
+            return standard_error_response("执行计划不存在", 404)
+
+        ExecutionHistory.query.filter_by(schedule_id=schedule_id).update(
+            {"schedule_id": None}, synchronize_session=False
+        )
+        db.session.delete(schedule)
+        db.session.commit()
+        return format_success_response(message="执行计划删除成功")
+
+    except Exception as e:
+        db.session.rollback()
+        return standard_error_response(f"删除执行计划失败: {str(e)}")
+
+
+@schedules_bp.route("/schedules/<int:schedule_id>/preview", methods=["GET"])
+@log_api_call
+def preview_schedule(schedule_id):
+    """预览接下来的触发时间及每个用例分散后的启动时间"""
+    try:
+        schedule = ExecutionSchedule.query.get(schedule_id)
+        if not schedule:
+            return standard_error_response("执行计划不存在", 404)
+
+        count = min(max(request.args.get("count", 5, type=int), 1), 50)
+        after = _parse_time_arg("after")
+        previews = get_execution_scheduler().preview(schedule, count=count, after=after)
+
+        return format_success_response(
+            message="获取成功",
+            data={
+                "schedule_id": schedule.id,
+                "cron_expression": schedule.cron_expression,
+                "next_runs": [
+                    {
+                        "fire_time": _format_time(item["fire_time"]),
+                        "runs": [_serialize_run(run) for run in item["runs"]],
+                    }
+                    for item in previews
+                ],
+            },
+        )
+
+    except ValueError as e:
+        return standard_error_response(str(e), 400)
+    except Exception as e:
+        return standard_error_response(f"预览执行计划失败: {str(e)}")
+
+
+@schedules_bp.route("/schedules/load", methods=["GET"])
+@log_api_call
+def get_planned_load():
+    """获取区间内每个时间槽的计划执行数"""
+    try:
+        start = _parse_time_arg("start") or datetime.utcnow()
+        hours = request.args.get("hours", 24, type=float)
+        if hours <= 0 or hours > MAX_LOAD_HOURS:
+            return standard_error_response(f"hours必须在0-{MAX_LOAD_HOURS}之间", 400)
+        end = start + timedelta(hours=hours)
+
+        scheduler = get_execution_scheduler()
+        slots = scheduler.slot_load(start, end)
+
+        return format_success_response(
+            message="获取成功",
+            data={
+                "start": _format_time(start),
+                "end": _format_time(end),
+                "slot_seconds": scheduler.slot_seconds,
+                "slot_budget": scheduler.slot_budget,
+                "total_planned": sum(slot["planned"] for slot in slots),
+                "peak": max((slot["planned"] for slot in slots), default=0),
+                "slots": [
+                    dict(slot, slot_start=_format_time(slot["slot_start"]))
+                    for slot in slots
+                ],
+            },
+        )
+
+    except ValueError as e:
+        return standard_error_response(str(e), 400)
+    except Exception as e:
+        return standard_error_response(f"获取计划负载失败: {str(e)}")
+
+
+@schedules_bp.route("/schedules/tick", methods=["POST"])
+@log_api_call
+def trigger_schedule_tick():
+    """手动触发一轮调度，创建已到期的执行"""
+    try:
+        created = get_execution_scheduler().tick()
+        return format_success_response(
+            message="调度完成", data={"created": created, "count": len(created)}
+        )
+
+    except Exception as e:
+        db.session.rollback()
+        return standard_error_response(f"触发调度失败: {str(e)}")
@@ -0,0 +1,188 @@
+"""
+套件运行API模块
+包含按失败风险或预测耗时排序的套件运行、fail-fast取消、排序预览和总耗时报告
+"""
+
+import logging
+
+from flask import Blueprint, request
+
+from .base import (
+    format_success_response,
+    standard_error_response,
+    log_api_call,
+)
+from backend.models import db, SuiteRun
+from backend.services.suite_service import get_suite_runner
+from backend.services.duration_predictor import get_duration_predictor
+
+logger = logging.getLogger(__name__)
+
+suites_bp = Blueprint("suites", __name__)
+
+
+def _parse_test_case_ids():
+    value = request.args.get("test_case_ids")
+    if not value:
+        return None
+    try:
+        return [int(item) for item in value.split(",") if item.strip()]
+    except ValueError:
+        raise ValueError(f"test_case_ids格式无效: {value}")
+
+
+@suites_bp.route("/suites/runs", methods=["POST"])
+@log_api_call
+def create_suite_run():
+    """创建套件运行"""
+    try:
+        data = request.get_json(silent=True) or {}
+        suite_run = get_suite_runner().start_suite_run(data)
+        return format_success_response(message="套件运行已创建", data=suite_run.to_dict())
+
+    except ValueError as e:
+        db.session.rollback()
+        return standard_error_response(str(e), 400)
+    except Exception as e:
+        db.session.rollback()
+        return standard_error_response(f"创建套件运行失败: {str(e)}")
+
+
+@suites_bp.route("/suites/runs", methods=["GET"])
+@log_api_call
+def list_suite_runs():
+    """获取最近的套件运行"""
+    try:
+        limit = min(max(request.args.get("limit", 20, type=int), 1), 100)
+        query = SuiteRun.query
+        if request.args.get("status"):
+            query = query.filter_by(status=request.args["status"])
+
+        suite_runs = query.order_by(SuiteRun.created_at.desc()).limit(limit).all()
+        items = [suite_run.to_dict() for suite_run in suite_runs]
+        return format_success_response(
+            message="获取成功", data={"items": items, "total": len(items)}
+        )
+
+    except Exception as e:
+        return standard_error_response(f"获取套件运行失败: {str(e)}")
+
+
+@suites_bp.route("/suites/runs/<suite_run_id>", methods=["GET"])
+@log_api_call
+def get_suite_run(suite_run_id):
+    """获取套件运行详情及按排队顺序的执行列表"""
+    try:
+        suite_run = SuiteRun.query.filter_by(suite_run_id=suite_run_id).first()
+        if not suite_run:
+            return standard_error_response("套件运行不存在", 404)
+
+        executions = get_suite_runner().get_suite_executions(suite_run_id)
+        # CI分片按shard参数只取分配给自己的执行
+        shard = request.args.get("shard", type=int)
+        if shard is not None:
+            executions = [e for e in executions if e.shard_index == shard]
+
+        data = suite_run.to_dict()
+        data["executions"] = [execution.to_dict() for execution in executions]
+        return format_success_response(message="获取成功", data=data)
+
+    except Exception as e:
+        return standard_error_response(f"获取套件运行失败: {str(e)}")
+
+
+@suites_bp.route("/suites/runs/<suite_run_id>/cancel", methods=["POST"])
+@log_api_call
+def cancel_suite_run(suite_run_id):
+    """取消套件运行中尚未开始的执行"""
+    try:
+        suite_run = get_suite_runner().cancel_suite_run(suite_run_id)
+        return format_success_response(message="套件运行已取消", data=suite_run.to_dict())
+
+    except ValueError as e:
+        return standard_error_response(str(e), 404)
+    except Exception as e:
+        db.session.rollback()
+        return standard_error_response(f"取消套件运行失败: {str(e)}")
+
+
+@suites_bp.route("/suites/ranking", methods=["GET"])
+@log_api_call
+def preview_suite_ranking():
+    """预览套件用例的失败风险排序，不创建执行"""
+    try:
+        runner = get_suite_runner()
+        testcases = runner.resolve_testcases(
+            request.args.get("category"), _parse_test_case_ids()
+        )
+        ranking = runner.rank_testcases(
+            testcases, request.args.get("ordering", "failure_first")
+        )
+        return format_success_response(
+            message="获取成功", data={"items": ranking, "total": len(ranking)}
+        )
+
+    except ValueError as e:
+        return standard_error_response(str(e), 400)
+    except Exception as e:
+        return standard_error_response(f"获取套件排序失败: {str(e)}")
+
+
+@suites_bp.route("/suites/runs/<suite_run_id>/makespan", methods=["GET"])
+@log_api_call
+def get_suite_makespan(suite_run_id):
+    """对比套件运行的预测总耗时和实际总耗时"""
+    try:
+        suite_run = SuiteRun.query.filter_by(suite_run_id=suite_run_id).first()
+        if not suite_run:
+            return standard_error_response("套件运行不存在", 404)
+
+        return format_success_response(
+            message="获取成功", data=get_suite_runner().makespan_report(suite_run)
+        )
+
+    except Exception as e:
+        return standard_error_response(f"获取总耗时报告失败: {str(e)}")
+
+
+@suites_bp.route("/suites/durations", methods=["GET"])
+@log_api_call
+def get_duration_predictions():
+    """获取用例耗时预测及按分片数的LPT分配预览"""
+    try:
+        runner = get_suite_runner()
+        predictor = get_duration_predictor()
+        testcases = runner.resolve_testcases(
+            request.args.get("category"), _parse_test_case_ids()
+        )
+        shards = request.args.get("shards", type=int) or runner.available_slots()
+
+        predictions = predictor.predict(testcases)
+        items = predictor.lpt_order(
+            [
+                {
+                    "test_case_id": testcase.id,
+                    "test_case_name": testcase.name,
+                    "predicted_duration": predictions[testcase.id]["seconds"],
+                    "source": predictions[testcase.id]["source"],
+                    "samples": predictions[testcase.id]["samples"],
+                }
+                for testcase in testcases
+            ]
+        )
+        plan = predictor.simulate(items, shards)
+
+        return format_success_response(
+            message="获取成功",
+            data={
+                "items": items,
+                "shard_count": max(1, shards),
+                "predicted_makespan": plan["makespan"],
+                "shards": plan["shards"],
+            },
+        )
+
+    except ValueError as e:
+        return standard_error_response(str(e), 400)
+    except Exception as e:
+        return standard_error_response(f"获取耗时预测失败: {str(e)}")
@@ -0,0 +1,77 @@
+"""
+租户公平调度API模块
+包含租户份额（权重、并发上限）配置，以及按租户查看排队位置和预估开始时间
+"""
+
+import logging
+
+from flask import Blueprint, request
+
+from .base import (
+    format_success_response,
+    standard_error_response,
+    log_api_call,
+)
+from backend.models import db
+from backend.services.fair_share import get_fair_share_scheduler
+
+logger = logging.getLogger(__name__)
+
+tenants_bp = Blueprint("tenants", __name__)
+
+
+@tenants_bp.route("/tenants/shares", methods=["GET"])
+@log_api_call
+def list_tenant_shares():
+    """获取已配置的租户份额"""
+    try:
+        items = [share.to_dict() for share in get_fair_share_scheduler().list_shares()]
+        return format_success_response(
+            message="获取成功", data={"items": items, "total": len(items)}
+        )
+
+    except Exception as e:
+        return standard_error_response(f"获取租户份额失败: {str(e)}")
+
+
+@tenants_bp.route("/tenants/shares/<tenant>", methods=["PUT"])
+@log_api_call
+def set_tenant_share(tenant):
+    """创建或更新租户份额：weight（权重）、max_concurrency（并发上限，可为空）"""
+    try:
+        data = request.get_json(silent=True) or {}
+        share = get_fair_share_scheduler().set_share(tenant, data)
+        return format_success_response(message="租户份额已更新", data=share.to_dict())
+
+    except ValueError as e:
+        db.session.rollback()
+        return standard_error_response(str(e), 400)
+    except Exception as e:
+        db.session.rollback()
+        return standard_error_response(f"更新租户份额失败: {str(e)}")
+
+
+@tenants_bp.route("/tenants/shares/<tenant>", methods=["DELETE"])
+@log_api_call
+def delete_tenant_share(tenant):
+    """删除租户份额配置，之后按默认权重调度"""
+    try:
+        if not get_fair_share_scheduler().delete_share(tenant):
+            return standard_error_response("租户份额不存在", 404)
+        return format_success_response(message="租户份额已删除")
+
+    except Exception as e:
+        db.session.rollback()
+        return standard_error_response(f"删除租户份额失败: {str(e)}")
+
+
+@tenants_bp.route("/tenants/queue", methods=["GET"])
+@log_api_call
+def get_tenant_queue():
+    """获取各租户的份额占用和排队执行的位置、预估开始时间，可按tenant过滤"""
+    try:
+        status = get_fair_share_scheduler().queue_status(tenant=request.args.get("tenant"))
+        return format_success_response(message="获取成功", data=status)
+
+    except Exception as e:
+        return standard_error_response(f"获取租户队列失败: {str(e)}")
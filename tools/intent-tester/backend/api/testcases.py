@@ -41,9 +41,21 @@ from backend.utils.common_patterns import (
     get_crud_helper,
 )
 
+# 导入数据模型
+from backend.models import SetupFixture
+
 # 导入查询优化器
 from backend.services.query_optimizer import QueryOptimizer
 
+# 导入网络录制服务
+from backend.services.network_recording_service import get_network_recording_service
+
+# 导入资源拦截策略
+from backend.services.resource_policy import dumps_policy
+from backend.services.execution_video_store import validate_capture_mode
+from backend.services.fair_share import resolve_tenant
+from midscene_framework.step_retry import StepRetryPolicy
+
 # 定义有效的动作类型
 VALID_ACTIONS = {
     "goto",
@@ -92,9 +104,27 @@ def validate_step_data(data, is_update=False):
             if not params.get("locate") and not params.get("prompt"):
                 raise ValidationError(f"{action}动作需要locate或prompt参数之一")
 
+    # 验证步骤重试策略
+    try:
+        StepRetryPolicy.from_step(data)
+    except ValueError as e:
+        raise ValidationError(str(e))
+
     return True
 
 
+def validate_retry_policies(steps):
+    """验证用例步骤中的重试策略，返回第一个错误信息"""
+    for i, step in enumerate(steps):
+        if not isinstance(step, dict):
+            continue
+        try:
+            StepRetryPolicy.from_step(step)
+        except ValueError as e:
+            return f"步骤 {i+1} {str(e)}"
+    return None
+
+
 # ==================== 测试用例CRUD操作 ====================
 
 
@@ -192,6 +222,42 @@ def create_testcase():
                 if not step.get("action"):
                     return standard_error_response(f"步骤 {i+1} 缺少action字段", 500)
 
+            retry_error = validate_retry_policies(steps)
+            if retry_error:
+                return standard_error_response(retry_error, 400)
+
+        # 验证前置夹具存在
+        if data.get("setup_fixture_id") and not SetupFixture.query.get(
+            data["setup_fixture_id"]
+        ):
+            return standard_error_response("前置夹具不存在", 400)
+
+        # 验证网络录制/回放配置
+        try:
+            network_config = get_network_recording_service().validate_config(
+                data.get("network_config")
+            )
+        except ValueError as e:
+            return standard_error_response(str(e), 400)
+
+        # 验证资源拦截策略
+        try:
+            resource_policy = dumps_policy(data.get("resource_policy"))
+        except ValueError as e:
+            return standard_error_response(str(e), 400)
+
+        # 验证截图方式
+        try:
+            capture_mode = validate_capture_mode(data.get("capture_mode"))
+        except ValueError as e:
+            return standard_error_response(str(e), 400)
+
+        # 验证所属租户
+        try:
+            tenant = resolve_tenant(data) if data.get("tenant") else None
+        except ValueError as e:
+            return standard_error_response(str(e), 400)
+
         # 处理tags - 转换数组为逗号分隔字符串存储
         tags = data.get("tags", "")
         if isinstance(tags, list):
@@ -206,6 +272,13 @@ def create_testcase():
             category=data.get("category", ""),
             priority=data.get("priority", 2),
             created_by=data.get("created_by", "user"),
+            setup_fixture_id=data.get("setup_fixture_id"),
+            network_config=(
+                json.dumps(network_config, ensure_ascii=False) if network_config else None
+            ),
+            resource_policy=resource_policy,
+            capture_mode=capture_mode,
+            tenant=tenant,
         )
 
         db.session.add(testcase)
@@ -266,6 +339,9 @@ def update_testcase(testcase_id):
         if "description" in data:
             testcase.description = data["description"]
         if "steps" in data:
+            retry_error = validate_retry_policies(data["steps"] or [])
+            if retry_error:
+                return standard_error_response(retry_error, 400)
             testcase.steps = json.dumps(data["steps"])
         if "tags" in data:
             tags = data["tags"]
@@ -276,6 +352,34 @@ def update_testcase(testcase_id):
             testcase.priority = data["priority"]
         if "is_active" in data:
             testcase.is_active = data["is_active"]
+        if "setup_fixture_id" in data:
+            if data["setup_fixture_id"] and not SetupFixture.query.get(
+                data["setup_fixture_id"]
+            ):
+                return standard_error_response("前置夹具不存在", 400)
+            testcase.setup_fixture_id = data["setup_fixture_id"]
+        if "network_config" in data:
+            try:
+                get_network_recording_service().apply_config(
+                    testcase, data["network_config"]
+                )
+            except ValueError as e:
+                return standard_error_response(str(e), 400)
+        if "resource_policy" in data:
+            try:
+                testcase.resource_policy = dumps_policy(data["resource_policy"])
+            except ValueError as e:
+                return standard_error_response(str(e), 400)
+        if "capture_mode" in data:
+            try:
+                testcase.capture_mode = validate_capture_mode(data["capture_mode"])
+            except ValueError as e:
+                return standard_error_response(str(e), 400)
+        if "tenant" in data:
+            try:
+                testcase.tenant = resolve_tenant(data) if data["tenant"] else None
+            except ValueError as e:
+                return standard_error_response(str(e), 400)
 
         testcase.updated_at = datetime.now()
 
@@ -360,6 +464,8 @@ def add_testcase_step(testcase_id, testcase, data):
         "retry_count": data.get("retry_count", 0),
         "output_variable": data.get("output_variable", ""),
     }
+    if data.get("retry_policy") is not None:
+        new_step["retry_policy"] = data["retry_policy"]
 
     # 支持指定位置插入
     position = data.get("position", len(steps))
@@ -410,6 +516,11 @@ def update_testcase_step(testcase_id, step_index, testcase, data):
         current_step["wait_time"] = data["wait_time"]
     if "retry_count" in data:
         current_step["retry_count"] = data["retry_count"]
+    if "retry_policy" in data:
+        if data["retry_policy"] is None:
+            current_step.pop("retry_policy", None)
+        else:
+            current_step["retry_policy"] = data["retry_policy"]
     if "output_variable" in data:
         current_step["output_variable"] = data["output_variable"]
     if "required" in data:
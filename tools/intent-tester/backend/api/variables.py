@@ -0,0 +1,72 @@
+"""
+变量提示API模块
+为步骤编辑器的${...}自动补全提供可用变量：执行中的实际变量，以及按用例步骤数据流预测的变量
+"""
+
+import logging
+
+from flask import Blueprint, request
+
+from .base import (
+    format_success_response,
+    standard_error_response,
+    log_api_call,
+)
+from backend.models import TestCase, ExecutionHistory
+from backend.services.variable_suggestion_index import get_variable_suggestion_service
+
+logger = logging.getLogger(__name__)
+
+variables_bp = Blueprint("variables", __name__)
+
+
+def _suggestion_args():
+    """解析step_index、include_properties、limit查询参数"""
+    step_index = request.args.get("step_index", type=int)
+    include_properties = request.args.get("include_properties", "true").lower() != "false"
+    limit = request.args.get("limit", type=int)
+    if limit is not None and limit < 1:
+        raise ValueError("limit必须是大于0的整数")
+    return step_index, include_properties, limit
+
+
+@variables_bp.route("/v1/executions/<execution_id>/variable-suggestions", methods=["GET"])
+@log_api_call
+def get_variable_suggestions(execution_id):
+    """获取执行中指定步骤之前可用的变量，已产生的变量返回实际值，其余按步骤数据流预测"""
+    try:
+        execution = ExecutionHistory.query.filter_by(execution_id=execution_id).first()
+        if execution is None:
+            return standard_error_response("执行记录不存在", 404)
+
+        step_index, include_properties, limit = _suggestion_args()
+        data = get_variable_suggestion_service().execution_suggestions(
+            execution, step_index, include_properties, limit
+        )
+        return format_success_response(message="获取成功", data=data)
+
+    except ValueError as e:
+        return standard_error_response(str(e), 400)
+    except Exception as e:
+        return standard_error_response(f"获取变量提示失败: {str(e)}")
+
+
+@variables_bp.route("/v1/testcases/<int:testcase_id>/predicted-variables", methods=["GET"])
+@log_api_call
+def get_predicted_variables(testcase_id):
+    """按用例步骤数据流预测指定步骤之前可用的变量，并列出引用了未定义变量的步骤"""
+    try:
+        testcase = TestCase.query.get(testcase_id)
+        if testcase is None or not testcase.is_active:
+            return standard_error_response("测试用例不存在", 404)
+
+        step_index, include_properties, limit = _suggestion_args()
+        data = get_variable_suggestion_service().predicted_variables(
+            testcase, step_index, include_properties, limit
+        )
+        return format_success_response(message="获取成功", data=data)
+
+    except ValueError as e:
+        return standard_error_response(str(e), 400)
+    except Exception as e:
+        return standard_error_response(f"预测变量失败: {str(e)}")
@@ -0,0 +1,147 @@
+"""
+视觉断言API模块
+包含视觉基线管理，以及执行节点提交截图做像素级基线比对
+"""
+
+import base64
+import binascii
+import logging
+
+from flask import Blueprint, Response, request
+
+from .base import (
+    format_success_response,
+    standard_error_response,
+    log_api_call,
+)
+from backend.models import db, TestCase, VisualBaseline
+from backend.services.visual_diff import get_visual_diff_service
+
+logger = logging.getLogger(__name__)
+
+visual_bp = Blueprint("visual", __name__)
+
+
+def _decode_image(value):
+    """解码base64图片，兼容data URL格式"""
+    if not value or not isinstance(value, str):
+        raise ValueError("image参数不能为空，需要base64编码的图片")
+    if value.startswith("data:"):
+        value = value.split(",", 1)[-1]
+    try:
+        return base64.b64decode(value, validate=True)
+    except (binascii.Error, ValueError):
+        raise ValueError("image参数不是有效的base64编码")
+
+
+def _validate_test_case_id(test_case_id):
+    if test_case_id is not None and not TestCase.query.get(test_case_id):
+        raise ValueError(f"测试用例不存在: {test_case_id}")
+    return test_case_id
+
+
+@visual_bp.route("/visual/baselines", methods=["POST"])
+@log_api_call
+def save_visual_baseline():
+    """创建或替换视觉基线"""
+    try:
+        data = request.get_json(silent=True) or {}
+        baseline = get_visual_diff_service().save_baseline(
+            data.get("name"),
+            _decode_image(data.get("image")),
+            test_case_id=_validate_test_case_id(data.get("test_case_id")),
+            region=data.get("region"),
+            ignore_regions=data.get("ignore_regions"),
+            created_by=data.get("created_by", "user"),
+        )
+        return format_success_response(message="基线保存成功", data=baseline.to_dict())
+
+    except ValueError as e:
+        db.session.rollback()
+        return standard_error_response(str(e), 400)
+    except Exception as e:
+        db.session.rollback()
+        return standard_error_response(f"保存基线失败: {str(e)}")
+
+
+@visual_bp.route("/visual/baselines", methods=["GET"])
+@log_api_call
+def list_visual_baselines():
+    """获取视觉基线列表"""
+    try:
+        query = VisualBaseline.query
+        test_case_id = request.args.get("test_case_id", type=int)
+        if test_case_id is not None:
+            query = query.filter_by(test_case_id=test_case_id)
+
+        baselines = query.order_by(VisualBaseline.name).all()
+        items = [baseline.to_dict() for baseline in baselines]
+        return format_success_response(
+            message="获取成功", data={"items": items, "total": len(items)}
+        )
+
+    except Exception as e:
+        return standard_error_response(f"获取基线列表失败: {str(e)}")
+
+
+@visual_bp.route("/visual/baselines/<int:baseline_id>/image", methods=["GET"])
+@log_api_call
+def get_visual_baseline_image(baseline_id):
+    """获取基线图片"""
+    baseline = VisualBaseline.query.get(baseline_id)
+    if not baseline:
+        return standard_error_response("基线不存在", 404)
+    return Response(baseline.image, mimetype="image/png")
+
+
+@visual_bp.route("/visual/baselines/<int:baseline_id>", methods=["DELETE"])
+@log_api_call
+def delete_visual_baseline(baseline_id):
+    """删除视觉基线"""
+    try:
+        baseline = VisualBaseline.query.get(baseline_id)
+        if not baseline:
+            return standard_error_response("基线不存在", 404)
+
+        db.session.delete(baseline)
+        db.session.commit()
+        return format_success_response(message="基线删除成功")
+
+    except Exception as e:
+        db.session.rollback()
+        return standard_error_response(f"删除基线失败: {str(e)}")
+
+
+@visual_bp.route("/visual/assert", methods=["POST"])
+@log_api_call
+def assert_visual():
+    """
+    视觉断言：与命名基线做像素比对
+
+    断言未通过不是接口错误，结果中passed为false并附带base64编码的差异图
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        if not data.get("name"):
+            return standard_error_response("name参数不能为空", 400)
+
+        result = get_visual_diff_service().assert_visual(
+            data["name"],
+            _decode_image(data.get("image")),
+            test_case_id=_validate_test_case_id(data.get("test_case_id")),
+            options=data,
+        )
+        if result.get("diff_image"):
+            result["diff_image"] = base64.b64encode(result["diff_image"]).decode("ascii")
+
+        return format_success_response(
+            message="视觉断言通过" if result["passed"] else "视觉断言未通过",
+            data=result,
+        )
+
+    except ValueError as e:
+        db.session.rollback()
+        return standard_error_response(str(e), 400)
+    except Exception as e:
+        db.session.rollback()
+        return standard_error_response(f"视觉断言失败: {str(e)}")
@@ -36,6 +36,9 @@ def create_app():
     
     with app.app_context():
         db.create_all()
+        # create_all不会修改已有的表，补齐模型新增的列和索引
+        from .utils.db_migration import upgrade_schema
+        upgrade_schema(db.engine, db.metadata)
         app.logger.info("Database tables created/verified")
 
     # 初始化SocketIO
@@ -63,6 +66,16 @@ def create_app():
     # 注册蓝图到根路径 (由 Nginx 处理 /intent-tester 前缀)
     app.register_blueprint(views_bp, url_prefix='/')
 
+    # 启动执行节点分发线程（多节点部署时开启）
+    if os.getenv('EXECUTOR_DISPATCH_ENABLED', 'false').lower() == 'true':
+        from .services.executor_registry import start_dispatch_loop
+        start_dispatch_loop(app)
+
+    # 启动定时执行调度线程
+    if os.getenv('SCHEDULER_ENABLED', 'false').lower() == 'true':
+        from .services.scheduler_service import start_scheduler_loop
+        start_scheduler_loop(app)
+
     # 根路径重定向到标准路径
     from flask import redirect
     @app.route('/redirect-to-testcases')
@@ -1,4 +1,4 @@
-from .models import db, TestCase, ExecutionHistory, StepExecution, ExecutionVariable, RequirementsSession, RequirementsMessage, VariableReference, RequirementsAIConfig
+from .models import db, TestCase, ExecutionHistory, StepExecution, ExecutionVariable, RequirementsSession, RequirementsMessage, VariableReference, RequirementsAIConfig, ExecutorNode, ExecutionSchedule, SuiteRun, SetupFixture, VisualBaseline, ReplayTrace, NetworkRecording, DatasetRun, TenantShare
 
 __all__ = [
     'db',
@@ -9,5 +9,14 @@ __all__ = [
     'RequirementsSession',
     'RequirementsMessage',
     'VariableReference',
-    'RequirementsAIConfig'
+    'RequirementsAIConfig',
+    'ExecutorNode',
+    'ExecutionSchedule',
+    'SuiteRun',
+    'SetupFixture',
+    'VisualBaseline',
+    'ReplayTrace',
+    'NetworkRecording',
+    'DatasetRun',
+    'TenantShare'
 ]
@@ -3,12 +3,23 @@
 """
 
 from flask_sqlalchemy import SQLAlchemy
-from datetime import datetime
+from datetime import datetime, timedelta
+import hashlib
 import json
 
 db = SQLAlchemy()
 
 
+def steps_revision(steps):
+    """步骤JSON的内容修订号：解析后按键排序序列化再取哈希，步骤不变时保持稳定"""
+    try:
+        parsed = json.loads(steps) if steps else []
+    except (TypeError, ValueError):
+        parsed = steps or ""
+    canonical = json.dumps(parsed, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(canonical.encode("utf-8")).hexdigest()[:16]
+
+
 class TestCase(db.Model):
     """测试用例模型"""
 
@@ -27,6 +38,12 @@ class TestCase(db.Model):
         db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow
     )
     is_active = db.Column(db.Boolean, default=True)
+    setup_fixture_id = db.Column(db.Integer, db.ForeignKey("setup_fixtures.id"))
+    network_config = db.Column(db.Text)  # JSON string - 网络录制/回放模式及直通规则
+    resource_policy = db.Column(db.Text)  # JSON string - 资源拦截策略
+    capture_mode = db.Column(db.String(20), default="screenshot")  # screenshot, video
+    dataset = db.Column(db.Text)  # JSON string - 绑定的数据集（内联数据、上传的CSV或查询）
+    tenant = db.Column(db.String(100))  # 所属团队/项目，执行未指定租户时按此公平调度
 
     # 索引优化
     __table_args__ = (
@@ -58,6 +75,16 @@ class TestCase(db.Model):
                 else None
             ),
             "is_active": self.is_active,
+            "setup_fixture_id": self.setup_fixture_id,
+            "network_config": (
+                json.loads(self.network_config) if self.network_config else None
+            ),
+            "resource_policy": (
+                json.loads(self.resource_policy) if self.resource_policy else None
+            ),
+            "capture_mode": self.capture_mode or "screenshot",
+            "dataset_type": json.loads(self.dataset)["type"] if self.dataset else None,
+            "tenant": self.tenant,
         }
 
         # 可选的统计信息计算，避免N+1查询问题
@@ -82,8 +109,14 @@ class TestCase(db.Model):
         else:
             data.update({"execution_count": 0, "success_rate": 0})
 
+        data["revision"] = self.revision
         return data
 
+    @property
+    def revision(self):
+        """测试用例步骤的内容修订号，步骤不变时保持稳定"""
+        return steps_revision(self.steps)
+
     @classmethod
     def get_with_stats(cls, limit=None, offset=None):
         """批量获取测试用例及其统计信息，优化查询性能"""
@@ -130,6 +163,7 @@ class TestCase(db.Model):
             category=data.get("category"),
             priority=data.get("priority", 3),
             created_by=data.get("created_by", "system"),
+            setup_fixture_id=data.get("setup_fixture_id"),
         )
 
 
@@ -143,7 +177,7 @@ class ExecutionHistory(db.Model):
     test_case_id = db.Column(db.Integer, db.ForeignKey("test_cases.id"), nullable=False)
     status = db.Column(
         db.String(50), nullable=False
-    )  # running, success, failed, stopped
+    )  # pending, running, success, failed, stopped, coalesced, cancelled
     mode = db.Column(db.String(20), default="headless")  # browser, headless
     browser = db.Column(db.String(50), default="chrome")
     start_time = db.Column(db.DateTime, nullable=False)
@@ -158,6 +192,22 @@ class ExecutionHistory(db.Model):
     error_message = db.Column(db.Text)
     error_stack = db.Column(db.Text)
     executed_by = db.Column(db.String(100))
+    executor_node_id = db.Column(db.String(100))  # 分配到的执行节点
+    dispatched_at = db.Column(db.DateTime)  # 分发到执行节点的时间
+    requeue_count = db.Column(db.Integer, default=0)  # 节点失联后重新排队的次数
+    schedule_id = db.Column(db.Integer, db.ForeignKey("execution_schedules.id"))
+    scheduled_for = db.Column(db.DateTime)  # 调度计划的cron触发时间（不含抖动）
+    request_fingerprint = db.Column(db.String(64))  # 用例修订号+执行参数的指纹，用于合并重复请求
+    coalesced_into = db.Column(db.String(50))  # 被合并时指向实际执行的execution_id
+    suite_run_id = db.Column(db.String(50))  # 所属套件运行
+    queue_position = db.Column(db.Integer)  # 在套件运行中的排队顺序
+    shard_index = db.Column(db.Integer)  # 套件运行中分配到的分片/槽位
+    predicted_duration = db.Column(db.Float)  # 预测耗时(秒)
+    deadline_at = db.Column(db.DateTime)  # 执行截止时间，超过后停止剩余工作
+    dataset_run_id = db.Column(db.String(50))  # 所属数据驱动运行
+    dataset_row_index = db.Column(db.Integer)  # 数据集中的行号（从0开始）
+    dataset_row = db.Column(db.Text)  # JSON string - 该行注入的变量
+    tenant = db.Column(db.String(100), default="default")  # 租户（团队/项目），按租户份额公平调度
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
     # 索引优化
@@ -167,11 +217,25 @@ class ExecutionHistory(db.Model):
         db.Index("idx_execution_status", "status"),
         db.Index("idx_execution_executed_by", "executed_by"),
         db.Index("idx_execution_created_at", "created_at"),
+        db.Index("idx_execution_node_status", "executor_node_id", "status"),
+        db.Index("idx_execution_schedule_slot", "schedule_id", "scheduled_for"),
+        db.Index("idx_execution_fingerprint_status", "request_fingerprint", "status"),
+        db.Index("idx_execution_coalesced_into", "coalesced_into"),
+        db.Index("idx_execution_suite_run", "suite_run_id", "queue_position"),
+        db.Index("idx_execution_dataset_run", "dataset_run_id", "dataset_row_index"),
+        db.Index("idx_execution_tenant_status", "tenant", "status"),
     )
 
     # 关系
     test_case = db.relationship("TestCase", backref=db.backref("executions", lazy=True))
 
+    def remaining_budget_ms(self, now=None):
+        """距截止时间的剩余预算（毫秒），未设置截止时间时返回None"""
+        if not self.deadline_at:
+            return None
+        remaining = (self.deadline_at - (now or datetime.utcnow())).total_seconds()
+        return max(0, int(remaining * 1000))
+
     def to_dict(self):
         """转换为字典"""
         return {
@@ -203,6 +267,32 @@ class ExecutionHistory(db.Model):
             "logs_path": self.logs_path,
             "error_message": self.error_message,
             "executed_by": self.executed_by,
+            "executor_node_id": self.executor_node_id,
+            "dispatched_at": (
+                self.dispatched_at.strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+                if self.dispatched_at
+                else None
+            ),
+            "requeue_count": self.requeue_count or 0,
+            "schedule_id": self.schedule_id,
+            "scheduled_for": (
+                self.scheduled_for.strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+                if self.scheduled_for
+                else None
+            ),
+            "coalesced_into": self.coalesced_into,
+            "suite_run_id": self.suite_run_id,
+            "queue_position": self.queue_position,
+            "shard_index": self.shard_index,
+            "predicted_duration": self.predicted_duration,
+            "dataset_run_id": self.dataset_run_id,
+            "dataset_row_index": self.dataset_row_index,
+            "tenant": self.tenant,
+            "deadline_at": (
+                self.deadline_at.strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+                if self.deadline_at
+                else None
+            ),
             "created_at": (
                 self.created_at.strftime("%Y-%m-%dT%H:%M:%S.%fZ")
                 if self.created_at
@@ -230,6 +320,8 @@ class StepExecution(db.Model):
     ai_confidence = db.Column(db.Float)
     ai_decision = db.Column(db.Text)  # JSON string
     error_message = db.Column(db.Text)
+    attempts = db.Column(db.Integer, default=1)  # 按步骤重试策略执行的尝试次数
+    attempt_history = db.Column(db.Text)  # JSON string，每次失败尝试的错误类别和信息
 
     # 索引优化
     __table_args__ = (
@@ -266,6 +358,10 @@ class StepExecution(db.Model):
             "ai_confidence": self.ai_confidence,
             "ai_decision": json.loads(self.ai_decision) if self.ai_decision else {},
             "error_message": self.error_message,
+            "attempts": self.attempts or 1,
+            "attempt_history": (
+                json.loads(self.attempt_history) if self.attempt_history else []
+            ),
         }
 
         # 如果ai_decision中包含action信息，则将其暴露为顶级字段
@@ -675,3 +771,534 @@ class RequirementsAIConfig(db.Model):
     def get_all_active_configs(cls):
         """获取所有启用的配置"""
         return cls.query.filter_by(is_active=True).order_by(cls.created_at.desc()).all()
+
+
+class ExecutorNode(db.Model):
+    """执行节点模型 - 记录已注册的浏览器执行节点及其心跳容量"""
+
+    __tablename__ = "executor_nodes"
+
+    id = db.Column(db.Integer, primary_key=True)
+    node_id = db.Column(db.String(100), unique=True, nullable=False)
+    server_url = db.Column(db.String(500), nullable=False)  # MidScene服务器地址
+    status = db.Column(
+        db.String(20), default="active"
+    )  # active, draining, drained, offline
+    total_slots = db.Column(db.Integer, default=1)  # 浏览器槽位总数
+    free_slots = db.Column(db.Integer, default=1)  # 空闲浏览器槽位
+    cpu_percent = db.Column(db.Float, default=0.0)
+    memory_percent = db.Column(db.Float, default=0.0)
+    running_executions = db.Column(db.Text)  # JSON list - 节点上报的运行中执行
+    node_metadata = db.Column(db.Text)  # JSON string - 版本、主机名等附加信息
+    registered_at = db.Column(db.DateTime, default=datetime.utcnow)
+    last_heartbeat_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    # 索引优化
+    __table_args__ = (
+        db.Index("idx_executor_node_status", "status"),
+        db.Index("idx_executor_node_heartbeat", "last_heartbeat_at"),
+    )
+
+    def to_dict(self):
+        """转换为字典"""
+        return {
+            "id": self.id,
+            "node_id": self.node_id,
+            "server_url": self.server_url,
+            "status": self.status,
+            "total_slots": self.total_slots,
+            "free_slots": self.free_slots,
+            "cpu_percent": self.cpu_percent,
+            "memory_percent": self.memory_percent,
+            "running_executions": (
+                json.loads(self.running_executions) if self.running_executions else []
+            ),
+            "metadata": json.loads(self.node_metadata) if self.node_metadata else {},
+            "registered_at": (
+                self.registered_at.strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+                if self.registered_at
+                else None
+            ),
+            "last_heartbeat_at": (
+                self.last_heartbeat_at.strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+                if self.last_heartbeat_at
+                else None
+            ),
+        }
+
+
+class ExecutionSchedule(db.Model):
+    """执行计划模型 - 按cron表达式定时执行单个测试用例或整个分类（套件）"""
+
+    __tablename__ = "execution_schedules"
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(255), nullable=False)
+    cron_expression = db.Column(db.String(100), nullable=False)  # 5段cron，UTC时间
+    test_case_id = db.Column(db.Integer, db.ForeignKey("test_cases.id"))
+    category = db.Column(db.String(100))  # 套件：按分类选取全部启用的测试用例
+    jitter_seconds = db.Column(db.Integer, default=600)  # 抖动窗口，用例在窗口内错开启动
+    mode = db.Column(db.String(20), default="headless")
+    is_active = db.Column(db.Boolean, default=True)
+    last_triggered_at = db.Column(db.DateTime)
+    created_by = db.Column(db.String(100))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(
+        db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow
+    )
+
+    # 索引优化
+    __table_args__ = (db.Index("idx_schedule_active", "is_active"),)
+
+    # 关系
+    test_case = db.relationship("TestCase", backref=db.backref("schedules", lazy=True))
+
+    def to_dict(self):
+        """转换为字典"""
+        return {
+            "id": self.id,
+            "name": self.name,
+            "cron_expression": self.cron_expression,
+            "test_case_id": self.test_case_id,
+            "test_case_name": self.test_case.name if self.test_case else None,
+            "category": self.category,
+            "jitter_seconds": self.jitter_seconds,
+            "mode": self.mode,
+            "is_active": self.is_active,
+            "last_triggered_at": (
+                self.last_triggered_at.strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+                if self.last_triggered_at
+                else None
+            ),
+            "created_by": self.created_by,
+            "created_at": (
+                self.created_at.strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+                if self.created_at
+                else None
+            ),
+            "updated_at": (
+                self.updated_at.strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+                if self.updated_at
+                else None
+            ),
+        }
+
+
+class SuiteRun(db.Model):
+    """套件运行模型 - 一次按顺序排队执行的一组测试用例"""
+
+    __tablename__ = "suite_runs"
+
+    id = db.Column(db.Integer, primary_key=True)
+    suite_run_id = db.Column(db.String(50), unique=True, nullable=False)
+    name = db.Column(db.String(255))
+    category = db.Column(db.String(100))  # 按分类选取用例时的分类
+    ordering = db.Column(
+        db.String(20), default="failure_first"
+    )  # failure_first, duration_lpt, fifo
+    fail_fast_threshold = db.Column(db.Integer)  # 失败数达到阈值后取消剩余队列
+    status = db.Column(
+        db.String(20), default="running"
+    )  # running, completed, cancelled
+    total_count = db.Column(db.Integer, default=0)
+    passed_count = db.Column(db.Integer, default=0)
+    failed_count = db.Column(db.Integer, default=0)
+    cancelled_count = db.Column(db.Integer, default=0)
+    ordering_scores = db.Column(db.Text)  # JSON list - 排序时每个用例的风险评分
+    shard_count = db.Column(db.Integer, default=1)  # 并行分片/槽位数
+    shard_plan = db.Column(db.Text)  # JSON list - 每个分片的用例和预测负载
+    predicted_makespan = db.Column(db.Float)  # 预测总耗时(秒)
+    actual_makespan = db.Column(db.Float)  # 实际总耗时(秒)
+    resource_policy = db.Column(db.Text)  # JSON string - 套件内所有执行共用的资源拦截策略
+    executed_by = db.Column(db.String(100))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    first_failure_at = db.Column(db.DateTime)
+    completed_at = db.Column(db.DateTime)
+
+    # 索引优化
+    __table_args__ = (
+        db.Index("idx_suite_run_status", "status"),
+        db.Index("idx_suite_run_created_at", "created_at"),
+    )
+
+    def to_dict(self):
+        """转换为字典"""
+        return {
+            "id": self.id,
+            "suite_run_id": self.suite_run_id,
+            "name": self.name,
+            "category": self.category,
+            "ordering": self.ordering,
+            "fail_fast_threshold": self.fail_fast_threshold,
+            "status": self.status,
+            "total_count": self.total_count,
+            "passed_count": self.passed_count,
+            "failed_count": self.failed_count,
+            "cancelled_count": self.cancelled_count,
+            "ordering_scores": (
+                json.loads(self.ordering_scores) if self.ordering_scores else []
+            ),
+            "shard_count": self.shard_count,
+            "shard_plan": json.loads(self.shard_plan) if self.shard_plan else [],
+            "predicted_makespan": self.predicted_makespan,
+            "actual_makespan": self.actual_makespan,
+            "resource_policy": (
+                json.loads(self.resource_policy) if self.resource_policy else None
+            ),
+            "executed_by": self.executed_by,
+            "created_at": (
+                self.created_at.strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+                if self.created_at
+                else None
+            ),
+            "first_failure_at": (
+                self.first_failure_at.strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+                if self.first_failure_at
+                else None
+            ),
+            "time_to_first_failure": (
+                (self.first_failure_at - self.created_at).total_seconds()
+                if self.first_failure_at and self.created_at
+                else None
+            ),
+            "completed_at": (
+                self.completed_at.strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+                if self.completed_at
+                else None
+            ),
+        }
+
+
+class SetupFixture(db.Model):
+    """前置夹具模型 - 可复用的登录/导航步骤及其浏览器存储状态快照"""
+
+    __tablename__ = "setup_fixtures"
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(255), unique=True, nullable=False)
+    description = db.Column(db.Text)
+    steps = db.Column(db.Text, nullable=False)  # JSON string
+    ttl_seconds = db.Column(db.Integer, default=3600)  # 快照有效期
+    snapshot_state = db.Column(db.Text)  # JSON string - Playwright storageState（cookies、localStorage）
+    snapshot_url = db.Column(db.Text)  # 夹具执行结束时的页面地址
+    snapshot_revision = db.Column(db.String(32))  # 生成快照时的步骤修订号
+    captured_at = db.Column(db.DateTime)
+    hit_count = db.Column(db.Integer, default=0)  # 快照被复用的次数
+    created_by = db.Column(db.String(100))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(
+        db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow
+    )
+
+    # 关系
+    test_cases = db.relationship(
+        "TestCase", backref=db.backref("setup_fixture", lazy=True), lazy=True
+    )
+
+    @property
+    def revision(self):
+        """夹具步骤的内容修订号，步骤变化时快照失效"""
+        return steps_revision(self.steps)
+
+    def snapshot_expires_at(self):
+        """快照过期时间"""
+        if not self.captured_at:
+            return None
+        return self.captured_at + timedelta(seconds=self.ttl_seconds or 0)
+
+    def has_valid_snapshot(self, now=None):
+        """快照存在、未过期且与当前步骤修订号一致"""
+        if not self.snapshot_state or not self.captured_at:
+            return False
+        if self.snapshot_revision != self.revision:
+            return False
+        return (now or datetime.utcnow()) < self.snapshot_expires_at()
+
+    def to_dict(self):
+        """转换为字典（不包含快照内容，避免泄露cookie）"""
+        expires_at = self.snapshot_expires_at()
+        return {
+            "id": self.id,
+            "name": self.name,
+            "description": self.description,
+            "steps": json.loads(self.steps) if self.steps else [],
+            "ttl_seconds": self.ttl_seconds,
+            "revision": self.revision,
+            "snapshot_valid": self.has_valid_snapshot(),
+            "snapshot_url": self.snapshot_url,
+            "snapshot_revision": self.snapshot_revision,
+            "captured_at": (
+                self.captured_at.strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+                if self.captured_at
+                else None
+            ),
+            "expires_at": (
+                expires_at.strftime("%Y-%m-%dT%H:%M:%S.%fZ") if expires_at else None
+            ),
+            "hit_count": self.hit_count or 0,
+            "created_by": self.created_by,
+            "created_at": (
+                self.created_at.strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+                if self.created_at
+                else None
+            ),
+            "updated_at": (
+                self.updated_at.strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+                if self.updated_at
+                else None
+            ),
+        }
+
+
+class VisualBaseline(db.Model):
+    """视觉基线模型 - 视觉断言步骤比对用的基线截图"""
+
+    __tablename__ = "visual_baselines"
+
+    id = db.Column(db.Integer, primary_key=True)
+    test_case_id = db.Column(db.Integer, db.ForeignKey("test_cases.id"))  # 为空表示跨用例共享
+    name = db.Column(db.String(255), nullable=False)
+    image = db.Column(db.LargeBinary, nullable=False)  # PNG字节
+    width = db.Column(db.Integer, nullable=False)
+    height = db.Column(db.Integer, nullable=False)
+    region = db.Column(db.Text)  # JSON string - 截取基线时的页面区域
+    ignore_regions = db.Column(db.Text)  # JSON string - 默认忽略区域
+    last_compared_at = db.Column(db.DateTime)
+    last_mismatch_ratio = db.Column(db.Float)
+    created_by = db.Column(db.String(100))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(
+        db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow
+    )
+
+    __table_args__ = (
+        db.UniqueConstraint("test_case_id", "name", name="uq_visual_baseline_name"),
+    )
+
+    def to_dict(self):
+        """转换为字典（不包含图片内容）"""
+        return {
+            "id": self.id,
+            "test_case_id": self.test_case_id,
+            "name": self.name,
+            "width": self.width,
+            "height": self.height,
+            "region": json.loads(self.region) if self.region else None,
+            "ignore_regions": (
+                json.loads(self.ignore_regions) if self.ignore_regions else []
+            ),
+            "last_compared_at": (
+                self.last_compared_at.strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+                if self.last_compared_at
+                else None
+            ),
+            "last_mismatch_ratio": self.last_mismatch_ratio,
+            "created_by": self.created_by,
+            "created_at": (
+                self.created_at.strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+                if self.created_at
+                else None
+            ),
+            "updated_at": (
+                self.updated_at.strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+                if self.updated_at
+                else None
+            ),
+        }
+
+
+class ReplayTrace(db.Model):
+    """回放轨迹模型 - 成功执行中AI步骤解析出的具体元素和操作，随用例修订号失效"""
+
+    __tablename__ = "replay_traces"
+
+    id = db.Column(db.Integer, primary_key=True)
+    test_case_id = db.Column(
+        db.Integer, db.ForeignKey("test_cases.id"), unique=True, nullable=False
+    )
+    revision = db.Column(db.String(32), nullable=False)  # 录制时的用例步骤修订号
+    steps = db.Column(db.Text, nullable=False)  # JSON string - 按步骤序号记录的具体操作
+    source_execution_id = db.Column(db.String(50))  # 录制轨迹的执行
+    replay_count = db.Column(db.Integer, default=0)  # 直接回放成功的步骤次数
+    fallback_count = db.Column(db.Integer, default=0)  # 回放校验失败回退到AI的步骤次数
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(
+        db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow
+    )
+
+    # 关系
+    test_case = db.relationship(
+        "TestCase", backref=db.backref("replay_trace", uselist=False, lazy=True)
+    )
+
+    def is_valid(self):
+        """轨迹修订号与用例当前步骤一致"""
+        return bool(self.test_case) and self.revision == self.test_case.revision
+
+    def to_dict(self):
+        """转换为字典"""
+        return {
+            "id": self.id,
+            "test_case_id": self.test_case_id,
+            "revision": self.revision,
+            "valid": self.is_valid(),
+            "steps": json.loads(self.steps) if self.steps else {},
+            "source_execution_id": self.source_execution_id,
+            "replay_count": self.replay_count or 0,
+            "fallback_count": self.fallback_count or 0,
+            "created_at": (
+                self.created_at.strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+                if self.created_at
+                else None
+            ),
+            "updated_at": (
+                self.updated_at.strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+                if self.updated_at
+                else None
+            ),
+        }
+
+
+class NetworkRecording(db.Model):
+    """网络录制模型 - 成功执行时录制的目标应用流量（Playwright HAR压缩包），回放模式下直接响应匹配的请求"""
+
+    __tablename__ = "network_recordings"
+
+    id = db.Column(db.Integer, primary_key=True)
+    test_case_id = db.Column(
+        db.Integer, db.ForeignKey("test_cases.id"), unique=True, nullable=False
+    )
+    archive = db.Column(db.LargeBinary, nullable=False)  # HAR zip压缩包字节
+    archive_size = db.Column(db.Integer, nullable=False)
+    checksum = db.Column(db.String(40), nullable=False)  # 压缩包sha1，执行节点据此复用本地缓存
+    entry_count = db.Column(db.Integer, default=0)  # 录制的请求数
+    hosts = db.Column(db.Text)  # JSON string - 录制到的请求域名
+    source_execution_id = db.Column(db.String(50))
+    replay_count = db.Column(db.Integer, default=0)  # 被回放执行下载的次数
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    # 关系
+    test_case = db.relationship(
+        "TestCase", backref=db.backref("network_recording", uselist=False, lazy=True)
+    )
+
+    def to_dict(self):
+        """转换为字典（不包含压缩包内容）"""
+        return {
+            "id": self.id,
+            "test_case_id": self.test_case_id,
+            "archive_size": self.archive_size,
+            "entry_count": self.entry_count or 0,
+            "hosts": json.loads(self.hosts) if self.hosts else [],
+            "source_execution_id": self.source_execution_id,
+            "replay_count": self.replay_count or 0,
+            "checksum": self.checksum,
+            "created_at": (
+                self.created_at.strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+                if self.created_at
+                else None
+            ),
+        }
+
+
+class DatasetRun(db.Model):
+    """数据驱动运行模型 - 用例按绑定数据集的每一行并行执行一次，每行一个子执行"""
+
+    __tablename__ = "dataset_runs"
+
+    id = db.Column(db.Integer, primary_key=True)
+    dataset_run_id = db.Column(db.String(50), unique=True, nullable=False)
+    test_case_id = db.Column(db.Integer, db.ForeignKey("test_cases.id"), nullable=False)
+    source = db.Column(db.Text, nullable=False)  # JSON string - 启动时的数据集配置快照
+    cursor = db.Column(db.Text)  # JSON string - 数据集读取位置，按需继续读取后续行
+    exhausted = db.Column(db.Boolean, default=False)  # 数据集是否已读完
+    status = db.Column(db.String(20), default="running")  # running, completed, failed(读取数据集失败), cancelled
+    max_parallel = db.Column(db.Integer, default=1)  # 同时排队或执行的子执行数上限
+    max_rows = db.Column(db.Integer)  # 最多执行的行数
+    mode = db.Column(db.String(20), default="headless")
+    browser = db.Column(db.String(50), default="chrome")
+    row_count = db.Column(db.Integer, default=0)  # 已创建子执行的行数
+    passed_count = db.Column(db.Integer, default=0)
+    failed_count = db.Column(db.Integer, default=0)
+    cancelled_count = db.Column(db.Integer, default=0)
+    error_message = db.Column(db.Text)  # 读取数据集失败的原因
+    executed_by = db.Column(db.String(100))
+    tenant = db.Column(db.String(100), default="default")  # 子执行所属租户
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    completed_at = db.Column(db.DateTime)
+
+    __table_args__ = (
+        db.Index("idx_dataset_run_status", "status"),
+        db.Index("idx_dataset_run_testcase", "test_case_id", "created_at"),
+    )
+
+    # 关系
+    test_case = db.relationship("TestCase", backref=db.backref("dataset_runs", lazy=True))
+
+    def to_dict(self):
+        """转换为字典"""
+        return {
+            "id": self.id,
+            "dataset_run_id": self.dataset_run_id,
+            "test_case_id": self.test_case_id,
+            "test_case_name": self.test_case.name if self.test_case else None,
+            "dataset_type": json.loads(self.source)["type"] if self.source else None,
+            "status": self.status,
+            "exhausted": bool(self.exhausted),
+            "max_parallel": self.max_parallel,
+            "max_rows": self.max_rows,
+            "mode": self.mode,
+            "row_count": self.row_count or 0,
+            "passed_count": self.passed_count or 0,
+            "failed_count": self.failed_count or 0,
+            "cancelled_count": self.cancelled_count or 0,
+            "error_message": self.error_message,
+            "executed_by": self.executed_by,
+            "tenant": self.tenant,
+            "created_at": (
+                self.created_at.strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+                if self.created_at
+                else None
+            ),
+            "completed_at": (
+                self.completed_at.strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+                if self.completed_at
+                else None
+            ),
+        }
+
+
+class TenantShare(db.Model):
+    """租户份额模型 - 按权重公平分配执行槽位，可设置并发上限"""
+
+    __tablename__ = "tenant_shares"
+
+    id = db.Column(db.Integer, primary_key=True)
+    tenant = db.Column(db.String(100), unique=True, nullable=False)
+    weight = db.Column(db.Float, default=1.0)  # 份额权重，未配置的租户按1计算
+    max_concurrency = db.Column(db.Integer)  # 同时执行数上限，为空表示可借用所有空闲槽位
+    description = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(
+        db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow
+    )
+
+    def to_dict(self):
+        """转换为字典"""
+        return {
+            "id": self.id,
+            "tenant": self.tenant,
+            "weight": self.weight,
+            "max_concurrency": self.max_concurrency,
+            "description": self.description,
+            "created_at": (
+                self.created_at.strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+                if self.created_at
+                else None
+            ),
+            "updated_at": (
+                self.updated_at.strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+                if self.updated_at
+                else None
+            ),
+        }
@@ -0,0 +1,331 @@
+"""
+AI Cache Service - MidScene AI缓存管理服务
+缓存文件保存在各执行节点上，cacheId由用例ID和步骤修订号构成；
+这里汇总各节点的缓存清单和执行上报的命中率，负责失效、预热和按保留天数/总大小淘汰
+"""
+
+import json
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional
+
+import requests
+
+from backend.models import ExecutionHistory, TestCase
+from backend.services.execution_coalescer import get_execution_coalescer
+from backend.services.executor_registry import NODE_OFFLINE, get_executor_registry
+
+logger = logging.getLogger(__name__)
+
+# 缓存状态
+CACHE_CURRENT = "current"  # 与用例当前修订号一致
+CACHE_STALE = "stale"  # 用例步骤已变化
+CACHE_ORPHANED = "orphaned"  # 用例已删除，或旧版按用例名称生成的缓存
+
+WARMER_EXECUTED_BY = "ai-cache-warmer"
+
+
+def summarize_cache_stats(stats: Any) -> Optional[Dict[str, Any]]:
+    """规范化执行节点上报的缓存命中统计，格式不正确时忽略"""
+    if not isinstance(stats, dict) or not isinstance(stats.get("cache_id"), str):
+        return None
+    summary = {"cache_id": stats["cache_id"]}
+    for key in ("entries_at_start", "lookups", "hits"):
+        value = stats.get(key, 0)
+        summary[key] = int(value) if isinstance(value, (int, float)) and value >= 0 else 0
+    summary["hits"] = min(summary["hits"], summary["lookups"])
+    return summary
+
+
+class AiCacheService:
+    """AI缓存管理服务"""
+
+    def __init__(self, request_timeout: int = 10):
+        """
+        初始化服务
+
+        Args:
+            request_timeout: 访问执行节点缓存接口的HTTP超时时间（秒）
+        """
+        self.request_timeout = request_timeout
+
+    # ==================== 节点访问 ====================
+
+    @staticmethod
+    def _nodes():
+        return [
+            node
+            for node in get_executor_registry().list_nodes()
+            if node.status != NODE_OFFLINE
+        ]
+
+    def _node_request(self, node, method: str, path: str, **kwargs) -> Dict[str, Any]:
+        response = requests.request(
+            method, f"{node.server_url}{path}", timeout=self.request_timeout, **kwargs
+        )
+        response.raise_for_status()
+        return response.json()
+
+    def _collect(self) -> Dict[str, Any]:
+        """读取所有在线节点的缓存清单，不可达的节点记录错误后跳过"""
+        caches, errors = [], []
+        for node in self._nodes():
+            try:
+                result = self._node_request(node, "GET", "/api/ai-cache")
+            except (requests.exceptions.RequestException, ValueError) as e:
+                errors.append({"node_id": node.node_id, "error": str(e)})
+                continue
+            for cache in result.get("caches", []):
+                caches.append({**cache, "node_id": node.node_id})
+        return {"caches": caches, "errors": errors}
+
+    @staticmethod
+    def _classify(caches: List[Dict[str, Any]]):
+        """标记每个缓存相对用例当前修订号的状态"""
+        testcase_ids = {c["testcase_id"] for c in caches if c.get("testcase_id")}
+        testcases = (
+            {tc.id: tc for tc in TestCase.query.filter(TestCase.id.in_(testcase_ids))}
+            if testcase_ids
+            else {}
+        )
+        for cache in caches:
+            testcase = testcases.get(cache.get("testcase_id"))
+            if testcase is None:
+                cache["state"] = CACHE_ORPHANED
+            elif cache.get("revision") == testcase.revision:
+                cache["state"] = CACHE_CURRENT
+            else:
+                cache["state"] = CACHE_STALE
+        return testcases
+
+    # ==================== 查询 ====================
+
+    @staticmethod
+    def hit_stats(
+        testcase_ids: Optional[Iterable[int]] = None, days: int = 7
+    ) -> Dict[int, Dict[str, Any]]:
+        """按用例汇总最近执行上报的缓存命中情况"""
+        query = ExecutionHistory.query.filter(
+            ExecutionHistory.start_time >= datetime.utcnow() - timedelta(days=days),
+            ExecutionHistory.result_summary.isnot(None),
+        )
+        if testcase_ids is not None:
+            query = query.filter(ExecutionHistory.test_case_id.in_(list(testcase_ids)))
+
+        stats = {}
+        for test_case_id, result_summary in query.with_entities(
+            ExecutionHistory.test_case_id, ExecutionHistory.result_summary
+        ):
+            try:
+                cache_stats = json.loads(result_summary).get("cache_stats")
+            except (TypeError, ValueError, AttributeError):
+                continue
+            if not cache_stats:
+                continue
+            total = stats.setdefault(
+                test_case_id, {"executions": 0, "lookups": 0, "hits": 0}
+            )
+            total["executions"] += 1
+            total["lookups"] += cache_stats.get("lookups", 0)
+            total["hits"] += cache_stats.get("hits", 0)
+
+        for total in stats.values():
+            total["hit_rate"] = (
+                round(total["hits"] / total["lookups"], 4) if total["lookups"] else None
+            )
+        return stats
+
+    def list_caches(self, testcase_id: Optional[int] = None, days: int = 7) -> Dict[str, Any]:
+        """
+        列出各节点上的缓存及按用例汇总的大小和命中率
+
+        Returns:
+            {caches, testcases, total_size, node_errors}
+        """
+        collected = self._collect()
+        caches = collected["caches"]
+        if testcase_id is not None:
+            caches = [c for c in caches if c.get("testcase_id") == testcase_id]
+        testcases = self._classify(caches)
+
+        summaries = {}
+        for cache in caches:
+            if cache["state"] == CACHE_ORPHANED:
+                continue
+            testcase = testcases[cache["testcase_id"]]
+            summary = summaries.setdefault(
+                testcase.id,
+                {
+                    "testcase_id": testcase.id,
+                    "name": testcase.name,
+                    "revision": testcase.revision,
+                    "files": 0,
+                    "entries": 0,
+                    "size": 0,
+                    "stale_size": 0,
+                },
+            )
+            summary["files"] += 1
+            summary["size"] += cache.get("size", 0)
+            if cache["state"] == CACHE_CURRENT:
+                summary["entries"] += cache.get("entries", 0)
+            else:
+                summary["stale_size"] += cache.get("size", 0)
+
+        hits = self.hit_stats(summaries.keys(), days=days) if summaries else {}
+        for summary in summaries.values():
+            summary.update(
+                hits.get(
+                    summary["testcase_id"],
+                    {"executions": 0, "lookups": 0, "hits": 0, "hit_rate": None},
+                )
+            )
+
+        return {
+            "caches": caches,
+            "testcases": sorted(summaries.values(), key=lambda s: s["testcase_id"]),
+            "total_size": sum(c.get("size", 0) for c in caches),
+            "orphaned_size": sum(
+                c.get("size", 0) for c in caches if c["state"] == CACHE_ORPHANED
+            ),
+            "node_errors": collected["errors"],
+        }
+
+    # ==================== 失效与淘汰 ====================
+
+    def _evict_on_nodes(self, payload_for_node) -> Dict[str, Any]:
+        """在每个节点上执行淘汰，payload_for_node(node_id)返回None表示该节点无需处理"""
+        deleted, freed, errors = [], 0, []
+        for node in self._nodes():
+            payload = payload_for_node(node.node_id)
+            if payload is None:
+                continue
+            try:
+                result = self._node_request(node, "POST", "/api/ai-cache/evict", json=payload)
+            except (requests.exceptions.RequestException, ValueError) as e:
+                errors.append({"node_id": node.node_id, "error": str(e)})
+                continue
+            deleted += [
+                {"node_id": node.node_id, "cache_id": cache_id}
+                for cache_id in result.get("deleted", [])
+            ]
+            freed += result.get("freed_bytes", 0)
+        return {"deleted": deleted, "freed_bytes": freed, "node_errors": errors}
+
+    def invalidate(self, testcase: TestCase) -> Dict[str, Any]:
+        """删除用例在所有节点上的缓存（包括各层级模型的缓存）"""
+        collected = self._collect()
+        by_node = {}
+        for cache in collected["caches"]:
+            if cache.get("testcase_id") == testcase.id:
+                by_node.setdefault(cache["node_id"], []).append(cache["cache_id"])
+
+        result = self._evict_on_nodes(
+            lambda node_id: {"cache_ids": by_node[node_id]} if node_id in by_node else None
+        )
+        result["node_errors"] += collected["errors"]
+        logger.info(f"AI缓存已失效: 用例 {testcase.id}，删除 {len(result['deleted'])} 个缓存文件")
+        return result
+
+    def evict(
+        self,
+        max_age_days: Optional[float] = None,
+        max_total_bytes: Optional[int] = None,
+        include_stale: bool = True,
+    ) -> Dict[str, Any]:
+        """
+        淘汰缓存：可选先删除失效和孤立的缓存，再按保留天数和每个节点的总大小上限淘汰
+        """
+        if max_age_days is not None and (
+            not isinstance(max_age_days, (int, float)) or max_age_days < 0
+        ):
+            raise ValueError("max_age_days必须是非负数")
+        if max_total_bytes is not None and (
+            not isinstance(max_total_bytes, int) or max_total_bytes < 0
+        ):
+            raise ValueError("max_total_bytes必须是非负整数")
+        if max_age_days is None and max_total_bytes is None and not include_stale:
+            raise ValueError("至少需要指定一种淘汰条件")
+
+        by_node = {}
+        errors = []
+        if include_stale:
+            collected = self._collect()
+            errors = collected["errors"]
+            self._classify(collected["caches"])
+            for cache in collected["caches"]:
+                if cache["state"] != CACHE_CURRENT:
+                    by_node.setdefault(cache["node_id"], []).append(cache["cache_id"])
+
+        result = self._evict_on_nodes(
+            lambda node_id: {
+                "cache_ids": by_node.get(node_id, []),
+                "max_age_days": max_age_days,
+                "max_total_bytes": max_total_bytes,
+            }
+        )
+        result["node_errors"] += errors
+        return result
+
+    # ==================== 预热 ====================
+
+    def warm(
+        self, testcase_ids: Optional[List[int]] = None, max_executions: int = 20
+    ) -> Dict[str, Any]:
+        """
+        为缺少当前修订号缓存的用例排队一次执行来生成缓存
+
+        只占用执行节点当前的空闲槽位，不与正常执行争抢容量；
+        适合由低峰期的定时任务调用，剩余用例在下次调用时继续预热
+        """
+        query = TestCase.query.filter(TestCase.is_active == True)  # noqa: E712
+        if testcase_ids:
+            query = query.filter(TestCase.id.in_(testcase_ids))
+        candidates = query.order_by(TestCase.id).all()
+
+        collected = self._collect()
+        self._classify(collected["caches"])
+        warmed = {
+            c["testcase_id"] for c in collected["caches"] if c["state"] == CACHE_CURRENT
+        }
+        missing = [tc for tc in candidates if tc.id not in warmed]
+
+        free_slots = sum(
+            node.free_slots or 0
+            for node in self._nodes()
+            if node.status == "active"
+        )
+        budget = max(0, min(max_executions, free_slots))
+
+        queued = []
+        for testcase in missing[:budget]:
+            execution, coalesced = get_execution_coalescer().create_or_coalesce(
+                testcase, {"executed_by": WARMER_EXECUTED_BY, "mode": "headless"}
+            )
+            queued.append(
+                {
+                    "testcase_id": testcase.id,
+                    "execution_id": execution.execution_id,
+                    "coalesced": coalesced,
+                }
+            )
+
+        return {
+            "queued": queued,
+            "already_warm": len(candidates) - len(missing),
+            "deferred": [tc.id for tc in missing[budget:]],
+            "free_slots": free_slots,
+            "node_errors": collected["errors"],
+        }
+
+
+# 全局AI缓存服务实例
+_ai_cache_service = None
+
+
+def get_ai_cache_service() -> AiCacheService:
+    """获取AI缓存服务实例（单例模式）"""
+    global _ai_cache_service
+    if _ai_cache_service is None:
+        _ai_cache_service = AiCacheService()
+    return _ai_cache_service
@@ -177,6 +177,9 @@ class AIStepExecutor:
                     "extraction_method": extraction_method.value,
                     "data_type": extraction_result.data_type,
                     "extraction_time": extraction_result.execution_time,
+                    "deduplicated": bool(
+                        (extraction_result.metadata or {}).get("deduplicated")
+                    ),
                     "extraction_metadata": extraction_result.metadata,
                 },
             )
@@ -0,0 +1,534 @@
+"""
+Dataset Service - 数据驱动运行服务
+测试用例可绑定数据集（内联JSON、上传的CSV或只读查询），数据驱动运行为每一行创建一个子执行，
+行数据作为变量注入；数据集按读取位置分批流式读取，只保持不超过并发上限的子执行在排队或执行中，
+由执行节点调度按全局槽位分发
+"""
+
+import csv
+import json
+import logging
+import os
+import re
+import shutil
+import uuid
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import SQLAlchemyError
+
+from backend.models import db, TestCase, ExecutionHistory, DatasetRun
+from backend.services.duration_predictor import FAILED_STATUSES
+from backend.services.suite_service import get_suite_runner
+from backend.services.fair_share import resolve_tenant
+from backend.services.variable_resolver_service import VariableManager
+
+logger = logging.getLogger(__name__)
+
+DATASET_TYPES = ("inline", "csv", "query")
+
+# 内联数据集行数上限，更大的数据集请上传CSV
+MAX_INLINE_ROWS = 1000
+MAX_COLUMNS = 100
+
+# 与执行节点变量引用${name}的命名规则一致
+VARIABLE_NAME_PATTERN = re.compile(r"^[a-zA-Z_][a-zA-Z0-9_]*$")
+
+QUEUED_STATUSES = ("pending", "running")
+
+# 行数据注入变量时使用的来源步骤索引（早于第一个步骤）
+DATASET_SOURCE_STEP = -1
+
+_query_engines = {}
+
+# 查询中出现这些关键字直接拒绝：WITH子句可以包含DELETE ... RETURNING等写操作
+WRITE_KEYWORD_PATTERN = re.compile(
+    r"\b(insert|update|delete|merge|upsert|drop|alter|create|truncate|grant|revoke"
+    r"|copy|call|exec|execute|attach|detach|pragma|vacuum|lock)\b",
+    re.IGNORECASE,
+)
+# 检查关键字前去掉字符串字面量，避免误判WHERE name = 'delete'
+STRING_LITERAL_PATTERN = re.compile(r"'(?:[^']|'')*'")
+
+
+def _check_columns(columns) -> List[str]:
+    columns = list(columns)
+    if not columns:
+        raise ValueError("数据集没有列")
+    if len(columns) > MAX_COLUMNS:
+        raise ValueError(f"数据集最多{MAX_COLUMNS}列")
+    invalid = [str(c) for c in columns if not VARIABLE_NAME_PATTERN.match(str(c))]
+    if invalid:
+        raise ValueError(f"数据集列名必须是合法的变量名: {', '.join(invalid)}")
+    return columns
+
+
+def _check_query(query: Any) -> str:
+    """只允许单条SELECT/WITH查询"""
+    if not isinstance(query, str) or not query.strip():
+        raise ValueError("query必须是非空字符串")
+    query = query.strip().rstrip(";").strip()
+    if ";" in query or not re.match(r"^(select|with)\b", query, re.IGNORECASE):
+        raise ValueError("query只能是单条SELECT查询")
+    keyword = WRITE_KEYWORD_PATTERN.search(STRING_LITERAL_PATTERN.sub("''", query))
+    if keyword:
+        raise ValueError(f"query不能包含写操作: {keyword.group(1).upper()}")
+    return query
+
+
+def _query_engine():
+    """
+    查询数据集使用独立配置的数据源，不查询本系统数据库
+
+    DATASET_DATABASE_URL应使用只读数据库账号；此外每次查询都在只读事务中执行并回滚，
+    关键字检查之外再由数据库拒绝写操作
+    """
+    url = os.environ.get("DATASET_DATABASE_URL")
+    if not url:
+        raise ValueError("未配置DATASET_DATABASE_URL，无法使用查询数据集")
+    if url not in _query_engines:
+        _query_engines[url] = create_engine(url)
+    return _query_engines[url]
+
+
+def _begin_read_only(connection):
+    """把连接的当前事务设为只读"""
+    if connection.dialect.name == "sqlite":
+        # SQLite没有只读事务，query_only对该连接的后续语句生效
+        connection.exec_driver_sql("PRAGMA query_only = ON")
+    else:
+        connection.exec_driver_sql("SET TRANSACTION READ ONLY")
+
+
+def _json_safe(row: Dict[str, Any]) -> Dict[str, Any]:
+    return json.loads(json.dumps(row, ensure_ascii=False, default=str))
+
+
+class DatasetRunner:
+    """数据集绑定与数据驱动运行调度器"""
+
+    def __init__(self, dataset_dir: Optional[str] = None):
+        self.dataset_dir = dataset_dir or os.environ.get("DATASET_DIR") or os.path.join(
+            os.getcwd(), "datasets"
+        )
+
+    # ==================== 数据集配置 ====================
+
+    def _csv_path(self, file_name: str) -> str:
+        if not isinstance(file_name, str) or not re.match(r"^[0-9a-f]{32}\.csv$", file_name):
+            raise ValueError("CSV数据集文件无效")
+        return os.path.join(self.dataset_dir, file_name)
+
+    def validate_dataset(self, spec: Any) -> Optional[Dict[str, Any]]:
+        """
+        校验并规范化数据集配置
+
+        - inline: {"type": "inline", "rows": [{"列名": 值}, ...]}
+        - csv: {"type": "csv", "file": ..., "filename": ...}，只能通过上传接口生成
+        - query: {"type": "query", "query": "SELECT ..."}，在DATASET_DATABASE_URL数据源上执行
+
+        Returns:
+            规范化后的配置，为空时返回None
+        """
+        if spec is None:
+            return None
+        if not isinstance(spec, dict) or spec.get("type") not in DATASET_TYPES:
+            raise ValueError(f"dataset.type必须是: {', '.join(DATASET_TYPES)}")
+
+        if spec["type"] == "inline":
+            rows = spec.get("rows")
+            if not isinstance(rows, list) or not rows:
+                raise ValueError("内联数据集的rows必须是非空数组")
+            if len(rows) > MAX_INLINE_ROWS:
+                raise ValueError(f"内联数据集最多{MAX_INLINE_ROWS}行，更大的数据集请上传CSV")
+            for index, row in enumerate(rows):
+                if not isinstance(row, dict):
+                    raise ValueError(f"第 {index + 1} 行必须是对象")
+                _check_columns(row.keys())
+            return {"type": "inline", "rows": rows}
+
+        if spec["type"] == "csv":
+            if not os.path.exists(self._csv_path(spec.get("file"))):
+                raise ValueError("CSV数据集文件不存在，请重新上传")
+            return {
+                "type": "csv",
+                "file": spec["file"],
+                "filename": str(spec.get("filename") or spec["file"]),
+            }
+
+        return {"type": "query", "query": _check_query(spec.get("query"))}
+
+    def describe(self, spec: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """数据集概要（不含内联数据本身）"""
+        if not spec:
+            return None
+        if spec["type"] == "inline":
+            return {"type": "inline", "rows": len(spec["rows"])}
+        if spec["type"] == "csv":
+            path = self._csv_path(spec["file"])
+            return {
+                "type": "csv",
+                "filename": spec["filename"],
+                "size": os.path.getsize(path) if os.path.exists(path) else None,
+            }
+        return {"type": "query", "query": spec["query"]}
+
+    def _release_csv(self, spec: Optional[Dict[str, Any]]):
+        """删除不再被用例绑定、也没有运行中数据驱动运行引用的CSV文件"""
+        if not spec or spec.get("type") != "csv":
+            return
+        pattern = f'%"file": "{spec["file"]}"%'
+        in_use = (
+            TestCase.query.filter(TestCase.dataset.like(pattern)).count()
+            + DatasetRun.query.filter(
+                DatasetRun.status == "running", DatasetRun.source.like(pattern)
+            ).count()
+        )
+        if not in_use:
+            try:
+                os.remove(self._csv_path(spec["file"]))
+            except OSError:
+                pass
+
+    def bind(self, testcase: TestCase, spec: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """绑定（spec为None时解除绑定）用例的数据集"""
+        normalized = self.validate_dataset(spec)
+        previous = json.loads(testcase.dataset) if testcase.dataset else None
+        testcase.dataset = json.dumps(normalized, ensure_ascii=False) if normalized else None
+        db.session.commit()
+        if previous and previous != normalized:
+            self._release_csv(previous)
+        return normalized
+
+    def store_csv(self, testcase: TestCase, stream, filename: str) -> Dict[str, Any]:
+        """保存上传的CSV（流式写入磁盘）并绑定到用例"""
+        os.makedirs(self.dataset_dir, exist_ok=True)
+        file_name = f"{uuid.uuid4().hex}.csv"
+        path = self._csv_path(file_name)
+        with open(path, "wb") as f:
+            shutil.copyfileobj(stream, f, 1024 * 1024)
+
+        spec = {"type": "csv", "file": file_name, "filename": filename or file_name}
+        try:
+            self.read_rows(spec, None, 1)
+            return self.bind(testcase, spec)
+        except (ValueError, UnicodeDecodeError, csv.Error) as e:
+            os.remove(path)
+            raise ValueError(f"CSV数据集无效: {str(e)}")
+
+    def preview(self, spec: Dict[str, Any], limit: int = 20) -> Dict[str, Any]:
+        """读取数据集前几行"""
+        rows, _, exhausted = self.read_rows(spec, None, limit)
+        return {
+            "dataset": self.describe(spec),
+            "columns": list(rows[0].keys()) if rows else [],
+            "rows": rows,
+            "truncated": not exhausted,
+        }
+
+    # ==================== 流式读取 ====================
+
+    def read_rows(
+        self, spec: Dict[str, Any], cursor: Any, limit: int
+    ) -> Tuple[List[Dict[str, Any]], Any, bool]:
+        """
+        从读取位置开始读取最多limit行
+
+        Returns:
+            (行数据列表, 新的读取位置, 是否已读完)
+        """
+        if spec["type"] == "inline":
+            start = cursor or 0
+            rows = spec["rows"][start : start + limit]
+            return rows, start + len(rows), start + len(rows) >= len(spec["rows"])
+        if spec["type"] == "csv":
+            return self._read_csv(self._csv_path(spec["file"]), cursor, limit)
+        return self._read_query(spec["query"], cursor or 0, limit)
+
+    @staticmethod
+    def _lines(f) -> Iterator[str]:
+        # 逐行读取而不是迭代文件对象，才能在读取过程中用tell()记录位置
+        while True:
+            line = f.readline()
+            if not line:
+                return
+            yield line
+
+    def _read_csv(self, path: str, cursor: Optional[Dict[str, Any]], limit: int):
+        """读取位置为文件偏移和表头，每批只读需要的行"""
+        with open(path, "r", encoding="utf-8-sig", newline="") as f:
+            reader = csv.reader(self._lines(f))
+            if cursor:
+                header = cursor["header"]
+                f.seek(cursor["offset"])
+            else:
+                header = _check_columns(
+                    [column.strip() for column in next(reader, None) or []]
+                )
+
+            rows = []
+            while len(rows) < limit:
+                record = next(reader, None)
+                if record is None:
+                    break
+                if not any(cell.strip() for cell in record):
+                    continue
+                if len(record) != len(header):
+                    raise ValueError(
+                        f"CSV第 {reader.line_num} 行有 {len(record)} 列，表头有 {len(header)} 列"
+                    )
+                rows.append(dict(zip(header, record)))
+
+            offset = f.tell()
+            exhausted = len(rows) < limit or not f.readline()
+        return rows, {"offset": offset, "header": header}, exhausted
+
+    def _read_query(self, query: str, offset: int, limit: int):
+        """按偏移分页读取查询结果（查询应包含ORDER BY以保证分页稳定）"""
+        statement = text(
+            f"SELECT * FROM ({query}) AS dataset_rows LIMIT :limit OFFSET :offset"
+        )
+        with _query_engine().connect() as connection:
+            try:
+                _begin_read_only(connection)
+                result = connection.execute(statement, {"limit": limit + 1, "offset": offset})
+                rows = [_json_safe(dict(row._mapping)) for row in result]
+            finally:
+                connection.rollback()
+        if rows:
+            _check_columns(rows[0].keys())
+        exhausted = len(rows) <= limit
+        rows = rows[:limit]
+        return rows, offset + len(rows), exhausted
+
+    # ==================== 数据驱动运行 ====================
+
+    def start_run(self, testcase: TestCase, data: Dict[str, Any]) -> DatasetRun:
+        """
+        创建数据驱动运行并创建第一批子执行
+
+        并发上限默认取在线执行节点的槽位总数，也不能超过它
+        """
+        spec = (
+            self.validate_dataset(data["dataset"])
+            if data.get("dataset") is not None
+            else (json.loads(testcase.dataset) if testcase.dataset else None)
+        )
+        if not spec:
+            raise ValueError("测试用例未绑定数据集")
+        tenant = resolve_tenant(data, testcase)
+
+        slots = get_suite_runner().available_slots()
+        max_parallel = data.get("max_parallel")
+        if max_parallel is not None and (not isinstance(max_parallel, int) or max_parallel < 1):
+            raise ValueError("max_parallel必须是大于0的整数")
+        max_rows = data.get("max_rows")
+        if max_rows is not None and (not isinstance(max_rows, int) or max_rows < 1):
+            raise ValueError("max_rows必须是大于0的整数")
+
+        dataset_run = DatasetRun(
+            dataset_run_id=str(uuid.uuid4()),
+            test_case_id=testcase.id,
+            source=json.dumps(spec, ensure_ascii=False),
+            status="running",
+            max_parallel=min(max_parallel or slots, slots),
+            max_rows=max_rows,
+            mode=data.get("mode", "headless"),
+            browser=data.get("browser", "chrome"),
+            executed_by=data.get("executed_by", "system"),
+            tenant=tenant,
+            created_at=datetime.utcnow(),
+        )
+        db.session.add(dataset_run)
+        db.session.commit()
+
+        self.advance(dataset_run)
+        logger.info(
+            f"数据驱动运行已创建: {dataset_run.dataset_run_id}, 用例 {testcase.id}, "
+            f"数据集 {spec['type']}, 并发上限 {dataset_run.max_parallel}"
+        )
+        return dataset_run
+
+    def _refresh_counts(self, dataset_run: DatasetRun) -> Dict[str, int]:
+        counts = dict(
+            db.session.query(ExecutionHistory.status, db.func.count(ExecutionHistory.id))
+            .filter(ExecutionHistory.dataset_run_id == dataset_run.dataset_run_id)
+            .group_by(ExecutionHistory.status)
+            .all()
+        )
+        dataset_run.passed_count = counts.get("success", 0)
+        dataset_run.failed_count = sum(counts.get(status, 0) for status in FAILED_STATUSES)
+        dataset_run.cancelled_count = counts.get("cancelled", 0)
+        return counts
+
+    def _complete_if_done(self, dataset_run: DatasetRun, counts: Dict[str, int]):
+        if (
+            dataset_run.status == "running"
+            and dataset_run.exhausted
+            and not any(counts.get(status, 0) for status in QUEUED_STATUSES)
+        ):
+            dataset_run.status = "failed" if dataset_run.error_message else "completed"
+            dataset_run.completed_at = datetime.utcnow()
+
+    def advance(self, dataset_run: DatasetRun) -> List[ExecutionHistory]:
+        """
+        补充子执行，使排队和执行中的子执行数达到并发上限
+
+        只读取需要的行数；读取数据集失败时停止读取，已创建的子执行继续完成
+        """
+        if dataset_run.status != "running":
+            return []
+
+        counts = self._refresh_counts(dataset_run)
+        budget = dataset_run.max_parallel - sum(counts.get(s, 0) for s in QUEUED_STATUSES)
+        if dataset_run.max_rows:
+            budget = min(budget, dataset_run.max_rows - (dataset_run.row_count or 0))
+
+        created = []
+        if budget > 0 and not dataset_run.exhausted:
+            cursor = json.loads(dataset_run.cursor) if dataset_run.cursor else None
+            try:
+                rows, cursor, exhausted = self.read_rows(
+                    json.loads(dataset_run.source), cursor, budget
+                )
+                for row in rows:
+                    _check_columns(row.keys())
+            except (OSError, ValueError, UnicodeDecodeError, csv.Error, SQLAlchemyError) as e:
+                logger.error(f"读取数据集失败: {dataset_run.dataset_run_id}, 错误: {str(e)}")
+                dataset_run.error_message = f"读取数据集失败: {str(e)}"
+                rows, exhausted = [], True
+            else:
+                dataset_run.cursor = json.dumps(cursor, ensure_ascii=False)
+
+            now = datetime.utcnow()
+            for row in rows:
+                row_index = dataset_run.row_count or 0
+                execution = ExecutionHistory(
+                    execution_id=str(uuid.uuid4()),
+                    test_case_id=dataset_run.test_case_id,
+                    status="pending",
+                    mode=dataset_run.mode,
+                    browser=dataset_run.browser,
+                    start_time=now,
+                    executed_by=dataset_run.executed_by,
+                    dataset_run_id=dataset_run.dataset_run_id,
+                    dataset_row_index=row_index,
+                    dataset_row=json.dumps(row, ensure_ascii=False),
+                    queue_position=row_index,
+                    tenant=dataset_run.tenant,
+                    # 与运行创建时间一致，后补充的行不会排到之后提交的执行后面
+                    created_at=dataset_run.created_at,
+                )
+                db.session.add(execution)
+                created.append((execution, row))
+                dataset_run.row_count = row_index + 1
+
+            dataset_run.exhausted = exhausted or bool(
+                dataset_run.max_rows and dataset_run.row_count >= dataset_run.max_rows
+            )
+            if created:
+                counts["pending"] = counts.get("pending", 0) + len(created)
+
+        self._complete_if_done(dataset_run, counts)
+        db.session.commit()
+
+        # 每行注入独立的变量管理器，不放入全局工厂缓存，避免大数据集占用内存
+        for execution, row in created:
+            manager = VariableManager(execution.execution_id)
+            for name, value in row.items():
+                manager.store_variable(
+                    name, value, DATASET_SOURCE_STEP, source_api_method="dataset"
+                )
+        return [execution for execution, _ in created]
+
+    def advance_running(self) -> int:
+        """补充所有运行中的数据驱动运行，返回新创建的子执行数"""
+        created = 0
+        for dataset_run in DatasetRun.query.filter_by(status="running").all():
+            created += len(self.advance(dataset_run))
+        return created
+
+    def record_result(self, execution: ExecutionHistory) -> Optional[DatasetRun]:
+        """子执行结束时更新计数，全部结束时标记运行完成（调用方负责提交）"""
+        if not execution.dataset_run_id:
+            return None
+        dataset_run = DatasetRun.query.filter_by(
+            dataset_run_id=execution.dataset_run_id
+        ).first()
+        if dataset_run is None:
+            return None
+        self._complete_if_done(dataset_run, self._refresh_counts(dataset_run))
+        return dataset_run
+
+    def cancel_run(self, dataset_run_id: str) -> DatasetRun:
+        """取消数据驱动运行：停止读取剩余行，取消尚未分发到节点的子执行"""
+        dataset_run = DatasetRun.query.filter_by(dataset_run_id=dataset_run_id).first()
+        if dataset_run is None:
+            raise ValueError(f"数据驱动运行不存在: {dataset_run_id}")
+
+        if dataset_run.status == "running":
+            now = datetime.utcnow()
+            for execution in ExecutionHistory.query.filter(
+                ExecutionHistory.dataset_run_id == dataset_run_id,
+                ExecutionHistory.status == "pending",
+                ExecutionHistory.executor_node_id.is_(None),
+            ).all():
+                execution.status = "cancelled"
+                execution.end_time = now
+                execution.error_message = "数据驱动运行已取消"
+            dataset_run.status = "cancelled"
+            dataset_run.exhausted = True
+            dataset_run.completed_at = now
+            self._refresh_counts(dataset_run)
+            db.session.commit()
+        return dataset_run
+
+    def row_results(
+        self,
+        dataset_run: DatasetRun,
+        status: Optional[str] = None,
+        offset: int = 0,
+        limit: int = 100,
+    ) -> Dict[str, Any]:
+        """按行汇总子执行结果，按行号分页"""
+        query = ExecutionHistory.query.filter_by(dataset_run_id=dataset_run.dataset_run_id)
+        if status:
+            query = query.filter(ExecutionHistory.status == status)
+        total = query.count()
+        executions = (
+            query.order_by(ExecutionHistory.dataset_row_index.asc())
+            .offset(offset)
+            .limit(limit)
+            .all()
+        )
+        return {
+            "total": total,
+            "items": [
+                {
+                    "row_index": execution.dataset_row_index,
+                    "variables": (
+                        json.loads(execution.dataset_row) if execution.dataset_row else {}
+                    ),
+                    "execution_id": execution.execution_id,
+                    "status": execution.status,
+                    "duration": execution.duration,
+                    "steps_passed": execution.steps_passed,
+                    "steps_failed": execution.steps_failed,
+                    "error_message": execution.error_message,
+                }
+                for execution in executions
+            ],
+        }
+
+
+# 全局数据驱动运行器实例
+_dataset_runner = None
+
+
+def get_dataset_runner() -> DatasetRunner:
+    """获取数据驱动运行器实例（单例模式）"""
+    global _dataset_runner
+    if _dataset_runner is None:
+        _dataset_runner = DatasetRunner()
+    return _dataset_runner
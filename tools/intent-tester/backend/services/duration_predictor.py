@@ -0,0 +1,187 @@
+"""
+Duration Predictor - 测试用例耗时预测服务
+基于历史执行耗时的指数加权平均预测用例耗时，没有历史时按步骤数量和动作类型估算，
+并提供最长处理时间优先（LPT）的多槽位分配
+"""
+
+import heapq
+import json
+import logging
+import re
+from collections import defaultdict
+from typing import Dict, List, Any
+
+from backend.models import db, TestCase, ExecutionHistory
+
+logger = logging.getLogger(__name__)
+
+# 参与预测的最近执行次数
+HISTORY_WINDOW = 10
+
+# 指数加权平均的平滑系数，越大越偏向最近的执行
+EWMA_ALPHA = 0.3
+
+# 浏览器启动、报告生成等与步骤无关的固定开销（秒）
+BASE_OVERHEAD_SECONDS = 5.0
+
+# 各动作类型的经验耗时（秒），AI动作包含一次模型调用
+ACTION_COST_SECONDS = {
+    "goto": 4.0,
+    "navigate": 4.0,
+    "ai_tap": 8.0,
+    "ai_input": 8.0,
+    "ai_assert": 7.0,
+    "ai_query": 10.0,
+    "ai_string": 8.0,
+    "ai_number": 8.0,
+    "ai_boolean": 8.0,
+    "ai_wait_for": 15.0,
+    "ai_scroll": 5.0,
+    "ai_drag": 10.0,
+    "ai_select": 8.0,
+    "ai_upload": 8.0,
+    "ai_check": 8.0,
+    "ai_action": 12.0,
+    "screenshot": 1.0,
+    "visual_assert": 1.0,
+    "refresh": 3.0,
+    "back": 2.0,
+}
+DEFAULT_ACTION_COST_SECONDS = 6.0
+
+# 执行结束状态，套件运行和数据驱动运行统计结果时共用
+FAILED_STATUSES = ("failed", "error")
+FINISHED_STATUSES = ("success",) + FAILED_STATUSES
+
+_CAMEL_BOUNDARY = re.compile(r"(?<=[a-z0-9])(?=[A-Z])")
+
+
+def normalize_action(step: Dict[str, Any]) -> str:
+    """步骤动作名：兼容action/type字段和驼峰写法（aiTap -> ai_tap）"""
+    action = step.get("action") or step.get("type") or ""
+    if not isinstance(action, str):
+        return ""
+    return _CAMEL_BOUNDARY.sub("_", action.strip()).lower()
+
+
+class DurationPredictor:
+    """测试用例耗时预测器"""
+
+    @staticmethod
+    def estimate_from_steps(testcase: TestCase) -> float:
+        """按步骤数量和动作类型估算耗时（秒）"""
+        try:
+            steps = json.loads(testcase.steps) if testcase.steps else []
+        except (TypeError, ValueError):
+            steps = []
+
+        total = BASE_OVERHEAD_SECONDS
+        for step in steps:
+            if not isinstance(step, dict):
+                continue
+            action = normalize_action(step)
+            params = step.get("params") or {}
+            if action in ("sleep", "wait"):
+                total += (params.get("time") or params.get("duration") or 1000) / 1000.0
+            else:
+                total += ACTION_COST_SECONDS.get(action, DEFAULT_ACTION_COST_SECONDS)
+            total += (step.get("wait_time") or 0) / 1000.0
+        return total
+
+    @staticmethod
+    def ewma(durations: List[float]) -> float:
+        """按时间顺序（旧到新）计算指数加权平均"""
+        value = durations[0]
+        for duration in durations[1:]:
+            value = EWMA_ALPHA * duration + (1 - EWMA_ALPHA) * value
+        return value
+
+    def predict(self, testcases: List[TestCase]) -> Dict[int, Dict[str, Any]]:
+        """
+        预测用例耗时
+
+        Returns:
+            {test_case_id: {"seconds", "source": history|estimate, "samples"}}
+        """
+        ids = [testcase.id for testcase in testcases]
+        history = defaultdict(list)
+        if ids:
+            rows = (
+                db.session.query(ExecutionHistory.test_case_id, ExecutionHistory.duration)
+                .filter(
+                    ExecutionHistory.test_case_id.in_(ids),
+                    ExecutionHistory.status.in_(FINISHED_STATUSES),
+                    ExecutionHistory.duration.isnot(None),
+                    ExecutionHistory.duration > 0,
+                )
+                .order_by(ExecutionHistory.start_time.desc())
+                .all()
+            )
+            for test_case_id, duration in rows:
+                if len(history[test_case_id]) < HISTORY_WINDOW:
+                    history[test_case_id].append(float(duration))
+
+        predictions = {}
+        for testcase in testcases:
+            samples = history.get(testcase.id)
+            if samples:
+                predictions[testcase.id] = {
+                    "seconds": round(self.ewma(list(reversed(samples))), 2),
+                    "source": "history",
+                    "samples": len(samples),
+                }
+            else:
+                predictions[testcase.id] = {
+                    "seconds": round(self.estimate_from_steps(testcase), 2),
+                    "source": "estimate",
+                    "samples": 0,
+                }
+        return predictions
+
+    @staticmethod
+    def lpt_order(items: List[Dict[str, Any]], key: str = "predicted_duration") -> List[Dict[str, Any]]:
+        """最长处理时间优先排序，耗时相同按用例ID稳定排序"""
+        return sorted(items, key=lambda item: (-item[key], item["test_case_id"]))
+
+    @staticmethod
+    def simulate(
+        items: List[Dict[str, Any]], slot_count: int, key: str = "predicted_duration"
+    ) -> Dict[str, Any]:
+        """
+        按队列顺序模拟贪心分配：每个用例交给最先空闲的槽位
+
+        对LPT顺序的队列而言，这就是LPT分配结果
+
+        Returns:
+            {"makespan", "shards": [{"shard_index", "load", "test_case_ids"}], "assignments": {test_case_id: shard_index}}
+        """
+        slot_count = max(1, int(slot_count))
+        heap = [(0.0, index) for index in range(slot_count)]
+        shards = [{"shard_index": index, "load": 0.0, "test_case_ids": []} for index in range(slot_count)]
+        assignments = {}
+
+        for item in items:
+            load, index = heapq.heappop(heap)
+            load += item[key]
+            shards[index]["load"] = round(load, 2)
+            shards[index]["test_case_ids"].append(item["test_case_id"])
+            assignments[item["test_case_id"]] = index
+            heapq.heappush(heap, (load, index))
+
+        return {
+            "makespan": round(max(shard["load"] for shard in shards), 2),
+            "shards": shards,
+            "assignments": assignments,
+        }
+
+
+# 全局预测器实例
+_duration_predictor = None
+
+
+def get_duration_predictor() -> DurationPredictor:
+    """获取耗时预测器实例（单例模式）"""
+    global _duration_predictor
+    if _duration_predictor is None:
+        _duration_predictor = DurationPredictor()
+    return _duration_predictor
@@ -0,0 +1,237 @@
+"""
+Execution Coalescer - 重复执行请求合并服务
+同一测试用例修订号和相同执行参数的请求在已有执行排队或运行时，合并到该执行而不是再跑一遍浏览器
+"""
+
+import hashlib
+import json
+import logging
+import threading
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Any, Tuple
+
+from backend.models import db, TestCase, ExecutionHistory
+from backend.services.fair_share import resolve_tenant
+
+logger = logging.getLogger(__name__)
+
+# 合并模式
+COALESCE_ATTACH = "attach"  # 直接返回已有执行，不创建新记录
+COALESCE_LINK = "link"  # 创建一条指向已有执行的关联记录，结果随其同步
+COALESCE_OFF = "off"  # 不合并，总是创建新执行
+COALESCE_MODES = (COALESCE_ATTACH, COALESCE_LINK, COALESCE_OFF)
+
+# 可被合并的执行状态
+INFLIGHT_STATUSES = ("pending", "running")
+
+# 关联记录的状态
+STATUS_COALESCED = "coalesced"
+
+# 执行截止时间预算上限（秒）
+MAX_DEADLINE_SECONDS = 6 * 3600
+
+# 执行结束后同步到关联记录的字段
+MIRRORED_FIELDS = (
+    "status",
+    "end_time",
+    "duration",
+    "steps_total",
+    "steps_passed",
+    "steps_failed",
+    "result_summary",
+    "screenshots_path",
+    "logs_path",
+    "error_message",
+    "error_stack",
+)
+
+
+class ExecutionCoalescer:
+    """重复执行请求合并器"""
+
+    def __init__(self):
+        # 查找和创建需要在同一临界区内完成，否则并发请求会各自创建执行
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def compute_fingerprint(testcase: TestCase, data: Dict[str, Any]) -> str:
+        """根据用例修订号和影响执行结果的参数计算请求指纹"""
+        payload = {
+            "test_case_id": testcase.id,
+            "revision": testcase.revision,
+            "mode": data.get("mode", "headless"),
+            "browser": data.get("browser", "chrome"),
+            "parameters": data.get("parameters") or {},
+        }
+        canonical = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def parse_deadline(data: Dict[str, Any], now: Optional[datetime] = None) -> Optional[datetime]:
+        """根据请求中的deadline_seconds计算执行截止时间，未指定时返回None"""
+        seconds = data.get("deadline_seconds")
+        if seconds is None:
+            return None
+        if isinstance(seconds, bool) or not isinstance(seconds, (int, float)):
+            raise ValueError("deadline_seconds必须是数字")
+        if seconds <= 0 or seconds > MAX_DEADLINE_SECONDS:
+            raise ValueError(f"deadline_seconds必须在0-{MAX_DEADLINE_SECONDS}秒之间")
+        return (now or datetime.utcnow()) + timedelta(seconds=seconds)
+
+    @staticmethod
+    def find_inflight(
+        fingerprint: str, statuses: Tuple[str, ...] = INFLIGHT_STATUSES
+    ) -> Optional[ExecutionHistory]:
+        """查找指纹相同且仍在排队或运行中的执行"""
+        return (
+            ExecutionHistory.query.filter(
+                ExecutionHistory.request_fingerprint == fingerprint,
+                ExecutionHistory.status.in_(statuses),
+                ExecutionHistory.coalesced_into.is_(None),
+            )
+            .order_by(ExecutionHistory.created_at.asc())
+            .first()
+        )
+
+    def create_or_coalesce(
+        self, testcase: TestCase, data: Dict[str, Any]
+    ) -> Tuple[ExecutionHistory, bool]:
+        """
+        创建执行或合并到已有执行
+
+        Args:
+            testcase: 测试用例
+            data: 执行请求数据，coalesce字段可选 attach/link/off（默认attach）
+
+        Returns:
+            (返回给调用方的执行记录, 是否发生了合并)
+        """
+        mode = (data.get("coalesce") or COALESCE_ATTACH).lower()
+        if mode not in COALESCE_MODES:
+            raise ValueError(f"coalesce参数无效: {mode}，可选值: {', '.join(COALESCE_MODES)}")
+
+        fingerprint = self.compute_fingerprint(testcase, data)
+        deadline_at = self.parse_deadline(data)
+        tenant = resolve_tenant(data, testcase)
+
+        with self._lock:
+            primary = self.find_inflight(fingerprint) if mode != COALESCE_OFF else None
+
+            if primary and mode == COALESCE_ATTACH:
+                logger.info(
+                    f"执行请求已合并到运行中的执行: {primary.execution_id} "
+                    f"(用例: {testcase.id})"
+                )
+                return primary, True
+
+            execution = ExecutionHistory(
+                execution_id=str(uuid.uuid4()),
+                test_case_id=testcase.id,
+                status=STATUS_COALESCED if primary else "pending",
+                mode=data.get("mode", "headless"),
+                browser=data.get("browser", "chrome"),
+                start_time=datetime.utcnow(),
+                executed_by=data.get("executed_by", "system"),
+                request_fingerprint=fingerprint,
+                coalesced_into=primary.execution_id if primary else None,
+                deadline_at=deadline_at,
+                tenant=tenant,
+            )
+            db.session.add(execution)
+            db.session.commit()
+
+            if primary:
+                logger.info(
+                    f"已创建关联执行记录: {execution.execution_id} -> {primary.execution_id}"
+                )
+            return execution, primary is not None
+
+    def start_or_coalesce(
+        self, testcase: TestCase, execution_id: str, data: Dict[str, Any]
+    ) -> Tuple[ExecutionHistory, bool]:
+        """
+        执行节点直接收到的执行请求（未经调度下发）开始时登记执行记录或合并到已有执行
+
+        只合并到运行中的执行：排队中的执行可能还没有下发到任何节点，合并进去会一直等不到结果
+
+        Args:
+            testcase: 测试用例
+            execution_id: 执行节点生成的执行ID
+            data: 执行开始通知数据，coalesce字段可选 attach/link/off（默认attach）
+
+        Returns:
+            (新登记的执行或被合并到的运行中执行, 是否发生了合并)
+        """
+        mode = (data.get("coalesce") or COALESCE_ATTACH).lower()
+        if mode not in COALESCE_MODES:
+            raise ValueError(f"coalesce参数无效: {mode}，可选值: {', '.join(COALESCE_MODES)}")
+
+        fingerprint = self.compute_fingerprint(testcase, data)
+        tenant = resolve_tenant(data, testcase)
+        now = datetime.utcnow()
+
+        with self._lock:
+            primary = (
+                self.find_inflight(fingerprint, statuses=("running",))
+                if mode != COALESCE_OFF
+                else None
+            )
+            if primary and mode == COALESCE_ATTACH:
+                logger.info(
+                    f"执行节点的执行请求已合并到运行中的执行: {primary.execution_id} "
+                    f"(用例: {testcase.id})"
+                )
+                return primary, True
+
+            execution = ExecutionHistory(
+                execution_id=execution_id,
+                test_case_id=testcase.id,
+                status=STATUS_COALESCED if primary else "running",
+                mode=data.get("mode", "headless"),
+                browser=data.get("browser", "chrome"),
+                start_time=now,
+                steps_total=data.get("steps_total", 0),
+                steps_passed=0,
+                steps_failed=0,
+                executed_by=data.get("executed_by", "midscene-server"),
+                created_at=now,
+                request_fingerprint=fingerprint,
+                coalesced_into=primary.execution_id if primary else None,
+                tenant=tenant,
+            )
+            db.session.add(execution)
+            db.session.commit()
+
+            if primary:
+                logger.info(f"已创建关联执行记录: {execution_id} -> {primary.execution_id}")
+                return primary, True
+            return execution, False
+
+    @staticmethod
+    def propagate_result(execution: ExecutionHistory) -> int:
+        """
+        将执行结果同步到合并进来的关联记录（调用方负责提交）
+
+        Returns:
+            同步的关联记录数
+        """
+        linked = ExecutionHistory.query.filter_by(
+            coalesced_into=execution.execution_id
+        ).all()
+        for record in linked:
+            for field in MIRRORED_FIELDS:
+                setattr(record, field, getattr(execution, field))
+        return len(linked)
+
+
+# 全局合并器实例
+_execution_coalescer = None
+
+
+def get_execution_coalescer() -> ExecutionCoalescer:
+    """获取执行请求合并器实例（单例模式）"""
+    global _execution_coalescer
+    if _execution_coalescer is None:
+        _execution_coalescer = ExecutionCoalescer()
+    return _execution_coalescer
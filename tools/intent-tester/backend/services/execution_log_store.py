@@ -0,0 +1,275 @@
+"""
+Execution Log Store - 执行日志存储
+每个执行一个目录，日志以JSON行追加写入分段的gzip文件，按未压缩字节偏移定位，
+支持尾部读取、按偏移分页和字节区间读取，读取时只解压涉及的分段
+"""
+
+import gzip
+import json
+import logging
+import os
+import shutil
+import threading
+from typing import Any, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# 单个分段的未压缩大小上限，超过后封存并开启新分段
+DEFAULT_SEGMENT_BYTES = 1024 * 1024
+
+# 单次读取的字节上限
+MAX_READ_BYTES = 1024 * 1024
+
+INDEX_FILE = "index.json"
+
+
+class ExecutionLogStore:
+    """
+    分段压缩的执行日志存储
+
+    日志按追加顺序构成一个逻辑字节流，偏移量是该字节流中的位置；
+    每次追加写入一个独立的gzip成员，已有内容从不改写
+    """
+
+    def __init__(self, root_dir: str, segment_bytes: int = DEFAULT_SEGMENT_BYTES):
+        self.root_dir = root_dir
+        self.segment_bytes = max(1, segment_bytes)
+        self._lock = threading.Lock()
+
+    # ---------- 路径与索引 ----------
+
+    def log_dir(self, execution_id: str) -> str:
+        """执行日志目录，执行ID只保留安全字符避免路径穿越"""
+        safe_id = "".join(c if c.isalnum() or c in "_.-" else "_" for c in execution_id)
+        if not safe_id.strip("."):
+            raise ValueError("execution_id无效")
+        return os.path.join(self.root_dir, safe_id)
+
+    def _load_index(self, execution_id: str) -> Optional[Dict[str, Any]]:
+        path = os.path.join(self.log_dir(execution_id), INDEX_FILE)
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _save_index(self, execution_id: str, index: Dict[str, Any]):
+        # 先写临时文件再替换，读取方不会看到写了一半的索引
+        path = os.path.join(self.log_dir(execution_id), INDEX_FILE)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(index, f)
+        os.replace(tmp_path, path)
+
+    # ---------- 写入 ----------
+
+    def append(self, execution_id: str, entries: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        追加日志条目
+
+        Returns:
+            追加后的日志信息（目录、总大小、行数、分段数）
+        """
+        if not entries:
+            raise ValueError("entries不能为空")
+
+        lines = [
+            (json.dumps(entry, ensure_ascii=False) + "\n").encode("utf-8")
+            for entry in entries
+        ]
+
+        with self._lock:
+            directory = self.log_dir(execution_id)
+            os.makedirs(directory, exist_ok=True)
+            index = self._load_index(execution_id) or {"size": 0, "lines": 0, "segments": []}
+
+            # 按分段上限把本批日志拆成若干块，每块作为一个gzip成员写入
+            pending = []
+            for line in lines:
+                segment = index["segments"][-1] if index["segments"] else None
+                pending_bytes = sum(len(item) for item in pending)
+                if segment is None or (
+                    segment["size"] + pending_bytes > 0
+                    and segment["size"] + pending_bytes + len(line) > self.segment_bytes
+                ):
+                    self._write_member(directory, segment, pending)
+                    pending = []
+                    segment = {
+                        "name": f"segment-{len(index['segments']):06d}.jsonl.gz",
+                        "start": index["size"],
+                        "size": 0,
+                        "lines": 0,
+                    }
+                    index["segments"].append(segment)
+                pending.append(line)
+                index["size"] += len(line)
+                index["lines"] += 1
+            self._write_member(directory, index["segments"][-1], pending)
+
+            self._save_index(execution_id, index)
+            return self._describe(execution_id, index)
+
+    @staticmethod
+    def _write_member(directory: str, segment: Optional[Dict[str, Any]], lines: List[bytes]):
+        if segment is None or not lines:
+            return
+        data = b"".join(lines)
+        with open(os.path.join(directory, segment["name"]), "ab") as f:
+            f.write(gzip.compress(data))
+        segment["size"] += len(data)
+        segment["lines"] += len(lines)
+
+    # ---------- 读取 ----------
+
+    def info(self, execution_id: str) -> Optional[Dict[str, Any]]:
+        """日志概要，没有日志时返回None"""
+        index = self._load_index(execution_id)
+        if index is None:
+            return None
+        return self._describe(execution_id, index)
+
+    def _describe(self, execution_id: str, index: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "path": self.log_dir(execution_id),
+            "size": index["size"],
+            "lines": index["lines"],
+            "segments": len(index["segments"]),
+        }
+
+    def iter_range(self, execution_id: str, start: int = 0, end: Optional[int] = None) -> Iterator[bytes]:
+        """按块产出逻辑字节流中 [start, end) 的内容，只解压涉及的分段"""
+        index = self._load_index(execution_id)
+        if index is None:
+            return
+        end = index["size"] if end is None else min(end, index["size"])
+        directory = self.log_dir(execution_id)
+
+        for segment in index["segments"]:
+            segment_end = segment["start"] + segment["size"]
+            if segment_end <= start or segment["start"] >= end:
+                continue
+            with gzip.open(os.path.join(directory, segment["name"]), "rb") as f:
+                position = max(start, segment["start"])
+                f.seek(position - segment["start"])
+                remaining = min(end, segment_end) - position
+                while remaining > 0:
+                    chunk = f.read(min(remaining, 64 * 1024))
+                    if not chunk:
+                        break
+                    remaining -= len(chunk)
+                    yield chunk
+
+    def read_bytes(self, execution_id: str, start: int, length: int) -> bytes:
+        """读取逻辑字节流中从start开始的length个字节"""
+        if start < 0 or length <= 0:
+            raise ValueError("start必须是非负整数，length必须是正整数")
+        length = min(length, MAX_READ_BYTES)
+        return b"".join(self.iter_range(execution_id, start, start + length))
+
+    def read_entries(self, execution_id: str, offset: int = 0, max_bytes: int = 64 * 1024) -> Optional[Dict[str, Any]]:
+        """
+        从offset开始按行读取日志，结果在行边界截断
+
+        offset必须是行首位置（0或之前返回的next_offset）
+        """
+        if offset < 0 or max_bytes <= 0:
+            raise ValueError("offset必须是非负整数，max_bytes必须是正整数")
+        index = self._load_index(execution_id)
+        if index is None:
+            return None
+
+        size = index["size"]
+        max_bytes = min(max_bytes, MAX_READ_BYTES)
+        data = b"".join(self.iter_range(execution_id, offset, offset + max_bytes))
+        cut = data.rfind(b"\n") + 1
+        if cut == 0 and data:
+            # 单行超过max_bytes时读到该行结束，保证至少前进一行
+            data = b"".join(self.iter_range(execution_id, offset, offset + MAX_READ_BYTES))
+            cut = data.find(b"\n") + 1 or len(data)
+
+        next_offset = offset + cut
+        return {
+            "entries": self._parse_lines(data[:cut]),
+            "offset": offset,
+            "next_offset": next_offset,
+            "size": size,
+            "eof": next_offset >= size,
+        }
+
+    def tail(self, execution_id: str, lines: int = 100) -> Optional[Dict[str, Any]]:
+        """读取最后lines行，从最后一个分段往前解压，直到凑够行数"""
+        if lines <= 0:
+            raise ValueError("lines必须是正整数")
+        index = self._load_index(execution_id)
+        if index is None:
+            return None
+
+        directory = self.log_dir(execution_id)
+        collected: List[bytes] = []
+        offset = index["size"]
+        for segment in reversed(index["segments"]):
+            with gzip.open(os.path.join(directory, segment["name"]), "rb") as f:
+                segment_lines = f.read().splitlines(keepends=True)
+            needed = lines - len(collected)
+            taken = segment_lines[-needed:]
+            collected = taken + collected
+            offset = segment["start"] + segment["size"] - sum(len(line) for line in taken)
+            if len(collected) >= lines:
+                break
+
+        return {
+            "entries": self._parse_lines(b"".join(collected)),
+            "offset": offset,
+            "next_offset": index["size"],
+            "size": index["size"],
+        }
+
+    @staticmethod
+    def _parse_lines(data: bytes) -> List[Dict[str, Any]]:
+        entries = []
+        for line in data.splitlines():
+            if not line.strip():
+                continue
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                entries.append({"message": line.decode("utf-8", errors="replace")})
+        return entries
+
+    # ---------- 保留策略 ----------
+
+    def delete(self, execution_id: str) -> bool:
+        """删除执行的全部日志，随执行记录一起清理"""
+        directory = self.log_dir(execution_id)
+        if not os.path.isdir(directory):
+            return False
+        with self._lock:
+            shutil.rmtree(directory, ignore_errors=True)
+        return True
+
+    def delete_many(self, execution_ids: List[str]) -> int:
+        """批量删除日志，返回实际删除的数量"""
+        deleted = 0
+        for execution_id in execution_ids:
+            try:
+                if self.delete(execution_id):
+                    deleted += 1
+            except Exception as e:
+                logger.warning(f"删除执行日志失败 {execution_id}: {str(e)}")
+        return deleted
+
+
+_execution_log_store = None
+
+
+def get_execution_log_store() -> ExecutionLogStore:
+    """获取执行日志存储实例（单例模式）"""
+    global _execution_log_store
+    if _execution_log_store is None:
+        _execution_log_store = ExecutionLogStore(
+            os.environ.get("EXECUTION_LOG_DIR")
+            or os.path.join(os.getcwd(), "execution_logs"),
+            segment_bytes=int(
+                os.environ.get("EXECUTION_LOG_SEGMENT_BYTES", DEFAULT_SEGMENT_BYTES)
+            ),
+        )
+    return _execution_log_store
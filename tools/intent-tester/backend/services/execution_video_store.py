@@ -0,0 +1,235 @@
+"""
+Execution Video Store - 执行录像存储
+录像模式下执行节点录制整个浏览器上下文的压缩视频，并以时间偏移标记每个步骤的起止；
+查看某个步骤时才从录像中抽取该步骤结束时的关键帧，抽取结果缓存在录像目录中
+"""
+
+import json
+import logging
+import os
+import shutil
+import subprocess
+import threading
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# 执行的截图方式：逐步截图或整段录像
+CAPTURE_MODES = ("screenshot", "video")
+
+# 录像文件大小上限
+MAX_VIDEO_BYTES = 500 * 1024 * 1024
+
+VIDEO_FILE = "video.webm"
+MARKERS_FILE = "markers.json"
+
+# 抽取关键帧的超时时间(秒)
+KEYFRAME_TIMEOUT = 30
+
+
+class KeyframeUnavailableError(RuntimeError):
+    """无法抽取关键帧（未安装ffmpeg或抽取失败）"""
+
+
+def validate_capture_mode(capture_mode: Optional[str]) -> str:
+    """校验截图方式，为空时使用逐步截图"""
+    if capture_mode is None:
+        return "screenshot"
+    if capture_mode not in CAPTURE_MODES:
+        raise ValueError(f"capture_mode必须是: {', '.join(CAPTURE_MODES)}")
+    return capture_mode
+
+
+class ExecutionVideoStore:
+    """
+    执行录像存储
+
+    每个执行一个目录：录像文件、步骤时间标记，以及按需抽取并缓存的关键帧
+    """
+
+    def __init__(self, root_dir: str, ffmpeg_path: Optional[str] = None):
+        self.root_dir = root_dir
+        self.ffmpeg_path = ffmpeg_path
+        self._lock = threading.Lock()
+
+    # ---------- 路径 ----------
+
+    def video_dir(self, execution_id: str) -> str:
+        """执行录像目录，执行ID只保留安全字符避免路径穿越"""
+        safe_id = "".join(c if c.isalnum() or c in "_.-" else "_" for c in execution_id)
+        if not safe_id.strip("."):
+            raise ValueError("execution_id无效")
+        return os.path.join(self.root_dir, safe_id)
+
+    def video_path(self, execution_id: str) -> Optional[str]:
+        """录像文件路径，没有录像时返回None"""
+        path = os.path.join(self.video_dir(execution_id), VIDEO_FILE)
+        return path if os.path.exists(path) else None
+
+    # ---------- 写入 ----------
+
+    @staticmethod
+    def _normalize_markers(markers: Any) -> List[Dict[str, int]]:
+        if not isinstance(markers, list):
+            raise ValueError("steps必须是数组")
+        normalized = {}
+        for marker in markers:
+            if not isinstance(marker, dict):
+                raise ValueError("步骤标记必须是对象")
+            values = [marker.get(key) for key in ("step_index", "start_ms", "end_ms")]
+            if not all(isinstance(v, (int, float)) and v >= 0 for v in values):
+                raise ValueError("步骤标记必须包含非负的step_index、start_ms和end_ms")
+            step_index, start_ms, end_ms = (int(v) for v in values)
+            if end_ms < start_ms:
+                raise ValueError(f"步骤 {step_index} 的end_ms早于start_ms")
+            normalized[step_index] = {
+                "step_index": step_index,
+                "start_ms": start_ms,
+                "end_ms": end_ms,
+            }
+        return [normalized[index] for index in sorted(normalized)]
+
+    def save(
+        self,
+        execution_id: str,
+        video: bytes,
+        markers: Any,
+        duration_ms: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        保存录像及步骤时间标记，替换已有录像和缓存的关键帧
+
+        Returns:
+            录像信息（大小、时长、步骤标记）
+        """
+        if not video:
+            raise ValueError("录像内容不能为空")
+        if len(video) > MAX_VIDEO_BYTES:
+            raise ValueError(f"录像超过{MAX_VIDEO_BYTES // (1024 * 1024)}MB上限")
+        steps = self._normalize_markers(markers)
+
+        directory = self.video_dir(execution_id)
+        info = {
+            "size": len(video),
+            "duration_ms": int(duration_ms) if duration_ms else None,
+            "steps": steps,
+        }
+        with self._lock:
+            shutil.rmtree(directory, ignore_errors=True)
+            os.makedirs(directory, exist_ok=True)
+            with open(os.path.join(directory, VIDEO_FILE), "wb") as f:
+                f.write(video)
+            with open(os.path.join(directory, MARKERS_FILE), "w", encoding="utf-8") as f:
+                json.dump(info, f)
+        return info
+
+    # ---------- 读取 ----------
+
+    def info(self, execution_id: str) -> Optional[Dict[str, Any]]:
+        """录像信息，没有录像时返回None"""
+        path = os.path.join(self.video_dir(execution_id), MARKERS_FILE)
+        if not os.path.exists(path) or not self.video_path(execution_id):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def step_marker(self, execution_id: str, step_index: int) -> Optional[Dict[str, int]]:
+        """步骤的时间标记"""
+        info = self.info(execution_id)
+        if info is None:
+            return None
+        return next(
+            (m for m in info["steps"] if m["step_index"] == step_index), None
+        )
+
+    def keyframe(self, execution_id: str, step_index: int) -> Optional[str]:
+        """
+        获取步骤结束时的关键帧（JPEG）路径，首次查看时从录像中抽取并缓存
+
+        Returns:
+            关键帧文件路径，没有录像或步骤标记时返回None
+        """
+        marker = self.step_marker(execution_id, step_index)
+        if marker is None:
+            return None
+
+        path = os.path.join(self.video_dir(execution_id), f"keyframe-{step_index}.jpg")
+        if os.path.exists(path):
+            return path
+
+        with self._lock:
+            if not os.path.exists(path):
+                tmp_path = path + ".tmp.jpg"
+                self._extract_frame(
+                    self.video_path(execution_id), marker["end_ms"], tmp_path
+                )
+                os.replace(tmp_path, path)
+        return path
+
+    def _ffmpeg(self) -> str:
+        ffmpeg = self.ffmpeg_path or shutil.which("ffmpeg")
+        if not ffmpeg:
+            raise KeyframeUnavailableError("未安装ffmpeg，无法从录像中抽取关键帧")
+        return ffmpeg
+
+    def _extract_frame(self, video_path: str, offset_ms: int, output_path: str):
+        """抽取偏移处的一帧；偏移超出录像末尾时取最后一帧"""
+        ffmpeg = self._ffmpeg()
+        attempts = [
+            ["-ss", f"{offset_ms / 1000:.3f}", "-i", video_path],
+            ["-sseof", "-0.5", "-i", video_path],
+        ]
+        for seek_args in attempts:
+            try:
+                subprocess.run(
+                    [ffmpeg, "-v", "error", "-y", *seek_args,
+                     "-frames:v", "1", "-q:v", "3", output_path],
+                    check=True,
+                    capture_output=True,
+                    timeout=KEYFRAME_TIMEOUT,
+                )
+            except subprocess.CalledProcessError as e:
+                stderr = e.stderr.decode("utf-8", errors="replace").strip()
+                raise KeyframeUnavailableError(f"抽取关键帧失败: {stderr}")
+            except subprocess.TimeoutExpired:
+                raise KeyframeUnavailableError("抽取关键帧超时")
+            if os.path.exists(output_path) and os.path.getsize(output_path) > 0:
+                return
+        raise KeyframeUnavailableError("录像中没有可抽取的画面")
+
+    # ---------- 保留策略 ----------
+
+    def delete(self, execution_id: str) -> bool:
+        """删除执行的录像及关键帧，随执行记录一起清理"""
+        directory = self.video_dir(execution_id)
+        if not os.path.isdir(directory):
+            return False
+        with self._lock:
+            shutil.rmtree(directory, ignore_errors=True)
+        return True
+
+    def delete_many(self, execution_ids: List[str]) -> int:
+        """批量删除录像，返回实际删除的数量"""
+        deleted = 0
+        for execution_id in execution_ids:
+            try:
+                if self.delete(execution_id):
+                    deleted += 1
+            except Exception as e:
+                logger.warning(f"删除执行录像失败 {execution_id}: {str(e)}")
+        return deleted
+
+
+_execution_video_store = None
+
+
+def get_execution_video_store() -> ExecutionVideoStore:
+    """获取执行录像存储实例（单例模式）"""
+    global _execution_video_store
+    if _execution_video_store is None:
+        _execution_video_store = ExecutionVideoStore(
+            os.environ.get("EXECUTION_VIDEO_DIR")
+            or os.path.join(os.getcwd(), "execution_videos"),
+            ffmpeg_path=os.environ.get("FFMPEG_PATH"),
+        )
+    return _execution_video_store
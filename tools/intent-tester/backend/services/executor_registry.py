@@ -0,0 +1,594 @@
+"""
+Executor Registry - 执行节点注册与调度服务
+管理多个MidScene执行节点的注册、心跳、排空，并按剩余容量分发排队中的执行
+"""
+
+import json
+import logging
+import math
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Any
+
+import requests
+
+from backend.models import db, TestCase, ExecutionHistory, ExecutorNode
+from backend.services.fixture_service import get_fixture_service
+from backend.services.execution_coalescer import get_execution_coalescer
+from backend.services.suite_service import get_suite_runner
+from backend.services.dataset_service import get_dataset_runner
+from backend.services.fair_share import get_fair_share_scheduler
+from backend.services.resource_policy import effective_policy
+
+logger = logging.getLogger(__name__)
+
+# 节点状态
+NODE_ACTIVE = "active"
+NODE_DRAINING = "draining"
+NODE_DRAINED = "drained"
+NODE_OFFLINE = "offline"
+
+# 已分发到节点、尚未结束的执行状态
+IN_FLIGHT_STATUSES = ("pending", "running")
+
+# 下发结果：节点接收、节点拒绝（排空中或没有空闲槽位，节点仍在线）、节点不可达（视为失联）
+DISPATCH_SENT = "sent"
+DISPATCH_REJECTED = "rejected"
+DISPATCH_DRAINING = "draining"
+DISPATCH_UNREACHABLE = "unreachable"
+
+
+class ExecutorRegistry:
+    """执行节点注册表和容量感知分发器"""
+
+    def __init__(
+        self,
+        heartbeat_timeout: Optional[int] = None,
+        dispatch_timeout: int = 10,
+    ):
+        """
+        初始化注册表
+
+        Args:
+            heartbeat_timeout: 心跳超时时间（秒），超时的节点视为失联
+            dispatch_timeout: 向节点下发执行请求的HTTP超时时间（秒）
+        """
+        self.heartbeat_timeout = heartbeat_timeout or int(
+            os.getenv("EXECUTOR_HEARTBEAT_TIMEOUT", "30")
+        )
+        self.dispatch_timeout = dispatch_timeout
+        self._dispatch_lock = threading.Lock()
+
+    # ==================== 节点生命周期 ====================
+
+    def register_node(
+        self,
+        node_id: str,
+        server_url: str,
+        total_slots: int = 1,
+        metadata: Optional[Dict] = None,
+    ) -> ExecutorNode:
+        """注册执行节点，重复注册时更新地址和容量并恢复为active"""
+        if not node_id or not server_url:
+            raise ValueError("node_id和server_url不能为空")
+        if total_slots < 1:
+            raise ValueError("total_slots必须大于0")
+
+        node = ExecutorNode.query.filter_by(node_id=node_id).first()
+        if node is None:
+            node = ExecutorNode(node_id=node_id)
+            db.session.add(node)
+
+        node.server_url = server_url.rstrip("/")
+        node.status = NODE_ACTIVE
+        node.total_slots = total_slots
+        node.free_slots = total_slots
+        node.node_metadata = json.dumps(metadata or {}, ensure_ascii=False)
+        node.registered_at = datetime.utcnow()
+        node.last_heartbeat_at = datetime.utcnow()
+        db.session.commit()
+
+        logger.info(f"执行节点已注册: {node_id} -> {node.server_url} ({total_slots} 槽位)")
+        return node
+
+    def heartbeat(
+        self,
+        node_id: str,
+        free_slots: int,
+        cpu_percent: float = 0.0,
+        memory_percent: float = 0.0,
+        running_executions: Optional[List[str]] = None,
+    ) -> ExecutorNode:
+        """处理节点心跳，刷新容量指标"""
+        node = self._get_node(node_id)
+
+        node.free_slots = max(0, min(int(free_slots), node.total_slots))
+        node.cpu_percent = float(cpu_percent or 0.0)
+        node.memory_percent = float(memory_percent or 0.0)
+        node.running_executions = json.dumps(running_executions or [])
+        node.last_heartbeat_at = datetime.utcnow()
+
+        self._reconcile_node_executions(node, running_executions or [])
+
+        if node.status == NODE_OFFLINE:
+            node.status = NODE_ACTIVE
+            logger.info(f"执行节点恢复在线: {node_id}")
+        elif node.status == NODE_DRAINING and node.free_slots >= node.total_slots:
+            node.status = NODE_DRAINED
+            logger.info(f"执行节点排空完成: {node_id}")
+
+        db.session.commit()
+        return node
+
+    def _reconcile_node_executions(self, node: ExecutorNode, running_ids: List[str]):
+        """
+        按心跳上报的运行中执行核对分配关系（调用方负责提交）
+
+        - 节点仍在运行、但已被重新排队且尚未分发的执行，收回到该节点，避免重复执行
+        - 已分配给该节点、分发超过心跳超时仍未开始运行且节点未上报的执行，视为下发丢失，重新排队
+        """
+        running_ids = set(running_ids)
+        if running_ids:
+            for execution in ExecutionHistory.query.filter(
+                ExecutionHistory.execution_id.in_(running_ids),
+                ExecutionHistory.status.in_(IN_FLIGHT_STATUSES),
+            ):
+                if execution.executor_node_id is None:
+                    execution.executor_node_id = node.node_id
+                    execution.dispatched_at = execution.dispatched_at or datetime.utcnow()
+                    logger.info(f"执行仍在节点上运行，取消重新排队: {execution.execution_id} -> {node.node_id}")
+                elif execution.executor_node_id != node.node_id:
+                    logger.warning(
+                        f"执行同时在两个节点上运行: {execution.execution_id} "
+                        f"({execution.executor_node_id}, {node.node_id})"
+                    )
+
+        cutoff = datetime.utcnow() - timedelta(seconds=self.heartbeat_timeout)
+        lost = ExecutionHistory.query.filter(
+            ExecutionHistory.executor_node_id == node.node_id,
+            ExecutionHistory.status == "pending",
+            ExecutionHistory.dispatched_at < cutoff,
+        ).all()
+        for execution in lost:
+            if execution.execution_id in running_ids:
+                continue
+            execution.executor_node_id = None
+            execution.dispatched_at = None
+            execution.requeue_count = (execution.requeue_count or 0) + 1
+            logger.warning(f"节点未运行已分发的执行，重新排队: {execution.execution_id} ({node.node_id})")
+
+    def drain_node(self, node_id: str) -> ExecutorNode:
+        """排空节点：不再分配新执行，运行中的执行继续完成"""
+        node = self._get_node(node_id)
+        if node.status in (NODE_ACTIVE, NODE_DRAINING):
+            node.status = (
+                NODE_DRAINED if node.free_slots >= node.total_slots else NODE_DRAINING
+            )
+            db.session.commit()
+            logger.info(f"执行节点开始排空: {node_id} -> {node.status}")
+        return node
+
+    def resume_node(self, node_id: str) -> ExecutorNode:
+        """取消排空，重新接收执行"""
+        node = self._get_node(node_id)
+        if node.status in (NODE_DRAINING, NODE_DRAINED):
+            node.status = NODE_ACTIVE
+            db.session.commit()
+            logger.info(f"执行节点恢复接收任务: {node_id}")
+        return node
+
+    def release_node(self, node_id: str) -> List[str]:
+        """
+        节点退出前交还未完成的执行：重新排队由其他节点执行，节点标记为离线
+
+        Returns:
+            重新排队的执行ID列表
+        """
+        node = self._get_node(node_id)
+        requeued = self._requeue_node_executions(node_id)
+        node.status = NODE_OFFLINE
+        node.free_slots = 0
+        db.session.commit()
+        logger.info(f"执行节点退出并交还 {len(requeued)} 个执行: {node_id}")
+        return requeued
+
+    def list_nodes(self, status: Optional[str] = None) -> List[ExecutorNode]:
+        """列出节点"""
+        query = ExecutorNode.query
+        if status:
+            query = query.filter_by(status=status)
+        return query.order_by(ExecutorNode.node_id).all()
+
+    # ==================== 容量与选择 ====================
+
+    @staticmethod
+    def headroom(node: ExecutorNode) -> float:
+        """
+        计算节点剩余容量分数
+
+        空闲槽位比例按CPU和内存中较高的负载折算，没有空闲槽位时为0
+        """
+        if not node.total_slots or (node.free_slots or 0) <= 0:
+            return 0.0
+        slot_ratio = node.free_slots / node.total_slots
+        load = max(node.cpu_percent or 0.0, node.memory_percent or 0.0) / 100.0
+        return slot_ratio * max(0.0, 1.0 - load)
+
+    def select_node(
+        self, now: Optional[datetime] = None, exclude: Optional[set] = None
+    ) -> Optional[ExecutorNode]:
+        """选择剩余容量最大的在线节点，exclude为本轮已拒绝执行的节点"""
+        cutoff = (now or datetime.utcnow()) - timedelta(seconds=self.heartbeat_timeout)
+        candidates = [
+            node
+            for node in ExecutorNode.query.filter_by(status=NODE_ACTIVE).all()
+            if node.node_id not in (exclude or ())
+            and (node.free_slots or 0) > 0
+            and node.last_heartbeat_at
+            and node.last_heartbeat_at >= cutoff
+        ]
+        if not candidates:
+            return None
+
+        return max(
+            candidates,
+            key=lambda node: (self.headroom(node), node.free_slots, node.node_id),
+        )
+
+    # ==================== 容量信号 ====================
+
+    def capacity(self, now: Optional[datetime] = None, window_minutes: int = 15) -> Dict[str, Any]:
+        """
+        自动扩缩容信号：排队和运行中的执行数、空闲槽位、最近的平均排队等待和积压清空预测
+
+        desired_slots为在目标时间内清空积压所需的槽位数，不少于运行中的执行数
+        """
+        now = now or datetime.utcnow()
+        cutoff = now - timedelta(seconds=self.heartbeat_timeout)
+        nodes = ExecutorNode.query.all()
+        online = [
+            node
+            for node in nodes
+            if node.status == NODE_ACTIVE
+            and node.last_heartbeat_at
+            and node.last_heartbeat_at >= cutoff
+        ]
+        node_counts = {}
+        for node in nodes:
+            node_counts[node.status] = node_counts.get(node.status, 0) + 1
+        total_slots = sum(node.total_slots or 0 for node in online)
+
+        scheduler = get_fair_share_scheduler()
+        running = scheduler.in_flight().all()
+        queued = ExecutionHistory.query.filter(
+            ExecutionHistory.status == "pending",
+            ExecutionHistory.executor_node_id.is_(None),
+        ).all()
+        durations = scheduler.predict_seconds(running + queued)
+
+        # 积压工作量：运行中执行的预测剩余耗时加上排队执行的预测耗时
+        work = sum(durations[e.id] for e in queued) + sum(
+            max(
+                0.0,
+                durations[e.id] - (now - (e.dispatched_at or e.start_time or now)).total_seconds(),
+            )
+            for e in running
+        )
+        target = float(os.getenv("EXECUTOR_TARGET_DRAIN_SECONDS", "300"))
+
+        waits = [
+            (dispatched_at - created_at).total_seconds()
+            for created_at, dispatched_at in ExecutionHistory.query.filter(
+                ExecutionHistory.dispatched_at >= now - timedelta(minutes=window_minutes),
+                ExecutionHistory.created_at.isnot(None),
+            ).with_entities(ExecutionHistory.created_at, ExecutionHistory.dispatched_at)
+        ]
+        oldest = min((e.created_at for e in queued if e.created_at), default=None)
+        draining = {node.node_id for node in nodes if node.status == NODE_DRAINING}
+
+        return {
+            "queued": len(queued),
+            "running": len(running),
+            "total_slots": total_slots,
+            "free_slots": sum(node.free_slots or 0 for node in online),
+            "nodes": node_counts,
+            "draining_executions": sum(1 for e in running if e.executor_node_id in draining),
+            "avg_queue_wait_seconds": round(sum(waits) / len(waits), 1) if waits else None,
+            "oldest_queued_seconds": (
+                round((now - oldest).total_seconds(), 1) if oldest else None
+            ),
+            "backlog_seconds": round(work, 1),
+            "predicted_drain_seconds": round(work / total_slots, 1) if total_slots else None,
+            "target_drain_seconds": target,
+            "desired_slots": max(len(running), math.ceil(work / target)) if work else len(running),
+            "window_minutes": window_minutes,
+        }
+
+    # ==================== 失联处理 ====================
+
+    def reap_stale_nodes(self, now: Optional[datetime] = None) -> List[str]:
+        """
+        将心跳超时的节点标记为离线，并把其上未结束的执行重新排队
+
+        Returns:
+            重新排队的执行ID列表
+        """
+        cutoff = (now or datetime.utcnow()) - timedelta(seconds=self.heartbeat_timeout)
+        stale_nodes = ExecutorNode.query.filter(
+            ExecutorNode.status != NODE_OFFLINE,
+            ExecutorNode.last_heartbeat_at < cutoff,
+        ).all()
+
+        requeued = []
+        for node in stale_nodes:
+            logger.warning(
+                f"执行节点心跳超时，标记为离线: {node.node_id} "
+                f"(最后心跳: {node.last_heartbeat_at})"
+            )
+            node.status = NODE_OFFLINE
+            node.free_slots = 0
+            requeued.extend(self._requeue_node_executions(node.node_id))
+
+        if stale_nodes:
+            db.session.commit()
+        return requeued
+
+    def _requeue_node_executions(self, node_id: str) -> List[str]:
+        """将节点上未结束的执行重置为pending（调用方负责提交）"""
+        executions = ExecutionHistory.query.filter(
+            ExecutionHistory.executor_node_id == node_id,
+            ExecutionHistory.status.in_(IN_FLIGHT_STATUSES),
+        ).all()
+
+        for execution in executions:
+            execution.status = "pending"
+            execution.executor_node_id = None
+            execution.dispatched_at = None
+            execution.requeue_count = (execution.requeue_count or 0) + 1
+            logger.info(
+                f"执行已重新排队: {execution.execution_id} "
+                f"(第 {execution.requeue_count} 次, 原节点: {node_id})"
+            )
+
+        return [execution.execution_id for execution in executions]
+
+    # ==================== 分发 ====================
+
+    def _next_pending_executions(self, limit: int) -> List[ExecutionHistory]:
+        """获取等待分发的执行，按租户加权公平排队，同一租户内先进先出、套件内按排队顺序"""
+        return get_fair_share_scheduler().order_pending(limit)
+
+    def expire_overdue(self, now: Optional[datetime] = None) -> List[str]:
+        """
+        将超过截止时间仍未分发的执行标记为失败，不再占用节点
+
+        Returns:
+            过期的execution_id列表
+        """
+        now = now or datetime.utcnow()
+        overdue = ExecutionHistory.query.filter(
+            ExecutionHistory.status == "pending",
+            ExecutionHistory.executor_node_id.is_(None),
+            ExecutionHistory.deadline_at.isnot(None),
+            ExecutionHistory.deadline_at <= now,
+        ).all()
+
+        for execution in overdue:
+            execution.status = "failed"
+            execution.end_time = now
+            execution.error_message = "执行超过截止时间，排队期间未能分发到执行节点"
+            get_execution_coalescer().propagate_result(execution)
+            get_suite_runner().record_result(execution)
+            get_dataset_runner().record_result(execution)
+            logger.warning(f"执行超过截止时间未分发: {execution.execution_id}")
+
+        if overdue:
+            db.session.commit()
+        return [execution.execution_id for execution in overdue]
+
+    def dispatch_pending(self, limit: int = 50) -> List[Dict[str, Any]]:
+        """
+        将排队中的执行分发到剩余容量最大的节点
+
+        Returns:
+            分发结果列表 [{"execution_id", "node_id"}]
+        """
+        dispatched = []
+        # 本轮拒绝执行或不可达的节点，不再向其下发
+        skipped = set()
+        with self._dispatch_lock:
+            for execution in self._next_pending_executions(limit):
+                testcase = TestCase.query.get(execution.test_case_id)
+                if testcase is None:
+                    execution.status = "failed"
+                    execution.end_time = datetime.utcnow()
+                    execution.error_message = "测试用例不存在"
+                    db.session.commit()
+                    continue
+
+                node = self._dispatch_execution(execution, testcase, skipped)
+                if node is None:
+                    logger.debug("没有可用的执行节点，剩余执行继续排队")
+                    break
+
+                dispatched.append(
+                    {"execution_id": execution.execution_id, "node_id": node.node_id}
+                )
+                logger.info(f"执行已分发: {execution.execution_id} -> {node.node_id}")
+
+        return dispatched
+
+    def _dispatch_execution(
+        self, execution: ExecutionHistory, testcase: TestCase, skipped: set
+    ) -> Optional[ExecutorNode]:
+        """
+        依次尝试剩余容量最大的节点，返回接收执行的节点；没有节点接收时执行留在队列中
+
+        节点拒绝（排空中、没有空闲槽位）只在本轮跳过该节点，节点上运行中的执行不受影响；
+        只有连接失败才视为节点失联，标记离线并把其上的执行重新排队
+        """
+        while True:
+            node = self.select_node(exclude=skipped)
+            if node is None:
+                return None
+
+            result = self._send_to_node(node, execution, testcase)
+            if result == DISPATCH_SENT:
+                execution.executor_node_id = node.node_id
+                execution.dispatched_at = datetime.utcnow()
+                # 在下次心跳前先本地扣减槽位，避免同一轮把多个执行压到同一节点
+                node.free_slots = max(0, (node.free_slots or 0) - 1)
+                db.session.commit()
+                return node
+
+            skipped.add(node.node_id)
+            if result == DISPATCH_DRAINING:
+                # 节点已开始排空但Web系统没有收到排空通知，按节点的回复补记排空状态
+                self.drain_node(node.node_id)
+            elif result == DISPATCH_UNREACHABLE:
+                node.status = NODE_OFFLINE
+                node.free_slots = 0
+                self._requeue_node_executions(node.node_id)
+                db.session.commit()
+
+    def build_dispatch_payload(
+        self, execution: ExecutionHistory, testcase: TestCase
+    ) -> Dict[str, Any]:
+        """构造下发到MidScene服务器的执行请求"""
+        payload = {
+            "execution_id": execution.execution_id,
+            "testcase": testcase.to_dict(include_stats=False),
+            "mode": execution.mode or "headless",
+            "enable_cache": True,
+        }
+        # 下发剩余预算而不是绝对时间，避免节点时钟偏差
+        remaining_ms = execution.remaining_budget_ms()
+        if remaining_ms is not None:
+            payload["deadline_ms"] = remaining_ms
+        # 引用前置夹具时附带夹具步骤及有效快照，节点可直接恢复登录状态
+        setup_fixture = get_fixture_service().resolve_for_testcase(testcase)
+        if setup_fixture:
+            payload["testcase"]["setup_fixture"] = setup_fixture
+        # 套件运行和用例的资源拦截策略合并后下发
+        resource_policy = effective_policy(execution, testcase)
+        if resource_policy:
+            payload["resource_policy"] = resource_policy
+        # 数据驱动运行的子执行附带本行数据，节点在执行开始前注入为变量
+        if execution.dataset_row:
+            payload["variables"] = json.loads(execution.dataset_row)
+        return payload
+
+    def _send_to_node(
+        self, node: ExecutorNode, execution: ExecutionHistory, testcase: TestCase
+    ) -> str:
+        """
+        向节点下发执行请求
+
+        Returns:
+            DISPATCH_SENT / DISPATCH_REJECTED / DISPATCH_DRAINING / DISPATCH_UNREACHABLE；
+            响应超时时节点可能已经开始执行，按已下发处理，由心跳核对纠正
+        """
+        try:
+            response = requests.post(
+                f"{node.server_url}/api/execute-testcase",
+                json=self.build_dispatch_payload(execution, testcase),
+                timeout=self.dispatch_timeout,
+            )
+        except requests.exceptions.ReadTimeout:
+            logger.warning(f"节点响应超时，按已下发处理: {node.node_id}")
+            return DISPATCH_SENT
+        except requests.exceptions.RequestException as e:
+            logger.error(f"下发执行到节点失败: {node.node_id}, 错误: {str(e)}")
+            return DISPATCH_UNREACHABLE
+
+        if response.status_code != 200:
+            logger.warning(f"节点拒绝执行请求: {node.node_id} 返回 {response.status_code}")
+            try:
+                node_status = response.json().get("node_status")
+            except ValueError:
+                node_status = None
+            if node_status in (NODE_DRAINING, NODE_DRAINED):
+                return DISPATCH_DRAINING
+            return DISPATCH_REJECTED
+        return DISPATCH_SENT
+
+    def delete_event_logs(self, execution_ids: List[str]) -> int:
+        """
+        通知未失联的节点删除已清理执行的事件日志
+
+        事件日志保存在执行所在节点本地，节点失联时由其自身的保留期清理
+
+        Returns:
+            各节点实际删除的事件日志文件数之和
+        """
+        if not execution_ids:
+            return 0
+        deleted = 0
+        for node in ExecutorNode.query.filter(ExecutorNode.status != NODE_OFFLINE).all():
+            try:
+                response = requests.post(
+                    f"{node.server_url}/api/execution-events/delete",
+                    json={"execution_ids": execution_ids},
+                    timeout=self.dispatch_timeout,
+                )
+                response.raise_for_status()
+                deleted += response.json().get("deleted", 0)
+            except (requests.exceptions.RequestException, ValueError) as e:
+                logger.warning(f"通知节点删除执行事件日志失败: {node.node_id}, 错误: {str(e)}")
+        return deleted
+
+    def run_once(self) -> Dict[str, Any]:
+        """执行一轮失联检测、数据驱动运行补充和分发"""
+        requeued = self.reap_stale_nodes()
+        expired = self.expire_overdue()
+        rows_queued = get_dataset_runner().advance_running()
+        dispatched = self.dispatch_pending()
+        return {
+            "requeued": requeued,
+            "expired": expired,
+            "rows_queued": rows_queued,
+            "dispatched": dispatched,
+        }
+
+    def _get_node(self, node_id: str) -> ExecutorNode:
+        node = ExecutorNode.query.filter_by(node_id=node_id).first()
+        if node is None:
+            raise ValueError(f"执行节点不存在: {node_id}")
+        return node
+
+
+# 全局注册表实例
+_executor_registry = None
+
+
+def get_executor_registry() -> ExecutorRegistry:
+    """获取执行节点注册表实例（单例模式）"""
+    global _executor_registry
+    if _executor_registry is None:
+        _executor_registry = ExecutorRegistry()
+    return _executor_registry
+
+
+def start_dispatch_loop(app, interval: Optional[float] = None) -> threading.Thread:
+    """启动后台分发线程，周期性地回收失联节点并分发排队中的执行"""
+    interval = interval or float(os.getenv("EXECUTOR_DISPATCH_INTERVAL", "2"))
+    stop_event = threading.Event()
+
+    def dispatch_loop():
+        registry = get_executor_registry()
+        while not stop_event.wait(interval):
+            try:
+                with app.app_context():
+                    registry.run_once()
+            except Exception as e:
+                logger.error(f"执行分发循环异常: {str(e)}")
+                with app.app_context():
+                    db.session.rollback()
+
+    thread = threading.Thread(target=dispatch_loop, name="executor-dispatch")
+    thread.daemon = True
+    thread.stop_event = stop_event
+    thread.start()
+    logger.info(f"执行分发线程已启动，间隔 {interval}s")
+    return thread
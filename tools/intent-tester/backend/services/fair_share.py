@@ -0,0 +1,343 @@
+"""
+Fair Share Scheduler - 租户公平调度服务
+执行按租户（团队/项目）打标签，分发时按加权公平排队（WFQ）在租户之间分配执行槽位：
+每个有排队任务的租户按权重获得保证份额，空闲租户的份额由其他租户借用，
+设置了并发上限的租户达到上限后暂停分发；同一租户内保持原有的先进先出和套件排队顺序
+"""
+
+import heapq
+import logging
+from collections import defaultdict, deque
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from backend.models import db, TestCase, ExecutionHistory, TenantShare
+from backend.services.duration_predictor import get_duration_predictor
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TENANT = "default"
+DEFAULT_WEIGHT = 1.0
+MAX_TENANT_LENGTH = 100
+
+# 预估开始时间时最多模拟的排队执行数
+MAX_SIMULATED_EXECUTIONS = 5000
+
+
+def resolve_tenant(data: Optional[Dict[str, Any]], testcase: Optional[TestCase] = None) -> str:
+    """执行的租户：请求中指定的租户优先，其次是用例所属租户"""
+    tenant = (data or {}).get("tenant") or (testcase.tenant if testcase else None)
+    if tenant is None:
+        return DEFAULT_TENANT
+    if not isinstance(tenant, str) or not tenant.strip() or len(tenant) > MAX_TENANT_LENGTH:
+        raise ValueError(f"tenant必须是1-{MAX_TENANT_LENGTH}个字符的字符串")
+    return tenant.strip()
+
+
+class FairShareScheduler:
+    """加权公平排队调度器"""
+
+    # ==================== 份额配置 ====================
+
+    @staticmethod
+    def list_shares() -> List[TenantShare]:
+        return TenantShare.query.order_by(TenantShare.tenant).all()
+
+    @staticmethod
+    def set_share(tenant: str, data: Dict[str, Any]) -> TenantShare:
+        """创建或更新租户份额"""
+        tenant = resolve_tenant({"tenant": tenant})
+        weight = data.get("weight", DEFAULT_WEIGHT)
+        if isinstance(weight, bool) or not isinstance(weight, (int, float)) or weight <= 0:
+            raise ValueError("weight必须是大于0的数字")
+        max_concurrency = data.get("max_concurrency")
+        if max_concurrency is not None and (
+            isinstance(max_concurrency, bool)
+            or not isinstance(max_concurrency, int)
+            or max_concurrency < 1
+        ):
+            raise ValueError("max_concurrency必须是大于0的整数")
+
+        share = TenantShare.query.filter_by(tenant=tenant).first()
+        if share is None:
+            share = TenantShare(tenant=tenant)
+            db.session.add(share)
+        share.weight = float(weight)
+        share.max_concurrency = max_concurrency
+        if "description" in data:
+            share.description = data["description"]
+        db.session.commit()
+        logger.info(f"租户份额已更新: {tenant}, 权重 {weight}, 并发上限 {max_concurrency}")
+        return share
+
+    @staticmethod
+    def delete_share(tenant: str) -> bool:
+        """删除租户份额配置，之后按默认权重调度"""
+        share = TenantShare.query.filter_by(tenant=tenant).first()
+        if share is None:
+            return False
+        db.session.delete(share)
+        db.session.commit()
+        return True
+
+    @staticmethod
+    def _share_settings() -> Dict[str, Dict[str, Any]]:
+        return {
+            share.tenant: {
+                "weight": share.weight or DEFAULT_WEIGHT,
+                "max_concurrency": share.max_concurrency,
+            }
+            for share in TenantShare.query.all()
+        }
+
+    @staticmethod
+    def _settings_for(settings: Dict[str, Dict[str, Any]], tenant: str) -> Dict[str, Any]:
+        return settings.get(tenant, {"weight": DEFAULT_WEIGHT, "max_concurrency": None})
+
+    # ==================== 队列 ====================
+
+    @staticmethod
+    def in_flight():
+        """已分发到节点或正在运行的执行"""
+        return ExecutionHistory.query.filter(
+            db.or_(
+                ExecutionHistory.status == "running",
+                db.and_(
+                    ExecutionHistory.status == "pending",
+                    ExecutionHistory.executor_node_id.isnot(None),
+                ),
+            )
+        )
+
+    def running_counts(self) -> Dict[str, int]:
+        """各租户正在占用槽位的执行数"""
+        counts = defaultdict(int)
+        for tenant, count in (
+            self.in_flight()
+            .with_entities(ExecutionHistory.tenant, db.func.count(ExecutionHistory.id))
+            .group_by(ExecutionHistory.tenant)
+        ):
+            counts[tenant or DEFAULT_TENANT] += count
+        return counts
+
+    @staticmethod
+    def _pending():
+        """等待分发的执行，按创建时间先进先出，同一套件内按排队顺序"""
+        return (
+            ExecutionHistory.query.filter(
+                ExecutionHistory.status == "pending",
+                ExecutionHistory.executor_node_id.is_(None),
+            )
+            .order_by(
+                ExecutionHistory.created_at.asc(),
+                ExecutionHistory.queue_position.asc(),
+                ExecutionHistory.id.asc(),
+            )
+            .all()
+        )
+
+    def order_pending(self, limit: Optional[int] = None) -> List[ExecutionHistory]:
+        """
+        按加权公平排队确定分发顺序
+
+        每次取 (占用数+1)/权重 最小的租户的下一个执行，相同时先取排队更早的；
+        达到并发上限的租户本轮不再分发
+        """
+        queues = defaultdict(deque)
+        for execution in self._pending():
+            queues[execution.tenant or DEFAULT_TENANT].append(execution)
+
+        settings = self._share_settings()
+        assigned = self.running_counts()
+
+        heap = []
+        for tenant, queue in queues.items():
+            heapq.heappush(heap, self._tag(tenant, queue, assigned, settings))
+
+        ordered = []
+        while heap and (limit is None or len(ordered) < limit):
+            _, _, _, tenant = heapq.heappop(heap)
+            cap = self._settings_for(settings, tenant)["max_concurrency"]
+            if cap is not None and assigned[tenant] >= cap:
+                continue
+            ordered.append(queues[tenant].popleft())
+            assigned[tenant] += 1
+            if queues[tenant]:
+                heapq.heappush(heap, self._tag(tenant, queues[tenant], assigned, settings))
+        return ordered
+
+    def _tag(self, tenant, queue, assigned, settings):
+        head = queue[0]
+        weight = self._settings_for(settings, tenant)["weight"]
+        return ((assigned[tenant] + 1) / weight, head.created_at or datetime.min, head.id, tenant)
+
+    # ==================== 队列状态 ====================
+
+    def predict_seconds(self, executions: List[ExecutionHistory]) -> Dict[int, float]:
+        """执行的预测耗时：套件运行已有预测时直接使用，否则按用例预测"""
+        missing = {e.test_case_id for e in executions if not e.predicted_duration}
+        predictions = {}
+        if missing:
+            testcases = TestCase.query.filter(TestCase.id.in_(missing)).all()
+            predictions = get_duration_predictor().predict(testcases)
+        return {
+            execution.id: float(
+                execution.predicted_duration
+                or predictions.get(execution.test_case_id, {}).get("seconds", 0.0)
+            )
+            for execution in executions
+        }
+
+    def queue_status(
+        self, tenant: Optional[str] = None, now: Optional[datetime] = None
+    ) -> Dict[str, Any]:
+        """
+        各租户的份额、占用和排队情况，以及每个排队执行的位置和预估开始时间
+
+        预估开始时间按当前槽位总数和预测耗时模拟加权公平分发得到
+        """
+        # 套件服务创建执行时依赖本模块，为了避免循环导入，函数内部导入
+        from backend.services.suite_service import get_suite_runner
+
+        now = now or datetime.utcnow()
+        capacity = get_suite_runner().available_slots()
+        settings = self._share_settings()
+        running = self.in_flight().all()
+        pending = self._pending()[:MAX_SIMULATED_EXECUTIONS]
+        durations = self.predict_seconds(running + pending)
+
+        # 每个槽位的空闲时刻（相对现在的秒数），正在运行的执行按预测剩余耗时占用
+        remaining = sorted(
+            (
+                max(
+                    0.0,
+                    durations[e.id]
+                    - ((now - (e.dispatched_at or e.start_time or now)).total_seconds()),
+                ),
+                e.tenant or DEFAULT_TENANT,
+            )
+            for e in running
+        )
+        slots = [end for end, _ in remaining[:capacity]] + [0.0] * max(0, capacity - len(remaining))
+        heapq.heapify(slots)
+        # 各租户占用中的执行的结束时刻（最小堆），模拟时间只会前进，已结束的直接弹出
+        tenant_ends = defaultdict(list)
+        for end, owner in remaining:
+            heapq.heappush(tenant_ends[owner], end)
+
+        queues = defaultdict(deque)
+        for execution in pending:
+            queues[execution.tenant or DEFAULT_TENANT].append(execution)
+
+        def occupied(owner, at):
+            ends = tenant_ends[owner]
+            while ends and ends[0] <= at:
+                heapq.heappop(ends)
+            return len(ends)
+
+        estimates = []
+        while any(queues.values()):
+            at = heapq.heappop(slots)
+            candidates = []
+            for owner, queue in queues.items():
+                if not queue:
+                    continue
+                owner_settings = self._settings_for(settings, owner)
+                count = occupied(owner, at)
+                cap = owner_settings["max_concurrency"]
+                if cap is not None and count >= cap:
+                    continue
+                head = queue[0]
+                candidates.append(
+                    ((count + 1) / owner_settings["weight"], head.created_at or datetime.min, head.id, owner)
+                )
+
+            if not candidates:
+                # 有排队的租户都已达到上限，等到其中最早结束的执行
+                heapq.heappush(
+                    slots, min(tenant_ends[owner][0] for owner, queue in queues.items() if queue)
+                )
+                continue
+
+            owner = min(candidates)[3]
+            execution = queues[owner].popleft()
+            end = at + durations[execution.id]
+            heapq.heappush(slots, end)
+            heapq.heappush(tenant_ends[owner], end)
+            estimates.append((execution, at))
+
+        tenant_positions = defaultdict(int)
+        items = []
+        for position, (execution, start) in enumerate(estimates):
+            owner = execution.tenant or DEFAULT_TENANT
+            tenant_positions[owner] += 1
+            if tenant and owner != tenant:
+                continue
+            items.append(
+                {
+                    "execution_id": execution.execution_id,
+                    "test_case_id": execution.test_case_id,
+                    "tenant": owner,
+                    "suite_run_id": execution.suite_run_id,
+                    "dataset_run_id": execution.dataset_run_id,
+                    "position": position + 1,
+                    "tenant_position": tenant_positions[owner],
+                    "estimated_wait_seconds": round(start, 1),
+                    "estimated_start_at": (now + timedelta(seconds=start)).strftime(
+                        "%Y-%m-%dT%H:%M:%S.%fZ"
+                    ),
+                }
+            )
+
+        return {
+            "capacity": capacity,
+            "tenants": self._tenant_summary(settings, running, pending, capacity, tenant),
+            "items": items,
+        }
+
+    def _tenant_summary(self, settings, running, pending, capacity, only=None):
+        running_counts = defaultdict(int)
+        for execution in running:
+            running_counts[execution.tenant or DEFAULT_TENANT] += 1
+        queued_counts = defaultdict(int)
+        for execution in pending:
+            queued_counts[execution.tenant or DEFAULT_TENANT] += 1
+
+        # 保证份额按当前有任务的租户的权重分配，空闲租户不占份额
+        active = set(running_counts) | set(queued_counts)
+        total_weight = sum(self._settings_for(settings, t)["weight"] for t in active)
+
+        summary = []
+        for tenant in sorted(active | set(settings)):
+            if only and tenant != only:
+                continue
+            tenant_settings = self._settings_for(settings, tenant)
+            fair_slots = (
+                capacity * tenant_settings["weight"] / total_weight if tenant in active else 0.0
+            )
+            if tenant_settings["max_concurrency"] is not None:
+                fair_slots = min(fair_slots, tenant_settings["max_concurrency"])
+            summary.append(
+                {
+                    "tenant": tenant,
+                    "weight": tenant_settings["weight"],
+                    "max_concurrency": tenant_settings["max_concurrency"],
+                    "fair_slots": round(fair_slots, 2),
+                    "running": running_counts[tenant],
+                    "queued": queued_counts[tenant],
+                    "borrowed": max(0, round(running_counts[tenant] - fair_slots, 2)),
+                }
+            )
+        return summary
+
+
+# 全局公平调度器实例
+_fair_share_scheduler = None
+
+
+def get_fair_share_scheduler() -> FairShareScheduler:
+    """获取公平调度器实例（单例模式）"""
+    global _fair_share_scheduler
+    if _fair_share_scheduler is None:
+        _fair_share_scheduler = FairShareScheduler()
+    return _fair_share_scheduler
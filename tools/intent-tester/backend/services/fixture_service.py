@@ -0,0 +1,162 @@
+"""
+Fixture Service - 前置夹具快照服务
+管理可复用的前置步骤（登录、导航等），缓存其执行后的浏览器存储状态快照，
+引用夹具的测试用例从快照恢复而不是重放这些步骤
+"""
+
+import json
+import logging
+from datetime import datetime
+from typing import Dict, Optional, Any
+
+from backend.models import db, SetupFixture
+
+logger = logging.getLogger(__name__)
+
+# 快照有效期上限（秒）
+MAX_TTL_SECONDS = 7 * 86400
+
+
+class FixtureService:
+    """前置夹具服务"""
+
+    @staticmethod
+    def _validate_steps(steps):
+        if not isinstance(steps, list) or not steps:
+            raise ValueError("夹具步骤必须是非空数组")
+        for index, step in enumerate(steps):
+            if not isinstance(step, dict) or not step.get("action"):
+                raise ValueError(f"夹具步骤 {index + 1} 缺少action字段")
+
+    @staticmethod
+    def _validate_ttl(ttl):
+        if not isinstance(ttl, int) or ttl <= 0 or ttl > MAX_TTL_SECONDS:
+            raise ValueError(f"ttl_seconds必须是1-{MAX_TTL_SECONDS}之间的整数")
+
+    def create_fixture(self, data: Dict[str, Any]) -> SetupFixture:
+        """创建前置夹具"""
+        if not data.get("name"):
+            raise ValueError("夹具名称不能为空")
+        if SetupFixture.query.filter_by(name=data["name"]).first():
+            raise ValueError(f"夹具名称已存在: {data['name']}")
+        self._validate_steps(data.get("steps"))
+        ttl = data.get("ttl_seconds", 3600)
+        self._validate_ttl(ttl)
+
+        fixture = SetupFixture(
+            name=data["name"],
+            description=data.get("description", ""),
+            steps=json.dumps(data["steps"], ensure_ascii=False),
+            ttl_seconds=ttl,
+            created_by=data.get("created_by", "user"),
+        )
+        db.session.add(fixture)
+        db.session.commit()
+        return fixture
+
+    def update_fixture(self, fixture: SetupFixture, data: Dict[str, Any]) -> SetupFixture:
+        """更新前置夹具，步骤变化时丢弃已有快照"""
+        if "name" in data and data["name"] != fixture.name:
+            if not data["name"]:
+                raise ValueError("夹具名称不能为空")
+            if SetupFixture.query.filter_by(name=data["name"]).first():
+                raise ValueError(f"夹具名称已存在: {data['name']}")
+            fixture.name = data["name"]
+        if "description" in data:
+            fixture.description = data["description"]
+        if "ttl_seconds" in data:
+            self._validate_ttl(data["ttl_seconds"])
+            fixture.ttl_seconds = data["ttl_seconds"]
+        if "steps" in data:
+            self._validate_steps(data["steps"])
+            previous_revision = fixture.revision
+            fixture.steps = json.dumps(data["steps"], ensure_ascii=False)
+            if fixture.revision != previous_revision:
+                self.invalidate(fixture, commit=False)
+
+        db.session.commit()
+        return fixture
+
+    @staticmethod
+    def invalidate(fixture: SetupFixture, commit: bool = True):
+        """丢弃夹具快照"""
+        fixture.snapshot_state = None
+        fixture.snapshot_url = None
+        fixture.snapshot_revision = None
+        fixture.captured_at = None
+        if commit:
+            db.session.commit()
+        logger.info(f"夹具快照已失效: {fixture.name}")
+
+    def store_snapshot(
+        self,
+        fixture: SetupFixture,
+        storage_state: Dict[str, Any],
+        url: Optional[str],
+        revision: str,
+    ) -> SetupFixture:
+        """
+        保存执行节点上报的快照
+
+        执行期间夹具步骤被修改时，节点上报的修订号与当前不一致，快照直接丢弃
+        """
+        if not isinstance(storage_state, dict):
+            raise ValueError("storage_state必须是对象")
+        if revision != fixture.revision:
+            raise ValueError(
+                f"夹具步骤已变更，快照修订号 {revision} 与当前 {fixture.revision} 不一致"
+            )
+
+        fixture.snapshot_state = json.dumps(storage_state, ensure_ascii=False)
+        fixture.snapshot_url = url
+        fixture.snapshot_revision = revision
+        fixture.captured_at = datetime.utcnow()
+        db.session.commit()
+        logger.info(f"夹具快照已保存: {fixture.name} (修订号 {revision})")
+        return fixture
+
+    def resolve(self, fixture: SetupFixture, count_hit: bool = True) -> Dict[str, Any]:
+        """
+        生成下发给执行节点的夹具信息
+
+        快照有效时附带快照，节点直接恢复；否则节点执行夹具步骤并回传新快照
+        """
+        snapshot = None
+        if fixture.has_valid_snapshot():
+            snapshot = {
+                "storage_state": json.loads(fixture.snapshot_state),
+                "url": fixture.snapshot_url,
+                "captured_at": fixture.captured_at.strftime("%Y-%m-%dT%H:%M:%S.%fZ"),
+            }
+            if count_hit:
+                fixture.hit_count = (fixture.hit_count or 0) + 1
+                db.session.commit()
+
+        return {
+            "id": fixture.id,
+            "name": fixture.name,
+            "revision": fixture.revision,
+            "steps": json.loads(fixture.steps) if fixture.steps else [],
+            "snapshot": snapshot,
+        }
+
+    def resolve_for_testcase(self, testcase) -> Optional[Dict[str, Any]]:
+        """获取测试用例引用的夹具信息，未引用时返回None"""
+        if not testcase.setup_fixture_id:
+            return None
+        fixture = SetupFixture.query.get(testcase.setup_fixture_id)
+        if fixture is None:
+            return None
+        return self.resolve(fixture)
+
+
+# 全局夹具服务实例
+_fixture_service = None
+
+
+def get_fixture_service() -> FixtureService:
+    """获取前置夹具服务实例（单例模式）"""
+    global _fixture_service
+    if _fixture_service is None:
+        _fixture_service = FixtureService()
+    return _fixture_service
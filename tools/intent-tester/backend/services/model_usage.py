@@ -0,0 +1,112 @@
+"""
+Model Usage - 模型分级用量统计
+执行节点按步骤类型把AI步骤路由到快速模型或最大模型，执行结束时上报各级别的
+步骤数、失败数、耗时和估算成本，以及截图负载优化前后发送的字节数，
+这里负责规范化并按时间范围汇总
+"""
+
+import json
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from backend.models import ExecutionHistory
+
+logger = logging.getLogger(__name__)
+
+MODEL_TIERS = ("fast", "max")
+
+# 截图负载统计字段：截图数、优化数、裁剪数、原始字节数、实际发送字节数
+PAYLOAD_KEYS = ("screenshots", "optimized", "cropped", "original_bytes", "sent_bytes")
+
+
+def _non_negative(value: Any, cast=int):
+    return cast(value) if isinstance(value, (int, float)) and value >= 0 else cast(0)
+
+
+def summarize_usage(usage: Any) -> Optional[Dict[str, Any]]:
+    """规范化执行节点上报的模型用量，格式不正确时忽略"""
+    if not isinstance(usage, dict) or not isinstance(usage.get("tiers"), dict):
+        return None
+    tiers = {}
+    for tier, stats in usage["tiers"].items():
+        if tier not in MODEL_TIERS or not isinstance(stats, dict):
+            continue
+        tiers[tier] = {
+            "model": str(stats.get("model") or ""),
+            "steps": _non_negative(stats.get("steps")),
+            "failures": _non_negative(stats.get("failures")),
+            "latency_ms": _non_negative(stats.get("latency_ms")),
+            "cost": _non_negative(stats.get("cost"), float),
+        }
+    if not tiers:
+        return None
+    summary = {"tiers": tiers, "escalations": _non_negative(usage.get("escalations"))}
+    payload = usage.get("payload")
+    if isinstance(payload, dict):
+        summary["payload"] = {key: _non_negative(payload.get(key)) for key in PAYLOAD_KEYS}
+    return summary
+
+
+def aggregate_usage(days: int = 7) -> Dict[str, Any]:
+    """
+    汇总最近若干天执行的模型用量
+
+    Returns:
+        各级别的步骤数、失败率、平均耗时和总成本，升级次数，以及截图负载的压缩比例
+    """
+    since = datetime.utcnow() - timedelta(days=days)
+    executions = (
+        ExecutionHistory.query.filter(ExecutionHistory.start_time >= since)
+        .filter(ExecutionHistory.result_summary.isnot(None))
+        .with_entities(ExecutionHistory.result_summary)
+        .all()
+    )
+
+    totals = {}
+    escalations = 0
+    executions_counted = 0
+    payload = dict.fromkeys(PAYLOAD_KEYS, 0)
+    for (result_summary,) in executions:
+        try:
+            usage = json.loads(result_summary).get("model_usage")
+        except (TypeError, ValueError, AttributeError):
+            continue
+        if not usage:
+            continue
+        executions_counted += 1
+        escalations += usage.get("escalations", 0)
+        for key in PAYLOAD_KEYS:
+            payload[key] += usage.get("payload", {}).get(key, 0)
+        for tier, stats in usage.get("tiers", {}).items():
+            total = totals.setdefault(
+                tier, {"steps": 0, "failures": 0, "latency_ms": 0, "cost": 0.0, "models": set()}
+            )
+            for key in ("steps", "failures", "latency_ms", "cost"):
+                total[key] += stats.get(key, 0)
+            if stats.get("model"):
+                total["models"].add(stats["model"])
+
+    tiers = {}
+    for tier, total in totals.items():
+        steps = total["steps"]
+        tiers[tier] = {
+            "models": sorted(total["models"]),
+            "steps": steps,
+            "failures": total["failures"],
+            "failure_rate": round(total["failures"] / steps, 4) if steps else 0.0,
+            "avg_latency_ms": round(total["latency_ms"] / steps) if steps else 0,
+            "cost": round(total["cost"], 6),
+        }
+    payload["byte_reduction"] = (
+        round(1 - payload["sent_bytes"] / payload["original_bytes"], 4)
+        if payload["original_bytes"]
+        else 0.0
+    )
+    return {
+        "days": days,
+        "executions": executions_counted,
+        "escalations": escalations,
+        "tiers": tiers,
+        "payload": payload,
+    }
@@ -0,0 +1,170 @@
+"""
+Network Recording Service - 目标应用网络录制/回放服务
+管理测试用例的网络模式配置，保存成功执行时录制的HAR压缩包；
+回放模式下执行节点用录制内容响应匹配的请求，直通规则匹配的请求（被测接口）仍走真实网络
+"""
+
+import hashlib
+import io
+import json
+import logging
+import zipfile
+from typing import Dict, Optional, Any
+from urllib.parse import urlparse
+
+from backend.models import db, NetworkRecording, TestCase
+
+logger = logging.getLogger(__name__)
+
+NETWORK_MODES = ("off", "record", "replay")
+
+# 回放时录制中找不到匹配请求的处理方式：走真实网络或直接中止请求
+NOT_FOUND_ACTIONS = ("fallback", "abort")
+
+# 录制压缩包大小上限
+MAX_ARCHIVE_BYTES = 100 * 1024 * 1024
+
+MAX_PASSTHROUGH_PATTERNS = 50
+
+
+class NetworkRecordingService:
+    """网络录制/回放服务"""
+
+    @staticmethod
+    def validate_config(config: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """
+        校验并规范化网络模式配置
+
+        Returns:
+            规范化后的配置，mode为off或配置为空时返回None
+        """
+        if config is None:
+            return None
+        if not isinstance(config, dict):
+            raise ValueError("network_config必须是对象")
+
+        mode = config.get("mode", "off")
+        if mode not in NETWORK_MODES:
+            raise ValueError(f"network_config.mode必须是: {', '.join(NETWORK_MODES)}")
+        if mode == "off":
+            return None
+
+        passthrough = config.get("passthrough", [])
+        if not isinstance(passthrough, list) or not all(
+            isinstance(pattern, str) and pattern for pattern in passthrough
+        ):
+            raise ValueError("network_config.passthrough必须是URL模式字符串数组")
+        if len(passthrough) > MAX_PASSTHROUGH_PATTERNS:
+            raise ValueError(f"直通规则最多{MAX_PASSTHROUGH_PATTERNS}条")
+
+        not_found = config.get("not_found", "fallback")
+        if not_found not in NOT_FOUND_ACTIONS:
+            raise ValueError(
+                f"network_config.not_found必须是: {', '.join(NOT_FOUND_ACTIONS)}"
+            )
+
+        url_filter = config.get("url_filter")
+        if url_filter is not None and not (isinstance(url_filter, str) and url_filter):
+            raise ValueError("network_config.url_filter必须是URL模式字符串")
+
+        normalized = {"mode": mode, "passthrough": passthrough, "not_found": not_found}
+        if url_filter:
+            normalized["url_filter"] = url_filter
+        return normalized
+
+    def apply_config(self, testcase: TestCase, config: Optional[Dict[str, Any]]):
+        """设置测试用例的网络模式配置（不提交事务）"""
+        normalized = self.validate_config(config)
+        testcase.network_config = (
+            json.dumps(normalized, ensure_ascii=False) if normalized else None
+        )
+
+    @staticmethod
+    def inspect_archive(archive: bytes) -> Dict[str, Any]:
+        """解析HAR压缩包，返回请求数和域名；格式不正确时抛出ValueError"""
+        if not archive:
+            raise ValueError("录制内容不能为空")
+        if len(archive) > MAX_ARCHIVE_BYTES:
+            raise ValueError(f"录制内容超过{MAX_ARCHIVE_BYTES // (1024 * 1024)}MB上限")
+        try:
+            with zipfile.ZipFile(io.BytesIO(archive)) as bundle:
+                har_names = [name for name in bundle.namelist() if name.endswith(".har")]
+                if not har_names:
+                    raise ValueError("录制压缩包中没有HAR文件")
+                har = json.loads(bundle.read(har_names[0]))
+        except zipfile.BadZipFile:
+            raise ValueError("录制内容不是有效的zip压缩包")
+        except (KeyError, UnicodeDecodeError, json.JSONDecodeError):
+            raise ValueError("HAR文件格式不正确")
+
+        entries = (har.get("log") or {}).get("entries")
+        if not isinstance(entries, list):
+            raise ValueError("HAR文件缺少log.entries")
+
+        hosts = sorted(
+            {
+                urlparse(entry.get("request", {}).get("url", "")).netloc
+                for entry in entries
+                if isinstance(entry, dict)
+            }
+            - {""}
+        )
+        return {"entry_count": len(entries), "hosts": hosts}
+
+    def store_recording(
+        self, testcase: TestCase, archive: bytes, execution_id: Optional[str] = None
+    ) -> NetworkRecording:
+        """保存录制内容，替换用例已有的录制"""
+        summary = self.inspect_archive(archive)
+
+        existing = NetworkRecording.query.filter_by(test_case_id=testcase.id).first()
+        if existing is not None:
+            db.session.delete(existing)
+            db.session.flush()
+
+        recording = NetworkRecording(
+            test_case_id=testcase.id,
+            archive=archive,
+            archive_size=len(archive),
+            checksum=hashlib.sha1(archive).hexdigest(),
+            entry_count=summary["entry_count"],
+            hosts=json.dumps(summary["hosts"], ensure_ascii=False),
+            source_execution_id=execution_id,
+            replay_count=0,
+        )
+        db.session.add(recording)
+        db.session.commit()
+        logger.info(
+            f"网络录制已保存: 用例 {testcase.id} ({summary['entry_count']} 个请求，{len(archive)} 字节)"
+        )
+        return recording
+
+    @staticmethod
+    def get_recording(testcase: TestCase) -> Optional[NetworkRecording]:
+        """获取用例的网络录制"""
+        return NetworkRecording.query.filter_by(test_case_id=testcase.id).first()
+
+    @staticmethod
+    def mark_replayed(recording: NetworkRecording):
+        """记录一次回放下载"""
+        recording.replay_count = (recording.replay_count or 0) + 1
+        db.session.commit()
+
+    @staticmethod
+    def delete_recording(testcase: TestCase) -> bool:
+        """删除用例的网络录制"""
+        deleted = NetworkRecording.query.filter_by(test_case_id=testcase.id).delete()
+        db.session.commit()
+        return bool(deleted)
+
+
+# 全局网络录制服务实例
+_network_recording_service = None
+
+
+def get_network_recording_service() -> NetworkRecordingService:
+    """获取网络录制服务实例（单例模式）"""
+    global _network_recording_service
+    if _network_recording_service is None:
+        _network_recording_service = NetworkRecordingService()
+    return _network_recording_service
@@ -236,6 +236,9 @@ class QueryOptimizer:
             "step_executions_deleted": 0,
             "variables_deleted": 0,
             "references_deleted": 0,
+            "logs_deleted": 0,
+            "videos_deleted": 0,
+            "event_logs_deleted": 0,
         }
 
         if execution_ids:
@@ -282,4 +285,17 @@ class QueryOptimizer:
 
             db.session.commit()
 
+            # 执行日志和录像文件随执行记录一起清理
+            from .execution_log_store import get_execution_log_store
+            from .execution_video_store import get_execution_video_store
+            from .executor_registry import get_executor_registry
+
+            stats["logs_deleted"] = get_execution_log_store().delete_many(execution_ids)
+            stats["videos_deleted"] = get_execution_video_store().delete_many(
+                execution_ids
+            )
+            stats["event_logs_deleted"] = get_executor_registry().delete_event_logs(
+                execution_ids
+            )
+
         return stats
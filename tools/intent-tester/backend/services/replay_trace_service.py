@@ -0,0 +1,138 @@
+"""
+Replay Trace Service - 确定性回放轨迹服务
+成功执行后保存AI步骤解析出的具体操作（选择器、坐标），之后的执行直接回放，
+回放校验失败的步骤才回退到AI；用例步骤修改后修订号变化，轨迹随之失效
+"""
+
+import json
+import logging
+from typing import Dict, Optional, Any
+
+from backend.models import db, ReplayTrace, TestCase
+
+logger = logging.getLogger(__name__)
+
+# 支持录制回放的步骤类型
+TRACEABLE_ACTIONS = ("ai_tap", "ai_input")
+
+# 单个步骤保留的候选选择器数量上限
+MAX_SELECTORS = 8
+
+
+class ReplayTraceService:
+    """回放轨迹服务"""
+
+    @staticmethod
+    def _validate_entry(step_index: int, entry: Dict[str, Any]) -> Dict[str, Any]:
+        if not isinstance(entry, dict):
+            raise ValueError(f"步骤 {step_index + 1} 的轨迹必须是对象")
+        if entry.get("action") not in TRACEABLE_ACTIONS:
+            raise ValueError(
+                f"步骤 {step_index + 1} 的轨迹action必须是: {', '.join(TRACEABLE_ACTIONS)}"
+            )
+
+        selectors = entry.get("selectors") or []
+        if not isinstance(selectors, list) or not all(
+            isinstance(selector, str) and selector for selector in selectors
+        ):
+            raise ValueError(f"步骤 {step_index + 1} 的selectors必须是字符串数组")
+
+        point = entry.get("point")
+        if point is not None and not (
+            isinstance(point, dict)
+            and isinstance(point.get("x"), (int, float))
+            and isinstance(point.get("y"), (int, float))
+        ):
+            raise ValueError(f"步骤 {step_index + 1} 的point必须包含数值x和y")
+
+        if not selectors and point is None:
+            raise ValueError(f"步骤 {step_index + 1} 的轨迹至少需要选择器或坐标")
+
+        return {**entry, "selectors": selectors[:MAX_SELECTORS]}
+
+    def _validate_steps(self, testcase: TestCase, steps: Dict[str, Any]) -> Dict[str, Any]:
+        if not isinstance(steps, dict) or not steps:
+            raise ValueError("steps必须是以步骤序号为键的非空对象")
+
+        total = len(json.loads(testcase.steps)) if testcase.steps else 0
+        validated = {}
+        for key, entry in steps.items():
+            try:
+                step_index = int(key)
+            except (TypeError, ValueError):
+                raise ValueError(f"步骤序号无效: {key}")
+            if step_index < 0 or step_index >= total:
+                raise ValueError(f"步骤序号超出范围: {key}")
+            validated[str(step_index)] = self._validate_entry(step_index, entry)
+        return validated
+
+    def record(
+        self,
+        testcase: TestCase,
+        steps: Dict[str, Any],
+        revision: str,
+        execution_id: Optional[str] = None,
+        replayed: int = 0,
+        fallbacks: int = 0,
+    ) -> ReplayTrace:
+        """
+        保存执行节点上报的轨迹
+
+        执行期间用例被修改时，上报的修订号与当前不一致，轨迹直接丢弃
+        """
+        if revision != testcase.revision:
+            raise ValueError(
+                f"测试用例步骤已变更，轨迹修订号 {revision} 与当前 {testcase.revision} 不一致"
+            )
+        validated = self._validate_steps(testcase, steps)
+
+        trace = ReplayTrace.query.filter_by(test_case_id=testcase.id).first()
+        if trace is None or trace.revision != revision:
+            if trace is not None:
+                db.session.delete(trace)
+                db.session.flush()
+            trace = ReplayTrace(
+                test_case_id=testcase.id, revision=revision, replay_count=0, fallback_count=0
+            )
+            db.session.add(trace)
+
+        trace.steps = json.dumps(validated, ensure_ascii=False)
+        trace.source_execution_id = execution_id
+        trace.replay_count = (trace.replay_count or 0) + max(0, int(replayed or 0))
+        trace.fallback_count = (trace.fallback_count or 0) + max(0, int(fallbacks or 0))
+        db.session.commit()
+        logger.info(
+            f"回放轨迹已保存: 用例 {testcase.id} (修订号 {revision}，{len(validated)} 个步骤)"
+        )
+        return trace
+
+    def resolve(self, testcase: TestCase) -> Optional[ReplayTrace]:
+        """获取用例的有效轨迹，修订号过期的轨迹直接删除"""
+        trace = ReplayTrace.query.filter_by(test_case_id=testcase.id).first()
+        if trace is None:
+            return None
+        if trace.revision != testcase.revision:
+            self.invalidate(testcase)
+            return None
+        return trace
+
+    @staticmethod
+    def invalidate(testcase: TestCase) -> bool:
+        """删除用例的回放轨迹"""
+        deleted = ReplayTrace.query.filter_by(test_case_id=testcase.id).delete()
+        db.session.commit()
+        if deleted:
+            logger.info(f"回放轨迹已失效: 用例 {testcase.id}")
+        return bool(deleted)
+
+
+# 全局回放轨迹服务实例
+_replay_trace_service = None
+
+
+def get_replay_trace_service() -> ReplayTraceService:
+    """获取回放轨迹服务实例（单例模式）"""
+    global _replay_trace_service
+    if _replay_trace_service is None:
+        _replay_trace_service = ReplayTraceService()
+    return _replay_trace_service
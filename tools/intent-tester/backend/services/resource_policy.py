@@ -0,0 +1,136 @@
+"""
+Resource Policy - 资源拦截策略
+测试用例或套件运行可配置拦截与测试无关的资源（统计脚本、字体、视频、第三方组件），
+执行节点在浏览器上下文中按策略中止请求，并上报节省的请求数和字节数
+"""
+
+import json
+import logging
+from typing import Dict, List, Optional, Any
+
+from backend.models import ExecutionHistory, SuiteRun, TestCase
+
+logger = logging.getLogger(__name__)
+
+# Playwright request.resourceType() 的取值，主文档不可拦截
+BLOCKABLE_RESOURCE_TYPES = (
+    "stylesheet",
+    "image",
+    "media",
+    "font",
+    "script",
+    "texttrack",
+    "xhr",
+    "fetch",
+    "eventsource",
+    "websocket",
+    "manifest",
+    "other",
+)
+
+MAX_PATTERNS = 100
+
+
+def _validate_patterns(policy: Dict[str, Any], key: str) -> List[str]:
+    patterns = policy.get(key, [])
+    if not isinstance(patterns, list) or not all(
+        isinstance(pattern, str) and pattern.strip() for pattern in patterns
+    ):
+        raise ValueError(f"resource_policy.{key}必须是URL模式字符串数组")
+    if len(patterns) > MAX_PATTERNS:
+        raise ValueError(f"resource_policy.{key}最多{MAX_PATTERNS}条")
+    return [pattern.strip() for pattern in patterns]
+
+
+def validate_policy(policy: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    校验并规范化资源策略
+
+    - block_resource_types: 按资源类型拦截
+    - block_url_patterns: 按URL模式拦截（*匹配任意字符）
+    - allow_url_patterns: 非空时只放行匹配的URL（主文档始终放行）
+
+    Returns:
+        规范化后的策略，策略为空时返回None
+    """
+    if policy is None:
+        return None
+    if not isinstance(policy, dict):
+        raise ValueError("resource_policy必须是对象")
+
+    block_types = policy.get("block_resource_types", [])
+    if not isinstance(block_types, list):
+        raise ValueError("resource_policy.block_resource_types必须是数组")
+    invalid = [t for t in block_types if t not in BLOCKABLE_RESOURCE_TYPES]
+    if invalid:
+        raise ValueError(
+            f"不支持拦截的资源类型: {', '.join(map(str, invalid))}，"
+            f"可选: {', '.join(BLOCKABLE_RESOURCE_TYPES)}"
+        )
+
+    normalized = {
+        "block_resource_types": sorted(set(block_types)),
+        "block_url_patterns": _validate_patterns(policy, "block_url_patterns"),
+        "allow_url_patterns": _validate_patterns(policy, "allow_url_patterns"),
+    }
+    if not any(normalized.values()):
+        return None
+    return normalized
+
+
+def dumps_policy(policy: Optional[Dict[str, Any]]) -> Optional[str]:
+    """校验策略并序列化为数据库存储格式"""
+    normalized = validate_policy(policy)
+    return json.dumps(normalized, ensure_ascii=False) if normalized else None
+
+
+def merge_policies(*policies: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    合并套件与用例的策略：拦截规则取并集，放行列表取最具体的一层（后面的优先）
+    """
+    merged = {"block_resource_types": [], "block_url_patterns": [], "allow_url_patterns": []}
+    for policy in policies:
+        if not policy:
+            continue
+        for key in ("block_resource_types", "block_url_patterns"):
+            merged[key] += [item for item in policy.get(key, []) if item not in merged[key]]
+        if policy.get("allow_url_patterns"):
+            merged["allow_url_patterns"] = list(policy["allow_url_patterns"])
+    merged["block_resource_types"].sort()
+    return merged if any(merged.values()) else None
+
+
+def effective_policy(
+    execution: Optional[ExecutionHistory], testcase: TestCase
+) -> Optional[Dict[str, Any]]:
+    """执行实际生效的资源策略：所属套件运行的策略叠加用例自身的策略"""
+    suite_policy = None
+    if execution is not None and execution.suite_run_id:
+        suite_run = SuiteRun.query.filter_by(suite_run_id=execution.suite_run_id).first()
+        if suite_run and suite_run.resource_policy:
+            suite_policy = json.loads(suite_run.resource_policy)
+    testcase_policy = json.loads(testcase.resource_policy) if testcase.resource_policy else None
+    return merge_policies(suite_policy, testcase_policy)
+
+
+def summarize_stats(stats: Any) -> Optional[Dict[str, Any]]:
+    """规范化执行节点上报的资源拦截统计，格式不正确时忽略"""
+    if not isinstance(stats, dict):
+        return None
+    summary = {}
+    for key in (
+        "requests_total",
+        "requests_blocked",
+        "bytes_loaded",
+        "bytes_saved",
+        "blocked_unknown_size",
+    ):
+        value = stats.get(key, 0)
+        summary[key] = int(value) if isinstance(value, (int, float)) and value >= 0 else 0
+    by_type = stats.get("blocked_by_type")
+    summary["blocked_by_type"] = (
+        {str(k): int(v) for k, v in by_type.items() if isinstance(v, (int, float))}
+        if isinstance(by_type, dict)
+        else {}
+    )
+    return summary
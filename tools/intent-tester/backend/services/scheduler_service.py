@@ -0,0 +1,360 @@
+"""
+Scheduler Service - 定时执行调度服务
+按cron表达式触发测试用例或套件，使用确定性抖动和时间槽并发预算把同一时刻的执行分散到窗口内
+"""
+
+import hashlib
+import logging
+import os
+import threading
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Any
+
+from backend.models import db, TestCase, ExecutionHistory, ExecutionSchedule
+from backend.utils.cron_expression import CronExpression
+from backend.services.fair_share import resolve_tenant
+
+logger = logging.getLogger(__name__)
+
+# 规划时向前多看的时间，用于计算从更早触发时间溢出到当前区间的执行
+PLAN_LOOKBEHIND_SECONDS = 3600
+
+# 单次规划中每个计划最多展开的触发次数，防止 "* * * * *" 在长区间内展开过多
+MAX_FIRE_TIMES_PER_SCHEDULE = 2000
+
+# 时间槽按UTC纪元对齐
+EPOCH = datetime(1970, 1, 1)
+
+
+class ExecutionScheduler:
+    """定时执行调度器"""
+
+    def __init__(
+        self,
+        slot_seconds: Optional[int] = None,
+        slot_budget: Optional[int] = None,
+        misfire_grace_seconds: Optional[int] = None,
+    ):
+        """
+        初始化调度器
+
+        Args:
+            slot_seconds: 时间槽长度（秒）
+            slot_budget: 每个时间槽内最多启动的执行数（全局并发预算）
+            misfire_grace_seconds: 错过计划时间后仍允许补触发的宽限时间（秒）
+        """
+        self.slot_seconds = slot_seconds or int(os.getenv("SCHEDULER_SLOT_SECONDS", "60"))
+        self.slot_budget = slot_budget or int(os.getenv("SCHEDULER_SLOT_BUDGET", "4"))
+        self.misfire_grace_seconds = misfire_grace_seconds or int(
+            os.getenv("SCHEDULER_MISFIRE_GRACE", "300")
+        )
+        self._tick_lock = threading.Lock()
+
+    # ==================== 计划管理 ====================
+
+    def validate_schedule_data(self, data: Dict[str, Any], partial: bool = False):
+        """验证计划数据"""
+        if not partial or "name" in data:
+            if not data.get("name"):
+                raise ValueError("计划名称不能为空")
+
+        if not partial or "cron_expression" in data:
+            CronExpression(data.get("cron_expression", "")).next_after(datetime.utcnow())
+
+        if not partial or "test_case_id" in data or "category" in data:
+            if not data.get("test_case_id") and not data.get("category"):
+                raise ValueError("必须指定test_case_id或category")
+            if data.get("test_case_id") and data.get("category"):
+                raise ValueError("test_case_id和category只能指定一个")
+            if data.get("test_case_id"):
+                testcase = TestCase.query.filter(
+                    TestCase.id == data["test_case_id"], TestCase.is_active == True
+                ).first()
+                if not testcase:
+                    raise ValueError(f"测试用例不存在: {data['test_case_id']}")
+
+        if "jitter_seconds" in data:
+            jitter = data["jitter_seconds"]
+            if not isinstance(jitter, int) or jitter < 0 or jitter > 86400:
+                raise ValueError("jitter_seconds必须是0-86400之间的整数")
+
+    def create_schedule(self, data: Dict[str, Any]) -> ExecutionSchedule:
+        """创建执行计划"""
+        self.validate_schedule_data(data)
+
+        schedule = ExecutionSchedule(
+            name=data["name"],
+            cron_expression=data["cron_expression"].strip(),
+            test_case_id=data.get("test_case_id"),
+            category=data.get("category"),
+            jitter_seconds=data.get("jitter_seconds", 600),
+            mode=data.get("mode", "headless"),
+            is_active=data.get("is_active", True),
+            created_by=data.get("created_by", "system"),
+        )
+        db.session.add(schedule)
+        db.session.commit()
+        return schedule
+
+    def update_schedule(
+        self, schedule: ExecutionSchedule, data: Dict[str, Any]
+    ) -> ExecutionSchedule:
+        """更新执行计划"""
+        # 切换目标时另一个字段需要清空，否则会同时存在两个目标
+        if "test_case_id" in data and "category" not in data:
+            data = dict(data, category=None)
+        elif "category" in data and "test_case_id" not in data:
+            data = dict(data, test_case_id=None)
+
+        self.validate_schedule_data(data, partial=True)
+
+        for field in (
+            "name",
+            "test_case_id",
+            "category",
+            "jitter_seconds",
+            "mode",
+            "is_active",
+        ):
+            if field in data:
+                setattr(schedule, field, data[field])
+        if "cron_expression" in data:
+            schedule.cron_expression = data["cron_expression"].strip()
+
+        db.session.commit()
+        return schedule
+
+    def resolve_testcases(self, schedule: ExecutionSchedule) -> List[TestCase]:
+        """获取计划覆盖的测试用例"""
+        query = TestCase.query.filter(TestCase.is_active == True)
+        if schedule.test_case_id:
+            query = query.filter(TestCase.id == schedule.test_case_id)
+        else:
+            query = query.filter(TestCase.category == schedule.category)
+        return query.order_by(TestCase.id).all()
+
+    # ==================== 负载分散 ====================
+
+    @staticmethod
+    def jitter_offset(schedule: ExecutionSchedule, testcase_id: int) -> int:
+        """
+        计算测试用例在抖动窗口内的确定性偏移（秒）
+
+        同一计划中的同一用例每次都落在同一偏移上，便于对比历史耗时
+        """
+        window = schedule.jitter_seconds or 0
+        if window <= 0:
+            return 0
+        digest = hashlib.sha1(f"{schedule.id}:{testcase_id}".encode("utf-8")).digest()
+        return int.from_bytes(digest[:4], "big") % window
+
+    def _slot_index(self, dt: datetime) -> int:
+        return int((dt - EPOCH).total_seconds()) // self.slot_seconds
+
+    def _slot_start(self, slot_index: int) -> datetime:
+        return EPOCH + timedelta(seconds=slot_index * self.slot_seconds)
+
+    def plan(
+        self,
+        start: datetime,
+        end: datetime,
+        schedules: Optional[List[ExecutionSchedule]] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        规划 [start, end) 区间内的执行
+
+        先按确定性抖动分散到窗口内，再按时间槽预算把超额的执行顺延到后续有空余的槽位
+
+        Returns:
+            按计划启动时间排序的执行列表
+        """
+        if schedules is None:
+            schedules = ExecutionSchedule.query.filter_by(is_active=True).all()
+        if not schedules:
+            return []
+
+        max_jitter = max(schedule.jitter_seconds or 0 for schedule in schedules)
+        fire_start = start - timedelta(seconds=max_jitter + PLAN_LOOKBEHIND_SECONDS)
+
+        candidates = []
+        for schedule in schedules:
+            cron = CronExpression(schedule.cron_expression)
+            testcases = self.resolve_testcases(schedule)
+            if not testcases:
+                continue
+            for fire_time in cron.iter_between(
+                fire_start, end, limit=MAX_FIRE_TIMES_PER_SCHEDULE
+            ):
+                for testcase in testcases:
+                    desired = fire_time + timedelta(
+                        seconds=self.jitter_offset(schedule, testcase.id)
+                    )
+                    candidates.append(
+                        (desired, schedule.id, testcase.id, fire_time, schedule, testcase)
+                    )
+
+        candidates.sort(key=lambda item: item[:3])
+
+        slot_counts = defaultdict(int)
+        planned = []
+        for desired, _, _, fire_time, schedule, testcase in candidates:
+            slot = self._slot_index(desired)
+            while slot_counts[slot] >= self.slot_budget:
+                slot += 1
+            slot_counts[slot] += 1
+            planned_time = max(desired, self._slot_start(slot))
+
+            if start <= planned_time < end:
+                planned.append(
+                    {
+                        "schedule_id": schedule.id,
+                        "schedule_name": schedule.name,
+                        "test_case_id": testcase.id,
+                        "test_case_name": testcase.name,
+                        "fire_time": fire_time,
+                        "planned_time": planned_time,
+                        "delay_seconds": int((planned_time - fire_time).total_seconds()),
+                    }
+                )
+
+        planned.sort(key=lambda item: (item["planned_time"], item["schedule_id"], item["test_case_id"]))
+        return planned
+
+    def slot_load(self, start: datetime, end: datetime) -> List[Dict[str, Any]]:
+        """统计区间内每个时间槽的计划执行数"""
+        counts = defaultdict(int)
+        for run in self.plan(start, end):
+            counts[self._slot_index(run["planned_time"])] += 1
+
+        return [
+            {
+                "slot_start": self._slot_start(slot),
+                "planned": counts[slot],
+                "budget": self.slot_budget,
+            }
+            for slot in sorted(counts)
+        ]
+
+    def preview(
+        self, schedule: ExecutionSchedule, count: int = 5, after: Optional[datetime] = None
+    ) -> List[Dict[str, Any]]:
+        """预览计划接下来的触发时间以及每个用例分散后的启动时间"""
+        after = after or datetime.utcnow()
+        fire_times = CronExpression(schedule.cron_expression).next_runs(after, count)
+        if not fire_times:
+            return []
+
+        # 包含全部启用的计划，使预览反映其他计划占用的槽位预算
+        window_end = fire_times[-1] + timedelta(
+            seconds=(schedule.jitter_seconds or 0) + PLAN_LOOKBEHIND_SECONDS
+        )
+        runs_by_fire_time = defaultdict(list)
+        for run in self.plan(after, window_end, self._schedules_with(schedule)):
+            if run["schedule_id"] == schedule.id:
+                runs_by_fire_time[run["fire_time"]].append(run)
+
+        return [
+            {"fire_time": fire_time, "runs": runs_by_fire_time.get(fire_time, [])}
+            for fire_time in fire_times
+        ]
+
+    @staticmethod
+    def _schedules_with(schedule: ExecutionSchedule) -> List[ExecutionSchedule]:
+        schedules = ExecutionSchedule.query.filter_by(is_active=True).all()
+        if schedule not in schedules:
+            schedules.append(schedule)
+        return schedules
+
+    # ==================== 触发 ====================
+
+    def tick(self, now: Optional[datetime] = None) -> List[str]:
+        """
+        创建计划启动时间已到的执行，执行以pending状态进入队列
+
+        同一计划、同一用例、同一cron触发时间只创建一次，重复调用是幂等的
+
+        Returns:
+            新创建的执行ID列表
+        """
+        now = now or datetime.utcnow()
+        window_start = now - timedelta(seconds=self.misfire_grace_seconds)
+        created = []
+
+        with self._tick_lock:
+            for run in self.plan(window_start, now + timedelta(microseconds=1)):
+                schedule = ExecutionSchedule.query.get(run["schedule_id"])
+                # 计划创建之前的触发时间不补跑
+                if schedule.created_at and run["fire_time"] < schedule.created_at.replace(
+                    second=0, microsecond=0
+                ):
+                    continue
+
+                exists = ExecutionHistory.query.filter_by(
+                    schedule_id=run["schedule_id"],
+                    test_case_id=run["test_case_id"],
+                    scheduled_for=run["fire_time"],
+                ).first()
+                if exists:
+                    continue
+
+                execution_id = str(uuid.uuid4())
+                db.session.add(
+                    ExecutionHistory(
+                        execution_id=execution_id,
+                        test_case_id=run["test_case_id"],
+                        status="pending",
+                        mode=schedule.mode or "headless",
+                        browser="chrome",
+                        start_time=now,
+                        executed_by=f"scheduler:{schedule.id}",
+                        schedule_id=schedule.id,
+                        scheduled_for=run["fire_time"],
+                        tenant=resolve_tenant(None, TestCase.query.get(run["test_case_id"])),
+                    )
+                )
+                schedule.last_triggered_at = now
+                created.append(execution_id)
+
+            if created:
+                db.session.commit()
+                logger.info(f"定时调度创建了 {len(created)} 个执行")
+
+        return created
+
+
+# 全局调度器实例
+_execution_scheduler = None
+
+
+def get_execution_scheduler() -> ExecutionScheduler:
+    """获取定时调度器实例（单例模式）"""
+    global _execution_scheduler
+    if _execution_scheduler is None:
+        _execution_scheduler = ExecutionScheduler()
+    return _execution_scheduler
+
+
+def start_scheduler_loop(app, interval: Optional[float] = None) -> threading.Thread:
+    """启动后台调度线程，周期性地创建到期的定时执行"""
+    interval = interval or float(os.getenv("SCHEDULER_TICK_INTERVAL", "15"))
+    stop_event = threading.Event()
+
+    def scheduler_loop():
+        scheduler = get_execution_scheduler()
+        while not stop_event.wait(interval):
+            try:
+                with app.app_context():
+                    scheduler.tick()
+            except Exception as e:
+                logger.error(f"定时调度循环异常: {str(e)}")
+                with app.app_context():
+                    db.session.rollback()
+
+    thread = threading.Thread(target=scheduler_loop, name="execution-scheduler")
+    thread.daemon = True
+    thread.stop_event = stop_event
+    thread.start()
+    logger.info(f"定时调度线程已启动，间隔 {interval}s")
+    return thread
@@ -0,0 +1,408 @@
+"""
+Suite Service - 套件运行服务
+根据执行历史把最可能失败和最近修改过的用例排在前面，并支持失败数达到阈值后取消剩余队列；
+也可以按预测耗时做最长处理时间优先（LPT）排队，缩短并行运行的总耗时
+"""
+
+import json
+import logging
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Any
+
+from backend.models import db, TestCase, ExecutionHistory, SuiteRun, ExecutorNode
+from backend.services.duration_predictor import (
+    FAILED_STATUSES,
+    FINISHED_STATUSES,
+    get_duration_predictor,
+)
+from backend.services.resource_policy import dumps_policy
+from backend.services.fair_share import resolve_tenant
+
+logger = logging.getLogger(__name__)
+
+# 排序方式
+ORDERING_FAILURE_FIRST = "failure_first"
+ORDERING_DURATION_LPT = "duration_lpt"
+ORDERING_FIFO = "fifo"
+ORDERINGS = (ORDERING_FAILURE_FIRST, ORDERING_DURATION_LPT, ORDERING_FIFO)
+
+# 计入失败率的最近执行次数和时间范围
+HISTORY_WINDOW = 20
+HISTORY_DAYS = 90
+
+# 失败率的时间衰减半衰期：一周前的失败权重减半
+HALF_LIFE_DAYS = 7.0
+
+# Beta先验：没有历史的用例按25%失败概率估计，少量历史时不至于大起大落
+PRIOR_FAILURES = 0.5
+PRIOR_RUNS = 2.0
+
+# 上次执行后修改过（或从未执行）的用例额外加分
+CHANGE_BONUS = 0.3
+
+QUEUED_STATUSES = ("pending", "running")
+
+
+class SuiteRunner:
+    """套件运行调度器"""
+
+    # ==================== 用例排序 ====================
+
+    def resolve_testcases(
+        self, category: Optional[str] = None, test_case_ids: Optional[List[int]] = None
+    ) -> List[TestCase]:
+        """获取套件包含的启用用例"""
+        if not category and not test_case_ids:
+            raise ValueError("必须指定category或test_case_ids")
+
+        query = TestCase.query.filter(TestCase.is_active == True)
+        if test_case_ids:
+            query = query.filter(TestCase.id.in_(test_case_ids))
+        else:
+            query = query.filter(TestCase.category == category)
+
+        testcases = query.order_by(TestCase.id).all()
+        if not testcases:
+            raise ValueError("套件中没有可执行的测试用例")
+        return testcases
+
+    def failure_scores(
+        self, testcases: List[TestCase], now: Optional[datetime] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        计算每个用例的失败风险评分
+
+        失败概率为按时间衰减加权的近期失败率（带Beta先验），上次执行后修改过的用例额外加分
+        """
+        now = now or datetime.utcnow()
+        ids = [testcase.id for testcase in testcases]
+
+        history = defaultdict(list)
+        if ids:
+            rows = (
+                db.session.query(
+                    ExecutionHistory.test_case_id,
+                    ExecutionHistory.status,
+                    ExecutionHistory.start_time,
+                )
+                .filter(
+                    ExecutionHistory.test_case_id.in_(ids),
+                    ExecutionHistory.status.in_(FINISHED_STATUSES),
+                    ExecutionHistory.start_time >= now - timedelta(days=HISTORY_DAYS),
+                )
+                .order_by(ExecutionHistory.start_time.desc())
+                .all()
+            )
+            for test_case_id, status, start_time in rows:
+                if len(history[test_case_id]) < HISTORY_WINDOW:
+                    history[test_case_id].append((status, start_time))
+
+        scores = []
+        for testcase in testcases:
+            runs = history.get(testcase.id, [])
+            weighted_failures = PRIOR_FAILURES
+            weighted_runs = PRIOR_RUNS
+            for status, start_time in runs:
+                age_days = max(0.0, (now - start_time).total_seconds() / 86400)
+                weight = 0.5 ** (age_days / HALF_LIFE_DAYS)
+                weighted_runs += weight
+                if status in FAILED_STATUSES:
+                    weighted_failures += weight
+
+            failure_probability = weighted_failures / weighted_runs
+            last_run_at = runs[0][1] if runs else None
+            changed_at = testcase.updated_at or testcase.created_at
+            recently_changed = last_run_at is None or (
+                changed_at is not None and changed_at > last_run_at
+            )
+
+            scores.append(
+                {
+                    "test_case_id": testcase.id,
+                    "test_case_name": testcase.name,
+                    "failure_probability": round(failure_probability, 4),
+                    "recently_changed": recently_changed,
+                    "runs_considered": len(runs),
+                    "score": round(
+                        failure_probability + (CHANGE_BONUS if recently_changed else 0.0),
+                        4,
+                    ),
+                }
+            )
+        return scores
+
+    def rank_testcases(
+        self, testcases: List[TestCase], ordering: str = ORDERING_FAILURE_FIRST
+    ) -> List[Dict[str, Any]]:
+        """按排序方式返回带评分的用例顺序"""
+        if ordering not in ORDERINGS:
+            raise ValueError(f"ordering参数无效: {ordering}，可选值: {', '.join(ORDERINGS)}")
+
+        scores = self.failure_scores(testcases)
+        predictions = get_duration_predictor().predict(testcases)
+        for item in scores:
+            prediction = predictions[item["test_case_id"]]
+            item["predicted_duration"] = prediction["seconds"]
+            item["duration_source"] = prediction["source"]
+
+        if ordering == ORDERING_DURATION_LPT:
+            scores = get_duration_predictor().lpt_order(scores)
+        elif ordering == ORDERING_FAILURE_FIRST:
+            # 分数相同时高优先级（数值小）在前，再按ID保证稳定
+            priorities = {testcase.id: testcase.priority or 3 for testcase in testcases}
+            scores.sort(
+                key=lambda item: (
+                    -item["score"],
+                    priorities[item["test_case_id"]],
+                    item["test_case_id"],
+                )
+            )
+        return scores
+
+    @staticmethod
+    def available_slots() -> int:
+        """当前在线执行节点的槽位总数，没有注册节点时按单槽位计算"""
+        total = (
+            db.session.query(db.func.sum(ExecutorNode.total_slots))
+            .filter(ExecutorNode.status == "active")
+            .scalar()
+        )
+        return int(total or 1)
+
+    # ==================== 套件运行 ====================
+
+    def start_suite_run(self, data: Dict[str, Any]) -> SuiteRun:
+        """创建套件运行，并按排序结果把用例放入执行队列"""
+        ordering = data.get("ordering", ORDERING_FAILURE_FIRST)
+        fail_fast = data.get("fail_fast")
+        if fail_fast is not None and (not isinstance(fail_fast, int) or fail_fast < 1):
+            raise ValueError("fail_fast必须是大于0的整数")
+        shard_count = data.get("shards")
+        if shard_count is not None and (not isinstance(shard_count, int) or shard_count < 1):
+            raise ValueError("shards必须是大于0的整数")
+        shard_count = shard_count or self.available_slots()
+        resource_policy = dumps_policy(data.get("resource_policy"))
+
+        testcases = self.resolve_testcases(data.get("category"), data.get("test_case_ids"))
+        tenants = {testcase.id: resolve_tenant(data, testcase) for testcase in testcases}
+        ranking = self.rank_testcases(testcases, ordering)
+        plan = get_duration_predictor().simulate(ranking, shard_count)
+
+        now = datetime.utcnow()
+        suite_run = SuiteRun(
+            suite_run_id=str(uuid.uuid4()),
+            name=data.get("name") or data.get("category") or "套件运行",
+            category=data.get("category"),
+            ordering=ordering,
+            fail_fast_threshold=fail_fast,
+            status="running",
+            total_count=len(ranking),
+            ordering_scores=json.dumps(ranking, ensure_ascii=False),
+            shard_count=shard_count,
+            shard_plan=json.dumps(plan["shards"], ensure_ascii=False),
+            predicted_makespan=plan["makespan"],
+            resource_policy=resource_policy,
+            executed_by=data.get("executed_by", "system"),
+            created_at=now,
+        )
+        db.session.add(suite_run)
+
+        # 同一套件的执行使用相同的创建时间，分发时按queue_position排队
+        for position, item in enumerate(ranking):
+            db.session.add(
+                ExecutionHistory(
+                    execution_id=str(uuid.uuid4()),
+                    test_case_id=item["test_case_id"],
+                    status="pending",
+                    mode=data.get("mode", "headless"),
+                    browser=data.get("browser", "chrome"),
+                    start_time=now,
+                    executed_by=data.get("executed_by", "system"),
+                    suite_run_id=suite_run.suite_run_id,
+                    queue_position=position,
+                    shard_index=plan["assignments"][item["test_case_id"]],
+                    predicted_duration=item["predicted_duration"],
+                    tenant=tenants[item["test_case_id"]],
+                    created_at=now,
+                )
+            )
+
+        db.session.commit()
+        logger.info(
+            f"套件运行已创建: {suite_run.suite_run_id}, {len(ranking)} 个用例, 排序: {ordering}, "
+            f"{shard_count} 个分片, 预测总耗时 {plan['makespan']}s"
+        )
+        return suite_run
+
+    def get_suite_executions(self, suite_run_id: str) -> List[ExecutionHistory]:
+        """按排队顺序获取套件内的执行"""
+        return (
+            ExecutionHistory.query.filter_by(suite_run_id=suite_run_id)
+            .order_by(ExecutionHistory.queue_position.asc())
+            .all()
+        )
+
+    def _cancel_pending(self, suite_run: SuiteRun, reason: str) -> int:
+        """
+        取消套件中尚未分发的执行（调用方负责提交）
+
+        已分发到节点的执行由节点继续执行，结束后照常计入套件结果
+        """
+        now = datetime.utcnow()
+        pending = ExecutionHistory.query.filter(
+            ExecutionHistory.suite_run_id == suite_run.suite_run_id,
+            ExecutionHistory.status == "pending",
+            ExecutionHistory.executor_node_id.is_(None),
+        ).all()
+        for execution in pending:
+            execution.status = "cancelled"
+            execution.end_time = now
+            execution.error_message = reason
+        return len(pending)
+
+    def _refresh_counts(self, suite_run: SuiteRun) -> Dict[str, int]:
+        counts = dict(
+            db.session.query(ExecutionHistory.status, db.func.count(ExecutionHistory.id))
+            .filter(ExecutionHistory.suite_run_id == suite_run.suite_run_id)
+            .group_by(ExecutionHistory.status)
+            .all()
+        )
+        suite_run.passed_count = counts.get("success", 0)
+        suite_run.failed_count = sum(counts.get(status, 0) for status in FAILED_STATUSES)
+        suite_run.cancelled_count = counts.get("cancelled", 0)
+        return counts
+
+    def _compute_actual_makespan(self, suite_run: SuiteRun) -> Optional[float]:
+        """实际总耗时：最早开始到最晚结束的时间跨度（不含被取消的执行）"""
+        first_start, last_end = (
+            db.session.query(
+                db.func.min(ExecutionHistory.start_time),
+                db.func.max(ExecutionHistory.end_time),
+            )
+            .filter(
+                ExecutionHistory.suite_run_id == suite_run.suite_run_id,
+                ExecutionHistory.status.in_(FINISHED_STATUSES),
+            )
+            .one()
+        )
+        if not first_start or not last_end:
+            return None
+        return round(max(0.0, (last_end - first_start).total_seconds()), 2)
+
+    def makespan_report(self, suite_run: SuiteRun) -> Dict[str, Any]:
+        """对比预测与实际的总耗时和各分片负载"""
+        executions = self.get_suite_executions(suite_run.suite_run_id)
+        actual_makespan = suite_run.actual_makespan or self._compute_actual_makespan(
+            suite_run
+        )
+
+        shard_loads = defaultdict(lambda: {"predicted": 0.0, "actual": 0.0})
+        items = []
+        for execution in executions:
+            predicted = execution.predicted_duration or 0.0
+            actual = execution.duration if execution.status in FINISHED_STATUSES else None
+            shard = shard_loads[execution.shard_index or 0]
+            shard["predicted"] += predicted
+            shard["actual"] += actual or 0.0
+            items.append(
+                {
+                    "execution_id": execution.execution_id,
+                    "test_case_id": execution.test_case_id,
+                    "shard_index": execution.shard_index,
+                    "status": execution.status,
+                    "predicted_duration": predicted,
+                    "actual_duration": actual,
+                }
+            )
+
+        predicted_makespan = suite_run.predicted_makespan
+        error_percent = None
+        if actual_makespan and predicted_makespan:
+            error_percent = round(
+                (predicted_makespan - actual_makespan) / actual_makespan * 100, 1
+            )
+
+        return {
+            "suite_run_id": suite_run.suite_run_id,
+            "status": suite_run.status,
+            "shard_count": suite_run.shard_count,
+            "predicted_makespan": predicted_makespan,
+            "actual_makespan": actual_makespan,
+            "error_percent": error_percent,
+            "shards": [
+                {
+                    "shard_index": index,
+                    "predicted_load": round(load["predicted"], 2),
+                    "actual_load": round(load["actual"], 2),
+                }
+                for index, load in sorted(shard_loads.items())
+            ],
+            "executions": items,
+        }
+
+    def record_result(self, execution: ExecutionHistory) -> Optional[SuiteRun]:
+        """
+        处理套件内执行的结束结果（调用方负责提交）
+
+        更新套件计数，失败数达到fail-fast阈值时取消剩余队列，全部结束时标记套件完成
+        """
+        if not execution.suite_run_id:
+            return None
+        suite_run = SuiteRun.query.filter_by(suite_run_id=execution.suite_run_id).first()
+        if suite_run is None:
+            return None
+
+        now = datetime.utcnow()
+        if execution.status in FAILED_STATUSES and suite_run.first_failure_at is None:
+            suite_run.first_failure_at = now
+
+        counts = self._refresh_counts(suite_run)
+        if suite_run.status != "running":
+            return suite_run
+
+        threshold = suite_run.fail_fast_threshold
+        if threshold and suite_run.failed_count >= threshold:
+            cancelled = self._cancel_pending(
+                suite_run, f"fail-fast: 套件失败数达到阈值 {threshold}，剩余用例已取消"
+            )
+            suite_run.status = "cancelled"
+            suite_run.completed_at = now
+            suite_run.actual_makespan = self._compute_actual_makespan(suite_run)
+            self._refresh_counts(suite_run)
+            logger.info(
+                f"套件运行触发fail-fast: {suite_run.suite_run_id}, 取消 {cancelled} 个执行"
+            )
+        elif not any(counts.get(status, 0) for status in QUEUED_STATUSES):
+            suite_run.status = "completed"
+            suite_run.completed_at = now
+            suite_run.actual_makespan = self._compute_actual_makespan(suite_run)
+
+        return suite_run
+
+    def cancel_suite_run(self, suite_run_id: str) -> SuiteRun:
+        """手动取消套件运行的剩余队列"""
+        suite_run = SuiteRun.query.filter_by(suite_run_id=suite_run_id).first()
+        if suite_run is None:
+            raise ValueError(f"套件运行不存在: {suite_run_id}")
+
+        if suite_run.status == "running":
+            self._cancel_pending(suite_run, "套件运行已手动取消")
+            suite_run.status = "cancelled"
+            suite_run.completed_at = datetime.utcnow()
+            self._refresh_counts(suite_run)
+            db.session.commit()
+        return suite_run
+
+
+# 全局套件运行器实例
+_suite_runner = None
+
+
+def get_suite_runner() -> SuiteRunner:
+    """获取套件运行器实例（单例模式）"""
+    global _suite_runner
+    if _suite_runner is None:
+        _suite_runner = SuiteRunner()
+    return _suite_runner
@@ -0,0 +1,368 @@
+"""
+Variable Suggestion Index - 变量提示索引服务
+静态分析测试用例步骤的数据流：output_variable/set_variable定义的变量、dataDemand描述的结构、
+${...}引用以及绑定数据集的列，按用例修订号缓存索引，任意步骤的可用变量查询为常数时间
+"""
+
+import json
+import logging
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from backend.models import TestCase, ExecutionHistory, ExecutionVariable
+from midscene_framework.validators import DataValidator
+
+logger = logging.getLogger(__name__)
+
+# 与执行节点变量解析一致：${变量名}或${变量名.属性.属性}
+REFERENCE_PATTERN = re.compile(r"\$\{([^}]+)\}")
+
+# AI数据提取方法输出的数据类型
+ACTION_DATA_TYPES = {
+    "aiQuery": "object",
+    "aiString": "string",
+    "aiNumber": "number",
+    "aiBoolean": "boolean",
+    "aiAsk": "string",
+    "aiLocate": "object",
+    "ai_query": "object",
+    "ai_string": "string",
+    "ai_number": "number",
+    "ai_boolean": "boolean",
+    "ai_ask": "string",
+    "ai_locate": "object",
+}
+
+PREVIEW_LENGTH = 100
+MAX_PROPERTY_DEPTH = 3
+MAX_PROPERTIES = 50
+
+# 缓存的用例索引数量上限
+MAX_CACHED_INDEXES = 256
+
+
+def _value_type(value: Any) -> str:
+    if isinstance(value, bool):
+        return "boolean"
+    if isinstance(value, (int, float)):
+        return "number"
+    if isinstance(value, dict):
+        return "object"
+    if isinstance(value, list):
+        return "array"
+    if value is None:
+        return "null"
+    return "string"
+
+
+def _preview(value: Any) -> str:
+    if isinstance(value, list):
+        return f"[{len(value)} items]"
+    text = json.dumps(value, ensure_ascii=False, default=str)
+    return text if len(text) <= PREVIEW_LENGTH else text[: PREVIEW_LENGTH - 3] + "..."
+
+
+def _value_properties(value: Any, path: str, depth: int = 1) -> List[Dict[str, Any]]:
+    """实际变量值的属性树（只展开对象，路径与${a.b}引用格式一致）"""
+    if not isinstance(value, dict) or depth > MAX_PROPERTY_DEPTH:
+        return []
+    properties = []
+    for key, item in list(value.items())[:MAX_PROPERTIES]:
+        prop = {"name": key, "type": _value_type(item), "path": f"{path}.{key}"}
+        children = _value_properties(item, prop["path"], depth + 1)
+        if children:
+            prop["properties"] = children
+        properties.append(prop)
+    return properties
+
+
+def _iter_strings(value: Any):
+    if isinstance(value, str):
+        yield value
+    elif isinstance(value, dict):
+        for item in value.values():
+            yield from _iter_strings(item)
+    elif isinstance(value, list):
+        for item in value:
+            yield from _iter_strings(item)
+
+
+class VariableSuggestionIndex:
+    """
+    单个用例修订号的变量提示索引
+
+    definitions按步骤顺序保存变量定义；snapshots[k]是前k个定义生效后的可用变量列表（同名变量后定义覆盖前定义），
+    visible_count[i]是步骤i之前的定义数，查询步骤i的可用变量即snapshots[visible_count[i]]
+    """
+
+    def __init__(self, testcase: TestCase, dataset_columns: Optional[List[str]] = None):
+        self.testcase_id = testcase.id
+        self.revision = testcase.revision
+        try:
+            steps = json.loads(testcase.steps) if testcase.steps else []
+        except (TypeError, ValueError):
+            steps = []
+        if not isinstance(steps, list):
+            steps = []
+        self.step_count = len(steps)
+
+        self.definitions: List[Dict[str, Any]] = [
+            {
+                "name": column,
+                "data_type": "string",
+                "source_step_index": -1,
+                "source_api_method": "dataset",
+                "preview_value": "<数据集列>",
+                "properties": [],
+            }
+            for column in dataset_columns or []
+        ]
+        self.reference_counts: Dict[str, int] = {}
+        self.unresolved_references: List[Dict[str, Any]] = []
+
+        defined = {definition["name"] for definition in self.definitions}
+        visible_count = []
+        for step_index, step in enumerate(steps):
+            visible_count.append(len(self.definitions))
+            if not isinstance(step, dict):
+                continue
+            params = step.get("params") or {}
+
+            # 先处理引用：步骤不能引用自己的输出
+            for text in _iter_strings(params):
+                for path in REFERENCE_PATTERN.findall(text):
+                    name = path.strip().split(".")[0]
+                    self.reference_counts[name] = self.reference_counts.get(name, 0) + 1
+                    if name not in defined:
+                        self.unresolved_references.append(
+                            {"step_index": step_index, "variable": name, "reference": path.strip()}
+                        )
+
+            definition = self._definition(step, step_index, params)
+            if definition:
+                self.definitions.append(definition)
+                defined.add(definition["name"])
+        visible_count.append(len(self.definitions))
+        self.visible_count = visible_count
+
+        for definition in self.definitions:
+            definition["reference_count"] = self.reference_counts.get(definition["name"], 0)
+
+        self.snapshots: List[List[Dict[str, Any]]] = [[]]
+        latest: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        for definition in self.definitions:
+            latest.pop(definition["name"], None)
+            latest[definition["name"]] = definition
+            # 最近定义的变量排在前面，编辑器中更可能被引用
+            self.snapshots.append(list(reversed(latest.values())))
+
+    @staticmethod
+    def _definition(step: Dict[str, Any], step_index: int, params: Dict[str, Any]):
+        action = step.get("action") or step.get("type") or ""
+        if action == "set_variable":
+            name = params.get("name")
+            value = params.get("value")
+            if not name:
+                return None
+            return {
+                "name": name,
+                "data_type": _value_type(value),
+                "source_step_index": step_index,
+                "source_api_method": action,
+                "preview_value": _preview(value),
+                "properties": _value_properties(value, name),
+            }
+
+        name = step.get("output_variable")
+        if not name:
+            return None
+        data_type = ACTION_DATA_TYPES.get(action, "unknown")
+        properties = []
+        preview = f"<{data_type}>"
+
+        data_demand = params.get("dataDemand")
+        if isinstance(data_demand, str) and data_demand.strip():
+            demand = data_demand.strip()
+            preview = demand if len(demand) <= PREVIEW_LENGTH else demand[: PREVIEW_LENGTH - 3] + "..."
+            if demand.startswith("["):
+                data_type = "array"
+            else:
+                schema = DataValidator.parse_dataDemand_schema(demand)
+                properties = [
+                    {"name": key, "type": value, "path": f"{name}.{key}"}
+                    for key, value in schema.items()
+                    if key
+                ]
+
+        return {
+            "name": name,
+            "data_type": data_type,
+            "source_step_index": step_index,
+            "source_api_method": action,
+            "preview_value": preview,
+            "properties": properties,
+        }
+
+    def available(self, step_index: Optional[int] = None) -> List[Dict[str, Any]]:
+        """步骤step_index执行前可用的变量，不指定时返回所有步骤完成后的变量"""
+        if step_index is None or step_index >= len(self.visible_count):
+            return self.snapshots[-1]
+        if step_index < 0:
+            step_index = 0
+        return self.snapshots[self.visible_count[step_index]]
+
+
+class VariableSuggestionService:
+    """变量提示服务：按用例修订号缓存索引，合并执行中已产生的实际变量"""
+
+    def __init__(self, max_cached: int = MAX_CACHED_INDEXES):
+        self.max_cached = max_cached
+        self._indexes: "OrderedDict[int, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._builds = 0
+
+    @staticmethod
+    def _dataset_columns(testcase: TestCase) -> List[str]:
+        """绑定数据集的列名（查询数据集需要访问外部数据源，不在索引中展开）"""
+        if not testcase.dataset:
+            return []
+        spec = json.loads(testcase.dataset)
+        if spec.get("type") == "inline":
+            columns = []
+            for row in spec.get("rows", []):
+                columns.extend(c for c in row if c not in columns)
+            return columns
+        if spec.get("type") == "csv":
+            from backend.services.dataset_service import get_dataset_runner
+
+            try:
+                return get_dataset_runner().preview(spec, limit=1)["columns"]
+            except (OSError, ValueError) as e:
+                logger.warning(f"读取数据集列名失败: 用例 {testcase.id}, 错误: {str(e)}")
+        return []
+
+    def get_index(self, testcase: TestCase) -> VariableSuggestionIndex:
+        """获取用例当前修订号的索引，步骤或数据集变化后重新构建"""
+        key = (testcase.revision, testcase.dataset)
+        with self._lock:
+            cached = self._indexes.get(testcase.id)
+            if cached and cached[0] == key:
+                self._indexes.move_to_end(testcase.id)
+                self._hits += 1
+                return cached[1]
+
+        index = VariableSuggestionIndex(testcase, self._dataset_columns(testcase))
+        with self._lock:
+            self._builds += 1
+            self._indexes[testcase.id] = (key, index)
+            self._indexes.move_to_end(testcase.id)
+            while len(self._indexes) > self.max_cached:
+                self._indexes.popitem(last=False)
+        return index
+
+    @staticmethod
+    def _format(variables, include_properties: bool, limit: Optional[int]):
+        if limit:
+            variables = variables[:limit]
+        return [
+            variable if include_properties else {**variable, "properties": []}
+            for variable in variables
+        ]
+
+    def predicted_variables(
+        self,
+        testcase: TestCase,
+        step_index: Optional[int] = None,
+        include_properties: bool = True,
+        limit: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """按步骤数据流预测的可用变量"""
+        index = self.get_index(testcase)
+        return {
+            "testcase_id": testcase.id,
+            "revision": index.revision,
+            "step_index": step_index,
+            "step_count": index.step_count,
+            "predicted_variables": self._format(
+                index.available(step_index), include_properties, limit
+            ),
+            "unresolved_references": index.unresolved_references,
+        }
+
+    def execution_suggestions(
+        self,
+        execution: ExecutionHistory,
+        step_index: Optional[int] = None,
+        include_properties: bool = True,
+        limit: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        执行中的变量提示：已产生的变量使用实际值和属性，
+        尚未产生的按用例索引预测（例如执行到一半时编辑后续步骤）
+        """
+        query = ExecutionVariable.query.filter_by(execution_id=execution.execution_id)
+        if step_index is not None:
+            query = query.filter(ExecutionVariable.source_step_index < step_index)
+        actual = {}
+        for record in query.order_by(ExecutionVariable.source_step_index.desc()):
+            if record.variable_name in actual:
+                continue
+            if record.is_encrypted:
+                # 加密存储的变量不返回值和结构
+                value = None
+            else:
+                try:
+                    value = json.loads(record.variable_value)
+                except (TypeError, ValueError):
+                    value = record.variable_value
+            actual[record.variable_name] = {
+                "name": record.variable_name,
+                "data_type": record.data_type or _value_type(value),
+                "source_step_index": record.source_step_index,
+                "source_api_method": record.source_api_method,
+                "created_at": (
+                    record.created_at.strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+                    if record.created_at
+                    else None
+                ),
+                "preview_value": "******" if record.is_encrypted else _preview(value),
+                "properties": _value_properties(value, record.variable_name),
+                "actual": True,
+            }
+
+        predicted = []
+        testcase = TestCase.query.get(execution.test_case_id)
+        if testcase is not None:
+            predicted = [
+                {**variable, "actual": False}
+                for variable in self.get_index(testcase).available(step_index)
+                if variable["name"] not in actual
+            ]
+
+        variables = sorted(
+            actual.values(), key=lambda v: v["source_step_index"] or 0, reverse=True
+        ) + predicted
+        return {
+            "execution_id": execution.execution_id,
+            "step_index": step_index,
+            "variables": self._format(variables, include_properties, limit),
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"cached": len(self._indexes), "hits": self._hits, "builds": self._builds}
+
+
+# 全局变量提示服务实例
+_variable_suggestion_service = None
+
+
+def get_variable_suggestion_service() -> VariableSuggestionService:
+    """获取变量提示服务实例（单例模式）"""
+    global _variable_suggestion_service
+    if _variable_suggestion_service is None:
+        _variable_suggestion_service = VariableSuggestionService()
+    return _variable_suggestion_service
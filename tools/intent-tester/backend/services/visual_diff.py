@@ -0,0 +1,375 @@
+"""
+Visual Diff Service - 像素级视觉基线比对服务
+用NumPy向量化比较当前截图与已保存的基线图片，支持容差、忽略区域和抗锯齿判定，
+失败时生成差异图；整个过程在本地完成，不调用视觉模型
+"""
+
+import io
+import json
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional, Any, Tuple
+
+import numpy as np
+from PIL import Image
+
+from backend.models import db, VisualBaseline
+
+logger = logging.getLogger(__name__)
+
+# 单个像素任一通道差值超过该阈值才视为不同（0-255），吸收压缩和渲染噪声
+DEFAULT_PIXEL_THRESHOLD = 16
+
+# 允许不同像素占比，超过时断言失败
+DEFAULT_TOLERANCE = 0.001
+
+# 差异图中底图的亮度比例和差异像素颜色
+DIFF_BACKGROUND_ALPHA = 0.3
+DIFF_COLOR = (255, 0, 0)
+ANTI_ALIAS_COLOR = (255, 200, 0)
+IGNORED_COLOR = (80, 80, 160)
+
+
+class VisualDiffService:
+    """视觉基线比对服务"""
+
+    @staticmethod
+    def load_image(data: bytes) -> np.ndarray:
+        """把PNG/JPEG字节解码为 (H, W, 3) 的uint8数组"""
+        try:
+            with Image.open(io.BytesIO(data)) as image:
+                return np.asarray(image.convert("RGB"), dtype=np.uint8)
+        except Exception as e:
+            raise ValueError(f"无法解析图片: {str(e)}")
+
+    @staticmethod
+    def encode_png(pixels: np.ndarray) -> bytes:
+        """把 (H, W, 3) 数组编码为PNG字节"""
+        buffer = io.BytesIO()
+        Image.fromarray(pixels.astype(np.uint8), "RGB").save(buffer, format="PNG")
+        return buffer.getvalue()
+
+    @staticmethod
+    def normalize_region(region: Optional[Dict[str, Any]], width: int, height: int) -> Optional[Tuple[int, int, int, int]]:
+        """
+        把 {x, y, width, height} 区域裁剪到图片范围内
+
+        Returns:
+            (x0, y0, x1, y1)，区域为空时返回None
+        """
+        if not region:
+            return None
+        try:
+            x = int(region.get("x", 0))
+            y = int(region.get("y", 0))
+            w = int(region["width"])
+            h = int(region["height"])
+        except (KeyError, TypeError, ValueError):
+            raise ValueError(f"区域格式无效: {region}，需要 x, y, width, height")
+        if w <= 0 or h <= 0:
+            raise ValueError(f"区域宽高必须大于0: {region}")
+
+        x0, y0 = max(0, x), max(0, y)
+        x1, y1 = min(width, x + w), min(height, y + h)
+        if x0 >= x1 or y0 >= y1:
+            return None
+        return x0, y0, x1, y1
+
+    def crop(self, pixels: np.ndarray, region: Optional[Dict[str, Any]]) -> np.ndarray:
+        """按区域裁剪图片，未指定区域时原样返回"""
+        if not region:
+            return pixels
+        bounds = self.normalize_region(region, pixels.shape[1], pixels.shape[0])
+        if bounds is None:
+            raise ValueError(f"区域超出图片范围: {region}")
+        x0, y0, x1, y1 = bounds
+        return pixels[y0:y1, x0:x1]
+
+    def build_ignore_mask(
+        self, shape: Tuple[int, int], ignore_regions: Optional[List[Dict[str, Any]]]
+    ) -> np.ndarray:
+        """生成忽略区域掩码，True表示该像素不参与比较"""
+        height, width = shape
+        mask = np.zeros((height, width), dtype=bool)
+        for region in ignore_regions or []:
+            bounds = self.normalize_region(region, width, height)
+            if bounds is None:
+                continue
+            x0, y0, x1, y1 = bounds
+            mask[y0:y1, x0:x1] = True
+        return mask
+
+    @staticmethod
+    def _neighbourhood_range(pixels: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """每个像素3x3邻域内各通道的最小值和最大值"""
+        padded = np.pad(pixels, ((1, 1), (1, 1), (0, 0)), mode="edge")
+        windows = np.lib.stride_tricks.sliding_window_view(padded, (3, 3), axis=(0, 1))
+        return windows.min(axis=(-2, -1)), windows.max(axis=(-2, -1))
+
+    @staticmethod
+    def _intermediate_tone(pixels: np.ndarray, threshold: int) -> np.ndarray:
+        """像素亮度是否介于3x3邻域最暗和最亮之间（抗锯齿边缘的特征）"""
+        luma = pixels.astype(np.float32) @ np.array([0.299, 0.587, 0.114], dtype=np.float32)
+        padded = np.pad(luma, 1, mode="edge")
+        windows = np.lib.stride_tricks.sliding_window_view(padded, (3, 3))
+        return (luma > windows.min(axis=(-2, -1)) + threshold) & (
+            luma < windows.max(axis=(-2, -1)) - threshold
+        )
+
+    def _anti_aliased(
+        self, baseline: np.ndarray, current: np.ndarray, threshold: int
+    ) -> np.ndarray:
+        """
+        判断差异像素是否来自抗锯齿或亚像素偏移
+
+        像素在任一图片中是介于邻域明暗之间的过渡色，且两张图片的像素都落在对方邻域的取值范围内时，
+        差异只是边缘平移或抗锯齿；纯色之间的翻转（例如文字内容变化）仍算真实差异
+        """
+        base_min, base_max = self._neighbourhood_range(baseline)
+        cur_min, cur_max = self._neighbourhood_range(current)
+        base = baseline.astype(np.int16)
+        cur = current.astype(np.int16)
+
+        current_in_baseline = (
+            (cur >= base_min.astype(np.int16) - threshold)
+            & (cur <= base_max.astype(np.int16) + threshold)
+        ).all(axis=-1)
+        baseline_in_current = (
+            (base >= cur_min.astype(np.int16) - threshold)
+            & (base <= cur_max.astype(np.int16) + threshold)
+        ).all(axis=-1)
+        transition = self._intermediate_tone(baseline, threshold) | self._intermediate_tone(
+            current, threshold
+        )
+        return transition & current_in_baseline & baseline_in_current
+
+    def render_diff(
+        self,
+        baseline: np.ndarray,
+        diff_mask: np.ndarray,
+        anti_alias_mask: np.ndarray,
+        ignore_mask: np.ndarray,
+    ) -> bytes:
+        """生成差异图：变暗的基线灰度图上标出差异像素、抗锯齿像素和忽略区域"""
+        gray = baseline.astype(np.float32).mean(axis=-1, keepdims=True)
+        canvas = np.repeat(255 - (255 - gray) * DIFF_BACKGROUND_ALPHA, 3, axis=-1)
+        canvas[ignore_mask] = IGNORED_COLOR
+        canvas[anti_alias_mask] = ANTI_ALIAS_COLOR
+        canvas[diff_mask] = DIFF_COLOR
+        return self.encode_png(canvas)
+
+    def compare(
+        self,
+        baseline_data: bytes,
+        current_data: bytes,
+        tolerance: float = DEFAULT_TOLERANCE,
+        pixel_threshold: int = DEFAULT_PIXEL_THRESHOLD,
+        ignore_regions: Optional[List[Dict[str, Any]]] = None,
+        region: Optional[Dict[str, Any]] = None,
+        detect_anti_aliasing: bool = True,
+        include_diff_image: bool = True,
+    ) -> Dict[str, Any]:
+        """
+        比较当前截图与基线图片
+
+        Args:
+            baseline_data: 基线图片字节
+            current_data: 当前截图字节
+            tolerance: 允许的不同像素占比
+            pixel_threshold: 单像素通道差值阈值
+            ignore_regions: 忽略区域列表（相对于比较区域的坐标）
+            region: 只比较当前截图中的该区域，基线图片需已是该区域大小
+            detect_anti_aliasing: 是否排除抗锯齿造成的差异
+            include_diff_image: 失败时是否生成差异图
+
+        Returns:
+            {"passed", "mismatch_ratio", "diff_pixels", "compared_pixels", "bounding_box", "diff_image"}
+        """
+        if not 0 <= tolerance <= 1:
+            raise ValueError("tolerance必须在0-1之间")
+        if not 0 <= pixel_threshold <= 255:
+            raise ValueError("pixel_threshold必须在0-255之间")
+
+        baseline = self.load_image(baseline_data)
+        current = self.crop(self.load_image(current_data), region)
+
+        if baseline.shape != current.shape:
+            return {
+                "passed": False,
+                "reason": "size_mismatch",
+                "message": (
+                    f"图片尺寸不一致: 基线 {baseline.shape[1]}x{baseline.shape[0]}，"
+                    f"当前 {current.shape[1]}x{current.shape[0]}"
+                ),
+                "mismatch_ratio": 1.0,
+                "diff_pixels": None,
+                "anti_aliased_pixels": None,
+                "compared_pixels": None,
+                "bounding_box": None,
+                "diff_image": None,
+            }
+
+        ignore_mask = self.build_ignore_mask(baseline.shape[:2], ignore_regions)
+
+        delta = np.abs(baseline.astype(np.int16) - current.astype(np.int16)).max(axis=-1)
+        diff_mask = (delta > pixel_threshold) & ~ignore_mask
+
+        anti_alias_mask = np.zeros_like(diff_mask)
+        if detect_anti_aliasing and diff_mask.any():
+            anti_alias_mask = diff_mask & self._anti_aliased(baseline, current, pixel_threshold)
+            diff_mask &= ~anti_alias_mask
+
+        compared_pixels = int(ignore_mask.size - ignore_mask.sum())
+        diff_pixels = int(diff_mask.sum())
+        mismatch_ratio = diff_pixels / compared_pixels if compared_pixels else 0.0
+        passed = mismatch_ratio <= tolerance
+
+        bounding_box = None
+        if diff_pixels:
+            rows = np.flatnonzero(diff_mask.any(axis=1))
+            cols = np.flatnonzero(diff_mask.any(axis=0))
+            bounding_box = {
+                "x": int(cols[0]),
+                "y": int(rows[0]),
+                "width": int(cols[-1] - cols[0] + 1),
+                "height": int(rows[-1] - rows[0] + 1),
+            }
+
+        diff_image = None
+        if not passed and include_diff_image:
+            diff_image = self.render_diff(baseline, diff_mask, anti_alias_mask, ignore_mask)
+
+        return {
+            "passed": passed,
+            "reason": None if passed else "pixel_mismatch",
+            "message": f"不同像素占比 {mismatch_ratio:.4%}，容差 {tolerance:.4%}",
+            "mismatch_ratio": round(mismatch_ratio, 6),
+            "diff_pixels": diff_pixels,
+            "anti_aliased_pixels": int(anti_alias_mask.sum()),
+            "compared_pixels": compared_pixels,
+            "bounding_box": bounding_box,
+            "diff_image": diff_image,
+        }
+
+
+    # ==================== 基线管理 ====================
+
+    @staticmethod
+    def find_baseline(name: str, test_case_id: Optional[int] = None) -> Optional[VisualBaseline]:
+        """查找基线，优先使用用例自己的基线，其次是共享基线"""
+        if test_case_id is not None:
+            baseline = VisualBaseline.query.filter_by(
+                test_case_id=test_case_id, name=name
+            ).first()
+            if baseline:
+                return baseline
+        return VisualBaseline.query.filter(
+            VisualBaseline.test_case_id.is_(None), VisualBaseline.name == name
+        ).first()
+
+    def save_baseline(
+        self,
+        name: str,
+        image_data: bytes,
+        test_case_id: Optional[int] = None,
+        region: Optional[Dict[str, Any]] = None,
+        ignore_regions: Optional[List[Dict[str, Any]]] = None,
+        created_by: str = "user",
+    ) -> VisualBaseline:
+        """创建或替换基线图片"""
+        if not name:
+            raise ValueError("基线名称不能为空")
+        pixels = self.load_image(image_data)
+        # 校验忽略区域格式
+        self.build_ignore_mask(pixels.shape[:2], ignore_regions)
+
+        baseline = VisualBaseline.query.filter_by(
+            test_case_id=test_case_id, name=name
+        ).first()
+        if baseline is None:
+            baseline = VisualBaseline(test_case_id=test_case_id, name=name)
+            db.session.add(baseline)
+
+        baseline.image = self.encode_png(pixels)
+        baseline.height, baseline.width = pixels.shape[:2]
+        baseline.region = json.dumps(region) if region else None
+        baseline.ignore_regions = json.dumps(ignore_regions) if ignore_regions else None
+        baseline.created_by = created_by
+        baseline.last_compared_at = None
+        baseline.last_mismatch_ratio = None
+        db.session.commit()
+        logger.info(f"视觉基线已保存: {name} ({baseline.width}x{baseline.height})")
+        return baseline
+
+    def assert_visual(
+        self,
+        name: str,
+        image_data: bytes,
+        test_case_id: Optional[int] = None,
+        options: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """
+        视觉断言：与命名基线比较
+
+        没有基线时默认以本次截图创建基线并通过（create_if_missing=False时报错）；
+        update_baseline=True时直接用本次截图替换基线
+        """
+        options = options or {}
+        baseline = self.find_baseline(name, test_case_id)
+
+        if options.get("update_baseline") or (
+            baseline is None and options.get("create_if_missing", True)
+        ):
+            region = options.get("region")
+            pixels = self.crop(self.load_image(image_data), region)
+            baseline = self.save_baseline(
+                name,
+                self.encode_png(pixels),
+                test_case_id=test_case_id,
+                region=region,
+                ignore_regions=options.get("ignore_regions"),
+                created_by=options.get("created_by", "system"),
+            )
+            return {
+                "passed": True,
+                "reason": "baseline_created",
+                "message": f"已保存基线: {name}",
+                "baseline_id": baseline.id,
+                "mismatch_ratio": 0.0,
+                "diff_image": None,
+            }
+
+        if baseline is None:
+            raise ValueError(f"视觉基线不存在: {name}")
+
+        ignore_regions = list(options.get("ignore_regions") or [])
+        if baseline.ignore_regions:
+            ignore_regions.extend(json.loads(baseline.ignore_regions))
+
+        result = self.compare(
+            baseline.image,
+            image_data,
+            tolerance=options.get("tolerance", DEFAULT_TOLERANCE),
+            pixel_threshold=options.get("pixel_threshold", DEFAULT_PIXEL_THRESHOLD),
+            ignore_regions=ignore_regions,
+            region=options.get("region"),
+            detect_anti_aliasing=options.get("anti_aliasing", True),
+        )
+        baseline.last_compared_at = datetime.utcnow()
+        baseline.last_mismatch_ratio = result["mismatch_ratio"]
+        db.session.commit()
+
+        result["baseline_id"] = baseline.id
+        return result
+
+
+# 全局比对服务实例
+_visual_diff_service = None
+
+
+def get_visual_diff_service() -> VisualDiffService:
+    """获取视觉比对服务实例（单例模式）"""
+    global _visual_diff_service
+    if _visual_diff_service is None:
+        _visual_diff_service = VisualDiffService()
+    return _visual_diff_service
@@ -0,0 +1,153 @@
+"""
+Cron表达式解析工具
+支持标准5段格式（分 时 日 月 周）以及 @hourly/@daily/@weekly/@monthly 别名，按UTC时间计算
+"""
+
+from datetime import datetime, timedelta
+from typing import Iterator, List, Optional, Set
+
+# 各字段取值范围：分、时、日、月、周（0和7都表示周日）
+FIELD_RANGES = [(0, 59), (0, 23), (1, 31), (1, 12), (0, 7)]
+FIELD_NAMES = ["分钟", "小时", "日", "月", "星期"]
+
+ALIASES = {
+    "@hourly": "0 * * * *",
+    "@daily": "0 0 * * *",
+    "@midnight": "0 0 * * *",
+    "@weekly": "0 0 * * 0",
+    "@monthly": "0 0 1 * *",
+}
+
+# 向后搜索触发时间的最大年数，避免 "0 0 30 2 *" 这类永远不触发的表达式死循环
+MAX_SEARCH_YEARS = 5
+
+
+class CronExpression:
+    """5段cron表达式"""
+
+    def __init__(self, expression: str):
+        if not expression or not expression.strip():
+            raise ValueError("cron表达式不能为空")
+
+        self.expression = expression.strip()
+        fields = ALIASES.get(self.expression.lower(), self.expression).split()
+        if len(fields) != 5:
+            raise ValueError(f"cron表达式必须包含5个字段: {self.expression}")
+
+        parsed = [
+            self._parse_field(field, low, high, name)
+            for field, (low, high), name in zip(fields, FIELD_RANGES, FIELD_NAMES)
+        ]
+        self.minutes, self.hours, self.days, self.months, weekdays = parsed
+        self.weekdays = {0 if day == 7 else day for day in weekdays}
+
+        # 日和周同时受限时，满足任意一个即触发（与标准cron一致）
+        self._day_restricted = fields[2] != "*"
+        self._weekday_restricted = fields[4] != "*"
+
+    @staticmethod
+    def _parse_field(field: str, low: int, high: int, name: str) -> Set[int]:
+        """解析单个字段，支持 *、*/n、a-b、a-b/n 和逗号列表"""
+        values = set()
+        for part in field.split(","):
+            step = 1
+            if "/" in part:
+                part, step_text = part.split("/", 1)
+                if not step_text.isdigit() or int(step_text) == 0:
+                    raise ValueError(f"{name}字段步长无效: {field}")
+                step = int(step_text)
+
+            if part == "*":
+                start, end = low, high
+            elif "-" in part:
+                start_text, end_text = part.split("-", 1)
+                if not start_text.isdigit() or not end_text.isdigit():
+                    raise ValueError(f"{name}字段范围无效: {field}")
+                start, end = int(start_text), int(end_text)
+            elif part.isdigit():
+                start = int(part)
+                end = high if step > 1 else start
+            else:
+                raise ValueError(f"{name}字段无效: {field}")
+
+            if start < low or end > high or start > end:
+                raise ValueError(f"{name}字段超出范围({low}-{high}): {field}")
+            values.update(range(start, end + 1, step))
+
+        return values
+
+    def _day_matches(self, dt: datetime) -> bool:
+        day_match = dt.day in self.days
+        # Python中周一为0，cron中周日为0
+        weekday_match = (dt.weekday() + 1) % 7 in self.weekdays
+
+        if self._day_restricted and self._weekday_restricted:
+            return day_match or weekday_match
+        return day_match and weekday_match
+
+    def matches(self, dt: datetime) -> bool:
+        """判断给定时间（精确到分钟）是否触发"""
+        return (
+            dt.minute in self.minutes
+            and dt.hour in self.hours
+            and dt.month in self.months
+            and self._day_matches(dt)
+        )
+
+    def next_after(self, dt: datetime) -> datetime:
+        """获取严格晚于给定时间的下一次触发时间"""
+        current = dt.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        # 从年初算起，避免2月29日替换年份时日期越界
+        limit = datetime(current.year + MAX_SEARCH_YEARS, 1, 1)
+
+        while current < limit:
+            if current.month not in self.months:
+                year = current.year + (1 if current.month == 12 else 0)
+                month = 1 if current.month == 12 else current.month + 1
+                current = datetime(year, month, 1)
+                continue
+            if not self._day_matches(current):
+                current = datetime(current.year, current.month, current.day) + timedelta(
+                    days=1
+                )
+                continue
+            if current.hour not in self.hours:
+                current = current.replace(minute=0) + timedelta(hours=1)
+                continue
+            if current.minute not in self.minutes:
+                current += timedelta(minutes=1)
+                continue
+            return current
+
+        raise ValueError(
+            f"cron表达式在{MAX_SEARCH_YEARS}年内没有触发时间: {self.expression}"
+        )
+
+    def iter_between(
+        self, start: datetime, end: datetime, limit: Optional[int] = None
+    ) -> Iterator[datetime]:
+        """按顺序生成 [start, end) 区间内的触发时间"""
+        current = start - timedelta(minutes=1)
+        count = 0
+        while limit is None or count < limit:
+            try:
+                current = self.next_after(current)
+            except ValueError:
+                return
+            if current >= end:
+                return
+            if current >= start:
+                yield current
+                count += 1
+
+    def next_runs(self, after: datetime, count: int) -> List[datetime]:
+        """获取之后的若干次触发时间"""
+        runs = []
+        current = after
+        for _ in range(count):
+            try:
+                current = self.next_after(current)
+            except ValueError:
+                break
+            runs.append(current)
+        return runs
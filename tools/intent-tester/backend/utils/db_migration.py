@@ -0,0 +1,82 @@
+"""
+数据库结构升级工具
+
+db.create_all()只创建缺失的表，不会修改已有的表。模型给已有表新增的列和索引由这里补齐：
+按模型定义对比数据库中的实际结构，用ALTER TABLE ADD COLUMN添加缺失的列（均为可空列），
+对有标量默认值的列回填已有行，再创建缺失的索引。应用启动时在create_all之后自动执行，
+也可以在升级部署前单独执行（新增的列和索引输出到日志）：
+
+    python -m backend.utils.db_migration
+"""
+
+import logging
+from typing import List
+
+from sqlalchemy import inspect, text
+
+logger = logging.getLogger(__name__)
+
+
+def upgrade_schema(engine, metadata) -> List[str]:
+    """
+    为已有的表补齐模型中新增的列和索引
+
+    Args:
+        engine: 数据库引擎
+        metadata: 模型元数据（db.metadata）
+
+    Returns:
+        新增的列和索引，格式为 "表名.列名" / "表名:索引名"
+    """
+    changes = []
+    preparer = engine.dialect.identifier_preparer
+
+    with engine.begin() as connection:
+        inspector = inspect(connection)
+        existing_tables = set(inspector.get_table_names())
+
+        for table in metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+
+            existing_columns = {c["name"] for c in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing_columns:
+                    continue
+                if not column.nullable and column.default is None and column.server_default is None:
+                    # 已有行无法取值的非空列需要人工迁移
+                    raise RuntimeError(f"无法自动添加非空列: {table.name}.{column.name}")
+
+                column_type = column.type.compile(dialect=engine.dialect)
+                connection.execute(
+                    text(
+                        f"ALTER TABLE {preparer.format_table(table)} "
+                        f"ADD COLUMN {preparer.format_column(column)} {column_type}"
+                    )
+                )
+                # 模型默认值在Python端生成，已有行按默认值回填
+                if column.default is not None and column.default.is_scalar:
+                    connection.execute(
+                        table.update()
+                        .where(column.is_(None))
+                        .values({column.name: column.default.arg})
+                    )
+                changes.append(f"{table.name}.{column.name}")
+
+            existing_indexes = {i["name"] for i in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in existing_indexes:
+                    index.create(bind=connection)
+                    changes.append(f"{table.name}:{index.name}")
+
+    if changes:
+        logger.info(f"数据库结构已升级: {', '.join(changes)}")
+    return changes
+
+
+if __name__ == "__main__":
+    from backend.app import create_app
+
+    # 创建应用时执行create_all和结构升级，新增的列和索引输出到日志
+    logging.basicConfig(level=logging.INFO)
+    create_app()
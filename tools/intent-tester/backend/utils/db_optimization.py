@@ -159,6 +159,16 @@ def cleanup_old_executions(db, days_to_keep: int = 30):
         WHERE created_at < :cutoff_date
         """
 
+        execution_ids = [
+            row[0]
+            for row in db.session.execute(
+                text(
+                    "SELECT execution_id FROM execution_history WHERE created_at < :cutoff_date"
+                ),
+                {"cutoff_date": cutoff_date},
+            )
+        ]
+
         step_result = db.session.execute(
             text(step_delete_sql), {"cutoff_date": cutoff_date}
         )
@@ -168,12 +178,24 @@ def cleanup_old_executions(db, days_to_keep: int = 30):
 
         db.session.commit()
 
+        # 执行日志和录像文件随执行记录一起清理
+        from backend.services.execution_log_store import get_execution_log_store
+        from backend.services.execution_video_store import get_execution_video_store
+        from backend.services.executor_registry import get_executor_registry
+
+        logs_deleted = get_execution_log_store().delete_many(execution_ids)
+        videos_deleted = get_execution_video_store().delete_many(execution_ids)
+        event_logs_deleted = get_executor_registry().delete_event_logs(execution_ids)
+
         logger.info(
             f"🧹 清理完成: 删除了 {history_result.rowcount} 条执行记录和 {step_result.rowcount} 条步骤记录"
         )
         return {
             "execution_records_deleted": history_result.rowcount,
             "step_records_deleted": step_result.rowcount,
+            "logs_deleted": logs_deleted,
+            "videos_deleted": videos_deleted,
+            "event_logs_deleted": event_logs_deleted,
             "cutoff_date": cutoff_date.isoformat(),
         }
     except Exception as e:
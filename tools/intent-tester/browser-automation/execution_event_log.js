@@ -0,0 +1,181 @@
+/**
+ * 执行事件日志
+ * 每个执行一个有界环形缓冲区，事件带单调递增的序号，
+ * 执行结束后落盘为JSONL文件，客户端断线重连或中途打开时按序号增量补齐
+ */
+
+const fs = require('fs');
+const path = require('path');
+
+class ExecutionEventLog {
+    constructor(capacity, directory) {
+        this.capacity = Math.max(1, capacity);
+        this.directory = directory;
+        this.logs = new Map();
+    }
+
+    _filePath(executionId) {
+        // 执行ID来自请求参数，只保留安全字符避免路径穿越
+        const safeId = String(executionId).replace(/[^A-Za-z0-9_.-]/g, '_');
+        return path.join(this.directory, `${safeId}.jsonl`);
+    }
+
+    _getOrCreate(executionId) {
+        let log = this.logs.get(executionId);
+        if (!log) {
+            log = { nextSeq: 1, events: [], completed: false, spilled: false, updatedAt: Date.now() };
+            this.logs.set(executionId, log);
+        }
+        return log;
+    }
+
+    // 追加事件，返回带序号的事件；缓冲区满时丢弃最早的事件
+    append(executionId, type, data) {
+        const log = this._getOrCreate(executionId);
+        const event = {
+            seq: log.nextSeq++,
+            type,
+            timestamp: new Date().toISOString(),
+            data
+        };
+        log.events.push(event);
+        if (log.events.length > this.capacity) {
+            log.events.shift();
+        }
+        log.updatedAt = Date.now();
+
+        // 落盘后仍有迟到事件（例如停止执行后的日志）时追加到文件
+        if (log.spilled) {
+            try {
+                fs.appendFileSync(this._filePath(executionId), JSON.stringify(event) + '\n');
+            } catch (error) {
+                console.warn(`⚠️ 追加执行事件失败: ${error.message}`);
+            }
+        }
+        return event;
+    }
+
+    // 执行结束：把缓冲区中的事件写入磁盘
+    complete(executionId) {
+        const log = this.logs.get(executionId);
+        if (!log || log.spilled) {
+            return;
+        }
+        log.completed = true;
+        try {
+            fs.mkdirSync(this.directory, { recursive: true });
+            const content = log.events.map(event => JSON.stringify(event)).join('\n');
+            fs.writeFileSync(this._filePath(executionId), content ? content + '\n' : '');
+            log.spilled = true;
+        } catch (error) {
+            console.warn(`⚠️ 执行事件落盘失败: ${error.message}`);
+        }
+    }
+
+    _readSpilled(executionId) {
+        const filePath = this._filePath(executionId);
+        if (!fs.existsSync(filePath)) {
+            return null;
+        }
+        const events = fs.readFileSync(filePath, 'utf8')
+            .split('\n')
+            .filter(line => line.trim())
+            .map(line => {
+                try {
+                    return JSON.parse(line);
+                } catch (error) {
+                    return null;
+                }
+            })
+            .filter(Boolean);
+        return { events, completed: true };
+    }
+
+    // 返回序号大于since的事件；since早于缓冲区最早事件时truncated为true，
+    // 客户端需要通过执行报告接口重建完整状态
+    since(executionId, since = 0, limit = 500) {
+        const source = this.logs.get(executionId) || this._readSpilled(executionId);
+        if (!source) {
+            return null;
+        }
+
+        const events = source.events;
+        const firstSeq = events.length > 0 ? events[0].seq : null;
+        const lastSeq = events.length > 0 ? events[events.length - 1].seq : since;
+        const pending = events.filter(event => event.seq > since);
+        const page = pending.slice(0, limit);
+
+        return {
+            events: page,
+            first_seq: firstSeq,
+            last_seq: lastSeq,
+            next_seq: page.length > 0 ? page[page.length - 1].seq : since,
+            has_more: pending.length > page.length,
+            truncated: firstSeq !== null && since < firstSeq - 1,
+            completed: Boolean(source.completed)
+        };
+    }
+
+    // 内存中只保留最近的日志，已落盘的较早日志从内存移除
+    evict(keep) {
+        const entries = Array.from(this.logs.entries());
+        if (entries.length <= keep) {
+            return;
+        }
+        entries
+            .sort((a, b) => b[1].updatedAt - a[1].updatedAt)
+            .slice(keep)
+            .filter(([, log]) => log.spilled)
+            .forEach(([id]) => this.logs.delete(id));
+    }
+
+    // 删除已清理执行的事件日志（内存和磁盘），返回删除的落盘文件数
+    remove(executionIds) {
+        let deleted = 0;
+        executionIds.forEach(executionId => {
+            const log = this.logs.get(executionId);
+            // 仍在运行的执行不删除
+            if (log && !log.completed) {
+                return;
+            }
+            this.logs.delete(executionId);
+            try {
+                fs.unlinkSync(this._filePath(executionId));
+                deleted++;
+            } catch (error) {
+                if (error.code !== 'ENOENT') {
+                    console.warn(`⚠️ 删除执行事件失败 ${executionId}: ${error.message}`);
+                }
+            }
+        });
+        return deleted;
+    }
+
+    // 删除修改时间早于maxAgeMs的落盘文件，返回删除的文件数
+    prune(maxAgeMs, now = Date.now()) {
+        let names;
+        try {
+            names = fs.readdirSync(this.directory);
+        } catch (error) {
+            return 0;
+        }
+        let deleted = 0;
+        names
+            .filter(name => name.endsWith('.jsonl'))
+            .forEach(name => {
+                const filePath = path.join(this.directory, name);
+                try {
+                    if (now - fs.statSync(filePath).mtimeMs > maxAgeMs) {
+                        fs.unlinkSync(filePath);
+                        this.logs.delete(name.slice(0, -'.jsonl'.length));
+                        deleted++;
+                    }
+                } catch (error) {
+                    console.warn(`⚠️ 清理执行事件失败 ${name}: ${error.message}`);
+                }
+            });
+        return deleted;
+    }
+}
+
+module.exports = { ExecutionEventLog };
@@ -3,11 +3,19 @@ MidSceneJS Python封装类 - 通过HTTP API调用MidSceneJS功能，完全依赖
 """
 
 import os
+import sys
 import json
+import time
 import requests
 from typing import Dict, Any, Optional, List
 from dotenv import load_dotenv
 
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from midscene_framework.deadline import Deadline, DeadlineExceeded
+from midscene_framework.page_change import PageFingerprint
+from midscene_framework.wait_engine import WaitEngine, WaitReport
+
 # 加载环境变量
 load_dotenv()
 
@@ -15,18 +23,54 @@ load_dotenv()
 class MidSceneAI:
     """MidSceneJS Python封装类 - 纯AI驱动，无传统方法fallback"""
 
-    def __init__(self, server_url: str = "http://127.0.0.1:3001"):
+    def __init__(
+        self,
+        server_url: str = "http://127.0.0.1:3001",
+        deadline: Optional[Deadline] = None,
+    ):
         """
         初始化MidSceneAI
 
         Args:
             server_url: MidSceneJS服务器地址
+            deadline: 执行截止时间，所有请求超时和重试都受剩余预算约束
         """
         self.server_url = server_url.rstrip("/")
         self.config = self._load_config()
         self.current_mode = "headless"  # 默认无头模式
+        self.deadline = deadline
+        self.wait_engine = WaitEngine()
+        self.last_wait_report: Optional[WaitReport] = None
         self._verify_server_connection()
 
+    def set_deadline(self, budget_seconds: Optional[float]) -> Optional[Deadline]:
+        """
+        设置执行截止时间
+
+        Args:
+            budget_seconds: 从现在起的时间预算（秒），None表示取消截止时间
+        """
+        self.deadline = Deadline.after(budget_seconds) if budget_seconds else None
+        return self.deadline
+
+    def remaining_budget_ms(self) -> Optional[int]:
+        """剩余预算（毫秒），未设置截止时间时返回None"""
+        return self.deadline.remaining_ms() if self.deadline else None
+
+    def _request_timeout(self, timeout: float) -> float:
+        """按剩余预算收紧请求超时"""
+        if self.deadline is None:
+            return timeout
+        self.deadline.check("AI请求")
+        return self.deadline.clamp(timeout)
+
+    def _sleep_before_retry(self, seconds: float) -> bool:
+        """重试前等待，剩余预算不足以等待并再次请求时返回False"""
+        if self.deadline is not None and seconds >= self.deadline.remaining():
+            return False
+        time.sleep(seconds)
+        return True
+
     def _load_config(self) -> Dict[str, Any]:
         """加载配置"""
         return {
@@ -53,60 +97,57 @@ class MidSceneAI:
     def _make_request(
         self, endpoint: str, method: str = "POST", data: Dict = None, retries: int = 2
     ) -> Dict[str, Any]:
-        """发送HTTP请求到MidSceneJS服务器，带重试机制"""
+        """发送HTTP请求到MidSceneJS服务器，带重试机制，超时和重试受截止时间约束"""
         url = f"{self.server_url}{endpoint}"
 
         for attempt in range(retries + 1):
             try:
                 if method == "POST":
                     response = requests.post(
-                        url, json=data or {}, timeout=90
+                        url, json=data or {}, timeout=self._request_timeout(90)
                     )  # 增加超时时间
                 else:
-                    response = requests.get(url, timeout=30)
+                    response = requests.get(url, timeout=self._request_timeout(30))
 
                 response.raise_for_status()
                 result = response.json()
 
                 if not result.get("success"):
                     error_msg = result.get("error", "未知错误")
-                    if attempt < retries:
+                    if attempt < retries and self._sleep_before_retry(2):
                         print(f"⚠️  AI操作失败，第{attempt + 1}次重试: {error_msg}")
-                        import time
-
-                        time.sleep(2)  # 重试前等待2秒
                         continue
                     else:
                         raise Exception(f"AI操作失败: {error_msg}")
 
                 return result
 
+            except DeadlineExceeded:
+                raise
+
             except requests.exceptions.Timeout:
-                if attempt < retries:
+                if self.deadline is not None and self.deadline.expired():
+                    raise DeadlineExceeded("AI请求超过截止时间")
+                if attempt < retries and self._sleep_before_retry(3):
                     print(f"⚠️  请求超时，第{attempt + 1}次重试...")
-                    import time
-
-                    time.sleep(3)
                     continue
                 else:
                     raise Exception("请求超时，AI模型响应较慢")
 
             except requests.exceptions.ConnectionError:
-                if attempt < retries:
+                if attempt < retries and self._sleep_before_retry(2):
                     print(f"⚠️  连接失败，第{attempt + 1}次重试...")
-                    import time
-
-                    time.sleep(2)
                     continue
                 else:
                     raise Exception("无法连接到MidSceneJS服务器")
 
             except Exception as e:
-                if attempt < retries and "500 Server Error" in str(e):
+                if (
+                    attempt < retries
+                    and "500 Server Error" in str(e)
+                    and self._sleep_before_retry(3)
+                ):
                     print(f"⚠️  服务器错误，第{attempt + 1}次重试: {str(e)}")
-                    import time
-
-                    time.sleep(3)
                     continue
                 else:
                     raise Exception(f"AI操作失败: {str(e)}")
@@ -246,21 +287,26 @@ class MidSceneAI:
         print(f"✅ aiBoolean完成，结果: {boolean_result}")
         return bool(boolean_result)
 
-    def ai_assert(self, prompt: str) -> bool:
+    def ai_assert(self, prompt: str, retries: int = 2) -> bool:
         """
         执行AI断言 - 纯AI驱动
 
         Args:
             prompt: 断言描述
+            retries: 请求级重试次数
 
         Returns:
             断言是否通过
         """
         print(f"🔍 AI断言: {prompt}")
         try:
-            result = self._make_request("/ai-assert", data={"prompt": prompt})
+            result = self._make_request(
+                "/ai-assert", data={"prompt": prompt}, retries=retries
+            )
             print(f"✅ AI断言通过")
             return True
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             print(f"❌ AI断言失败: {e}")
             raise Exception(f"AI断言失败: {e}")
@@ -298,29 +344,59 @@ class MidSceneAI:
         print(f"✅ AI输入成功")
         return result.get("result", result)
 
-    def ai_wait_for(self, prompt: str, timeout: Optional[int] = None) -> Dict[str, Any]:
+    def page_fingerprint(self) -> PageFingerprint:
+        """获取当前页面指纹（截图dHash + DOM校验和），不调用模型"""
+        result = self._make_request("/page-fingerprint", method="GET", retries=0)
+        return PageFingerprint.from_dict(result["fingerprint"])
+
+    def ai_wait_for(
+        self,
+        prompt: str,
+        timeout: Optional[int] = None,
+        change_detection: bool = True,
+    ) -> Dict[str, Any]:
         """
         AI等待条件满足 - 纯AI驱动
 
         Args:
             prompt: 等待条件描述
             timeout: 超时时间（毫秒）
+            change_detection: 服务器本地轮询页面指纹，只在页面变化后让模型重新判断
 
         Returns:
             操作结果
         """
         timeout = timeout or self.config["timeout"]
+        if self.deadline is not None:
+            # 等待时间不超过剩余预算，并为请求往返预留1秒
+            self.deadline.check("AI等待")
+            timeout = max(0, min(timeout, self.deadline.remaining_ms() - 1000))
         print(f"⏳ AI等待: {prompt} (超时: {timeout}ms)")
         result = self._make_request(
-            "/ai-wait-for", data={"prompt": prompt, "timeout": timeout}
+            "/ai-wait-for",
+            data={
+                "prompt": prompt,
+                "timeout": timeout,
+                "change_detection": change_detection,
+            },
         )
-        print(f"✅ AI等待条件满足")
-        return result.get("result", result)
+        wait_result = result.get("result", result)
+        if isinstance(wait_result, dict) and "probes" in wait_result:
+            print(
+                f"✅ AI等待条件满足（耗时{wait_result.get('elapsed_ms')}ms，"
+                f"探测{wait_result['probes']}次，模型调用{wait_result.get('model_calls')}次）"
+            )
+        else:
+            print(f"✅ AI等待条件满足")
+        return wait_result
 
     def smart_wait_and_verify(self, condition: str, max_wait: int = 5) -> bool:
         """
         智能等待和验证 - 更稳定的等待策略
 
+        由等待引擎按指数增长并封顶的间隔探测页面指纹，页面变化且就绪后才调用AI断言，
+        等待统计保存在last_wait_report中
+
         Args:
             condition: 验证条件描述
             max_wait: 最大等待时间（秒）
@@ -328,25 +404,35 @@ class MidSceneAI:
         Returns:
             验证是否成功
         """
-        import time
-
         print(f"🔍 智能等待验证: {condition}")
 
-        for i in range(max_wait):
+        def evaluate() -> bool:
+            # 每次探测只调用一次模型，由等待引擎决定何时再探测；截止时间到期时结束等待
             try:
-                time.sleep(1)
-                self.ai_assert(condition)
-                print(f"✅ 验证成功（等待{i+1}秒）")
+                self.ai_assert(condition, retries=0)
                 return True
-            except Exception as e:
-                if i < max_wait - 1:
-                    print(f"⏳ 等待中... ({i+1}/{max_wait})")
-                    continue
-                else:
-                    print(f"⚠️  验证失败: {e}")
-                    return False
+            except DeadlineExceeded:
+                raise
+            except Exception:
+                return False
+
+        if self.deadline is not None:
+            max_wait = self.deadline.clamp(max_wait)
 
-        return False
+        report = self.wait_engine.wait(
+            condition, self.page_fingerprint, evaluate, timeout=max_wait
+        )
+        self.last_wait_report = report
+
+        summary = (
+            f"等待{report.elapsed_seconds:.1f}秒，探测{report.probes}次，"
+            f"模型调用{report.model_calls}次"
+        )
+        if report.satisfied:
+            print(f"✅ 验证成功（{summary}）")
+        else:
+            print(f"⚠️  验证失败（{summary}）")
+        return report.satisfied
 
     def ai_scroll(
         self,
@@ -68,6 +68,11 @@ const { chromium } = require('playwright');
 const { createServer } = require('http');
 const { Server } = require('socket.io');
 const axios = require('axios');
+const os = require('os');
+const { PNG } = require('pngjs');
+const yaml = require('js-yaml');
+const { ExecutionEventLog } = require('./execution_event_log');
+const { WAIT_DEFAULTS, WaitEngine } = require('./wait_engine');
 
 const app = express();
 const server = createServer(app);
@@ -91,6 +96,8 @@ app.use(express.json({ limit: '50mb' }));
 let browser = null;
 let page = null;
 let agent = null;
+// 各模型级别的AI代理，共用同一个页面
+let tierAgents = {};
 
 // 执行状态管理
 const executionStates = new Map();
@@ -113,6 +120,224 @@ function cleanupOldExecutions() {
                 executionStates.delete(id);
             });
     }
+    executionEventLog.evict(50);
+
+    // 按保留期清理落盘的事件日志，每小时最多扫描一次目录
+    if (Date.now() - lastEventLogPrune > EVENT_LOG_PRUNE_INTERVAL) {
+        lastEventLogPrune = Date.now();
+        const pruned = executionEventLog.prune(EVENT_LOG_RETENTION_DAYS * 24 * 60 * 60 * 1000);
+        if (pruned > 0) {
+            console.log(`🧹 清理过期执行事件日志: ${pruned} 个`);
+        }
+    }
+}
+
+// 执行事件日志配置
+const EVENT_BUFFER_SIZE = parseInt(process.env.EVENT_BUFFER_SIZE || '1000', 10);
+const EVENT_LOG_DIR = process.env.EVENT_LOG_DIR || require('path').join(process.cwd(), 'event_logs');
+// 落盘事件日志的保留天数，与Web系统清理旧执行记录的默认保留期一致；
+// Web系统清理执行记录时也会通知节点删除对应的事件日志
+const EVENT_LOG_RETENTION_DAYS = parseFloat(process.env.EVENT_LOG_RETENTION_DAYS || '30');
+const EVENT_LOG_PRUNE_INTERVAL = 60 * 60 * 1000;
+let lastEventLogPrune = 0;
+
+const executionEventLog = new ExecutionEventLog(EVENT_BUFFER_SIZE, EVENT_LOG_DIR);
+
+// 发送执行事件：先写入事件日志分配序号，再通过WebSocket广播
+// 截图数据体积较大，缓冲区中只记录标记，截图本身可从执行报告获取
+function emitExecutionEvent(type, payload) {
+    if (!payload.executionId) {
+        io.emit(type, payload);
+        return null;
+    }
+    const { screenshot, ...rest } = payload;
+    const data = screenshot === undefined ? rest : { ...rest, has_screenshot: true };
+    const event = executionEventLog.append(payload.executionId, type, data);
+    io.emit(type, { ...payload, seq: event.seq });
+    return event;
+}
+
+// 执行节点注册配置 - 多节点部署时由Web系统统一调度
+const EXECUTOR_REGISTRY_ENABLED = process.env.EXECUTOR_REGISTRY_ENABLED === '1';
+const EXECUTOR_NODE_ID = process.env.EXECUTOR_NODE_ID || `${os.hostname()}-${port}`;
+// 执行共用进程内的browser/page/agent（以及tierAgents、payloadOptimizer.active），
+// 同一进程内并发执行会互相关闭上下文和浏览器，因此每个进程只提供1个槽位；需要更多并发时部署多个节点进程
+const REQUESTED_EXECUTOR_SLOTS = parseInt(process.env.EXECUTOR_TOTAL_SLOTS || '1', 10);
+const EXECUTOR_TOTAL_SLOTS = 1;
+if (REQUESTED_EXECUTOR_SLOTS > 1) {
+    console.warn(`⚠️ EXECUTOR_TOTAL_SLOTS=${REQUESTED_EXECUTOR_SLOTS} 未生效：执行共用同一浏览器实例，每个节点进程只提供1个槽位`);
+}
+const EXECUTOR_PUBLIC_URL = process.env.EXECUTOR_PUBLIC_URL || `http://localhost:${port}`;
+const EXECUTOR_HEARTBEAT_INTERVAL = parseInt(process.env.EXECUTOR_HEARTBEAT_INTERVAL || '10000', 10);
+// 退出前排空的最长等待时间，超时仍未结束的执行交还Web系统重新排队
+const EXECUTOR_DRAIN_TIMEOUT = parseInt(process.env.EXECUTOR_DRAIN_TIMEOUT || '300000', 10);
+
+// 节点状态：active / draining / drained，由Web系统在心跳响应中下发
+let executorNodeStatus = 'active';
+let heartbeatTimer = null;
+// 本节点主动发起的排空（SIGTERM或/api/drain），心跳响应不会把它恢复为active
+let localDrain = null;
+// 排空超时交还给Web系统的执行，退出过程中不再上报它们的结果
+const releasedExecutionIds = new Set();
+
+function getRunningExecutionIds() {
+    return Array.from(executionStates.entries())
+        .filter(([, state]) => state.status === 'running')
+        .map(([id]) => id);
+}
+
+function getNodeLoad() {
+    const cpuCount = os.cpus().length || 1;
+    const runningIds = getRunningExecutionIds();
+    return {
+        free_slots: Math.max(0, EXECUTOR_TOTAL_SLOTS - runningIds.length),
+        cpu_percent: Math.min(100, (os.loadavg()[0] / cpuCount) * 100),
+        memory_percent: (1 - os.freemem() / os.totalmem()) * 100,
+        running_executions: runningIds
+    };
+}
+
+async function registerExecutorNode() {
+    try {
+        await axios.post(`${API_BASE_URL}/executors/register`, {
+            node_id: EXECUTOR_NODE_ID,
+            server_url: EXECUTOR_PUBLIC_URL,
+            total_slots: EXECUTOR_TOTAL_SLOTS,
+            metadata: { hostname: os.hostname(), pid: process.pid }
+        }, { timeout: 5000 });
+        executorNodeStatus = 'active';
+        console.log(`✅ 执行节点已注册: ${EXECUTOR_NODE_ID} (${EXECUTOR_TOTAL_SLOTS} 槽位)`);
+        return true;
+    } catch (error) {
+        console.warn(`⚠️ 执行节点注册失败: ${error.message}`);
+        return false;
+    }
+}
+
+async function sendExecutorHeartbeat() {
+    try {
+        const response = await axios.post(
+            `${API_BASE_URL}/executors/${encodeURIComponent(EXECUTOR_NODE_ID)}/heartbeat`,
+            getNodeLoad(),
+            { timeout: 5000 }
+        );
+        const nodeStatus = response.data?.data?.status;
+        if (localDrain && nodeStatus === 'active') {
+            // Web系统尚未收到排空通知（例如通知失败），重新通知
+            await notifyExecutorDrain();
+        } else if (nodeStatus && nodeStatus !== executorNodeStatus) {
+            console.log(`执行节点状态变更: ${executorNodeStatus} -> ${nodeStatus}`);
+            executorNodeStatus = nodeStatus;
+        }
+    } catch (error) {
+        // Web系统不认识该节点（例如数据库被重建）时重新注册，排空中的节点不再注册
+        if (error.response && error.response.status === 404 && !localDrain) {
+            await registerExecutorNode();
+        } else {
+            console.warn(`⚠️ 执行节点心跳失败: ${error.message}`);
+        }
+    }
+}
+
+async function startExecutorHeartbeat() {
+    await registerExecutorNode();
+    heartbeatTimer = setInterval(sendExecutorHeartbeat, EXECUTOR_HEARTBEAT_INTERVAL);
+}
+
+async function notifyExecutorDrain() {
+    if (!EXECUTOR_REGISTRY_ENABLED) return;
+    try {
+        await axios.post(
+            `${API_BASE_URL}/executors/${encodeURIComponent(EXECUTOR_NODE_ID)}/drain`,
+            {},
+            { timeout: 5000 }
+        );
+    } catch (error) {
+        console.warn(`⚠️ 通知排空失败: ${error.message}`);
+    }
+}
+
+async function releaseExecutorExecutions(executionIds) {
+    executionIds.forEach(id => releasedExecutionIds.add(id));
+    if (!EXECUTOR_REGISTRY_ENABLED) return [];
+    try {
+        const response = await axios.post(
+            `${API_BASE_URL}/executors/${encodeURIComponent(EXECUTOR_NODE_ID)}/release`,
+            {},
+            { timeout: 5000 }
+        );
+        return response.data?.data?.requeued || [];
+    } catch (error) {
+        console.warn(`⚠️ 交还执行失败: ${error.message}`);
+        return [];
+    }
+}
+
+function getDrainState() {
+    if (!localDrain) return null;
+    return {
+        startedAt: new Date(localDrain.startedAt).toISOString(),
+        deadline: localDrain.exitWhenDone ? new Date(localDrain.deadline).toISOString() : null,
+        exitWhenDone: localDrain.exitWhenDone,
+        runningExecutions: getRunningExecutionIds(),
+        releasedExecutions: Array.from(releasedExecutionIds)
+    };
+}
+
+/**
+ * 排空本节点：立即停止接收新执行并通知Web系统，等待运行中的执行完成。
+ * exitWhenDone时最多等待timeoutMs，超时仍未结束的执行交还Web系统重新排队后退出进程；
+ * 不退出时一直等到执行全部结束，节点状态变为drained
+ */
+function startLocalDrain({ exitWhenDone = false, timeoutMs = EXECUTOR_DRAIN_TIMEOUT } = {}) {
+    if (localDrain) {
+        if (exitWhenDone && !localDrain.exitWhenDone) {
+            localDrain.exitWhenDone = true;
+            localDrain.deadline = Date.now() + timeoutMs;
+        }
+        return localDrain;
+    }
+
+    executorNodeStatus = 'draining';
+    localDrain = { startedAt: Date.now(), deadline: Date.now() + timeoutMs, exitWhenDone };
+    console.log(`执行节点开始排空: ${getRunningExecutionIds().length} 个执行运行中`);
+
+    localDrain.promise = (async () => {
+        await notifyExecutorDrain();
+        while (getRunningExecutionIds().length > 0
+            && !(localDrain.exitWhenDone && Date.now() >= localDrain.deadline)) {
+            await new Promise(resolve => setTimeout(resolve, 1000));
+        }
+
+        const remaining = getRunningExecutionIds();
+        if (remaining.length > 0) {
+            // 交还后节点被标记为离线，不能再发送心跳，否则会被重新视为在线
+            if (heartbeatTimer) clearInterval(heartbeatTimer);
+            const requeued = await releaseExecutorExecutions(remaining);
+            console.log(`排空超时，${requeued.length} 个执行已交还重新排队: ${remaining.join(', ')}`);
+        }
+        executorNodeStatus = 'drained';
+        console.log('执行节点排空完成');
+        if (localDrain.exitWhenDone) {
+            await shutdownServer();
+        }
+    })();
+    return localDrain;
+}
+
+async function shutdownServer() {
+    if (heartbeatTimer) clearInterval(heartbeatTimer);
+    // 退出前再发送一次心跳，Web系统据此把节点标记为drained
+    if (EXECUTOR_REGISTRY_ENABLED && releasedExecutionIds.size === 0) {
+        await sendExecutorHeartbeat();
+    }
+    try {
+        if (page) await page.close();
+        if (browser) await browser.close();
+    } catch (error) {
+        console.warn(`关闭浏览器失败: ${error.message}`);
+    }
+    process.exit(0);
 }
 
 // 统一的日志记录函数
@@ -125,17 +350,72 @@ function logMessage(executionId, level, message) {
     };
     
     // 发送WebSocket消息
-    io.emit('log-message', logEntry);
+    emitExecutionEvent('log-message', logEntry);
     
     // 记录到执行状态
     const executionState = executionStates.get(executionId);
     if (executionState) {
         executionState.logs.push(logEntry);
     }
+
+    // 批量写入Web系统的执行日志存储
+    if (executionId) {
+        queueExecutionLog(executionId, logEntry);
+    }
     
     return logEntry;
 }
 
+// 执行日志批量上报配置
+const LOG_FLUSH_INTERVAL = parseInt(process.env.LOG_FLUSH_INTERVAL || '1000', 10);
+const LOG_FLUSH_BATCH_SIZE = 200;
+
+// 待上报的执行日志 executionId -> { entries, timer }
+const pendingExecutionLogs = new Map();
+
+function queueExecutionLog(executionId, logEntry) {
+    let pending = pendingExecutionLogs.get(executionId);
+    if (!pending) {
+        pending = { entries: [], timer: null };
+        pendingExecutionLogs.set(executionId, pending);
+    }
+    pending.entries.push({
+        level: logEntry.level,
+        message: logEntry.message,
+        timestamp: logEntry.timestamp
+    });
+
+    if (pending.entries.length >= LOG_FLUSH_BATCH_SIZE) {
+        flushExecutionLogs(executionId);
+    } else if (!pending.timer) {
+        pending.timer = setTimeout(() => flushExecutionLogs(executionId), LOG_FLUSH_INTERVAL);
+    }
+}
+
+// 上报失败只记录警告，执行状态中的日志仍可通过执行报告获取
+async function flushExecutionLogs(executionId) {
+    const pending = pendingExecutionLogs.get(executionId);
+    if (!pending) {
+        return;
+    }
+    pendingExecutionLogs.delete(executionId);
+    clearTimeout(pending.timer);
+    if (pending.entries.length === 0) {
+        return;
+    }
+
+    try {
+        await axios.post(`${API_BASE_URL}/executions/${encodeURIComponent(executionId)}/logs`, {
+            entries: pending.entries
+        }, {
+            headers: { 'Content-Type': 'application/json' },
+            timeout: 10000
+        });
+    } catch (error) {
+        console.warn(`⚠️ 上报执行日志失败 (${executionId}): ${error.message}`);
+    }
+}
+
 // 生成执行ID
 function generateExecutionId() {
     return 'exec_' + Date.now() + '_' + Math.random().toString(36).substr(2, 9);
@@ -187,13 +467,54 @@ function resolveVariableReferences(text, variableContext) {
 }
 
 // Web系统API集成函数
-async function notifyExecutionStart(executionId, testcase, mode) {
+function countTestcaseSteps(testcase) {
+    return Array.isArray(testcase.steps) ? testcase.steps.length :
+           (typeof testcase.steps === 'string' ? JSON.parse(testcase.steps).length : 0);
+}
+
+// 在Web系统登记执行开始，返回响应数据；coalesced为true表示已合并到运行中的相同执行
+async function registerExecutionStart(executionId, testcase, mode, options = {}) {
     try {
-        const totalSteps = Array.isArray(testcase.steps) ? testcase.steps.length : 
-                          (typeof testcase.steps === 'string' ? JSON.parse(testcase.steps).length : 0);
+        const startData = {
+            execution_id: executionId,
+            testcase_id: testcase.id,
+            mode: mode,
+            browser: 'chrome',
+            steps_total: countTestcaseSteps(testcase),
+            executed_by: 'midscene-server',
+            parameters: options.variables || {},
+            coalesce: options.coalesce
+        };
+
+        console.log(`📡 发送执行开始通知到Web系统 API: ${executionId}`);
+
+        const response = await axios.post(`${API_BASE_URL}/midscene/execution-start`, startData, {
+            headers: {
+                'Content-Type': 'application/json'
+            },
+            timeout: 10000
+        });
+
+        if (response.status === 200) {
+            console.log(`✅ 执行开始通知已同步到Web系统: ${executionId}`);
+        } else {
+            console.warn(`⚠️ Web系统API响应异常: ${response.status} - ${response.statusText}`);
+        }
+        return response.data?.data || null;
+    } catch (apiError) {
+        console.error(`❌ 发送执行开始通知到Web系统失败: ${apiError.message}`);
+        // 不中断流程，继续执行
+        return null;
+    }
+}
+
+// registered: 执行节点接口已登记过该执行时不再重复登记，避免重置开始时间
+async function notifyExecutionStart(executionId, testcase, mode, registered = false) {
+    try {
+        const totalSteps = countTestcaseSteps(testcase);
 
         // 通过WebSocket通知前端执行开始
-        io.emit('execution-start', {
+        emitExecutionEvent('execution-start', {
             executionId: executionId,
             testcase: testcase.name,
             mode: mode,
@@ -201,35 +522,10 @@ async function notifyExecutionStart(executionId, testcase, mode) {
         });
 
         // 发送执行开始通知到Web系统API
-        try {
-            const startData = {
-                execution_id: executionId,
-                testcase_id: testcase.id,
-                mode: mode,
-                browser: 'chrome',
-                steps_total: totalSteps,
-                executed_by: 'midscene-server'
-            };
-
-            console.log(`📡 发送执行开始通知到Web系统 API: ${executionId}`);
-            
-            const response = await axios.post(`${API_BASE_URL}/midscene/execution-start`, startData, {
-                headers: {
-                    'Content-Type': 'application/json'
-                },
-                timeout: 10000
-            });
-
-            if (response.status === 200) {
-                console.log(`✅ 执行开始通知已同步到Web系统: ${executionId}`);
-            } else {
-                console.warn(`⚠️ Web系统API响应异常: ${response.status} - ${response.statusText}`);
-            }
-        } catch (apiError) {
-            console.error(`❌ 发送执行开始通知到Web系统失败: ${apiError.message}`);
-            // 不中断流程，继续执行
+        if (!registered) {
+            await registerExecutionStart(executionId, testcase, mode);
         }
-        
+
         console.log(`通知执行开始: ${executionId}`);
         return { success: true };
     } catch (error) {
@@ -239,6 +535,10 @@ async function notifyExecutionStart(executionId, testcase, mode) {
 }
 
 async function notifyExecutionResult(executionId, testcase, mode, status, steps, errorMessage = null) {
+    // 已交还重新排队的执行由其他节点重新执行，不再上报本节点的结果
+    if (releasedExecutionIds.has(executionId)) {
+        return;
+    }
     try {
         const executionState = executionStates.get(executionId);
         if (!executionState) {
@@ -250,7 +550,7 @@ async function notifyExecutionResult(executionId, testcase, mode, status, steps,
         const startTime = executionState.startTime.toISOString();
 
         // 通过WebSocket通知前端执行结果
-        io.emit('execution-completed', {
+        emitExecutionEvent('execution-completed', {
             executionId: executionId,
             testcase: testcase.name,
             status: status,
@@ -271,7 +571,17 @@ async function notifyExecutionResult(executionId, testcase, mode, status, steps,
                 start_time: startTime,
                 end_time: endTime,
                 steps: steps || [],
-                error_message: errorMessage
+                error_message: errorMessage,
+                ...(executionState.resourceStats ? { resource_stats: executionState.resourceStats } : {}),
+                ...(executionState.modelUsage ? { model_usage: summarizeModelUsage(executionState.modelUsage) } : {}),
+                ...(executionState.cacheStats ? {
+                    cache_stats: {
+                        cache_id: executionState.cacheStats.cache_id,
+                        entries_at_start: executionState.cacheStats.entries_at_start,
+                        lookups: executionState.cacheStats.lookups,
+                        hits: executionState.cacheStats.hits
+                    }
+                } : {})
             };
 
             console.log(`📡 发送执行结果到Web系统 API: ${executionId}`);
@@ -302,7 +612,608 @@ async function notifyExecutionResult(executionId, testcase, mode, status, steps,
 }
 
 // 启动浏览器和页面
-async function initBrowser(headless = true, timeoutConfig = {}, enableCache = true, testcaseName = '') {
+// 模型分级：简单的抽取和判断走快速模型，定位和复杂查询走最大模型，
+// 快速模型失败或结果为空时自动升级到最大模型重试，并按级别统计耗时和成本
+function loadModelTiers() {
+    const apiKey = process.env.OPENAI_API_KEY;
+    const baseUrl = process.env.OPENAI_BASE_URL || 'https://dashscope.aliyuncs.com/compatible-mode/v1';
+    const maxModel = process.env.MIDSCENE_MODEL_NAME || 'qwen-vl-max-latest';
+    return {
+        max: {
+            modelName: maxModel,
+            apiKey,
+            baseUrl,
+            costPerCall: Number(process.env.MIDSCENE_MAX_COST_PER_CALL) || 0
+        },
+        // 未配置快速模型时与最大模型相同，不做分级
+        fast: {
+            modelName: process.env.MIDSCENE_FAST_MODEL_NAME || maxModel,
+            apiKey: process.env.MIDSCENE_FAST_API_KEY || apiKey,
+            baseUrl: process.env.MIDSCENE_FAST_BASE_URL || baseUrl,
+            costPerCall: Number(process.env.MIDSCENE_FAST_COST_PER_CALL) || 0
+        }
+    };
+}
+
+const MODEL_TIERS = loadModelTiers();
+
+// 默认路由：只读的简单抽取、判断和等待走快速模型，其余AI步骤走最大模型
+const DEFAULT_MODEL_ROUTES = {
+    ai_string: 'fast',
+    ai_number: 'fast',
+    ai_boolean: 'fast',
+    ai_wait_for: 'fast'
+};
+
+// MIDSCENE_MODEL_ROUTES可按步骤类型覆盖默认路由，例如 {"ai_assert": "fast"}
+function loadModelRoutes() {
+    try {
+        const overrides = JSON.parse(process.env.MIDSCENE_MODEL_ROUTES || '{}');
+        return { ...DEFAULT_MODEL_ROUTES, ...overrides };
+    } catch (error) {
+        console.warn(`⚠️ MIDSCENE_MODEL_ROUTES格式错误，使用默认路由: ${error.message}`);
+        return { ...DEFAULT_MODEL_ROUTES };
+    }
+}
+
+const MODEL_ROUTES = loadModelRoutes();
+
+const AI_STEP_ACTIONS = new Set([
+    'click', 'ai_tap', 'type', 'ai_input', 'assert', 'ai_assert', 'ai_query', 'ai_string',
+    'ai_number', 'ai_boolean', 'ai_locate', 'ai_hover', 'ai_scroll', 'ai_wait_for', 'ai', 'ai_action'
+]);
+
+// 结果为空视为低置信度，需升级模型重新抽取
+const EXTRACTION_ACTIONS = new Set(['ai_query', 'ai_string', 'ai_number']);
+
+function fastTierEnabled() {
+    const { fast, max } = MODEL_TIERS;
+    return fast.modelName !== max.modelName || fast.baseUrl !== max.baseUrl;
+}
+
+// 步骤级提示(step.model_tier或params.model_tier)优先于按类型的路由；非AI步骤返回null
+function resolveModelTier(step, normalizedAction) {
+    if (!AI_STEP_ACTIONS.has(normalizedAction)) {
+        return null;
+    }
+    const hint = step.model_tier || step.params?.model_tier;
+    const tier = MODEL_TIERS[hint] ? hint : (MODEL_ROUTES[normalizedAction] || 'max');
+    return tier === 'fast' && !fastTierEnabled() ? 'max' : tier;
+}
+
+function buildAgentConfig(tierConfig, cacheId) {
+    const agentConfig = {
+        aiModel: {
+            modelName: tierConfig.modelName,
+            apiKey: tierConfig.apiKey,
+            baseUrl: tierConfig.baseUrl
+        },
+        modelConfig: () => ({
+            MIDSCENE_MODEL_NAME: tierConfig.modelName,
+            OPENAI_API_KEY: tierConfig.apiKey,
+            OPENAI_BASE_URL: tierConfig.baseUrl,
+            ...(process.env.MIDSCENE_USE_QWEN_VL ? { MIDSCENE_USE_QWEN_VL: process.env.MIDSCENE_USE_QWEN_VL } : {})
+        })
+    };
+    if (cacheId) {
+        agentConfig.cacheId = cacheId;
+    }
+    return agentConfig;
+}
+
+function isLowConfidenceResult(step, normalizedAction, executionId, stepIndex) {
+    if (!EXTRACTION_ACTIONS.has(normalizedAction)) {
+        return false;
+    }
+    const value = variableContexts.get(executionId)?.[step.output_variable || `step_${stepIndex + 1}_result`];
+    return value === null || value === undefined || value === ''
+        || (typeof value === 'number' && Number.isNaN(value))
+        || (typeof value === 'object' && Object.keys(value).length === 0);
+}
+
+function recordModelUsage(executionId, tier, latencyMs, succeeded) {
+    const executionState = executionStates.get(executionId);
+    if (!executionState) {
+        return;
+    }
+    if (!executionState.modelUsage) {
+        executionState.modelUsage = { tiers: {}, escalations: 0 };
+    }
+    const usage = executionState.modelUsage.tiers[tier]
+        || (executionState.modelUsage.tiers[tier] = { steps: 0, failures: 0, latency_ms: 0 });
+    usage.steps += 1;
+    usage.latency_ms += latencyMs;
+    if (!succeeded) {
+        usage.failures += 1;
+    }
+}
+
+// 上报的模型用量：每个级别的步骤数、失败数、总耗时和按单次调用价格估算的成本
+function summarizeModelUsage(modelUsage) {
+    if (!modelUsage) {
+        return null;
+    }
+    const tiers = {};
+    for (const [tier, usage] of Object.entries(modelUsage.tiers)) {
+        tiers[tier] = {
+            ...usage,
+            model: MODEL_TIERS[tier].modelName,
+            cost: usage.steps * MODEL_TIERS[tier].costPerCall
+        };
+    }
+    return {
+        tiers,
+        escalations: modelUsage.escalations,
+        ...(modelUsage.payload ? { payload: modelUsage.payload } : {})
+    };
+}
+
+// 按级别执行AI步骤；快速模型失败或抽取结果为空时升级到最大模型重试一次
+async function runWithModelTier(tier, defaultAgent, step, normalizedAction, executionId, stepIndex, stepDeadline, run) {
+    if (!tier) {
+        return { result: await run(defaultAgent), tier: null, escalated: false };
+    }
+
+    const attempt = async (attemptTier) => {
+        const startedAt = Date.now();
+        try {
+            const result = await run((attemptTier === 'fast' && tierAgents.fast) || defaultAgent);
+            const lowConfidence = attemptTier === 'fast'
+                && isLowConfidenceResult(step, normalizedAction, executionId, stepIndex);
+            recordModelUsage(executionId, attemptTier, Date.now() - startedAt, !lowConfidence);
+            return { result, lowConfidence };
+        } catch (error) {
+            recordModelUsage(executionId, attemptTier, Date.now() - startedAt, false);
+            throw error;
+        }
+    };
+
+    if (tier !== 'fast') {
+        const { result } = await attempt(tier);
+        return { result, tier, escalated: false };
+    }
+
+    try {
+        const { result, lowConfidence } = await attempt('fast');
+        if (!lowConfidence) {
+            return { result, tier: 'fast', escalated: false };
+        }
+        logMessage(executionId, 'warning', `快速模型结果为空，升级到最大模型重试 (步骤 ${stepIndex + 1})`);
+    } catch (error) {
+        if (error instanceof DeadlineExceededError || executionControls.get(executionId)?.shouldStop) {
+            throw error;
+        }
+        logMessage(executionId, 'warning', `快速模型执行失败，升级到最大模型重试 (步骤 ${stepIndex + 1}): ${error.message}`);
+    }
+
+    ensureBudget(stepDeadline, '模型升级重试');
+    // 升级重试发送完整截图，排除降采样或裁剪导致的抽取失败
+    payloadOptimizer.active = null;
+    const executionState = executionStates.get(executionId);
+    if (executionState?.modelUsage) {
+        executionState.modelUsage.escalations += 1;
+    }
+    const { result } = await attempt('max');
+    return { result, tier: 'max', escalated: true };
+}
+
+// 截图负载优化：AI调用的耗时主要花在上传截图和图像token上，
+// 对不依赖坐标的步骤（抽取、判断、断言、等待）按步骤类型降采样、裁剪到关注区域并使用有损编码；
+// 定位类步骤由模型根据截图给出坐标，缩放或裁剪会导致点击偏移，始终发送完整截图
+const PAYLOAD_OPTIMIZER_ENABLED = process.env.MIDSCENE_PAYLOAD_OPTIMIZER === '1';
+
+const PAYLOAD_OPTIMIZABLE_ACTIONS = new Set([
+    'assert', 'ai_assert', 'ai_query', 'ai_string', 'ai_number', 'ai_boolean', 'ai_wait_for'
+]);
+
+const DEFAULT_PAYLOAD_PROFILE = { max_width: 960, format: 'jpeg', quality: 70, crop: true, padding: 80 };
+
+function normalizePayloadProfile(profile) {
+    if (!profile || typeof profile !== 'object') {
+        return null;
+    }
+    const merged = { ...DEFAULT_PAYLOAD_PROFILE, ...profile };
+    const maxWidth = Number(merged.max_width);
+    const quality = Number(merged.quality);
+    return {
+        // max_width为空时不缩放
+        max_width: maxWidth >= 160 ? Math.round(maxWidth) : null,
+        format: merged.format === 'png' ? 'png' : 'jpeg',
+        quality: quality >= 1 && quality <= 100 ? Math.round(quality) : DEFAULT_PAYLOAD_PROFILE.quality,
+        crop: merged.crop !== false,
+        padding: Math.max(0, Number(merged.padding) || 0)
+    };
+}
+
+// MIDSCENE_PAYLOAD_PROFILES可按步骤类型覆盖默认配置，例如 {"ai_assert": null, "ai_string": {"max_width": 640}}
+function loadPayloadProfiles() {
+    const profiles = {};
+    for (const action of PAYLOAD_OPTIMIZABLE_ACTIONS) {
+        profiles[action] = normalizePayloadProfile(DEFAULT_PAYLOAD_PROFILE);
+    }
+    let overrides = {};
+    try {
+        overrides = JSON.parse(process.env.MIDSCENE_PAYLOAD_PROFILES || '{}');
+    } catch (error) {
+        console.warn(`⚠️ MIDSCENE_PAYLOAD_PROFILES格式错误，使用默认配置: ${error.message}`);
+    }
+    for (const [action, profile] of Object.entries(overrides)) {
+        if (!PAYLOAD_OPTIMIZABLE_ACTIONS.has(action)) {
+            console.warn(`⚠️ 步骤类型 ${action} 依赖截图坐标，不做负载优化`);
+            continue;
+        }
+        profiles[action] = normalizePayloadProfile(profile);
+    }
+    return profiles;
+}
+
+const PAYLOAD_PROFILES = loadPayloadProfiles();
+
+// 当前步骤生效的负载优化请求，由executeStep设置、截图包装函数读取；
+// 浏览器页面全局共享，同一时间只有一个步骤在调用模型
+const payloadOptimizer = { active: null, workerPage: null };
+
+function createPayloadStats() {
+    return { screenshots: 0, optimized: 0, cropped: 0, original_bytes: 0, sent_bytes: 0 };
+}
+
+function dataUrlBytes(dataUrl) {
+    const payload = String(dataUrl);
+    return Math.floor((payload.length - payload.indexOf(',') - 1) * 3 / 4);
+}
+
+function toRegion(rect) {
+    if (!rect || typeof rect !== 'object') {
+        return null;
+    }
+    const region = {
+        x: Number(rect.x ?? rect.left),
+        y: Number(rect.y ?? rect.top),
+        width: Number(rect.width),
+        height: Number(rect.height)
+    };
+    return Object.values(region).every(Number.isFinite) && region.width > 0 && region.height > 0
+        ? region : null;
+}
+
+// 记录aiLocate结果（视口坐标及当时的滚动位置），后续步骤通过locate_hint引用同一提示词时裁剪到该区域
+async function rememberLocatedRegion(executionId, prompt, locateResult, page) {
+    const executionState = executionStates.get(executionId);
+    const center = Array.isArray(locateResult?.center) ? locateResult.center : null;
+    const region = toRegion(locateResult?.rect)
+        || (center ? { x: center[0], y: center[1], width: 1, height: 1 } : null);
+    if (!executionState || !region) {
+        return;
+    }
+    const scroll = await page.evaluate(() => ({ x: window.scrollX, y: window.scrollY })).catch(() => null);
+    if (!scroll) {
+        return;
+    }
+    executionState.locatedRegions = executionState.locatedRegions || {};
+    executionState.locatedRegions[prompt] = { ...region, scrollX: scroll.x, scrollY: scroll.y, url: page.url() };
+}
+
+// 关注区域：步骤显式给出的region，或locate_hint对应的已知定位结果（换算到当前滚动位置）
+async function resolveRegionOfInterest(step, executionId, page) {
+    const params = step.params || {};
+    const explicit = toRegion(params.region);
+    if (explicit) {
+        return explicit;
+    }
+    const located = params.locate_hint && executionStates.get(executionId)?.locatedRegions?.[params.locate_hint];
+    if (!located || located.url !== page.url()) {
+        return null;
+    }
+    const scroll = await page.evaluate(() => ({ x: window.scrollX, y: window.scrollY })).catch(() => null);
+    if (!scroll) {
+        return null;
+    }
+    return {
+        x: located.x + located.scrollX - scroll.x,
+        y: located.y + located.scrollY - scroll.y,
+        width: located.width,
+        height: located.height
+    };
+}
+
+// 步骤级配置(step.payload_profile或params.payload_profile)：false关闭，对象在该类型配置上覆盖（全局未开启时也生效）
+async function resolvePayloadRequest(step, normalizedAction, executionId, page) {
+    if (!PAYLOAD_OPTIMIZABLE_ACTIONS.has(normalizedAction)) {
+        return null;
+    }
+    const override = step.payload_profile ?? step.params?.payload_profile;
+    if (override === false) {
+        return null;
+    }
+    const profile = override && typeof override === 'object'
+        ? normalizePayloadProfile({ ...(PAYLOAD_PROFILES[normalizedAction] || {}), ...override })
+        : (PAYLOAD_OPTIMIZER_ENABLED ? PAYLOAD_PROFILES[normalizedAction] : null);
+    if (!profile) {
+        return null;
+    }
+    return {
+        profile,
+        region: profile.crop ? await resolveRegionOfInterest(step, executionId, page) : null,
+        stats: createPayloadStats()
+    };
+}
+
+// 图片处理放在独立的浏览器上下文中用canvas完成，不影响被测页面，也不需要额外的图片处理依赖
+async function getPayloadWorkerPage() {
+    if (!payloadOptimizer.workerPage || payloadOptimizer.workerPage.isClosed()) {
+        const context = await browser.newContext();
+        payloadOptimizer.workerPage = await context.newPage();
+    }
+    return payloadOptimizer.workerPage;
+}
+
+async function optimizeScreenshot(screenshot, request) {
+    const { profile, region } = request;
+    const workerPage = await getPayloadWorkerPage();
+    // 视口deviceScaleFactor为1，区域的CSS像素坐标与截图像素一致
+    return workerPage.evaluate(async ({ src, region, maxWidth, format, quality, padding }) => {
+        const image = new Image();
+        image.src = src;
+        await image.decode();
+        let [sx, sy, sw, sh] = [0, 0, image.naturalWidth, image.naturalHeight];
+        let cropped = false;
+        if (region) {
+            const left = Math.max(0, Math.floor(region.x - padding));
+            const top = Math.max(0, Math.floor(region.y - padding));
+            const right = Math.min(image.naturalWidth, Math.ceil(region.x + region.width + padding));
+            const bottom = Math.min(image.naturalHeight, Math.ceil(region.y + region.height + padding));
+            // 区域已滚出视口时发送完整画面
+            if (right > left && bottom > top) {
+                [sx, sy, sw, sh] = [left, top, right - left, bottom - top];
+                cropped = true;
+            }
+        }
+        const scale = maxWidth ? Math.min(1, maxWidth / sw) : 1;
+        const canvas = document.createElement('canvas');
+        canvas.width = Math.max(1, Math.round(sw * scale));
+        canvas.height = Math.max(1, Math.round(sh * scale));
+        canvas.getContext('2d').drawImage(image, sx, sy, sw, sh, 0, 0, canvas.width, canvas.height);
+        return { dataUrl: canvas.toDataURL(`image/${format}`, quality / 100), cropped };
+    }, {
+        src: screenshot,
+        region,
+        maxWidth: profile.max_width,
+        format: profile.format,
+        quality: profile.quality,
+        padding: profile.padding
+    });
+}
+
+// 包装MidScene页面接口的截图方法：所有AI调用都通过它获取截图
+function installPayloadOptimizer(aiAgent) {
+    const target = aiAgent && (aiAgent.interface || aiAgent.page);
+    if (!target || typeof target.screenshotBase64 !== 'function' || target.__payloadOptimized) {
+        return;
+    }
+    const capture = target.screenshotBase64.bind(target);
+    target.screenshotBase64 = async (...args) => {
+        const screenshot = await capture(...args);
+        const request = payloadOptimizer.active;
+        if (!request) {
+            return screenshot;
+        }
+        const originalBytes = dataUrlBytes(screenshot);
+        request.stats.screenshots += 1;
+        request.stats.original_bytes += originalBytes;
+        let sent = screenshot;
+        if (request.profile) {
+            try {
+                const optimized = await optimizeScreenshot(screenshot, request);
+                // 未裁剪且压缩后反而更大时保留原图
+                if (optimized.cropped || dataUrlBytes(optimized.dataUrl) < originalBytes) {
+                    sent = optimized.dataUrl;
+                    request.stats.optimized += 1;
+                    request.stats.cropped += optimized.cropped ? 1 : 0;
+                }
+            } catch (error) {
+                console.warn(`⚠️ 截图负载优化失败，发送原始截图: ${error.message}`);
+            }
+        }
+        request.stats.sent_bytes += dataUrlBytes(sent);
+        return sent;
+    };
+    target.__payloadOptimized = true;
+}
+
+function recordPayloadStats(executionId, stats) {
+    const executionState = executionStates.get(executionId);
+    if (!executionState || !stats || stats.screenshots === 0) {
+        return;
+    }
+    if (!executionState.modelUsage) {
+        executionState.modelUsage = { tiers: {}, escalations: 0 };
+    }
+    const total = executionState.modelUsage.payload
+        || (executionState.modelUsage.payload = createPayloadStats());
+    for (const key of Object.keys(total)) {
+        total[key] += stats[key];
+    }
+}
+
+// 基准测试中执行只读AI步骤，断言和等待以是否通过作为结果
+async function runBenchmarkStep(aiAgent, normalizedAction, params) {
+    switch (normalizedAction) {
+        case 'ai_query':
+            return aiAgent.aiQuery(`${params.query}${params.dataDemand || ''}`);
+        case 'ai_string':
+            return aiAgent.aiString(params.query);
+        case 'ai_number':
+            return aiAgent.aiNumber(params.query);
+        case 'ai_boolean':
+            return aiAgent.aiBoolean(params.query);
+        case 'ai_wait_for':
+            return aiAgent.aiWaitFor(params.locate || params.selector || params.element, { timeout: params.timeout || 10000 })
+                .then(() => true, () => false);
+        default:
+            return aiAgent.aiAssert(params.condition || params.assertion || params.expected)
+                .then(() => true, () => false);
+    }
+}
+
+// AI缓存管理：MidScene把每个cacheId的缓存写到运行目录下的yaml文件，
+// 用例执行时的cacheId由用例ID和步骤修订号构成，改名不会丢失缓存，步骤变化后旧缓存自然失效
+const AI_CACHE_DIR = require('path').join(
+    process.env.MIDSCENE_RUN_DIR || require('path').join(process.cwd(), 'midscene_run'),
+    'cache'
+);
+const AI_CACHE_SUFFIX = '.cache.yaml';
+const TESTCASE_CACHE_PATTERN = /^playwright-testcase-(\d+)-([0-9a-f]+)(?:-(fast))?$/;
+
+// 为每个测试用例生成唯一的 cacheId
+// 支持中文字符，并合并连续的连字符
+function aiCacheId(cacheKey) {
+    const normalizedName = cacheKey ? 
+        cacheKey
+            .replace(/[\s\-_]+/g, '-')  // 空格、连字符、下划线统一替换为单个连字符
+            .replace(/[^\u4e00-\u9fa5a-zA-Z0-9\-]/g, '')  // 保留中文、字母、数字和连字符
+            .replace(/\-+/g, '-')  // 合并多个连续的连字符
+            .replace(/^\-|\-$/g, '')  // 去除首尾的连字符
+            .toLowerCase() : 
+        `test-${Date.now()}`;
+    return `playwright-${normalizedName || Date.now()}`;
+}
+
+// 有用例ID和修订号时按二者生成缓存键，否则沿用用例名称
+function testcaseCacheKey(testcase) {
+    return testcase.id && testcase.revision
+        ? `testcase-${testcase.id}-${testcase.revision}`
+        : testcase.name;
+}
+
+function readAiCacheFile(cacheId) {
+    const fs = require('fs');
+    const filePath = require('path').join(AI_CACHE_DIR, `${cacheId}${AI_CACHE_SUFFIX}`);
+    if (!fs.existsSync(filePath)) {
+        return null;
+    }
+    try {
+        return yaml.load(fs.readFileSync(filePath, 'utf8')) || {};
+    } catch (error) {
+        console.warn(`⚠️ 解析AI缓存失败 ${cacheId}: ${error.message}`);
+        return {};
+    }
+}
+
+function listAiCaches() {
+    const fs = require('fs');
+    const path = require('path');
+    if (!fs.existsSync(AI_CACHE_DIR)) {
+        return [];
+    }
+    return fs.readdirSync(AI_CACHE_DIR)
+        .filter(name => name.endsWith(AI_CACHE_SUFFIX))
+        .map(name => {
+            const cacheId = name.slice(0, -AI_CACHE_SUFFIX.length);
+            const stat = fs.statSync(path.join(AI_CACHE_DIR, name));
+            const match = cacheId.match(TESTCASE_CACHE_PATTERN);
+            const content = readAiCacheFile(cacheId) || {};
+            return {
+                cache_id: cacheId,
+                testcase_id: match ? Number(match[1]) : null,
+                revision: match ? match[2] : null,
+                tier: match ? (match[3] || 'max') : null,
+                size: stat.size,
+                entries: Array.isArray(content.caches) ? content.caches.length : 0,
+                modified_at: stat.mtime.toISOString()
+            };
+        });
+}
+
+function isValidAiCacheId(cacheId) {
+    return typeof cacheId === 'string' && /^[\u4e00-\u9fa5a-zA-Z0-9\-]+$/.test(cacheId);
+}
+
+function deleteAiCache(cacheId) {
+    const fs = require('fs');
+    const filePath = require('path').join(AI_CACHE_DIR, `${cacheId}${AI_CACHE_SUFFIX}`);
+    if (!isValidAiCacheId(cacheId) || !fs.existsSync(filePath)) {
+        return 0;
+    }
+    const size = fs.statSync(filePath).size;
+    fs.rmSync(filePath, { force: true });
+    return size;
+}
+
+// 淘汰缓存：先删除指定的缓存和超过保留天数的缓存，再按最久未更新优先删除直到总大小不超过上限
+function evictAiCaches({ cache_ids = [], max_age_days = null, max_total_bytes = null } = {}) {
+    const now = Date.now();
+    const requested = new Set(cache_ids);
+    const deleted = [];
+    let freedBytes = 0;
+    const remaining = [];
+
+    for (const cache of listAiCaches()) {
+        const ageDays = (now - Date.parse(cache.modified_at)) / 86400000;
+        if (requested.has(cache.cache_id) || (max_age_days != null && ageDays > max_age_days)) {
+            freedBytes += deleteAiCache(cache.cache_id);
+            deleted.push(cache.cache_id);
+        } else {
+            remaining.push(cache);
+        }
+    }
+
+    let remainingBytes = remaining.reduce((sum, cache) => sum + cache.size, 0);
+    if (max_total_bytes != null) {
+        remaining.sort((a, b) => Date.parse(a.modified_at) - Date.parse(b.modified_at));
+        while (remaining.length > 0 && remainingBytes > max_total_bytes) {
+            const cache = remaining.shift();
+            freedBytes += deleteAiCache(cache.cache_id);
+            remainingBytes -= cache.size;
+            deleted.push(cache.cache_id);
+        }
+    }
+    return { deleted, freed_bytes: freedBytes, remaining_bytes: remainingBytes };
+}
+
+// 可命中缓存的步骤提示词：定位类步骤使用locate缓存，自动规划步骤使用plan缓存
+function cacheablePrompt(step, normalizedAction) {
+    const params = step.params || {};
+    switch (normalizedAction) {
+        case 'click':
+        case 'ai_tap':
+        case 'type':
+        case 'ai_input':
+        case 'ai_hover':
+        case 'ai_locate':
+            return params.locate || params.selector || params.element || params.query || null;
+        case 'ai':
+        case 'ai_action':
+            return params.prompt || params.instruction || step.description || null;
+        default:
+            return null;
+    }
+}
+
+// 执行开始时缓存中已有的提示词，用于统计本次执行的缓存命中率
+function createCacheStats(cacheId) {
+    const content = readAiCacheFile(cacheId);
+    const caches = Array.isArray(content?.caches) ? content.caches : [];
+    return {
+        cache_id: cacheId,
+        entries_at_start: caches.length,
+        lookups: 0,
+        hits: 0,
+        prompts: new Set(caches.map(entry => typeof entry.prompt === 'string' ? entry.prompt : JSON.stringify(entry.prompt)))
+    };
+}
+
+function recordCacheLookup(cacheStats, step) {
+    const prompt = cacheStats && cacheablePrompt(step, normalizeStepType(step.type || step.action));
+    if (!prompt) {
+        return;
+    }
+    cacheStats.lookups += 1;
+    if (cacheStats.prompts.has(prompt)) {
+        cacheStats.hits += 1;
+    }
+}
+
+async function initBrowser(headless = true, timeoutConfig = {}, enableCache = true, testcaseName = '', contextOptions = null) {
     if (!browser) {
         console.log(`启动浏览器 - 模式: ${headless ? '无头模式' : '浏览器模式'}`);
         browser = await chromium.launch({
@@ -329,12 +1240,19 @@ async function initBrowser(headless = true, timeoutConfig = {}, enableCache = tr
     const actionTimeout = timeoutConfig.action_timeout || 30000;
     const navigationTimeout = timeoutConfig.navigation_timeout || 30000;
     
+    // 需要独立上下文时（例如恢复前置夹具快照）关闭复用的页面上下文
+    if (page && contextOptions) {
+        await page.context().close().catch(() => {});
+        page = null;
+    }
+
     if (!page) {
         const context = await browser.newContext({
             viewport: { width: 1280, height: 720 },
             deviceScaleFactor: 1,
             // 使用动态超时设置
-            timeout: actionTimeout
+            timeout: actionTimeout,
+            ...(contextOptions || {})
         });
         page = await context.newPage();
     }
@@ -346,11 +1264,7 @@ async function initBrowser(headless = true, timeoutConfig = {}, enableCache = tr
     console.log(`⏱️ 超时设置: 页面加载=${pageTimeout}ms, 操作=${actionTimeout}ms, 导航=${navigationTimeout}ms`);
     
     // 配置MidSceneJS AI
-    const config = {
-        modelName: process.env.MIDSCENE_MODEL_NAME || 'qwen-vl-max-latest',
-        apiKey: process.env.OPENAI_API_KEY,
-        baseUrl: process.env.OPENAI_BASE_URL || 'https://dashscope.aliyuncs.com/compatible-mode/v1'
-    };
+    const config = MODEL_TIERS.max;
     
     console.log('🤖 初始化MidSceneJS AI配置:', {
         modelName: config.modelName,
@@ -361,23 +1275,13 @@ async function initBrowser(headless = true, timeoutConfig = {}, enableCache = tr
     
     // 根据 MidScene 文档配置缓存
     const agentConfig = { 
-        aiModel: config
+        aiModel: { modelName: config.modelName, apiKey: config.apiKey, baseUrl: config.baseUrl }
     };
     
     // 设置缓存相关的环境变量和 cacheId
     if (enableCache) {
         process.env.MIDSCENE_CACHE = '1';
-        // 为每个测试用例生成唯一的 cacheId
-        // 支持中文字符，并合并连续的连字符
-        const normalizedName = testcaseName ? 
-            testcaseName
-                .replace(/[\s\-_]+/g, '-')  // 空格、连字符、下划线统一替换为单个连字符
-                .replace(/[^\u4e00-\u9fa5a-zA-Z0-9\-]/g, '')  // 保留中文、字母、数字和连字符
-                .replace(/\-+/g, '-')  // 合并多个连续的连字符
-                .replace(/^\-|\-$/g, '')  // 去除首尾的连字符
-                .toLowerCase() : 
-            `test-${Date.now()}`;
-        const cacheId = `playwright-${normalizedName || Date.now()}`;
+        const cacheId = aiCacheId(testcaseName);
         agentConfig.cacheId = cacheId;
         console.log('📦 AI缓存已启用');
         console.log(`📦 Cache ID: ${cacheId}`);
@@ -387,6 +1291,16 @@ async function initBrowser(headless = true, timeoutConfig = {}, enableCache = tr
     }
     
     agent = new PlaywrightAgent(page, agentConfig);
+    tierAgents = { max: agent };
+    if (fastTierEnabled()) {
+        // 快速模型使用独立的缓存，避免与最大模型的缓存互相覆盖
+        tierAgents.fast = new PlaywrightAgent(
+            page,
+            buildAgentConfig(MODEL_TIERS.fast, agentConfig.cacheId && `${agentConfig.cacheId}-fast`)
+        );
+        console.log(`🤖 快速模型: ${MODEL_TIERS.fast.modelName}`);
+    }
+    Object.values(tierAgents).forEach(installPayloadOptimizer);
     
     return { page, agent };
 }
@@ -395,6 +1309,12 @@ async function initBrowser(headless = true, timeoutConfig = {}, enableCache = tr
 io.on('connection', (socket) => {
     console.log('🔌 WebSocket客户端连接:', socket.id);
 
+    // 客户端重连后按序号补齐错过的事件，只回复给请求的客户端
+    socket.on('replay-events', ({ executionId, since = 0, limit = 500 } = {}) => {
+        const result = executionEventLog.since(executionId, Number(since) || 0, Number(limit) || 500);
+        socket.emit('replay-events', { executionId, ...(result || { events: [], completed: false }) });
+    });
+
     socket.on('disconnect', () => {
         console.log('🔌 WebSocket客户端断开:', socket.id);
     });
@@ -424,6 +1344,7 @@ function normalizeStepType(stepType) {
         'aiWaitFor': 'ai_wait_for',
         'evaluateJavaScript': 'evaluate_javascript',
         'logScreenshot': 'screenshot',
+        'visualAssert': 'visual_assert',
         
         // 保持旧格式兼容
         'navigate': 'navigate',
@@ -441,14 +1362,325 @@ function normalizeStepType(stepType) {
         'refresh': 'refresh',
         'back': 'back',
         'screenshot': 'screenshot',
+        'visual_assert': 'visual_assert',
         'evaluate_javascript': 'evaluate_javascript'
     };
-    
-    return typeMapping[stepType] || stepType;
+    
+    return typeMapping[stepType] || stepType;
+}
+
+// 页面变化检测：dHash汉明距离不超过阈值且DOM校验和不变时视为页面未变化
+const PAGE_CHANGE_HASH_THRESHOLD = parseInt(process.env.PAGE_CHANGE_HASH_THRESHOLD || String(WAIT_DEFAULTS.hash_threshold), 10);
+
+// 计算截图的差值哈希（dHash）：缩小到9x8灰度网格，比较横向相邻格子的明暗，得到64位十六进制指纹
+function computeDHash(pngBuffer) {
+    const { width, height, data } = PNG.sync.read(pngBuffer);
+    const cols = 9;
+    const rows = 8;
+    const sums = new Float64Array(cols * rows);
+    const counts = new Uint32Array(cols * rows);
+    // 每个格子采样约8x8个点，避免逐像素遍历整张截图
+    const stride = Math.max(1, Math.floor(Math.min(width / cols, height / rows) / 8));
+
+    for (let y = 0; y < height; y += stride) {
+        const row = Math.min(rows - 1, Math.floor(y * rows / height));
+        for (let x = 0; x < width; x += stride) {
+            const col = Math.min(cols - 1, Math.floor(x * cols / width));
+            const offset = (y * width + x) * 4;
+            sums[row * cols + col] += 0.299 * data[offset] + 0.587 * data[offset + 1] + 0.114 * data[offset + 2];
+            counts[row * cols + col] += 1;
+        }
+    }
+
+    let hash = '';
+    for (let row = 0; row < rows; row++) {
+        for (let nibble = 0; nibble < 2; nibble++) {
+            let value = 0;
+            for (let bit = 0; bit < 4; bit++) {
+                const col = nibble * 4 + bit;
+                const left = sums[row * cols + col] / (counts[row * cols + col] || 1);
+                const right = sums[row * cols + col + 1] / (counts[row * cols + col + 1] || 1);
+                value = (value << 1) | (left > right ? 1 : 0);
+            }
+            hash += value.toString(16);
+        }
+    }
+    return hash;
+}
+
+// 页面DOM状态：地址、标题、元素数量和可见文本的FNV-1a校验和，以及文档加载状态
+async function computeDomState(page) {
+    return page.evaluate(() => {
+        const text = document.body ? document.body.innerText : '';
+        const elementCount = document.getElementsByTagName('*').length;
+        const input = `${location.href}|${document.title}|${elementCount}|${text}`;
+        let hash = 0x811c9dc5;
+        for (let i = 0; i < input.length; i++) {
+            hash ^= input.charCodeAt(i);
+            hash = Math.imul(hash, 0x01000193);
+        }
+        return {
+            checksum: (hash >>> 0).toString(16),
+            element_count: elementCount,
+            ready_state: document.readyState
+        };
+    });
+}
+
+// 页面网络活动跟踪：进行中的请求数和最近一次请求活动时间
+const pageNetworkActivity = new WeakMap();
+
+function trackNetworkActivity(page) {
+    if (pageNetworkActivity.has(page)) {
+        return pageNetworkActivity.get(page);
+    }
+    const activity = { inflight: 0, lastActivityAt: Date.now() };
+    const onStart = () => {
+        activity.inflight += 1;
+        activity.lastActivityAt = Date.now();
+    };
+    const onEnd = () => {
+        // 开始跟踪前发出的请求结束时计数可能为负
+        activity.inflight = Math.max(0, activity.inflight - 1);
+        activity.lastActivityAt = Date.now();
+    };
+    page.on('request', onStart);
+    page.on('requestfinished', onEnd);
+    page.on('requestfailed', onEnd);
+    pageNetworkActivity.set(page, activity);
+    return activity;
+}
+
+// 采集页面指纹（截图dHash + DOM校验和）及就绪信号
+async function capturePageFingerprint(page) {
+    const activity = trackNetworkActivity(page);
+    const [screenshot, domState] = await Promise.all([
+        page.screenshot({ type: 'png', fullPage: false }),
+        computeDomState(page)
+    ]);
+    return {
+        dhash: computeDHash(screenshot),
+        dom: domState.checksum,
+        element_count: domState.element_count,
+        ready_state: domState.ready_state,
+        inflight_requests: activity.inflight,
+        network_idle_ms: Date.now() - activity.lastActivityAt,
+        url: page.url(),
+        captured_at: new Date().toISOString()
+    };
+}
+
+const waitEngine = new WaitEngine({
+    captureFingerprint: capturePageFingerprint,
+    hashThreshold: PAGE_CHANGE_HASH_THRESHOLD,
+    initialInterval: parseInt(process.env.WAIT_INITIAL_INTERVAL || String(WAIT_DEFAULTS.initial_interval_ms), 10),
+    maxInterval: parseInt(process.env.WAIT_MAX_INTERVAL || String(WAIT_DEFAULTS.max_interval_ms), 10)
+});
+
+// 执行单个步骤
+// 截止时间到期错误
+class DeadlineExceededError extends Error {
+    constructor(message) {
+        super(message);
+        this.name = 'DeadlineExceededError';
+    }
+}
+
+// 剩余预算（毫秒），未设置截止时间时返回null
+function remainingBudget(deadlineAt) {
+    if (!deadlineAt) {
+        return null;
+    }
+    return Math.max(0, deadlineAt - Date.now());
+}
+
+// 预算已耗尽时抛出DeadlineExceededError
+function ensureBudget(deadlineAt, operation = '操作') {
+    if (deadlineAt && remainingBudget(deadlineAt) <= 0) {
+        throw new DeadlineExceededError(`${operation}超过截止时间`);
+    }
+}
+
+// 把超时时间限制在剩余预算内
+function clampToBudget(timeout, deadlineAt) {
+    const remaining = remainingBudget(deadlineAt);
+    if (remaining === null) {
+        return timeout;
+    }
+    return Math.max(1, Math.min(timeout, remaining));
+}
+
+// 按剩余预算收紧页面、动作和导航超时
+function clampTimeoutConfig(timeoutConfig, deadlineAt) {
+    if (!deadlineAt) {
+        return timeoutConfig;
+    }
+    return {
+        ...timeoutConfig,
+        page_timeout: clampToBudget(timeoutConfig.page_timeout || 30000, deadlineAt),
+        action_timeout: clampToBudget(timeoutConfig.action_timeout || 30000, deadlineAt),
+        navigation_timeout: clampToBudget(timeoutConfig.navigation_timeout || 30000, deadlineAt)
+    };
+}
+
+// 步骤截止时间：步骤可通过deadline_ms设置自身预算，但不会晚于执行截止时间
+function resolveStepDeadline(step, deadlineAt) {
+    const stepBudget = Number(step.deadline_ms);
+    if (!stepBudget || stepBudget <= 0) {
+        return deadlineAt;
+    }
+    const stepDeadline = Date.now() + stepBudget;
+    return deadlineAt ? Math.min(deadlineAt, stepDeadline) : stepDeadline;
+}
+
+// 在截止时间内等待任务完成，到期立即返回失败（AI调用本身无法取消，结果被丢弃）
+async function withDeadline(work, deadlineAt, operation = '操作') {
+    if (!deadlineAt) {
+        return work;
+    }
+    let timer = null;
+    const expired = new Promise((_, reject) => {
+        timer = setTimeout(
+            () => reject(new DeadlineExceededError(`${operation}超过截止时间`)),
+            remainingBudget(deadlineAt)
+        );
+    });
+    try {
+        return await Promise.race([work, expired]);
+    } finally {
+        clearTimeout(timer);
+        // 到期后仍在运行的动作最终失败时不应产生未处理的拒绝
+        work.catch(() => {});
+    }
+}
+
+// ==================== 步骤重试策略 ====================
+// 与midscene_framework/step_retry.py保持一致：错误类别按顺序匹配错误信息中的关键字
+const STEP_ERROR_CLASS_KEYWORDS = [
+    ['assertion', ['assertion', 'assert failed', '断言']],
+    ['timeout', ['timeout', 'timed out', '超时']],
+    ['network', ['connection', 'network', 'econn', 'refused', 'net::', 'unreachable', '连接']],
+    ['ai_service', ['ai model', 'ai模型', 'rate limit', 'too many requests', 'server error', 'bad gateway', 'service unavailable']],
+    ['element_not_found', ['not found', 'cannot find', 'unable to locate', 'no element', '找不到', '未找到']]
+];
+const STEP_ERROR_CLASSES = [...STEP_ERROR_CLASS_KEYWORDS.map(([name]) => name), 'other'];
+const DEFAULT_RETRY_ON = ['timeout', 'network', 'ai_service', 'element_not_found'];
+const MAX_STEP_ATTEMPTS = 10;
+
+// 步骤错误类别：截止时间到期和用户中断不参与重试
+function classifyStepError(stepResult) {
+    if (stepResult.status === 'stopped') {
+        return 'stopped';
+    }
+    const message = String(stepResult.error_message || '').toLowerCase();
+    if (stepResult.deadline_exceeded || message.includes('截止时间')) {
+        return 'deadline';
+    }
+    for (const [name, keywords] of STEP_ERROR_CLASS_KEYWORDS) {
+        if (keywords.some(keyword => message.includes(keyword))) {
+            return name;
+        }
+    }
+    return 'other';
+}
+
+// 解析步骤的retry_policy（兼容旧的retry_count字段），未配置时返回null；字段已在Web系统保存时校验
+function resolveRetryPolicy(step) {
+    let policy = step.retry_policy;
+    if (!policy) {
+        const retryCount = Number(step.retry_count) || 0;
+        if (retryCount <= 0) {
+            return null;
+        }
+        policy = { attempts: retryCount + 1 };
+    }
+    const retryOn = policy.retry_on === 'any' ? STEP_ERROR_CLASSES : (policy.retry_on || DEFAULT_RETRY_ON);
+    return {
+        attempts: Math.min(Math.max(1, Number(policy.attempts) || 1), MAX_STEP_ATTEMPTS),
+        backoffMs: policy.backoff_ms ?? 1000,
+        backoffMultiplier: policy.backoff_multiplier ?? 2,
+        maxBackoffMs: policy.max_backoff_ms ?? 30000,
+        retryOn,
+        renavigate: policy.renavigate || false
+    };
 }
 
-// 执行单个步骤
-async function executeStep(step, page, agent, executionId, stepIndex, totalSteps, timeoutConfig = {}) {
+// 步骤内部AI连接失败的重试次数：配置了重试策略时由策略负责重试，避免两层重试叠加
+function actionRetryLimit(step) {
+    return resolveRetryPolicy(step) ? 1 : 3;
+}
+
+// 重试前重新导航：true重新加载当前页面，字符串导航到指定URL（支持${变量}引用）
+async function renavigateBeforeRetry(renavigate, page, executionId, timeoutConfig) {
+    const timeout = timeoutConfig.page_timeout || 30000;
+    try {
+        if (typeof renavigate === 'string') {
+            const url = resolveVariableReferences(renavigate, variableContexts.get(executionId));
+            await page.goto(url, { waitUntil: 'domcontentloaded', timeout });
+            logMessage(executionId, 'info', `重试前重新导航: ${url}`);
+        } else {
+            await page.reload({ waitUntil: 'domcontentloaded', timeout });
+            logMessage(executionId, 'info', '重试前重新加载页面');
+        }
+    } catch (error) {
+        logMessage(executionId, 'warning', `重试前重新导航失败: ${error.message}`);
+    }
+}
+
+// 按步骤重试策略执行步骤：只重试失败的步骤，退避等待受执行截止时间约束
+async function executeStepWithRetry(step, page, agent, executionId, stepIndex, totalSteps, timeoutConfig = {}, deadlineAt = null) {
+    const policy = resolveRetryPolicy(step);
+    if (!policy) {
+        return executeStep(step, page, agent, executionId, stepIndex, totalSteps, timeoutConfig, deadlineAt);
+    }
+
+    const attemptHistory = [];
+    let attempt = 1;
+    while (true) {
+        const stepResult = await executeStep(step, page, agent, executionId, stepIndex, totalSteps, timeoutConfig, deadlineAt);
+        if (stepResult.status === 'success') {
+            return { ...stepResult, attempts: attempt, attempt_history: attemptHistory };
+        }
+
+        const errorClass = classifyStepError(stepResult);
+        if (stepResult.status !== 'stopped') {
+            attemptHistory.push({
+                attempt,
+                error_class: errorClass,
+                error_message: stepResult.error_message,
+                failed_at: stepResult.end_time
+            });
+        }
+        const delay = Math.min(policy.backoffMs * Math.pow(policy.backoffMultiplier, attempt - 1), policy.maxBackoffMs);
+        const budget = remainingBudget(deadlineAt);
+        const retryable = attempt < policy.attempts
+            && policy.retryOn.includes(errorClass)
+            && (budget === null || delay < budget);
+        if (!retryable) {
+            return { ...stepResult, attempts: attempt, attempt_history: attemptHistory };
+        }
+
+        logMessage(executionId, 'warning', `步骤 ${stepIndex + 1} 第${attempt}次尝试失败（${errorClass}），${delay}ms后重试 (${attempt + 1}/${policy.attempts})`);
+        emitExecutionEvent('step-retrying', {
+            executionId,
+            stepIndex,
+            totalSteps,
+            attempt,
+            maxAttempts: policy.attempts,
+            errorClass,
+            error: stepResult.error_message,
+            delayMs: delay
+        });
+        await page.waitForTimeout(delay);
+        if (policy.renavigate) {
+            await renavigateBeforeRetry(policy.renavigate, page, executionId, timeoutConfig);
+        }
+        attempt++;
+    }
+}
+
+// options.fixture 为前置夹具名称：夹具步骤使用独立的事件类型，序号不与测试用例步骤混淆
+async function executeStep(step, page, agent, executionId, stepIndex, totalSteps, timeoutConfig = {}, deadlineAt = null, options = {}) {
     // 在步骤开始时检查中断标志
     const control = executionControls.get(executionId);
     if (control && control.shouldStop) {
@@ -470,18 +1702,36 @@ async function executeStep(step, page, agent, executionId, stepIndex, totalSteps
     // 标准化步骤类型名称 - 将新的MidSceneJS格式映射到执行引擎识别的格式
     const normalizedAction = normalizeStepType(stepType);
 
+    const eventPrefix = options.fixture ? 'fixture-step' : 'step';
+    const fixtureInfo = options.fixture ? { fixture: options.fixture } : {};
+
     // 发送步骤开始事件
-    io.emit('step-start', {
+    emitExecutionEvent(`${eventPrefix}-start`, {
         executionId,
         stepIndex,
         action: normalizedAction,
         description: description || normalizedAction,
-        totalSteps: totalSteps
+        totalSteps: totalSteps,
+        ...fixtureInfo
     });
 
     const stepStartTime = Date.now();
 
-    try {
+    // 步骤截止时间取执行截止时间和步骤自身预算中较早的一个
+    const stepDeadline = resolveStepDeadline(step, deadlineAt);
+
+    // 按步骤类型或步骤提示选择模型级别
+    const modelTier = resolveModelTier(step, normalizedAction);
+    let payloadRequest = null;
+
+    // 步骤内各操作的超时不超过步骤截止时间
+    timeoutConfig = clampTimeoutConfig(timeoutConfig, stepDeadline);
+
+    // 执行步骤的具体动作，升级模型级别时使用对应级别的agent重新执行
+    const runAction = async agent => {
+        // 需要记录到步骤元数据中的动作结果
+        let actionResult = null;
+
         switch (normalizedAction) {
             case 'navigate':
                 if (params.url) {
@@ -509,7 +1759,11 @@ async function executeStep(step, page, agent, executionId, stepIndex, totalSteps
             case 'click':
             case 'ai_tap':
                 const clickTarget = params.locate || params.selector || params.element;
-                if (clickTarget) {
+                const tapTraceContext = replayTraceContexts.get(executionId);
+                if (clickTarget && await replayTracedStep(tapTraceContext, stepIndex, 'ai_tap', params, page, executionId)) {
+                    actionResult = { replayed: true };
+                    logMessage(executionId, 'info', `点击: ${clickTarget}`);
+                } else if (clickTarget) {
                     console.log(`\n[${new Date().toISOString()}] MidScene Step Execution - aiTap`);
                     console.log(`Target: ${clickTarget}`);
                     console.log(`Execution ID: ${executionId}`);
@@ -519,12 +1773,12 @@ async function executeStep(step, page, agent, executionId, stepIndex, totalSteps
                     
                     // 添加重试机制
                     let retryCount = 0;
-                    const maxRetries = 3;
+                    const maxRetries = actionRetryLimit(step);
                     let lastError = null;
                     
                     while (retryCount < maxRetries) {
                         try {
-                            await agent.aiTap(clickTarget);
+                            await aiTapWithTrace(agent, page, clickTarget, tapTraceContext, stepIndex, params);
                             break; // 成功则退出循环
                         } catch (error) {
                             lastError = error;
@@ -535,6 +1789,7 @@ async function executeStep(step, page, agent, executionId, stepIndex, totalSteps
                             // 检查是否是AI模型连接错误
                             if (error.message.includes('Connection error') || error.message.includes('AI model service')) {
                                 logMessage(executionId, 'warning', `AI模型连接失败，正在重试... (${retryCount}/${maxRetries})`);
+                                ensureBudget(stepDeadline, 'AI操作重试');
                                 await page.waitForTimeout(2000 * retryCount); // 递增等待时间
                             } else if (error.message.includes('Protocol error')) {
                                 // 鼠标协议错误，可能需要重新初始化
@@ -580,7 +1835,11 @@ async function executeStep(step, page, agent, executionId, stepIndex, totalSteps
                     }
                 }
                 
-                if (inputTarget && inputText) {
+                const inputTraceContext = replayTraceContexts.get(executionId);
+                if (inputTarget && inputText && await replayTracedStep(inputTraceContext, stepIndex, 'ai_input', params, page, executionId, inputText)) {
+                    actionResult = { replayed: true };
+                    logMessage(executionId, 'info', `输入: "${inputText}" 到 ${inputTarget}`);
+                } else if (inputTarget && inputText) {
                     console.log(`\n[${new Date().toISOString()}] MidScene Step Execution - aiInput`);
                     console.log(`Text: ${inputText}`);
                     console.log(`Target: ${inputTarget}`);
@@ -591,12 +1850,12 @@ async function executeStep(step, page, agent, executionId, stepIndex, totalSteps
                     
                     // 添加重试机制
                     let retryCount = 0;
-                    const maxRetries = 3;
+                    const maxRetries = actionRetryLimit(step);
                     let lastError = null;
                     
                     while (retryCount < maxRetries) {
                         try {
-                            await agent.aiInput(inputText, inputTarget);
+                            await aiInputWithTrace(agent, page, inputText, inputTarget, inputTraceContext, stepIndex, params);
                             break; // 成功则退出循环
                         } catch (error) {
                             lastError = error;
@@ -607,6 +1866,7 @@ async function executeStep(step, page, agent, executionId, stepIndex, totalSteps
                             // 检查是否是AI模型连接错误
                             if (error.message.includes('Connection error') || error.message.includes('AI model service')) {
                                 logMessage(executionId, 'warning', `AI模型连接失败，正在重试... (${retryCount}/${maxRetries})`);
+                                ensureBudget(stepDeadline, 'AI操作重试');
                                 await page.waitForTimeout(2000 * retryCount); // 递增等待时间
                             } else if (error.message.includes('empty content')) {
                                 // AI返回空内容，可能是识别失败
@@ -676,7 +1936,7 @@ async function executeStep(step, page, agent, executionId, stepIndex, totalSteps
                     
                     // 添加重试机制
                     let retryCount = 0;
-                    const maxRetries = 3;
+                    const maxRetries = actionRetryLimit(step);
                     let lastError = null;
                     let queryResult = null;
                     
@@ -694,6 +1954,7 @@ async function executeStep(step, page, agent, executionId, stepIndex, totalSteps
                             // 检查是否是AI模型连接错误
                             if (error.message.includes('Connection error') || error.message.includes('AI model service')) {
                                 logMessage(executionId, 'warning', `AI模型连接失败，正在重试... (${retryCount}/${maxRetries})`);
+                                ensureBudget(stepDeadline, 'AI操作重试');
                                 await page.waitForTimeout(2000 * retryCount); // 递增等待时间
                             } else {
                                 // 其他错误直接抛出
@@ -756,7 +2017,7 @@ async function executeStep(step, page, agent, executionId, stepIndex, totalSteps
                     
                     // 添加重试机制
                     let retryCount = 0;
-                    const maxRetries = 3;
+                    const maxRetries = actionRetryLimit(step);
                     let lastError = null;
                     let stringResult = null;
                     
@@ -774,6 +2035,7 @@ async function executeStep(step, page, agent, executionId, stepIndex, totalSteps
                             // 检查是否是AI模型连接错误
                             if (error.message.includes('Connection error') || error.message.includes('AI model service')) {
                                 logMessage(executionId, 'warning', `AI模型连接失败，正在重试... (${retryCount}/${maxRetries})`);
+                                ensureBudget(stepDeadline, 'AI操作重试');
                                 await page.waitForTimeout(2000 * retryCount); // 递增等待时间
                             } else {
                                 // 其他错误直接抛出
@@ -835,7 +2097,7 @@ async function executeStep(step, page, agent, executionId, stepIndex, totalSteps
                     
                     // 添加重试机制
                     let retryCount = 0;
-                    const maxRetries = 3;
+                    const maxRetries = actionRetryLimit(step);
                     let lastError = null;
                     let numberResult = null;
                     
@@ -853,6 +2115,7 @@ async function executeStep(step, page, agent, executionId, stepIndex, totalSteps
                             // 检查是否是AI模型连接错误
                             if (error.message.includes('Connection error') || error.message.includes('AI model service')) {
                                 logMessage(executionId, 'warning', `AI模型连接失败，正在重试... (${retryCount}/${maxRetries})`);
+                                ensureBudget(stepDeadline, 'AI操作重试');
                                 await page.waitForTimeout(2000 * retryCount); // 递增等待时间
                             } else {
                                 // 其他错误直接抛出
@@ -914,7 +2177,7 @@ async function executeStep(step, page, agent, executionId, stepIndex, totalSteps
                     
                     // 添加重试机制
                     let retryCount = 0;
-                    const maxRetries = 3;
+                    const maxRetries = actionRetryLimit(step);
                     let lastError = null;
                     let booleanResult = null;
                     
@@ -932,6 +2195,7 @@ async function executeStep(step, page, agent, executionId, stepIndex, totalSteps
                             // 检查是否是AI模型连接错误
                             if (error.message.includes('Connection error') || error.message.includes('AI model service')) {
                                 logMessage(executionId, 'warning', `AI模型连接失败，正在重试... (${retryCount}/${maxRetries})`);
+                                ensureBudget(stepDeadline, 'AI操作重试');
                                 await page.waitForTimeout(2000 * retryCount); // 递增等待时间
                             } else {
                                 // 其他错误直接抛出
@@ -993,7 +2257,7 @@ async function executeStep(step, page, agent, executionId, stepIndex, totalSteps
                     
                     // 添加重试机制
                     let retryCount = 0;
-                    const maxRetries = 3;
+                    const maxRetries = actionRetryLimit(step);
                     let lastError = null;
                     let locateResult = null;
                     
@@ -1011,6 +2275,7 @@ async function executeStep(step, page, agent, executionId, stepIndex, totalSteps
                             // 检查是否是AI模型连接错误
                             if (error.message.includes('Connection error') || error.message.includes('AI model service')) {
                                 logMessage(executionId, 'warning', `AI模型连接失败，正在重试... (${retryCount}/${maxRetries})`);
+                                ensureBudget(stepDeadline, 'AI操作重试');
                                 await page.waitForTimeout(2000 * retryCount); // 递增等待时间
                             } else {
                                 // 其他错误直接抛出
@@ -1027,6 +2292,7 @@ async function executeStep(step, page, agent, executionId, stepIndex, totalSteps
                     
                     console.log(`MidScene aiLocate completed in ${locateEndTime - locateStartTime}ms`);
                     console.log(`Locate Result:`, locateResult);
+                    await rememberLocatedRegion(executionId, locateQuery, locateResult, page);
                     
                     // 在日志中显示定位到的坐标
                     const locateDisplay = locateResult ? 
@@ -1072,7 +2338,47 @@ async function executeStep(step, page, agent, executionId, stepIndex, totalSteps
                 logMessage(executionId, 'info', `返回上一页 (超时=${backTimeout}ms)`);
                 break;
 
+            case 'visual_assert':
+                // 与基线截图做像素比对，不调用AI模型
+                const baselineName = params.baseline || params.name;
+                if (!baselineName) {
+                    throw new Error('视觉断言缺少baseline参数');
+                }
+                const visualShot = await page.screenshot({
+                    type: 'png',
+                    fullPage: !!params.full_page,
+                    ...(params.region ? { clip: params.region } : {})
+                });
+                const visualResponse = await axios.post(`${API_BASE_URL}/visual/assert`, {
+                    name: baselineName,
+                    test_case_id: executionStates.get(executionId)?.testcaseId ?? null,
+                    image: visualShot.toString('base64'),
+                    tolerance: params.tolerance,
+                    pixel_threshold: params.pixel_threshold,
+                    ignore_regions: params.ignore_regions,
+                    anti_aliasing: params.anti_aliasing,
+                    update_baseline: !!params.update_baseline
+                }, { timeout: clampToBudget(10000, stepDeadline) });
+                const visualResult = visualResponse.data?.data || {};
+                if (!visualResult.passed) {
+                    if (visualResult.diff_image) {
+                        const fs = require('fs');
+                        const diffPath = `./screenshots/${executionId}_step_${stepIndex}_diff.png`;
+                        fs.mkdirSync('./screenshots', { recursive: true });
+                        fs.writeFileSync(diffPath, Buffer.from(visualResult.diff_image, 'base64'));
+                        logMessage(executionId, 'info', `差异图保存到: ${diffPath}`);
+                    }
+                    throw new Error(`视觉断言失败 (${baselineName}): ${visualResult.message}`);
+                }
+                logMessage(executionId, 'info', `视觉断言通过 (${baselineName}): ${visualResult.message}`);
+                break;
+
             case 'screenshot':
+                if (executionStates.get(executionId)?.captureMode === 'video') {
+                    // 录像模式：该步骤的画面在查看时从录像中提取
+                    logMessage(executionId, 'info', `截图已记录为录像标记 (步骤 ${stepIndex + 1})`);
+                    break;
+                }
                 const screenshotPath = `./screenshots/${executionId}_step_${stepIndex}.png`;
                 await page.screenshot({ path: screenshotPath, fullPage: true });
                 logMessage(executionId, 'info', `截图保存到: ${screenshotPath}`);
@@ -1107,7 +2413,8 @@ async function executeStep(step, page, agent, executionId, stepIndex, totalSteps
 
             case 'ai_wait_for':
                 const waitTarget = params.locate || params.selector || params.element;
-                const waitTimeout = params.timeout || 10000;
+                // 等待时间不超过步骤剩余预算
+                const waitTimeout = clampToBudget(params.timeout || 10000, stepDeadline);
                 if (waitTarget) {
                     console.log(`\n[${new Date().toISOString()}] MidScene Step Execution - aiWaitFor`);
                     console.log(`Target: ${waitTarget}`);
@@ -1116,7 +2423,13 @@ async function executeStep(step, page, agent, executionId, stepIndex, totalSteps
                     console.log(`Step ${stepIndex + 1}/${totalSteps}`);
                     
                     const waitStartTime = Date.now();
-                    await agent.aiWaitFor(waitTarget, { timeout: waitTimeout });
+                    if (params.change_detection === false) {
+                        await agent.aiWaitFor(waitTarget, { timeout: waitTimeout });
+                    } else {
+                        const waitReport = await waitEngine.wait(agent, page, waitTarget, waitTimeout, params);
+                        actionResult = { wait: waitReport };
+                        logMessage(executionId, 'info', `等待耗时 ${waitReport.elapsed_ms}ms，探测 ${waitReport.probes} 次，模型调用 ${waitReport.model_calls} 次`);
+                    }
                     const waitEndTime = Date.now();
                     
                     console.log(`MidScene aiWaitFor completed in ${waitEndTime - waitStartTime}ms\n`);
@@ -1137,7 +2450,7 @@ async function executeStep(step, page, agent, executionId, stepIndex, totalSteps
                 
                 // 添加重试机制
                 let retryCount = 0;
-                const maxRetries = 3;
+                const maxRetries = actionRetryLimit(step);
                 let lastError = null;
                 
                 while (retryCount < maxRetries) {
@@ -1153,6 +2466,7 @@ async function executeStep(step, page, agent, executionId, stepIndex, totalSteps
                         // 检查是否是AI模型连接错误
                         if (error.message.includes('Connection error') || error.message.includes('AI model service')) {
                             logMessage(executionId, 'warning', `AI模型连接失败，正在重试... (${retryCount}/${maxRetries})`);
+                            ensureBudget(stepDeadline, 'AI操作重试');
                             await page.waitForTimeout(2000 * retryCount); // 递增等待时间
                         } else if (error.message.includes('empty content')) {
                             // AI返回空内容，可能是识别失败
@@ -1189,63 +2503,675 @@ async function executeStep(step, page, agent, executionId, stepIndex, totalSteps
                 logMessage(executionId, 'info', `AI操作规划: ${aiActionPrompt}`);
                 break;
 
-            default:
-                // 通用AI操作 - 优先使用params中的prompt或instruction
-                const instruction = params.prompt || params.instruction || description || stepType;
-                console.log(`\n[${new Date().toISOString()}] MidScene Step Execution - Default Action`);
-                console.log(`Action Type: ${normalizedAction}`);
-                console.log(`Instruction: ${instruction}`);
-                console.log(`Params:`, JSON.stringify(params, null, 2));
-                console.log(`Description: ${description}`);
-                console.log(`Execution ID: ${executionId}`);
-                console.log(`Step ${stepIndex + 1}/${totalSteps}`);
-                
-                const defaultStartTime = Date.now();
-                await agent.ai(instruction);
-                const defaultEndTime = Date.now();
-                
-                console.log(`MidScene default action completed in ${defaultEndTime - defaultStartTime}ms\n`);
-                logMessage(executionId, 'info', `AI操作: ${instruction}`);
+            default:
+                // 通用AI操作 - 优先使用params中的prompt或instruction
+                const instruction = params.prompt || params.instruction || description || stepType;
+                console.log(`\n[${new Date().toISOString()}] MidScene Step Execution - Default Action`);
+                console.log(`Action Type: ${normalizedAction}`);
+                console.log(`Instruction: ${instruction}`);
+                console.log(`Params:`, JSON.stringify(params, null, 2));
+                console.log(`Description: ${description}`);
+                console.log(`Execution ID: ${executionId}`);
+                console.log(`Step ${stepIndex + 1}/${totalSteps}`);
+                
+                const defaultStartTime = Date.now();
+                await agent.ai(instruction);
+                const defaultEndTime = Date.now();
+                
+                console.log(`MidScene default action completed in ${defaultEndTime - defaultStartTime}ms\n`);
+                logMessage(executionId, 'info', `AI操作: ${instruction}`);
+                break;
+        }
+
+        return actionResult;
+    };
+
+    try {
+        ensureBudget(stepDeadline, `步骤 ${stepIndex + 1}`);
+
+        payloadRequest = await resolvePayloadRequest(step, normalizedAction, executionId, page);
+        payloadOptimizer.active = payloadRequest;
+
+        const tierRun = await withDeadline(
+            runWithModelTier(modelTier, agent, step, normalizedAction, executionId, stepIndex, stepDeadline, runAction),
+            stepDeadline,
+            `步骤 ${stepIndex + 1}`
+        );
+        const actionResult = tierRun.result;
+
+        const stepEndTime = Date.now();
+        const duration = stepEndTime - stepStartTime;
+        
+        return {
+            status: 'success',
+            start_time: new Date(stepStartTime).toISOString(),
+            end_time: new Date(stepEndTime).toISOString(),
+            duration: duration,
+            remaining_budget_ms: remainingBudget(deadlineAt),
+            deadline_exceeded: false,
+            ...(tierRun.tier ? { model_tier: tierRun.tier, model_escalated: tierRun.escalated } : {}),
+            ...(payloadRequest?.stats.screenshots ? { payload: payloadRequest.stats } : {}),
+            ...(actionResult ? { result_data: actionResult } : {})
+        };
+
+    } catch (error) {
+        const stepEndTime = Date.now();
+        const duration = stepEndTime - stepStartTime;
+        
+        // 发送步骤失败事件
+        emitExecutionEvent(`${eventPrefix}-failed`, {
+            executionId,
+            stepIndex,
+            totalSteps: totalSteps,
+            error: error.message,
+            ...fixtureInfo
+        });
+        
+        logMessage(executionId, 'error', `步骤执行失败: ${error.message}`);
+        
+        // 返回失败结果而不是抛出异常，让上层处理
+        return {
+            status: 'failed',
+            start_time: new Date(stepStartTime).toISOString(),
+            end_time: new Date(stepEndTime).toISOString(),
+            duration: duration,
+            error_message: error.message,
+            remaining_budget_ms: remainingBudget(deadlineAt),
+            deadline_exceeded: error instanceof DeadlineExceededError,
+            ...(modelTier ? { model_tier: modelTier } : {})
+        };
+    } finally {
+        payloadOptimizer.active = null;
+        recordPayloadStats(executionId, payloadRequest?.stats);
+    }
+}
+
+// 获取测试用例引用的前置夹具：优先使用调度下发的数据，否则向Web系统查询
+async function resolveSetupFixture(testcase) {
+    if (testcase.setup_fixture) {
+        return testcase.setup_fixture;
+    }
+    if (!testcase.setup_fixture_id) {
+        return null;
+    }
+    try {
+        const response = await axios.get(`${API_BASE_URL}/fixtures/${testcase.setup_fixture_id}/resolve`, {
+            timeout: 5000
+        });
+        return response.data?.data || null;
+    } catch (error) {
+        console.warn(`⚠️ 获取前置夹具失败: ${error.message}`);
+        return null;
+    }
+}
+
+// 执行前置夹具：有效快照直接恢复，否则执行夹具步骤并回传新的存储状态快照
+async function applySetupFixture(fixture, page, agent, executionId, timeoutConfig, deadlineAt = null) {
+    if (fixture.snapshot) {
+        if (fixture.snapshot.url) {
+            await page.goto(fixture.snapshot.url, {
+                waitUntil: 'domcontentloaded',
+                timeout: clampToBudget(timeoutConfig.navigation_timeout || 30000, deadlineAt)
+            });
+        }
+        logMessage(executionId, 'info', `前置夹具 "${fixture.name}" 已从快照恢复，跳过 ${fixture.steps.length} 个步骤`);
+        return { restored: true };
+    }
+
+    logMessage(executionId, 'info', `前置夹具 "${fixture.name}" 没有有效快照，执行 ${fixture.steps.length} 个步骤`);
+    for (let i = 0; i < fixture.steps.length; i++) {
+        const result = await executeStep(fixture.steps[i], page, agent, executionId, i, fixture.steps.length, timeoutConfig, deadlineAt, {
+            fixture: fixture.name
+        });
+        if (result.status !== 'success') {
+            throw new Error(`前置夹具 "${fixture.name}" 第 ${i + 1} 步失败: ${result.error_message || result.status}`);
+        }
+    }
+
+    try {
+        const storageState = await page.context().storageState();
+        await axios.post(`${API_BASE_URL}/fixtures/${fixture.id}/snapshot`, {
+            storage_state: storageState,
+            url: page.url(),
+            revision: fixture.revision
+        }, { timeout: 10000 });
+        logMessage(executionId, 'info', `前置夹具 "${fixture.name}" 快照已保存`);
+    } catch (error) {
+        // 快照保存失败不影响本次执行
+        logMessage(executionId, 'warning', `前置夹具快照保存失败: ${error.message}`);
+    }
+    return { restored: false };
+}
+
+// 网络录制/回放：录制模式下成功执行的目标应用流量保存为HAR压缩包，
+// 回放模式下由录制内容响应匹配的请求，直通规则匹配的请求仍走真实网络
+const HAR_CACHE_DIR = process.env.HAR_CACHE_DIR || require('path').join(os.tmpdir(), 'midscene-har');
+
+// 已下载的录制 testcaseId -> { etag, path }
+const harCache = new Map();
+
+async function downloadNetworkRecording(testcaseId) {
+    const fs = require('fs');
+    const path = require('path');
+    const cached = harCache.get(testcaseId);
+    try {
+        const response = await axios.get(`${API_BASE_URL}/testcases/${testcaseId}/network-recording`, {
+            responseType: 'arraybuffer',
+            headers: cached && fs.existsSync(cached.path) ? { 'If-None-Match': cached.etag } : {},
+            validateStatus: status => status === 200 || status === 304 || status === 404,
+            timeout: 30000
+        });
+        if (response.status === 404) {
+            return null;
+        }
+        if (response.status === 304) {
+            return cached.path;
+        }
+        fs.mkdirSync(HAR_CACHE_DIR, { recursive: true });
+        const harPath = path.join(HAR_CACHE_DIR, `testcase-${testcaseId}.zip`);
+        fs.writeFileSync(harPath, Buffer.from(response.data));
+        harCache.set(testcaseId, { etag: response.headers.etag, path: harPath });
+        return harPath;
+    } catch (error) {
+        console.warn(`⚠️ 下载网络录制失败: ${error.message}`);
+        return null;
+    }
+}
+
+// 解析用例的网络模式：回放模式但还没有录制时，本次执行先录制
+async function resolveNetworkMode(testcase, executionId) {
+    const config = testcase.network_config;
+    if (!config || !config.mode || config.mode === 'off' || !testcase.id) {
+        return null;
+    }
+
+    if (config.mode === 'replay') {
+        const harPath = await downloadNetworkRecording(testcase.id);
+        if (harPath) {
+            logMessage(executionId, 'info', `网络回放模式：使用已录制的流量，直通规则 ${(config.passthrough || []).length} 条`);
+            return { mode: 'replay', config, harPath };
+        }
+        logMessage(executionId, 'warning', '网络回放模式下没有录制内容，本次执行将录制流量');
+    }
+
+    const path = require('path');
+    require('fs').mkdirSync(HAR_CACHE_DIR, { recursive: true });
+    return {
+        mode: 'record',
+        config,
+        harPath: path.join(HAR_CACHE_DIR, `record-${executionId}.zip`)
+    };
+}
+
+// 录制模式需要在创建浏览器上下文时开启HAR录制
+function networkContextOptions(network) {
+    if (!network || network.mode !== 'record') {
+        return null;
+    }
+    return {
+        recordHar: {
+            path: network.harPath,
+            mode: 'minimal',
+            ...(network.config.url_filter ? { urlFilter: network.config.url_filter } : {})
+        }
+    };
+}
+
+// 回放模式：先注册HAR路由，再注册直通路由；后注册的路由优先匹配
+async function applyNetworkReplay(network, context) {
+    if (!network || network.mode !== 'replay') {
+        return;
+    }
+    await context.routeFromHAR(network.harPath, {
+        notFound: network.config.not_found || 'fallback',
+        ...(network.config.url_filter ? { url: network.config.url_filter } : {})
+    });
+    for (const pattern of network.config.passthrough || []) {
+        await context.route(pattern, route => route.continue());
+    }
+}
+
+// 录制模式结束：关闭上下文写出HAR，执行成功时上传
+async function finalizeNetworkRecording(network, context, testcase, executionId, succeeded) {
+    if (!network || network.mode !== 'record') {
+        return;
+    }
+    const fs = require('fs');
+    try {
+        await context.close();
+        if (succeeded && fs.existsSync(network.harPath)) {
+            const response = await axios.post(
+                `${API_BASE_URL}/testcases/${testcase.id}/network-recording?execution_id=${encodeURIComponent(executionId)}`,
+                fs.readFileSync(network.harPath),
+                {
+                    headers: { 'Content-Type': 'application/zip' },
+                    maxBodyLength: Infinity,
+                    timeout: 60000
+                }
+            );
+            const recording = response.data?.data || {};
+            logMessage(executionId, 'info', `网络录制已保存: ${recording.entry_count || 0} 个请求`);
+        }
+    } catch (error) {
+        logMessage(executionId, 'warning', `网络录制保存失败: ${error.response?.data?.message || error.message}`);
+    } finally {
+        fs.rmSync(network.harPath, { force: true });
+    }
+}
+
+// 录像模式：录制整个浏览器上下文的视频代替逐步截图，步骤以相对录像开始的时间偏移标记，
+// 关键帧在查看步骤时由Web系统从录像中抽取
+const VIDEO_DIR = process.env.VIDEO_DIR || require('path').join(process.cwd(), 'videos');
+
+function resolveCaptureMode(testcase, requestedMode, executionId) {
+    if ((requestedMode || testcase.capture_mode) !== 'video') {
+        return null;
+    }
+    const safeId = String(executionId).replace(/[^\w.-]/g, '_');
+    return {
+        dir: require('path').join(VIDEO_DIR, safeId),
+        startedAt: null,
+        steps: [],
+        context: null,
+        video: null
+    };
+}
+
+// 录像尺寸与视口一致
+function videoContextOptions(capture) {
+    if (!capture) {
+        return null;
+    }
+    return {
+        recordVideo: {
+            dir: capture.dir,
+            size: { width: 1280, height: 720 }
+        }
+    };
+}
+
+// 录像从创建上下文时开始，起点取创建之前的时间，偏移略晚于实际，关键帧落在步骤完成之后
+function markVideoStep(capture, stepIndex, startTime, endTime) {
+    capture.steps.push({
+        step_index: stepIndex,
+        start_ms: Math.max(0, startTime - capture.startedAt),
+        end_ms: Math.max(0, endTime - capture.startedAt)
+    });
+}
+
+// 关闭上下文写出录像，连同步骤标记上传到Web系统；执行失败时同样上传，便于排查
+async function finalizeVideoCapture(capture, executionId) {
+    if (!capture || !capture.video) {
+        return;
+    }
+    const fs = require('fs');
+    try {
+        const durationMs = Date.now() - capture.startedAt;
+        await capture.context.close().catch(() => {});
+        const videoPath = await capture.video.path();
+        const form = new FormData();
+        form.append('video', new Blob([fs.readFileSync(videoPath)], { type: 'video/webm' }), 'video.webm');
+        form.append('markers', JSON.stringify({ steps: capture.steps, duration_ms: durationMs }));
+        const response = await axios.post(
+            `${API_BASE_URL}/executions/${encodeURIComponent(executionId)}/video`,
+            form,
+            { maxBodyLength: Infinity, timeout: 60000 }
+        );
+        const info = response.data?.data || {};
+        logMessage(executionId, 'info', `录像已保存: ${Math.round((info.size || 0) / 1024)}KB，${capture.steps.length} 个步骤标记`);
+    } catch (error) {
+        logMessage(executionId, 'warning', `录像保存失败: ${error.response?.data?.message || error.message}`);
+    } finally {
+        fs.rmSync(capture.dir, { recursive: true, force: true });
+    }
+}
+
+// 资源拦截策略：按资源类型、URL模式拦截，或只放行白名单中的URL，统计节省的请求数和字节数
+// 各URL最近一次加载的响应大小，用于估算被拦截请求节省的字节数
+const resourceSizeCache = new Map();
+const RESOURCE_SIZE_CACHE_LIMIT = 5000;
+
+function rememberResourceSize(url, size) {
+    resourceSizeCache.delete(url);
+    resourceSizeCache.set(url, size);
+    if (resourceSizeCache.size > RESOURCE_SIZE_CACHE_LIMIT) {
+        resourceSizeCache.delete(resourceSizeCache.keys().next().value);
+    }
+}
+
+// URL模式中*匹配任意字符，其余字符按字面匹配
+function globToRegExp(pattern) {
+    const escaped = pattern.replace(/[.+?^${}()|[\]\\]/g, '\\$&').replace(/\*+/g, '.*');
+    return new RegExp(`^${escaped}$`);
+}
+
+function compileResourcePolicy(policy) {
+    if (!policy) {
+        return null;
+    }
+    const compiled = {
+        blockTypes: new Set(policy.block_resource_types || []),
+        blockPatterns: (policy.block_url_patterns || []).map(globToRegExp),
+        allowPatterns: (policy.allow_url_patterns || []).map(globToRegExp)
+    };
+    if (!compiled.blockTypes.size && !compiled.blockPatterns.length && !compiled.allowPatterns.length) {
+        return null;
+    }
+    return compiled;
+}
+
+// 返回拦截原因，不拦截时返回null；主框架的页面导航始终放行
+function resourceBlockReason(compiled, request) {
+    const type = request.resourceType();
+    if (type === 'document' && request.isNavigationRequest()) {
+        try {
+            if (!request.frame().parentFrame()) {
+                return null;
+            }
+        } catch (error) {
+            return null;
+        }
+    }
+    const url = request.url();
+    if (compiled.allowPatterns.length && !compiled.allowPatterns.some(re => re.test(url))) {
+        return 'allow_list';
+    }
+    if (compiled.blockTypes.has(type)) {
+        return 'resource_type';
+    }
+    if (compiled.blockPatterns.some(re => re.test(url))) {
+        return 'url_pattern';
+    }
+    return null;
+}
+
+// 在执行所用的浏览器上下文上应用策略；需在其他路由之后注册，保证最先判断是否拦截
+async function applyResourcePolicy(policy, context, executionId) {
+    const compiled = compileResourcePolicy(policy);
+    if (!compiled) {
+        return null;
+    }
+
+    const stats = {
+        requests_total: 0,
+        requests_blocked: 0,
+        bytes_loaded: 0,
+        bytes_saved: 0,
+        blocked_unknown_size: 0,
+        blocked_by_type: {}
+    };
+
+    context.on('requestfinished', async (request) => {
+        stats.requests_total++;
+        try {
+            const sizes = await request.sizes();
+            const size = sizes.responseBodySize + sizes.responseHeadersSize;
+            stats.bytes_loaded += size;
+            rememberResourceSize(request.url(), size);
+        } catch (error) {
+            // 页面关闭后无法获取大小
+        }
+    });
+
+    await context.route('**/*', async (route) => {
+        const request = route.request();
+        if (!resourceBlockReason(compiled, request)) {
+            return route.fallback();
+        }
+        const type = request.resourceType();
+        stats.requests_total++;
+        stats.requests_blocked++;
+        stats.blocked_by_type[type] = (stats.blocked_by_type[type] || 0) + 1;
+        const knownSize = resourceSizeCache.get(request.url());
+        if (knownSize !== undefined) {
+            stats.bytes_saved += knownSize;
+        } else {
+            stats.blocked_unknown_size++;
+        }
+        return route.abort('blockedbyclient');
+    });
+
+    const executionState = executionStates.get(executionId);
+    if (executionState) {
+        executionState.resourceStats = stats;
+    }
+    logMessage(executionId, 'info', `资源拦截策略已启用: 类型 ${compiled.blockTypes.size} 个，拦截规则 ${compiled.blockPatterns.length} 条，放行规则 ${compiled.allowPatterns.length} 条`);
+    return stats;
+}
+
+// 回放轨迹上下文 executionId -> { testcaseId, revision, trace, recorded, replayed, fallbacks }
+// 成功执行中AI步骤解析出的具体元素记录为轨迹，之后的执行直接回放，校验失败才回退到AI
+const replayTraceContexts = new Map();
+
+async function createReplayTraceContext(testcase) {
+    if (!testcase.id) {
+        return null;
+    }
+    try {
+        const response = await axios.get(`${API_BASE_URL}/testcases/${testcase.id}/replay-trace`, {
+            timeout: 5000
+        });
+        const data = response.data?.data;
+        if (!data || !data.revision) {
+            return null;
+        }
+        return {
+            testcaseId: testcase.id,
+            revision: data.revision,
+            trace: data.trace ? data.trace.steps : {},
+            recorded: {},
+            replayed: 0,
+            fallbacks: 0
+        };
+    } catch (error) {
+        console.warn(`⚠️ 获取回放轨迹失败: ${error.message}`);
+        return null;
+    }
+}
+
+// 描述坐标处（未给坐标时为当前焦点）的可交互元素，生成按稳定性排序的候选选择器
+async function describeElement(page, point = null) {
+    return page.evaluate((pt) => {
+        const hit = pt ? document.elementFromPoint(pt.x, pt.y) : document.activeElement;
+        if (!hit || hit === document.body) {
+            return null;
+        }
+        const el = hit.closest('a,button,input,textarea,select,label,[role],[contenteditable="true"],[onclick]') || hit;
+        const tag = el.tagName.toLowerCase();
+        const selectors = [];
+        const quote = (value) => JSON.stringify(value);
+
+        for (const name of ['data-testid', 'data-test', 'data-cy', 'data-qa']) {
+            const value = el.getAttribute(name);
+            if (value) selectors.push(`[${name}=${quote(value)}]`);
+        }
+        if (el.id && !/\d{4,}/.test(el.id)) {
+            selectors.push(`#${CSS.escape(el.id)}`);
+        }
+        for (const name of ['name', 'aria-label', 'placeholder']) {
+            const value = el.getAttribute(name);
+            if (value) selectors.push(`${tag}[${name}=${quote(value)}]`);
+        }
+        const text = (el.innerText || el.value || '').trim().replace(/\s+/g, ' ').slice(0, 80);
+        if (text && text.length <= 50 && !['input', 'textarea'].includes(tag)) {
+            selectors.push(`${tag}:has-text(${quote(text)})`);
+        }
+
+        // 结构路径作为最后的候选
+        const parts = [];
+        let node = el;
+        while (node && node.nodeType === 1 && node !== document.body && parts.length < 6) {
+            let part = node.tagName.toLowerCase();
+            if (node.id && !/\d{4,}/.test(node.id)) {
+                parts.unshift(`#${CSS.escape(node.id)}`);
                 break;
+            }
+            const siblings = node.parentElement
+                ? Array.from(node.parentElement.children).filter(child => child.tagName === node.tagName)
+                : [];
+            if (siblings.length > 1) {
+                part += `:nth-of-type(${siblings.indexOf(node) + 1})`;
+            }
+            parts.unshift(part);
+            node = node.parentElement;
         }
+        selectors.push(parts.join(' > '));
 
-        const stepEndTime = Date.now();
-        const duration = stepEndTime - stepStartTime;
-        
+        const rect = el.getBoundingClientRect();
         return {
-            status: 'success',
-            start_time: new Date(stepStartTime).toISOString(),
-            end_time: new Date(stepEndTime).toISOString(),
-            duration: duration
+            tag,
+            text,
+            selectors,
+            point: { x: Math.round(rect.left + rect.width / 2), y: Math.round(rect.top + rect.height / 2) }
         };
+    }, point);
+}
 
+function pageKey(url) {
+    try {
+        const parsed = new URL(url);
+        return `${parsed.origin}${parsed.pathname}`;
     } catch (error) {
-        const stepEndTime = Date.now();
-        const duration = stepEndTime - stepStartTime;
-        
-        // 发送步骤失败事件
-        io.emit('step-failed', {
-            executionId,
-            stepIndex,
-            totalSteps: totalSteps,
-            error: error.message
-        });
-        
-        logMessage(executionId, 'error', `步骤执行失败: ${error.message}`);
-        
-        // 返回失败结果而不是抛出异常，让上层处理
-        return {
-            status: 'failed',
-            start_time: new Date(stepStartTime).toISOString(),
-            end_time: new Date(stepEndTime).toISOString(),
-            duration: duration,
-            error_message: error.message
-        };
+        return url;
+    }
+}
+
+// 在当前页面上校验轨迹：页面地址一致，选择器唯一命中可见元素且标签和文本与录制时一致
+async function locateTracedElement(page, entry) {
+    if (entry.url && pageKey(entry.url) !== pageKey(page.url())) {
+        return null;
+    }
+
+    for (const selector of entry.selectors || []) {
+        try {
+            const locator = page.locator(selector);
+            if (await locator.count() !== 1 || !(await locator.isVisible())) {
+                continue;
+            }
+            const actual = await locator.evaluate(el => ({
+                tag: el.tagName.toLowerCase(),
+                text: (el.innerText || el.value || '').trim().replace(/\s+/g, ' ').slice(0, 80)
+            }));
+            const isField = ['input', 'textarea'].includes(actual.tag);
+            if (actual.tag === entry.tag && (isField || actual.text === entry.text)) {
+                return { locator, method: `selector ${selector}` };
+            }
+        } catch (error) {
+            // 选择器在当前页面无效，尝试下一个
+        }
+    }
+
+    // 选择器都失效时，坐标处的元素与录制时一致也可回放
+    if (entry.point) {
+        const actual = await describeElement(page, entry.point);
+        if (actual && actual.tag === entry.tag && actual.text === entry.text) {
+            const handle = await page.evaluateHandle((pt) => document.elementFromPoint(pt.x, pt.y), entry.point);
+            return { locator: handle.asElement(), method: `坐标 (${entry.point.x}, ${entry.point.y})` };
+        }
+    }
+    return null;
+}
+
+// 尝试直接回放步骤，成功返回true；没有轨迹或校验失败时返回false，由调用方执行AI步骤
+async function replayTracedStep(traceContext, stepIndex, action, params, page, executionId, inputText = null) {
+    if (!traceContext || params.replay === false) {
+        return false;
+    }
+    const entry = traceContext.trace[String(stepIndex)];
+    if (!entry || entry.action !== action) {
+        return false;
+    }
+
+    try {
+        const target = await locateTracedElement(page, entry);
+        if (target) {
+            if (action === 'ai_input') {
+                await target.locator.fill(inputText, { timeout: 5000 });
+            } else {
+                await target.locator.click({ timeout: 5000 });
+            }
+            traceContext.recorded[String(stepIndex)] = entry;
+            traceContext.replayed++;
+            logMessage(executionId, 'info', `步骤 ${stepIndex + 1} 按回放轨迹执行（${target.method}），未调用模型`);
+            return true;
+        }
+        logMessage(executionId, 'warning', `步骤 ${stepIndex + 1} 回放轨迹校验失败，回退到AI执行`);
+    } catch (error) {
+        logMessage(executionId, 'warning', `步骤 ${stepIndex + 1} 回放失败，回退到AI执行: ${error.message}`);
+    }
+    traceContext.fallbacks++;
+    return false;
+}
+
+function recordTraceEntry(traceContext, stepIndex, action, described, page) {
+    if (!described || described.selectors.length === 0) {
+        return;
+    }
+    traceContext.recorded[String(stepIndex)] = {
+        action,
+        selectors: described.selectors,
+        point: described.point,
+        tag: described.tag,
+        text: described.text,
+        url: page.url(),
+        viewport: page.viewportSize()
+    };
+}
+
+// AI点击并录制轨迹：先由模型定位元素，记录元素描述后在其中心点击（与aiTap行为一致）
+async function aiTapWithTrace(agent, page, target, traceContext, stepIndex, params) {
+    if (!traceContext || params.replay === false || typeof agent.aiLocate !== 'function') {
+        return agent.aiTap(target);
+    }
+    const located = await agent.aiLocate(target);
+    const center = Array.isArray(located?.center)
+        ? { x: located.center[0], y: located.center[1] }
+        : located?.rect
+            ? { x: located.rect.left + located.rect.width / 2, y: located.rect.top + located.rect.height / 2 }
+            : null;
+    if (!center) {
+        return agent.aiTap(target);
+    }
+    // 点击可能触发跳转，先记录元素
+    const described = await describeElement(page, center).catch(() => null);
+    await page.mouse.click(center.x, center.y);
+    recordTraceEntry(traceContext, stepIndex, 'ai_tap', described, page);
+}
+
+// AI输入并录制轨迹：输入完成后焦点所在元素即模型定位到的输入框
+async function aiInputWithTrace(agent, page, text, target, traceContext, stepIndex, params) {
+    await agent.aiInput(text, target);
+    if (traceContext && params.replay !== false) {
+        const described = await describeElement(page).catch(() => null);
+        recordTraceEntry(traceContext, stepIndex, 'ai_input', described, page);
+    }
+}
+
+// 执行成功后回传轨迹，用例在执行期间被修改时服务端会拒绝
+async function saveReplayTrace(executionId, traceContext) {
+    if (!traceContext || Object.keys(traceContext.recorded).length === 0) {
+        return;
+    }
+    try {
+        await axios.post(`${API_BASE_URL}/testcases/${traceContext.testcaseId}/replay-trace`, {
+            revision: traceContext.revision,
+            execution_id: executionId,
+            steps: traceContext.recorded,
+            replayed: traceContext.replayed,
+            fallbacks: traceContext.fallbacks
+        }, { timeout: 10000 });
+        logMessage(executionId, 'info', `回放轨迹已保存: 回放 ${traceContext.replayed} 步，回退AI ${traceContext.fallbacks} 步`);
+    } catch (error) {
+        logMessage(executionId, 'warning', `回放轨迹保存失败: ${error.response?.data?.message || error.message}`);
     }
 }
 
 // 异步执行完整测试用例
-async function executeTestCaseAsync(testcase, mode, executionId, timeoutConfig = {}, enableCache = true) {
+async function executeTestCaseAsync(testcase, mode, executionId, timeoutConfig = {}, enableCache = true, deadlineAt = null, resourcePolicy = null, captureMode = null, variables = null, startRegistered = false) {
+    // 网络录制状态，执行失败时在finally中丢弃录制文件
+    let network = null;
+    // 录像状态，无论执行成功与否都在finally中上传
+    let capture = null;
     try {
         // 清理旧的执行状态，确保不会累积太多数据
         cleanupOldExecutions();
@@ -1256,6 +3182,7 @@ async function executeTestCaseAsync(testcase, mode, executionId, timeoutConfig =
             status: 'running',
             startTime: new Date(),
             testcase: testcase.name,
+            testcaseId: testcase.id,
             mode,
             steps: [],  // 收集步骤执行数据
             screenshots: [],  // 收集截图数据
@@ -1268,11 +3195,17 @@ async function executeTestCaseAsync(testcase, mode, executionId, timeoutConfig =
         // 设置执行控制标志
         executionControls.set(executionId, { shouldStop: false });
 
+        // 数据驱动运行的行数据作为初始变量，步骤中可通过${列名}引用
+        if (variables && typeof variables === 'object' && !Array.isArray(variables)) {
+            variableContexts.set(executionId, { ...variables });
+            logMessage(executionId, 'info', `注入数据集变量: ${Object.keys(variables).join(', ')}`);
+        }
+
         // 通知Web系统执行开始
-        await notifyExecutionStart(executionId, testcase, mode);
+        await notifyExecutionStart(executionId, testcase, mode, startRegistered);
 
         // 发送执行开始事件
-        io.emit('execution-start', {
+        emitExecutionEvent('execution-start', {
             executionId,
             testcase: testcase.name,
             mode,
@@ -1323,7 +3256,50 @@ async function executeTestCaseAsync(testcase, mode, executionId, timeoutConfig =
         
         logMessage(executionId, 'info', `初始化浏览器 (${headless ? '无头模式' : '可视模式'})`);
 
-        const { page, agent } = await initBrowser(headless, timeoutConfig, enableCache, testcase.name);
+        // 前置夹具需要独立的浏览器上下文：有快照时以快照存储状态创建，否则从空白状态执行夹具步骤
+        const setupFixture = await resolveSetupFixture(testcase);
+        const fixtureOptions = setupFixture
+            ? (setupFixture.snapshot ? { storageState: setupFixture.snapshot.storage_state } : {})
+            : null;
+
+        // 网络录制同样需要独立的浏览器上下文
+        network = await resolveNetworkMode(testcase, executionId);
+        const recordOptions = networkContextOptions(network);
+
+        // 录像模式同样需要独立的浏览器上下文
+        capture = resolveCaptureMode(testcase, captureMode, executionId);
+        currentExecution.captureMode = capture ? 'video' : 'screenshot';
+        const videoOptions = videoContextOptions(capture);
+
+        const contextOptions = fixtureOptions || recordOptions || videoOptions
+            ? { ...(fixtureOptions || {}), ...(recordOptions || {}), ...(videoOptions || {}) }
+            : null;
+
+        if (capture) {
+            capture.startedAt = Date.now();
+        }
+        const cacheKey = testcaseCacheKey(testcase);
+        const { page, agent } = await initBrowser(headless, timeoutConfig, enableCache, cacheKey, contextOptions);
+        if (enableCache) {
+            currentExecution.cacheStats = createCacheStats(aiCacheId(cacheKey));
+        }
+        if (capture) {
+            capture.context = page.context();
+            capture.video = page.video();
+            logMessage(executionId, 'info', '录像模式：录制浏览器视频，步骤画面在查看时从录像中提取');
+        }
+        await applyNetworkReplay(network, page.context());
+        const resourceStats = await applyResourcePolicy(resourcePolicy || testcase.resource_policy, page.context(), executionId);
+
+        if (setupFixture) {
+            await applySetupFixture(setupFixture, page, agent, executionId, timeoutConfig, deadlineAt);
+        }
+
+        // 夹具步骤不录制轨迹，轨迹上下文在夹具之后创建
+        const traceContext = await createReplayTraceContext(testcase);
+        if (traceContext) {
+            replayTraceContexts.set(executionId, traceContext);
+        }
 
         // 执行每个步骤
         for (let i = 0; i < steps.length; i++) {
@@ -1337,6 +3313,31 @@ async function executeTestCaseAsync(testcase, mode, executionId, timeoutConfig =
             }
             
             const step = steps[i];
+
+            // 执行预算耗尽：剩余步骤不再执行，直接记为失败
+            if (deadlineAt && remainingBudget(deadlineAt) <= 0) {
+                logMessage(executionId, 'error', `执行超过截止时间，剩余 ${steps.length - i} 个步骤未执行`);
+                const executionState = executionStates.get(executionId);
+                const expiredTime = new Date().toISOString();
+                for (let j = i; j < steps.length; j++) {
+                    if (executionState) {
+                        executionState.steps.push({
+                            index: j,
+                            description: steps[j].description || steps[j].action || 'Unknown Step',
+                            status: 'failed',
+                            start_time: expiredTime,
+                            end_time: expiredTime,
+                            duration: 0,
+                            stepType: steps[j].type || steps[j].action,
+                            params: steps[j].params || {},
+                            error_message: '执行超过截止时间，步骤未执行',
+                            remaining_budget_ms: 0,
+                            deadline_exceeded: true
+                        });
+                    }
+                }
+                break;
+            }
             
             // 检查步骤是否被跳过
             if (step.skip) {
@@ -1344,7 +3345,7 @@ async function executeTestCaseAsync(testcase, mode, executionId, timeoutConfig =
                 logMessage(executionId, 'warning', `步骤 ${i + 1} 被跳过: ${step.description || step.action}`);
                 
                 // 发送步骤跳过事件
-                io.emit('step-skipped', {
+                emitExecutionEvent('step-skipped', {
                     executionId,
                     stepIndex: i,
                     totalSteps: steps.length,
@@ -1385,7 +3386,7 @@ async function executeTestCaseAsync(testcase, mode, executionId, timeoutConfig =
             }
 
             // 发送步骤进度
-            io.emit('step-progress', {
+            emitExecutionEvent('step-progress', {
                 executionId,
                 stepIndex: i,
                 totalSteps: steps.length,
@@ -1393,17 +3394,19 @@ async function executeTestCaseAsync(testcase, mode, executionId, timeoutConfig =
                 progress: Math.round((i / steps.length) * 100)
             });
 
+            recordCacheLookup(currentExecution.cacheStats, step);
+
             // 执行步骤并获取详细结果
             const stepStartTime = new Date();
             let stepResult = null;
             
-            // executeStep现在返回结果而不是抛出异常
-            stepResult = await executeStep(step, page, agent, executionId, i, steps.length, timeoutConfig);
+            // executeStep现在返回结果而不是抛出异常，失败时按步骤重试策略只重试当前步骤
+            stepResult = await executeStepWithRetry(step, page, agent, executionId, i, steps.length, timeoutConfig, deadlineAt);
             
             // 根据步骤结果发送相应事件
             if (stepResult.status === 'success') {
                 // 发送步骤完成事件
-                io.emit('step-completed', {
+                emitExecutionEvent('step-completed', {
                     executionId,
                     stepIndex: i,
                     totalSteps: steps.length,
@@ -1415,7 +3418,7 @@ async function executeTestCaseAsync(testcase, mode, executionId, timeoutConfig =
                 logMessage(executionId, 'warning', `步骤 ${i + 1} 被用户中断`);
                 
                 // 发送步骤中断事件
-                io.emit('step-completed', {
+                emitExecutionEvent('step-completed', {
                     executionId,
                     stepIndex: i,
                     totalSteps: steps.length,
@@ -1430,7 +3433,7 @@ async function executeTestCaseAsync(testcase, mode, executionId, timeoutConfig =
                 logMessage(executionId, 'error', `步骤 ${i + 1} 执行失败: ${stepResult.error_message}`);
                 
                 // 发送步骤失败事件
-                io.emit('step-completed', {
+                emitExecutionEvent('step-completed', {
                     executionId,
                     stepIndex: i,
                     totalSteps: steps.length,
@@ -1441,22 +3444,26 @@ async function executeTestCaseAsync(testcase, mode, executionId, timeoutConfig =
                 // 继续执行后续步骤（可以根据配置决定是否在首次失败时停止）
             }
 
-            // 截图
+            // 截图：录像模式下只记录步骤在录像中的时间标记
             let screenshot = null;
-            try {
-                screenshot = await page.screenshot({
-                    fullPage: false,
-                    type: 'png'
-                });
+            if (capture) {
+                markVideoStep(capture, i, stepStartTime, new Date());
+            } else {
+                try {
+                    screenshot = await page.screenshot({
+                        fullPage: false,
+                        type: 'png'
+                    });
 
-                io.emit('screenshot-taken', {
-                    executionId,
-                    stepIndex: i,
-                    screenshot: screenshot.toString('base64'),
-                    timestamp: new Date().toISOString()
-                });
-            } catch (screenshotError) {
-                console.warn('截图失败:', screenshotError.message);
+                    emitExecutionEvent('screenshot-taken', {
+                        executionId,
+                        stepIndex: i,
+                        screenshot: screenshot.toString('base64'),
+                        timestamp: new Date().toISOString()
+                    });
+                } catch (screenshotError) {
+                    console.warn('截图失败:', screenshotError.message);
+                }
             }
 
             // 记录步骤执行数据到当前执行记录
@@ -1472,7 +3479,14 @@ async function executeTestCaseAsync(testcase, mode, executionId, timeoutConfig =
                     duration: stepResult?.duration || (stepEndTime - stepStartTime),
                     stepType: step.type || step.action,
                     params: step.params || {},
-                    error_message: stepResult?.error_message || null
+                    error_message: stepResult?.error_message || null,
+                    remaining_budget_ms: stepResult?.remaining_budget_ms ?? null,
+                    deadline_exceeded: stepResult?.deadline_exceeded || false,
+                    model_tier: stepResult?.model_tier || null,
+                    model_escalated: stepResult?.model_escalated || false,
+                    attempts: stepResult?.attempts || 1,
+                    attempt_history: stepResult?.attempt_history || [],
+                    result_data: stepResult?.result_data || {}
                 };
                 
                 executionState.steps.push(stepData);
@@ -1521,7 +3535,7 @@ async function executeTestCaseAsync(testcase, mode, executionId, timeoutConfig =
         }
 
         // 发送执行完成事件
-        io.emit('execution-completed', {
+        emitExecutionEvent('execution-completed', {
             executionId,
             status: overallStatus,
             message: message,
@@ -1538,6 +3552,24 @@ async function executeTestCaseAsync(testcase, mode, executionId, timeoutConfig =
         
         logMessage(executionId, overallStatus === 'success' ? 'success' : 'warning', statusMessage);
         
+        const modelUsage = summarizeModelUsage(executionState.modelUsage);
+        if (modelUsage) {
+            const tierSummary = Object.entries(modelUsage.tiers)
+                .map(([tier, usage]) => `${tier}(${usage.model}) ${usage.steps} 步/${usage.latency_ms}ms`)
+                .join('，');
+            logMessage(executionId, 'info', `模型用量: ${tierSummary}，升级 ${modelUsage.escalations} 次`);
+        }
+
+        if (resourceStats) {
+            logMessage(executionId, 'info', `资源拦截: 拦截 ${resourceStats.requests_blocked}/${resourceStats.requests_total} 个请求，节省约 ${Math.round(resourceStats.bytes_saved / 1024)}KB（${resourceStats.blocked_unknown_size} 个请求大小未知）`);
+        }
+
+        if (overallStatus === 'success') {
+            await saveReplayTrace(executionId, traceContext);
+        }
+        await finalizeNetworkRecording(network, page.context(), testcase, executionId, overallStatus === 'success');
+        network = null;
+
         // 检查并通知MidScene生成的报告
         await checkAndNotifyMidsceneReport(executionId, testcase, executionState);
 
@@ -1556,7 +3588,7 @@ async function executeTestCaseAsync(testcase, mode, executionId, timeoutConfig =
         }
 
         // 发送执行错误事件
-        io.emit('execution-completed', {
+        emitExecutionEvent('execution-completed', {
             executionId,
             status: 'failed',
             error: error.message,
@@ -1568,8 +3600,17 @@ async function executeTestCaseAsync(testcase, mode, executionId, timeoutConfig =
         // 通知Web系统执行失败
         await notifyExecutionResult(executionId, testcase, mode, 'failed', executionState?.steps || [], error.message);
     } finally {
-        // 清理执行控制标志
+        // 清理执行控制标志和变量上下文（数据驱动运行每行一个执行，不清理会随行数累积）
         executionControls.delete(executionId);
+        replayTraceContexts.delete(executionId);
+        variableContexts.delete(executionId);
+
+        // 执行结束后事件日志落盘，供之后的客户端回放
+        executionEventLog.complete(executionId);
+        await flushExecutionLogs(executionId);
+
+        // 录像需在关闭浏览器之前关闭上下文写出
+        await finalizeVideoCapture(capture, executionId);
         
         // 确保每次执行完成后都关闭浏览器，避免资源泄漏和状态污染
         try {
@@ -1584,6 +3625,11 @@ async function executeTestCaseAsync(testcase, mode, executionId, timeoutConfig =
         } catch (closeError) {
             console.error('⚠️ 关闭浏览器失败:', closeError.message);
         }
+
+        // 执行失败时丢弃未上传的录制文件（浏览器关闭时才会写出）
+        if (network && network.mode === 'record') {
+            require('fs').rmSync(network.harPath, { force: true });
+        }
     }
 }
 
@@ -1592,7 +3638,7 @@ async function executeTestCaseAsync(testcase, mode, executionId, timeoutConfig =
 // 执行完整测试用例
 app.post('/api/execute-testcase', async (req, res) => {
     try {
-        const { testcase, mode = 'headless', timeout_settings = {}, enable_cache = true } = req.body;
+        const { testcase, mode = 'headless', timeout_settings = {}, enable_cache = true, execution_id, deadline_ms, resource_policy, capture_mode, variables, coalesce } = req.body;
 
         // 详细记录请求信息
         console.log(`\n[${new Date().toISOString()}] MidScene API Request - /api/execute-testcase`);
@@ -1617,8 +3663,52 @@ app.post('/api/execute-testcase', async (req, res) => {
             });
         }
 
-        const executionId = generateExecutionId();
-        console.log(`Generated Execution ID: ${executionId}`);
+        // 同一执行重复下发（例如Web系统等待响应超时后重新下发）时不重复执行
+        if (execution_id && executionStates.get(execution_id)?.status === 'running') {
+            return res.json({
+                success: true,
+                executionId: execution_id,
+                duplicate: true,
+                message: '执行已在本节点运行'
+            });
+        }
+
+        // 排空中的节点不再接收新的执行
+        if (executorNodeStatus !== 'active') {
+            return res.status(503).json({
+                success: false,
+                node_status: executorNodeStatus,
+                error: `执行节点正在排空，拒绝新的执行 (${executorNodeStatus})`
+            });
+        }
+
+        if (EXECUTOR_REGISTRY_ENABLED && getRunningExecutionIds().length >= EXECUTOR_TOTAL_SLOTS) {
+            return res.status(503).json({
+                success: false,
+                error: '执行节点没有空闲槽位'
+            });
+        }
+
+        // 由Web系统调度时沿用其分配的执行ID
+        const executionId = execution_id || generateExecutionId();
+        console.log(`Execution ID: ${executionId}`);
+
+        // 未经Web系统调度的请求先登记执行：相同用例修订号和参数的执行正在运行时合并到该执行，不再重复打开浏览器
+        let startRegistered = false;
+        if (!execution_id) {
+            const registered = await registerExecutionStart(executionId, testcase, mode, { variables, coalesce });
+            if (registered?.coalesced) {
+                console.log(`🔗 执行请求已合并到运行中的执行: ${registered.coalesced_into}`);
+                return res.json({
+                    success: true,
+                    executionId: registered.coalesced_into,
+                    coalesced: true,
+                    message: '已合并到运行中的相同执行',
+                    timestamp: new Date().toISOString()
+                });
+            }
+            startRegistered = !!registered;
+        }
 
         // 解析超时设置
         const timeoutConfig = {
@@ -1629,8 +3719,16 @@ app.post('/api/execute-testcase', async (req, res) => {
         
         console.log('📋 接收到的超时设置:', JSON.stringify(timeoutConfig, null, 2));
 
+        // 截止时间以剩余预算下发，按本机时钟换算
+        const deadlineAt = (deadline_ms !== undefined && deadline_ms !== null)
+            ? Date.now() + Math.max(0, Number(deadline_ms) || 0)
+            : null;
+        if (deadlineAt) {
+            console.log(`⏱️ 执行预算: ${deadline_ms}ms`);
+        }
+
         // 异步执行，立即返回执行ID
-        executeTestCaseAsync(testcase, mode, executionId, timeoutConfig, enable_cache).catch(error => {
+        executeTestCaseAsync(testcase, mode, executionId, timeoutConfig, enable_cache, deadlineAt, resource_policy, capture_mode, variables, startRegistered).catch(error => {
             console.error('异步执行错误:', error);
         });
 
@@ -1674,6 +3772,182 @@ app.get('/api/execution-status/:executionId', (req, res) => {
     });
 });
 
+// AI缓存：列出本节点的缓存文件
+app.get('/api/ai-cache', (req, res) => {
+    try {
+        const caches = listAiCaches();
+        res.json({
+            success: true,
+            cache_dir: AI_CACHE_DIR,
+            caches,
+            total_size: caches.reduce((sum, cache) => sum + cache.size, 0)
+        });
+    } catch (error) {
+        res.status(500).json({ success: false, error: error.message });
+    }
+});
+
+// AI缓存：按指定ID、保留天数和总大小上限淘汰
+app.post('/api/ai-cache/evict', (req, res) => {
+    try {
+        const { cache_ids = [], max_age_days = null, max_total_bytes = null } = req.body || {};
+        if (!Array.isArray(cache_ids) || !cache_ids.every(isValidAiCacheId)) {
+            return res.status(400).json({ success: false, error: 'cache_ids必须是有效的缓存ID数组' });
+        }
+        res.json({ success: true, ...evictAiCaches({ cache_ids, max_age_days, max_total_bytes }) });
+    } catch (error) {
+        res.status(500).json({ success: false, error: error.message });
+    }
+});
+
+// AI缓存：删除单个缓存
+app.delete('/api/ai-cache/:cacheId', (req, res) => {
+    const { cacheId } = req.params;
+    if (!isValidAiCacheId(cacheId)) {
+        return res.status(400).json({ success: false, error: '缓存ID无效' });
+    }
+    const existed = listAiCaches().some(cache => cache.cache_id === cacheId);
+    if (!existed) {
+        return res.status(404).json({ success: false, error: '缓存不存在' });
+    }
+    res.json({ success: true, freed_bytes: deleteAiCache(cacheId) });
+});
+
+// 负载优化基准：在同一页面上分别用完整截图和各候选配置执行相同的只读AI步骤，
+// 对比平均耗时、发送字节数以及与完整截图结果的一致率，用于确定各步骤类型的配置
+app.post('/api/payload-benchmark', async (req, res) => {
+    const { url, steps = [], profiles = {}, repeat = 1 } = req.body || {};
+    if (!url) {
+        return res.status(400).json({ success: false, error: '缺少url参数' });
+    }
+    const benchSteps = (Array.isArray(steps) ? steps : [])
+        .map(step => ({ action: normalizeStepType(step.type || step.action), params: step.params || {} }))
+        .filter(step => PAYLOAD_OPTIMIZABLE_ACTIONS.has(step.action));
+    if (benchSteps.length === 0) {
+        return res.status(400).json({ success: false, error: '没有可测试的只读AI步骤' });
+    }
+    if (getRunningExecutionIds().length > 0) {
+        return res.status(409).json({ success: false, error: '有执行正在运行，请稍后再测' });
+    }
+
+    const candidates = { full: null };
+    const requested = profiles && typeof profiles === 'object' && Object.keys(profiles).length > 0
+        ? profiles : { default: DEFAULT_PAYLOAD_PROFILE };
+    for (const [name, profile] of Object.entries(requested)) {
+        candidates[name] = normalizePayloadProfile(profile);
+    }
+    const rounds = Math.min(5, Math.max(1, parseInt(repeat, 10) || 1));
+
+    try {
+        // 关闭缓存，保证每次都实际调用模型
+        await initBrowser(true, {}, false, 'payload-benchmark');
+        await page.goto(url, { waitUntil: 'domcontentloaded' });
+        await page.waitForTimeout(2000);
+
+        const totals = {};
+        const details = [];
+        for (const [stepIndex, step] of benchSteps.entries()) {
+            let baseline;
+            for (const [name, profile] of Object.entries(candidates)) {
+                const total = totals[name] || (totals[name] = {
+                    profile, samples: 0, errors: 0, agreed: 0, latency_ms: 0, ...createPayloadStats()
+                });
+                for (let round = 0; round < rounds; round += 1) {
+                    const request = {
+                        profile,
+                        region: profile?.crop ? toRegion(step.params.region) : null,
+                        stats: createPayloadStats()
+                    };
+                    payloadOptimizer.active = request;
+                    const startedAt = Date.now();
+                    let value;
+                    let error = null;
+                    try {
+                        value = await runBenchmarkStep(agent, step.action, step.params);
+                    } catch (stepError) {
+                        error = stepError.message;
+                    } finally {
+                        payloadOptimizer.active = null;
+                    }
+                    const latencyMs = Date.now() - startedAt;
+                    if (name === 'full' && round === 0) {
+                        baseline = value;
+                    }
+                    const agreed = !error && JSON.stringify(value) === JSON.stringify(baseline);
+
+                    total.samples += 1;
+                    total.errors += error ? 1 : 0;
+                    total.agreed += agreed ? 1 : 0;
+                    total.latency_ms += latencyMs;
+                    for (const key of Object.keys(request.stats)) {
+                        total[key] += request.stats[key];
+                    }
+                    details.push({
+                        step_index: stepIndex, action: step.action, profile: name, round,
+                        latency_ms: latencyMs, sent_bytes: request.stats.sent_bytes,
+                        result: value, agreed, error
+                    });
+                }
+            }
+        }
+
+        const summary = {};
+        for (const [name, total] of Object.entries(totals)) {
+            summary[name] = {
+                profile: total.profile,
+                samples: total.samples,
+                errors: total.errors,
+                avg_latency_ms: Math.round(total.latency_ms / total.samples),
+                avg_sent_bytes: Math.round(total.sent_bytes / total.samples),
+                byte_reduction: total.original_bytes
+                    ? Number((1 - total.sent_bytes / total.original_bytes).toFixed(4)) : 0,
+                // 与完整截图首轮结果一致的比例，作为准确率的近似
+                agreement: Number((total.agreed / total.samples).toFixed(4))
+            };
+        }
+        res.json({ success: true, url, rounds, summary, details });
+    } catch (error) {
+        payloadOptimizer.active = null;
+        res.status(500).json({ success: false, error: error.message });
+    }
+});
+
+// 回放执行事件：返回序号大于since的事件，执行结束后从磁盘读取
+app.get('/api/execution-events/:executionId', (req, res) => {
+    const { executionId } = req.params;
+    const since = parseInt(req.query.since || '0', 10);
+    const limit = parseInt(req.query.limit || '500', 10);
+    if (Number.isNaN(since) || since < 0 || Number.isNaN(limit) || limit <= 0) {
+        return res.status(400).json({
+            success: false,
+            error: 'since必须是非负整数，limit必须是正整数'
+        });
+    }
+
+    const result = executionEventLog.since(executionId, since, Math.min(limit, 5000));
+    if (!result) {
+        return res.status(404).json({
+            success: false,
+            error: '执行事件不存在'
+        });
+    }
+
+    res.json({
+        success: true,
+        executionId,
+        ...result
+    });
+});
+
+// 删除执行事件日志：Web系统清理旧执行记录时调用
+app.post('/api/execution-events/delete', (req, res) => {
+    const { execution_ids } = req.body || {};
+    if (!Array.isArray(execution_ids) || !execution_ids.every(id => typeof id === 'string' && id)) {
+        return res.status(400).json({ success: false, error: 'execution_ids必须是执行ID数组' });
+    }
+    res.json({ success: true, deleted: executionEventLog.remove(execution_ids) });
+});
+
 // 获取独立的执行报告
 app.get('/api/execution-report/:executionId', (req, res) => {
     const { executionId } = req.params;
@@ -1792,7 +4066,7 @@ app.post('/api/stop-execution/:executionId', async (req, res) => {
         }
 
         // 发送停止事件
-        io.emit('execution-stopped', {
+        emitExecutionEvent('execution-stopped', {
             executionId,
             timestamp: new Date().toISOString()
         });
@@ -1815,6 +4089,14 @@ app.post('/api/stop-execution/:executionId', async (req, res) => {
     }
 });
 
+// 排空本节点：停止接收新执行，运行中的执行完成后按需退出（滚动部署时使用）
+app.post('/api/drain', (req, res) => {
+    const { exit = false, timeout_ms } = req.body || {};
+    const timeoutMs = timeout_ms !== undefined ? Math.max(0, Number(timeout_ms) || 0) : EXECUTOR_DRAIN_TIMEOUT;
+    startLocalDrain({ exitWhenDone: !!exit, timeoutMs });
+    res.json({ success: true, status: executorNodeStatus, drain: getDrainState() });
+});
+
 // 获取服务器状态
 app.get('/api/status', (req, res) => {
     const runningExecutions = Array.from(executionStates.values())
@@ -1826,6 +4108,13 @@ app.get('/api/status', (req, res) => {
         browserInitialized: !!browser,
         runningExecutions: runningExecutions.length,
         totalExecutions: executionStates.size,
+        executorNode: {
+            nodeId: EXECUTOR_NODE_ID,
+            status: executorNodeStatus,
+            registryEnabled: EXECUTOR_REGISTRY_ENABLED,
+            drain: getDrainState(),
+            ...getNodeLoad()
+        },
         uptime: process.uptime(),
         timestamp: new Date().toISOString()
     });
@@ -2071,7 +4360,7 @@ app.post('/ai-action', async (req, res) => {
 // AI等待
 app.post('/ai-wait-for', async (req, res) => {
     try {
-        const { prompt, timeout = 30000 } = req.body;
+        const { prompt, timeout = 30000, change_detection = true, options = {} } = req.body;
         
         // 详细记录请求信息
         console.log(`\n[${new Date().toISOString()}] MidScene API Request - /ai-wait-for`);
@@ -2079,12 +4368,17 @@ app.post('/ai-wait-for', async (req, res) => {
         console.log('Prompt:', prompt);
         console.log('Timeout:', timeout);
         
-        const { agent } = await initBrowser();
-        
-        console.log(`Sending to MidScene: agent.aiWaitFor("${prompt}", { timeout: ${timeout} })`);
+        const { page, agent } = await initBrowser();
         
         const startTime = Date.now();
-        const result = await agent.aiWaitFor(prompt, { timeout });
+        let result;
+        if (change_detection) {
+            console.log(`Waiting with page change detection: "${prompt}" (timeout: ${timeout}ms)`);
+            result = await waitEngine.wait(agent, page, prompt, timeout, options);
+        } else {
+            console.log(`Sending to MidScene: agent.aiWaitFor("${prompt}", { timeout: ${timeout} })`);
+            result = await agent.aiWaitFor(prompt, { timeout });
+        }
         const endTime = Date.now();
         
         console.log(`MidScene Response Time: ${endTime - startTime}ms`);
@@ -2152,6 +4446,31 @@ app.post('/screenshot', async (req, res) => {
     }
 });
 
+// 获取页面指纹（截图dHash + DOM校验和），供客户端本地判断页面是否变化
+app.get('/page-fingerprint', async (req, res) => {
+    try {
+        const { page } = await initBrowser();
+        const fingerprint = await capturePageFingerprint(page);
+        res.json({
+            success: true,
+            fingerprint
+        });
+    } catch (error) {
+        res.status(500).json({
+            success: false,
+            error: error.message
+        });
+    }
+});
+
+// 获取等待引擎学习到的各条件典型等待时长
+app.get('/wait-expectations', (req, res) => {
+    res.json({
+        success: true,
+        expectations: waitEngine.snapshot()
+    });
+});
+
 // 获取页面信息
 app.get('/page-info', async (req, res) => {
     try {
@@ -2428,20 +4747,23 @@ server.listen(port, () => {
     console.log(`   GET  /api/executions - 获取所有执行记录`);
     console.log(`   POST /api/stop-execution/:id - 停止执行`);
     console.log(`   GET  /api/status - 获取服务器状态`);
+    console.log(`   POST /api/drain - 排空节点（可选排空后退出）`);
     console.log(`   GET  /health - 健康检查`);
-});
 
-// 优雅关闭
-process.on('SIGTERM', async () => {
-    console.log('收到SIGTERM信号，正在优雅关闭...');
-    if (page) await page.close();
-    if (browser) await browser.close();
-    process.exit(0);
+    if (EXECUTOR_REGISTRY_ENABLED) {
+        startExecutorHeartbeat();
+    }
 });
 
-process.on('SIGINT', async () => {
-    console.log('收到SIGINT信号，正在优雅关闭...');
-    if (page) await page.close();
-    if (browser) await browser.close();
-    process.exit(0);
-}); 
\ No newline at end of file
+// 优雅关闭：先排空，运行中的执行完成（或超时交还重新排队）后退出；再次收到信号时立即退出
+function handleShutdownSignal(signal) {
+    if (localDrain && localDrain.exitWhenDone) {
+        console.log(`再次收到${signal}信号，立即退出`);
+        process.exit(1);
+    }
+    console.log(`收到${signal}信号，排空后优雅关闭...`);
+    startLocalDrain({ exitWhenDone: true });
+}
+
+process.on('SIGTERM', () => handleShutdownSignal('SIGTERM'));
+process.on('SIGINT', () => handleShutdownSignal('SIGINT')); 
\ No newline at end of file
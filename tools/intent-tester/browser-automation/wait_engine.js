@@ -0,0 +1,171 @@
+/**
+ * 等待引擎和页面变化检测
+ * 默认参数来自midscene_framework/wait_defaults.json，与Python端（midscene_framework.wait_engine）共用
+ */
+
+const fs = require('fs');
+const path = require('path');
+
+// 仓库中位于上一级目录，打包后的代理服务与midscene_framework同级
+function loadWaitDefaults() {
+    const candidates = [
+        path.join(__dirname, '..', 'midscene_framework', 'wait_defaults.json'),
+        path.join(__dirname, 'midscene_framework', 'wait_defaults.json')
+    ];
+    const file = candidates.find(candidate => fs.existsSync(candidate));
+    if (!file) {
+        throw new Error(`未找到等待引擎默认配置: ${candidates.join(', ')}`);
+    }
+    return JSON.parse(fs.readFileSync(file, 'utf8'));
+}
+
+const WAIT_DEFAULTS = loadWaitDefaults();
+
+// 两个十六进制指纹的汉明距离，长度不同视为完全不同（64位指纹）
+function hammingDistance(a, b) {
+    if (!a || !b || a.length !== b.length) {
+        return 64;
+    }
+    let distance = 0;
+    for (let i = 0; i < a.length; i++) {
+        let diff = parseInt(a[i], 16) ^ parseInt(b[i], 16);
+        while (diff) {
+            distance += diff & 1;
+            diff >>= 1;
+        }
+    }
+    return distance;
+}
+
+// 与上次模型评估时相比页面是否发生变化：DOM校验和不同或画面哈希距离超过阈值
+function pageChanged(previous, current, threshold = WAIT_DEFAULTS.hash_threshold) {
+    if (!previous) {
+        return true;
+    }
+    return previous.dom !== current.dom || hammingDistance(previous.dhash, current.dhash) > threshold;
+}
+
+// 等待引擎：本地探测页面状态，按指数增长并封顶的间隔轮询，
+// 页面变化且就绪（加载完成、网络空闲、元素数量稳定）后才让模型判断条件，
+// 并按条件学习典型等待时长，避免在通常还未满足时过早调用模型
+class WaitEngine {
+    constructor(options = {}) {
+        // 采集页面指纹的函数 (page) => fingerprint，不调用模型
+        this.captureFingerprint = options.captureFingerprint;
+        this.hashThreshold = options.hashThreshold ?? WAIT_DEFAULTS.hash_threshold;
+        this.initialInterval = options.initialInterval || WAIT_DEFAULTS.initial_interval_ms;
+        this.maxInterval = options.maxInterval || WAIT_DEFAULTS.max_interval_ms;
+        this.multiplier = options.multiplier || WAIT_DEFAULTS.multiplier;
+        // 网络无请求持续该时长视为空闲
+        this.networkIdleMs = options.networkIdleMs || WAIT_DEFAULTS.network_idle_ms;
+        // 页面迟迟不就绪时，距上次模型调用超过该时长仍会调用一次模型
+        this.maxUnreadyMs = options.maxUnreadyMs || WAIT_DEFAULTS.max_unready_ms;
+        // 学习到的典型等待时长低于该比例之前不调用模型
+        this.expectationFloor = options.expectationFloor ?? WAIT_DEFAULTS.expectation_floor;
+        this.ewmaAlpha = options.ewmaAlpha || WAIT_DEFAULTS.ewma_alpha;
+        this.expectations = new Map();
+    }
+
+    static conditionKey(condition) {
+        return String(condition || '').trim().toLowerCase().replace(/\s+/g, ' ');
+    }
+
+    expectedWait(condition) {
+        return this.expectations.get(WaitEngine.conditionKey(condition)) || null;
+    }
+
+    // 用指数加权平均更新条件的典型等待时长
+    recordWait(condition, elapsedMs) {
+        const key = WaitEngine.conditionKey(condition);
+        const current = this.expectations.get(key);
+        if (!current) {
+            this.expectations.set(key, { expected_ms: elapsedMs, samples: 1 });
+        } else {
+            current.expected_ms = Math.round(this.ewmaAlpha * elapsedMs + (1 - this.ewmaAlpha) * current.expected_ms);
+            current.samples += 1;
+        }
+    }
+
+    isReady(fingerprint, previousFingerprint) {
+        return (fingerprint.ready_state == null || fingerprint.ready_state === 'complete')
+            && (fingerprint.inflight_requests || 0) === 0
+            && (fingerprint.network_idle_ms || 0) >= this.networkIdleMs
+            && !!previousFingerprint
+            && previousFingerprint.element_count === fingerprint.element_count;
+    }
+
+    async wait(agent, page, condition, timeout, options = {}) {
+        const startedAt = Date.now();
+        const deadline = startedAt + timeout;
+        const threshold = options.hash_threshold ?? this.hashThreshold;
+        const expectation = this.expectedWait(condition);
+        const notBefore = expectation ? startedAt + expectation.expected_ms * this.expectationFloor : startedAt;
+        const report = {
+            condition,
+            probes: 0,
+            model_calls: 0,
+            unchanged_probes: 0,
+            unready_probes: 0,
+            expected_ms: expectation ? expectation.expected_ms : null,
+            elapsed_ms: 0
+        };
+
+        let interval = options.initial_interval || this.initialInterval;
+        let previousFingerprint = null;
+        let evaluatedFingerprint = null;
+        let lastEvalAt = startedAt;
+
+        while (true) {
+            let fingerprint = null;
+            try {
+                fingerprint = await this.captureFingerprint(page);
+                report.probes += 1;
+            } catch (error) {
+                // 页面跳转中截图或执行脚本可能失败，下一轮再探测
+                console.warn(`采集页面指纹失败: ${error.message}`);
+            }
+
+            if (fingerprint) {
+                const changed = pageChanged(evaluatedFingerprint, fingerprint, threshold);
+                const ready = this.isReady(fingerprint, previousFingerprint);
+                const now = Date.now();
+
+                if (!changed) {
+                    report.unchanged_probes += 1;
+                } else if (!ready && now - lastEvalAt < this.maxUnreadyMs) {
+                    report.unready_probes += 1;
+                } else if (now >= notBefore || now + interval >= deadline) {
+                    evaluatedFingerprint = fingerprint;
+                    lastEvalAt = now;
+                    report.model_calls += 1;
+                    if (await agent.aiBoolean(condition)) {
+                        report.elapsed_ms = Date.now() - startedAt;
+                        this.recordWait(condition, report.elapsed_ms);
+                        return report;
+                    }
+                }
+
+                // 页面仍在变化时回到较短的间隔，稳定后逐步拉长
+                interval = changed && !ready
+                    ? (options.initial_interval || this.initialInterval)
+                    : Math.min(interval * this.multiplier, options.max_interval || this.maxInterval);
+                previousFingerprint = fingerprint;
+            }
+
+            const remaining = deadline - Date.now();
+            if (remaining <= 0) {
+                report.elapsed_ms = Date.now() - startedAt;
+                const error = new Error(`等待条件超时 (${timeout}ms): ${condition}，探测 ${report.probes} 次，模型调用 ${report.model_calls} 次`);
+                error.waitReport = report;
+                throw error;
+            }
+            await page.waitForTimeout(Math.min(interval, remaining));
+        }
+    }
+
+    snapshot() {
+        return Array.from(this.expectations.entries()).map(([condition, value]) => ({ condition, ...value }));
+    }
+}
+
+module.exports = { WAIT_DEFAULTS, hammingDistance, pageChanged, WaitEngine };
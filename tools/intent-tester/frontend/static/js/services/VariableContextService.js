@@ -91,7 +91,7 @@ class VariableContextService {
         }
 
         const data = await response.json();
-        return data.variables || [];
+        return (data.data && data.data.variables) || [];
     }
 
     /**
@@ -121,7 +121,7 @@ class VariableContextService {
             }
 
             const data = await response.json();
-            return data.predicted_variables || [];
+            return (data.data && data.data.predicted_variables) || [];
 
         } catch (error) {
             console.warn('预测变量失败，使用演示数据:', error);
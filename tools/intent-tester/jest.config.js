@@ -23,6 +23,8 @@ module.exports = {
   collectCoverage: false, // 默认关闭，通过命令行参数控制
   collectCoverageFrom: [
     'browser-automation/midscene_server.js',
+    'browser-automation/execution_event_log.js',
+    'browser-automation/wait_engine.js',
     '!**/node_modules/**',
     '!**/dist/**',
     '!**/build/**',
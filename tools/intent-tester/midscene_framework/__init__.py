@@ -10,6 +10,11 @@ from .data_extractor import (
     ExtractionResult,
 )
 from .retry_handler import RetryHandler, RetryConfig
+from .deadline import Deadline, DeadlineExceeded
+from .step_retry import StepRetryPolicy, classify_error
+from .page_change import PageFingerprint, hamming_distance
+from .singleflight import SingleFlight, get_singleflight, singleflight_key
+from .wait_engine import WaitEngine, WaitConfig, WaitReport
 from .config import MidSceneConfig, ConfigManager
 from .mock_service import MockMidSceneAPI
 from .validators import DataValidator
@@ -23,6 +28,18 @@ __all__ = [
     "ExtractionResult",
     "RetryHandler",
     "RetryConfig",
+    "Deadline",
+    "DeadlineExceeded",
+    "StepRetryPolicy",
+    "classify_error",
+    "PageFingerprint",
+    "hamming_distance",
+    "SingleFlight",
+    "get_singleflight",
+    "singleflight_key",
+    "WaitEngine",
+    "WaitConfig",
+    "WaitReport",
     "MidSceneConfig",
     "ConfigManager",
     "MockMidSceneAPI",
@@ -14,6 +14,8 @@ from enum import Enum
 
 from .validators import DataValidator
 from .retry_handler import RetryHandler, RetryConfig
+from .deadline import Deadline
+from .singleflight import SingleFlight, get_singleflight, singleflight_key
 
 logger = logging.getLogger(__name__)
 
@@ -38,6 +40,7 @@ class ExtractionRequest:
     output_variable: Optional[str] = None
     validation_rules: Optional[Dict] = None
     retry_config: Optional[Dict] = None
+    deadline: Optional[Deadline] = None
 
 
 @dataclass
@@ -99,18 +102,27 @@ class MidSceneDataExtractor:
         },
     }
 
-    def __init__(self, midscene_client=None, mock_mode: bool = False):
+    def __init__(
+        self,
+        midscene_client=None,
+        mock_mode: bool = False,
+        singleflight: Optional[SingleFlight] = None,
+        deduplicate: bool = True,
+    ):
         """
         初始化数据提取器
 
         Args:
             midscene_client: MidSceneJS客户端实例
             mock_mode: 是否使用Mock模式
+            singleflight: 调用合并器，默认使用进程内共享的实例
+            deduplicate: 是否合并相同页面上的相同并发调用
         """
         self.midscene_client = midscene_client
         self.mock_mode = mock_mode
         self.logger = logger
         self.data_validator = DataValidator()
+        self.singleflight = (singleflight or get_singleflight()) if deduplicate else None
 
         # 设置默认重试配置
         self.default_retry_config = RetryConfig(
@@ -142,12 +154,16 @@ class MidSceneDataExtractor:
             retry_config = self._get_retry_config(request.retry_config)
 
             # 执行提取（带重试）
+            deduplicated = False
             if self.mock_mode:
                 raw_data = await self._mock_extract(request)
             else:
-                # 使用重试机制执行真实的API调用
-                raw_data = await RetryHandler.retry_with_backoff(
-                    handler, retry_config, request.params
+                # 使用重试机制执行真实的API调用，相同页面上的相同并发调用只执行一次
+                raw_data, deduplicated = await self._call_with_singleflight(
+                    request,
+                    lambda: RetryHandler.retry_with_backoff(
+                        handler, retry_config, request.params, deadline=request.deadline
+                    ),
                 )
 
             # 数据验证
@@ -173,6 +189,10 @@ class MidSceneDataExtractor:
                     "output_variable": request.output_variable,
                     "validation_rules": request.validation_rules,
                     "retry_attempts": 0,  # TODO: 从重试处理器获取实际重试次数
+                    "deduplicated": deduplicated,
+                    "remaining_budget_ms": (
+                        request.deadline.remaining_ms() if request.deadline else None
+                    ),
                 },
             )
 
@@ -196,9 +216,48 @@ class MidSceneDataExtractor:
                 method=request.method.value,
                 error=error_msg,
                 execution_time=execution_time,
-                metadata={"params": request.params, "error_type": type(e).__name__},
+                metadata={
+                    "params": request.params,
+                    "error_type": type(e).__name__,
+                    "remaining_budget_ms": (
+                        request.deadline.remaining_ms() if request.deadline else None
+                    ),
+                },
             )
 
+    async def _call_with_singleflight(self, request: ExtractionRequest, call):
+        """
+        与其他执行合并相同的调用
+
+        Returns:
+            (原始结果, 是否共享了其他调用的结果)；无法获取页面指纹时直接调用
+        """
+        if self.singleflight is None:
+            return await call(), False
+
+        fingerprint = await self._page_fingerprint()
+        if fingerprint is None or not (fingerprint.dom or fingerprint.dhash):
+            return await call(), False
+
+        key = singleflight_key(request.method.value, request.params, fingerprint)
+        raw_data, deduplicated = await self.singleflight.do(
+            key, call, deadline=request.deadline
+        )
+        if deduplicated:
+            logger.info(f"合并相同的模型调用 [{request.method.value}]，共享进行中请求的结果")
+        return raw_data, deduplicated
+
+    async def _page_fingerprint(self):
+        """获取当前页面指纹，客户端不支持或获取失败时返回None"""
+        probe = getattr(self.midscene_client, "page_fingerprint", None)
+        if not callable(probe):
+            return None
+        try:
+            return await asyncio.to_thread(probe)
+        except Exception as e:
+            logger.debug(f"获取页面指纹失败，不合并调用: {str(e)}")
+            return None
+
     def _validate_request(self, request: ExtractionRequest):
         """验证请求参数"""
         if not isinstance(request.method, DataExtractionMethod):
@@ -436,4 +495,7 @@ class MidSceneDataExtractor:
             "mock_mode": self.mock_mode,
             "client_available": self.midscene_client is not None,
             "methods": list(self.METHOD_REGISTRY.keys()),
+            "singleflight": (
+                self.singleflight.get_stats() if self.singleflight else None
+            ),
         }
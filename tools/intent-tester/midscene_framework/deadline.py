@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+执行截止时间
+为一次执行或单个步骤设定总时间预算，并把剩余预算传递给请求超时、重试和等待
+"""
+
+import time
+from typing import Optional
+
+
+class DeadlineExceeded(TimeoutError):
+    """执行超过截止时间"""
+
+
+class Deadline:
+    """
+    基于单调时钟的截止时间
+
+    剩余预算只随时间减少，不受系统时间调整影响
+    """
+
+    def __init__(self, expires_at: float, clock=time.monotonic):
+        """
+        Args:
+            expires_at: 截止时刻（clock时钟下的秒数）
+            clock: 时钟函数，测试时可替换
+        """
+        self.expires_at = expires_at
+        self._clock = clock
+
+    @classmethod
+    def after(cls, seconds: float, clock=time.monotonic) -> "Deadline":
+        """创建在seconds秒后到期的截止时间"""
+        if seconds is None or seconds <= 0:
+            raise ValueError("截止时间预算必须大于0")
+        return cls(clock() + seconds, clock=clock)
+
+    def remaining(self) -> float:
+        """剩余预算（秒），已到期时为0"""
+        return max(0.0, self.expires_at - self._clock())
+
+    def remaining_ms(self) -> int:
+        """剩余预算（毫秒）"""
+        return int(self.remaining() * 1000)
+
+    def expired(self) -> bool:
+        """是否已到期"""
+        return self.remaining() <= 0
+
+    def check(self, operation: str = "操作"):
+        """已到期时抛出DeadlineExceeded"""
+        if self.expired():
+            raise DeadlineExceeded(f"{operation}超过截止时间")
+
+    def clamp(self, timeout: Optional[float]) -> float:
+        """把超时时间（秒）限制在剩余预算内"""
+        remaining = self.remaining()
+        if timeout is None:
+            return remaining
+        return min(timeout, remaining)
+
+    def child(self, seconds: Optional[float]) -> "Deadline":
+        """创建子截止时间（例如单个步骤），不会晚于当前截止时间"""
+        if not seconds or seconds <= 0:
+            return self
+        return Deadline(
+            min(self.expires_at, self._clock() + seconds), clock=self._clock
+        )
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+页面变化检测
+比较MidScene服务器返回的页面指纹（截图dHash + DOM校验和），
+页面未变化时跳过模型重新判断
+"""
+
+import json
+import os
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+# 等待引擎和页面变化检测的默认参数，与执行节点（browser-automation/wait_engine.js）共用同一份配置
+with open(os.path.join(os.path.dirname(__file__), "wait_defaults.json"), encoding="utf-8") as f:
+    WAIT_DEFAULTS = json.load(f)
+
+# dHash汉明距离不超过该值视为画面未变化（64位指纹）
+DEFAULT_HASH_THRESHOLD = WAIT_DEFAULTS["hash_threshold"]
+
+
+def hamming_distance(a: str, b: str) -> int:
+    """两个十六进制指纹的汉明距离，长度不同视为完全不同"""
+    if not a or not b or len(a) != len(b):
+        return 64
+    return bin(int(a, 16) ^ int(b, 16)).count("1")
+
+
+@dataclass
+class PageFingerprint:
+    """页面指纹"""
+
+    dhash: str
+    dom: str
+    url: Optional[str] = None
+    element_count: Optional[int] = None
+    ready_state: Optional[str] = None
+    inflight_requests: int = 0
+    network_idle_ms: int = 0
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "PageFingerprint":
+        return cls(
+            dhash=data.get("dhash", ""),
+            dom=data.get("dom", ""),
+            url=data.get("url"),
+            element_count=data.get("element_count"),
+            ready_state=data.get("ready_state"),
+            inflight_requests=data.get("inflight_requests", 0),
+            network_idle_ms=data.get("network_idle_ms", 0),
+        )
+
+    def changed_since(
+        self,
+        previous: Optional["PageFingerprint"],
+        threshold: int = DEFAULT_HASH_THRESHOLD,
+    ) -> bool:
+        """与之前的指纹相比页面是否变化：DOM校验和不同或画面哈希距离超过阈值"""
+        if previous is None:
+            return True
+        if self.dom != previous.dom:
+            return True
+        return hamming_distance(self.dhash, previous.dhash) > threshold
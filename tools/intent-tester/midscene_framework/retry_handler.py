@@ -7,9 +7,11 @@
 import asyncio
 import random
 import logging
-from typing import Callable, Any, Union
+from typing import Callable, Any, Union, Optional
 from dataclasses import dataclass
 
+from .deadline import Deadline, DeadlineExceeded
+
 logger = logging.getLogger(__name__)
 
 
@@ -56,7 +58,11 @@ class RetryHandler:
 
     @staticmethod
     async def retry_with_backoff(
-        func: Callable, config: RetryConfig, *args, **kwargs
+        func: Callable,
+        config: RetryConfig,
+        *args,
+        deadline: Optional[Deadline] = None,
+        **kwargs,
     ) -> Any:
         """
         指数退避重试机制
@@ -65,17 +71,21 @@ class RetryHandler:
             func: 要重试的函数
             config: 重试配置
             *args: 函数参数
+            deadline: 截止时间，剩余预算不足以等待下一次重试时立即停止
             **kwargs: 函数关键字参数
 
         Returns:
             函数执行结果
 
         Raises:
-            最后一次执行的异常
+            最后一次执行的异常；截止时间到期时抛出DeadlineExceeded
         """
         last_exception = None
 
         for attempt in range(config.max_attempts):
+            if deadline is not None:
+                deadline.check(f"第 {attempt + 1} 次尝试")
+
             try:
                 # 如果是异步函数
                 if asyncio.iscoroutinefunction(func):
@@ -104,6 +114,15 @@ class RetryHandler:
                 # 计算延迟时间
                 delay = RetryHandler._calculate_delay(attempt, config, e)
 
+                # 等待结束时预算已耗尽，重试没有意义
+                if deadline is not None and delay >= deadline.remaining():
+                    logger.warning(
+                        f"剩余预算 {deadline.remaining():.2f}秒 不足以等待 {delay:.2f}秒 后重试"
+                    )
+                    raise DeadlineExceeded(
+                        f"重试超过截止时间: {type(e).__name__}: {str(e)}"
+                    ) from e
+
                 logger.warning(
                     f"尝试 {attempt + 1} 失败: {type(e).__name__}: {str(e)}, "
                     f"{delay:.2f}秒后重试"
@@ -125,6 +144,10 @@ class RetryHandler:
         Returns:
             是否应该重试
         """
+        # 截止时间到期不再重试（DeadlineExceeded是TimeoutError的子类，需先判断）
+        if isinstance(exception, DeadlineExceeded):
+            return False
+
         # 检查异常类型
         if isinstance(exception, RetryHandler.RETRYABLE_EXCEPTIONS):
             return True
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+相同模型调用的并发合并（singleflight）
+数据驱动的多个变体并发执行时，会在同一页面上几乎同时发出完全相同的AI调用；
+以(方法, 参数, 页面指纹)为键，同一时间只真正执行一次，其余调用等待并共享结果
+"""
+
+import asyncio
+import concurrent.futures
+import hashlib
+import json
+import threading
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from .deadline import Deadline, DeadlineExceeded
+from .page_change import PageFingerprint
+
+# 执行者超过截止时间或被取消时交给等待者的标记，等待者收到后重新发起调用
+_ABANDONED = object()
+
+
+def singleflight_key(
+    method: str, params: Dict[str, Any], fingerprint: PageFingerprint
+) -> str:
+    """调用的合并键：方法、规范化后的参数和页面指纹（URL、DOM校验和、画面哈希）"""
+    payload = json.dumps(
+        {
+            "method": method,
+            "params": params,
+            "page": [fingerprint.url, fingerprint.dom, fingerprint.dhash],
+        },
+        sort_keys=True,
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class SingleFlight:
+    """
+    并发调用合并器
+
+    使用线程安全的Future保存进行中的调用，不同线程、不同事件循环中的执行也能共享；
+    调用结束后立即移除，不缓存结果，之后的相同调用会重新执行
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, concurrent.futures.Future] = {}
+        self._calls = 0
+        self._executed = 0
+        self._deduplicated = 0
+
+    async def do(
+        self,
+        key: str,
+        fn: Callable[[], Awaitable[Any]],
+        deadline: Optional[Deadline] = None,
+    ) -> Tuple[Any, bool]:
+        """
+        执行调用，同键的调用正在进行时等待其结果
+
+        Args:
+            key: 合并键
+            fn: 实际执行调用的协程函数
+            deadline: 等待共享结果时遵守的截止时间
+
+        Returns:
+            (结果, 是否共享了其他调用的结果)；调用失败时所有等待者收到相同的异常，
+            执行者自身超过截止时间或被取消时，等待者各自重新发起调用
+        """
+        with self._lock:
+            self._calls += 1
+
+        while True:
+            with self._lock:
+                future = self._inflight.get(key)
+                leader = future is None
+                if leader:
+                    future = concurrent.futures.Future()
+                    self._inflight[key] = future
+                    self._executed += 1
+
+            if leader:
+                return await self._lead(key, future, fn), False
+
+            # shield：等待者超时或被取消时不能取消共享的Future
+            waiter = asyncio.shield(asyncio.wrap_future(future))
+            try:
+                if deadline is None:
+                    outcome = await waiter
+                else:
+                    outcome = await asyncio.wait_for(waiter, timeout=deadline.remaining())
+            except asyncio.TimeoutError:
+                raise DeadlineExceeded("等待合并的模型调用超过截止时间")
+            except Exception:
+                self._count_deduplicated()
+                raise
+            if outcome is _ABANDONED:
+                continue
+            self._count_deduplicated()
+            return outcome, True
+
+    async def _lead(
+        self, key: str, future: concurrent.futures.Future, fn: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """执行调用并把结果交给等待者"""
+        try:
+            result = await fn()
+        except BaseException as e:
+            self._release(key, future)
+            if isinstance(e, DeadlineExceeded) or not isinstance(e, Exception):
+                # 截止时间和取消只属于执行者自身，不能让预算充足的等待者跟着失败
+                future.set_result(_ABANDONED)
+            else:
+                future.set_exception(e)
+            raise
+        self._release(key, future)
+        future.set_result(result)
+        return result
+
+    def _release(self, key: str, future: concurrent.futures.Future):
+        # 先移除再通知等待者，重新发起的调用不会再等到同一个Future
+        with self._lock:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+    def _count_deduplicated(self):
+        with self._lock:
+            self._deduplicated += 1
+
+    def inflight(self) -> int:
+        """进行中的调用数"""
+        with self._lock:
+            return len(self._inflight)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """合并统计：总调用数、实际执行数、共享结果数和合并比例"""
+        with self._lock:
+            calls = self._calls
+            return {
+                "calls": calls,
+                "executed": self._executed,
+                "deduplicated": self._deduplicated,
+                "dedup_rate": round(self._deduplicated / calls, 4) if calls else 0.0,
+                "inflight": len(self._inflight),
+            }
+
+
+# 进程内共享的合并器，使各执行的数据提取器之间能够合并调用
+_singleflight = None
+_singleflight_lock = threading.Lock()
+
+
+def get_singleflight() -> SingleFlight:
+    """获取进程内共享的合并器实例（单例模式）"""
+    global _singleflight
+    with _singleflight_lock:
+        if _singleflight is None:
+            _singleflight = SingleFlight()
+        return _singleflight
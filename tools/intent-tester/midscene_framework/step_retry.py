@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+步骤级重试策略
+步骤定义中的retry_policy描述失败后的重试次数、退避时间、可重试的错误类别以及重试前是否重新导航，
+偶发失败（临时遮罩、AI服务抖动）只重试失败的步骤，不再整条用例重跑
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Union
+
+from .deadline import DeadlineExceeded
+
+# 错误类别，按顺序匹配错误信息中的关键字；断言信息中常带有页面内容，最先匹配
+ERROR_CLASS_KEYWORDS = [
+    ("assertion", ["assertion", "assert failed", "断言"]),
+    ("timeout", ["timeout", "timed out", "超时"]),
+    (
+        "network",
+        ["connection", "network", "econn", "refused", "net::", "unreachable", "连接"],
+    ),
+    (
+        "ai_service",
+        [
+            "ai model",
+            "ai模型",
+            "rate limit",
+            "too many requests",
+            "server error",
+            "bad gateway",
+            "service unavailable",
+        ],
+    ),
+    (
+        "element_not_found",
+        ["not found", "cannot find", "unable to locate", "no element", "找不到", "未找到"],
+    ),
+]
+ERROR_CLASSES = [name for name, _ in ERROR_CLASS_KEYWORDS] + ["other"]
+
+# 未指定retry_on时重试的错误类别：断言失败通常是真实缺陷，默认不重试
+DEFAULT_RETRY_ON = ["timeout", "network", "ai_service", "element_not_found"]
+
+MAX_ATTEMPTS = 10
+MAX_BACKOFF_MS = 5 * 60 * 1000
+
+
+def classify_error(error: Union[BaseException, str, None]) -> str:
+    """
+    把步骤错误归入错误类别
+
+    截止时间到期归为deadline，任何策略下都不重试
+    """
+    if isinstance(error, DeadlineExceeded):
+        return "deadline"
+    message = str(error or "").lower()
+    if "截止时间" in message or "deadline" in message:
+        return "deadline"
+    for name, keywords in ERROR_CLASS_KEYWORDS:
+        if any(keyword in message for keyword in keywords):
+            return name
+    return "other"
+
+
+@dataclass
+class StepRetryPolicy:
+    """步骤重试策略"""
+
+    attempts: int = 1
+    backoff_ms: int = 1000
+    backoff_multiplier: float = 2.0
+    max_backoff_ms: int = 30000
+    retry_on: List[str] = field(default_factory=lambda: list(DEFAULT_RETRY_ON))
+    # True表示重试前重新加载当前页面，字符串表示重试前导航到该URL
+    renavigate: Union[bool, str] = False
+
+    @classmethod
+    def from_step(cls, step: Dict[str, Any]) -> Optional["StepRetryPolicy"]:
+        """
+        从步骤定义解析重试策略，未配置时返回None
+
+        兼容旧的retry_count字段：retry_count=N等价于attempts=N+1的默认策略
+        """
+        data = step.get("retry_policy")
+        if data is None:
+            retry_count = step.get("retry_count") or 0
+            if isinstance(retry_count, bool) or not isinstance(retry_count, int) or retry_count < 0:
+                raise ValueError("retry_count必须是非负整数")
+            if retry_count == 0:
+                return None
+            data = {"attempts": min(retry_count + 1, MAX_ATTEMPTS)}
+        if not isinstance(data, dict):
+            raise ValueError("retry_policy必须是对象")
+
+        unknown = set(data) - {
+            "attempts",
+            "backoff_ms",
+            "backoff_multiplier",
+            "max_backoff_ms",
+            "retry_on",
+            "renavigate",
+        }
+        if unknown:
+            raise ValueError(f"retry_policy包含未知字段: {', '.join(sorted(unknown))}")
+
+        policy = cls()
+        attempts = data.get("attempts", policy.attempts)
+        if isinstance(attempts, bool) or not isinstance(attempts, int) or not 1 <= attempts <= MAX_ATTEMPTS:
+            raise ValueError(f"retry_policy.attempts必须是1-{MAX_ATTEMPTS}的整数")
+        policy.attempts = attempts
+
+        for name in ("backoff_ms", "max_backoff_ms"):
+            value = data.get(name, getattr(policy, name))
+            if isinstance(value, bool) or not isinstance(value, int) or not 0 <= value <= MAX_BACKOFF_MS:
+                raise ValueError(f"retry_policy.{name}必须是0-{MAX_BACKOFF_MS}的整数（毫秒）")
+            setattr(policy, name, value)
+
+        multiplier = data.get("backoff_multiplier", policy.backoff_multiplier)
+        if isinstance(multiplier, bool) or not isinstance(multiplier, (int, float)) or multiplier < 1:
+            raise ValueError("retry_policy.backoff_multiplier必须是不小于1的数字")
+        policy.backoff_multiplier = float(multiplier)
+
+        retry_on = data.get("retry_on", policy.retry_on)
+        if retry_on == "any":
+            retry_on = list(ERROR_CLASSES)
+        if not isinstance(retry_on, list) or not retry_on:
+            raise ValueError("retry_policy.retry_on必须是错误类别数组或\"any\"")
+        invalid = [name for name in retry_on if name not in ERROR_CLASSES]
+        if invalid:
+            raise ValueError(
+                f"retry_policy.retry_on包含未知错误类别: {', '.join(map(str, invalid))}，"
+                f"支持: {', '.join(ERROR_CLASSES)}"
+            )
+        policy.retry_on = list(retry_on)
+
+        renavigate = data.get("renavigate", policy.renavigate)
+        if not isinstance(renavigate, (bool, str)) or renavigate == "":
+            raise ValueError("retry_policy.renavigate必须是布尔值或URL")
+        policy.renavigate = renavigate
+        return policy
+
+    def should_retry(self, error_class: str, attempt: int) -> bool:
+        """第attempt次尝试（从1开始）失败后是否继续重试"""
+        return attempt < self.attempts and error_class in self.retry_on
+
+    def delay_seconds(self, attempt: int) -> float:
+        """第attempt次尝试（从1开始）失败后等待多久再重试"""
+        delay_ms = self.backoff_ms * (self.backoff_multiplier ** (attempt - 1))
+        return min(delay_ms, self.max_backoff_ms) / 1000.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "attempts": self.attempts,
+            "backoff_ms": self.backoff_ms,
+            "backoff_multiplier": self.backoff_multiplier,
+            "max_backoff_ms": self.max_backoff_ms,
+            "retry_on": self.retry_on,
+            "renavigate": self.renavigate,
+        }
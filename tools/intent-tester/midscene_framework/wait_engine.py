@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+自适应等待引擎
+按指数增长并封顶的间隔探测页面，页面变化且就绪后才调用模型判断条件，
+并按条件学习典型等待时长
+"""
+
+import logging
+import re
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional
+
+from .deadline import DeadlineExceeded
+from .page_change import DEFAULT_HASH_THRESHOLD, WAIT_DEFAULTS, PageFingerprint
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class WaitConfig:
+    """等待配置，默认值来自wait_defaults.json"""
+
+    initial_interval: float = WAIT_DEFAULTS["initial_interval_ms"] / 1000
+    max_interval: float = WAIT_DEFAULTS["max_interval_ms"] / 1000
+    multiplier: float = float(WAIT_DEFAULTS["multiplier"])
+    network_idle_ms: int = WAIT_DEFAULTS["network_idle_ms"]  # 网络无请求持续该时长视为空闲
+    # 页面迟迟不就绪时，距上次模型调用超过该时长仍调用一次模型
+    max_unready: float = WAIT_DEFAULTS["max_unready_ms"] / 1000
+    # 学习到的典型等待时长低于该比例之前不调用模型
+    expectation_floor: float = WAIT_DEFAULTS["expectation_floor"]
+    ewma_alpha: float = WAIT_DEFAULTS["ewma_alpha"]
+    hash_threshold: int = DEFAULT_HASH_THRESHOLD
+
+    def __post_init__(self):
+        """参数验证"""
+        if self.initial_interval <= 0 or self.max_interval < self.initial_interval:
+            raise ValueError("轮询间隔必须大于0且max_interval不小于initial_interval")
+        if self.multiplier < 1:
+            raise ValueError("multiplier不能小于1")
+
+
+@dataclass
+class WaitReport:
+    """单次等待的统计"""
+
+    condition: str
+    satisfied: bool = False
+    probes: int = 0
+    model_calls: int = 0
+    unchanged_probes: int = 0
+    unready_probes: int = 0
+    expected_seconds: Optional[float] = None
+    elapsed_seconds: float = 0.0
+
+    def to_dict(self) -> Dict:
+        return dict(self.__dict__)
+
+
+@dataclass
+class WaitExpectation:
+    """条件的典型等待时长"""
+
+    expected_seconds: float
+    samples: int = 1
+
+
+class WaitEngine:
+    """自适应等待引擎"""
+
+    def __init__(
+        self,
+        config: Optional[WaitConfig] = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.config = config or WaitConfig()
+        self._clock = clock
+        self._sleep = sleep
+        self.expectations: Dict[str, WaitExpectation] = {}
+
+    @staticmethod
+    def condition_key(condition: str) -> str:
+        return re.sub(r"\s+", " ", (condition or "").strip().lower())
+
+    def expected_wait(self, condition: str) -> Optional[WaitExpectation]:
+        return self.expectations.get(self.condition_key(condition))
+
+    def record_wait(self, condition: str, elapsed: float):
+        """用指数加权平均更新条件的典型等待时长"""
+        key = self.condition_key(condition)
+        current = self.expectations.get(key)
+        if current is None:
+            self.expectations[key] = WaitExpectation(expected_seconds=elapsed)
+            return
+        alpha = self.config.ewma_alpha
+        current.expected_seconds = alpha * elapsed + (1 - alpha) * current.expected_seconds
+        current.samples += 1
+
+    def is_ready(
+        self, fingerprint: PageFingerprint, previous: Optional[PageFingerprint]
+    ) -> bool:
+        """页面就绪：加载完成、网络空闲且元素数量与上次探测一致"""
+        return (
+            fingerprint.ready_state in (None, "complete")
+            and fingerprint.inflight_requests == 0
+            and fingerprint.network_idle_ms >= self.config.network_idle_ms
+            and previous is not None
+            and previous.element_count == fingerprint.element_count
+        )
+
+    def wait(
+        self,
+        condition: str,
+        probe: Callable[[], PageFingerprint],
+        evaluate: Callable[[], bool],
+        timeout: float,
+    ) -> WaitReport:
+        """
+        等待条件满足
+
+        Args:
+            condition: 条件描述（用于学习典型等待时长）
+            probe: 本地探测页面指纹，不调用模型
+            evaluate: 调用模型判断条件是否满足
+            timeout: 超时时间（秒）
+
+        Returns:
+            等待统计，satisfied表示条件是否满足
+        """
+        config = self.config
+        started_at = self._clock()
+        deadline = started_at + timeout
+        expectation = self.expected_wait(condition)
+        not_before = started_at + (
+            expectation.expected_seconds * config.expectation_floor if expectation else 0
+        )
+        report = WaitReport(
+            condition=condition,
+            expected_seconds=expectation.expected_seconds if expectation else None,
+        )
+
+        interval = config.initial_interval
+        previous = None
+        evaluated = None
+        last_eval_at = started_at
+
+        while True:
+            try:
+                fingerprint = probe()
+                report.probes += 1
+            except DeadlineExceeded:
+                raise
+            except Exception as e:
+                logger.warning(f"探测页面状态失败: {e}")
+                fingerprint = None
+
+            if fingerprint is None:
+                # 无法探测页面时退回按max_unready间隔直接调用模型
+                now = self._clock()
+                if report.model_calls == 0 or now - last_eval_at >= config.max_unready:
+                    last_eval_at = now
+                    report.model_calls += 1
+                    if evaluate():
+                        report.satisfied = True
+                        report.elapsed_seconds = self._clock() - started_at
+                        self.record_wait(condition, report.elapsed_seconds)
+                        return report
+                interval = min(interval * config.multiplier, config.max_interval)
+            else:
+                changed = fingerprint.changed_since(evaluated, config.hash_threshold)
+                ready = self.is_ready(fingerprint, previous)
+                now = self._clock()
+
+                if not changed:
+                    report.unchanged_probes += 1
+                elif not ready and now - last_eval_at < config.max_unready:
+                    report.unready_probes += 1
+                elif now >= not_before or now + interval >= deadline:
+                    evaluated = fingerprint
+                    last_eval_at = now
+                    report.model_calls += 1
+                    if evaluate():
+                        report.satisfied = True
+                        report.elapsed_seconds = self._clock() - started_at
+                        self.record_wait(condition, report.elapsed_seconds)
+                        return report
+
+                # 页面仍在变化时回到较短的间隔，稳定后逐步拉长
+                if changed and not ready:
+                    interval = config.initial_interval
+                else:
+                    interval = min(interval * config.multiplier, config.max_interval)
+                previous = fingerprint
+
+            remaining = deadline - self._clock()
+            if remaining <= 0:
+                report.elapsed_seconds = self._clock() - started_at
+                return report
+            self._sleep(min(interval, remaining))
@@ -0,0 +1,73 @@
+"""
+AI缓存管理API测试
+"""
+
+import pytest
+
+from backend.services import ai_cache_service
+from backend.services.ai_cache_service import AiCacheService
+from backend.services.executor_registry import ExecutorRegistry
+
+
+@pytest.fixture
+def cache_service(monkeypatch, db_session):
+    service = AiCacheService()
+    caches = []
+    evicted = []
+
+    def fake_request(node, method, path, **kwargs):
+        if method == "GET":
+            return {"caches": caches}
+        evicted.append(kwargs["json"])
+        return {"deleted": kwargs["json"]["cache_ids"], "freed_bytes": 10}
+
+    monkeypatch.setattr(service, "_node_request", fake_request)
+    monkeypatch.setattr(ai_cache_service, "_ai_cache_service", service)
+    ExecutorRegistry().register_node("node-a", "http://a:3001", total_slots=1)
+    service.caches, service.evicted = caches, evicted
+    return service
+
+
+class TestAiCacheAPI:
+    """AI缓存查看、失效、淘汰和预热API测试"""
+
+    def test_should_list_and_invalidate_testcase_cache(
+        self, api_client, test_data_manager, assert_api_response, cache_service
+    ):
+        """测试列出用例缓存并使其失效"""
+        testcase = test_data_manager.create_testcase()
+        detail = assert_api_response(api_client.get(f"/api/testcases/{testcase.id}"), 200)
+        cache_id = f"playwright-testcase-{testcase.id}-{detail['revision']}"
+        cache_service.caches.append(
+            {"cache_id": cache_id, "testcase_id": testcase.id, "revision": detail["revision"], "size": 64, "entries": 2}
+        )
+
+        listing = assert_api_response(
+            api_client.get(f"/api/ai-cache?testcase_id={testcase.id}"), 200
+        )
+        assert listing["caches"][0]["state"] == "current"
+        assert listing["testcases"][0]["entries"] == 2
+
+        result = assert_api_response(
+            api_client.delete(f"/api/testcases/{testcase.id}/ai-cache"), 200
+        )
+        assert result["deleted"] == [{"node_id": "node-a", "cache_id": cache_id}]
+        assert api_client.delete("/api/testcases/99999/ai-cache").status_code == 404
+
+    def test_should_validate_evict_and_warm_requests(
+        self, api_client, test_data_manager, assert_api_response, cache_service
+    ):
+        """测试淘汰和预热的参数校验"""
+        assert api_client.post("/api/ai-cache/evict", json={"max_age_days": -1}).status_code == 400
+        result = assert_api_response(
+            api_client.post("/api/ai-cache/evict", json={"max_age_days": 30}), 200
+        )
+        assert result["freed_bytes"] == 10
+        assert cache_service.evicted[0]["max_age_days"] == 30
+
+        assert api_client.post("/api/ai-cache/warm", json={"testcase_ids": "1"}).status_code == 400
+        testcase = test_data_manager.create_testcase()
+        result = assert_api_response(
+            api_client.post("/api/ai-cache/warm", json={"testcase_ids": [testcase.id]}), 200
+        )
+        assert [q["testcase_id"] for q in result["queued"]] == [testcase.id]
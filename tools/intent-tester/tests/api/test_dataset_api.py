@@ -0,0 +1,101 @@
+"""
+数据驱动运行API测试
+"""
+
+import io
+
+import pytest
+
+from backend.services import dataset_service
+
+
+class TestDatasetAPI:
+    """数据集绑定、上传和数据驱动运行API测试"""
+
+    @pytest.fixture(autouse=True)
+    def dataset_dir(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(
+            dataset_service,
+            "_dataset_runner",
+            dataset_service.DatasetRunner(dataset_dir=str(tmp_path)),
+        )
+
+    def test_should_bind_inline_dataset_and_run_rows(
+        self, api_client, test_data_manager, assert_api_response
+    ):
+        """测试绑定内联数据集后每行创建一个子执行，结果按行汇总"""
+        testcase = test_data_manager.create_testcase({"name": "数据驱动登录"})
+
+        preview = assert_api_response(
+            api_client.put(
+                f"/api/testcases/{testcase.id}/dataset",
+                json={"type": "inline", "rows": [{"username": "a"}, {"username": "b"}]},
+            ),
+            200,
+        )
+        assert preview["columns"] == ["username"]
+        assert preview["dataset"] == {"type": "inline", "rows": 2}
+
+        dataset_run = assert_api_response(
+            api_client.post(f"/api/testcases/{testcase.id}/dataset-runs", json={}), 200
+        )
+        assert dataset_run["dataset_type"] == "inline"
+        assert dataset_run["row_count"] == 1
+
+        detail = assert_api_response(
+            api_client.get(f"/api/dataset-runs/{dataset_run['dataset_run_id']}"), 200
+        )
+        first = detail["rows"]["items"][0]
+        assert first["variables"] == {"username": "a"}
+
+        api_client.post(
+            "/api/midscene/execution-result",
+            json={
+                "execution_id": first["execution_id"],
+                "testcase_id": testcase.id,
+                "status": "failed",
+                "mode": "headless",
+                "steps": [{"status": "failed"}],
+            },
+        )
+        detail = assert_api_response(
+            api_client.get(f"/api/dataset-runs/{dataset_run['dataset_run_id']}"), 200
+        )
+        assert detail["failed_count"] == 1
+
+        cancelled = assert_api_response(
+            api_client.post(f"/api/dataset-runs/{dataset_run['dataset_run_id']}/cancel"), 200
+        )
+        assert cancelled["status"] == "cancelled"
+
+    def test_should_upload_csv_dataset(
+        self, api_client, test_data_manager, assert_api_response
+    ):
+        """测试上传CSV数据集并预览"""
+        testcase = test_data_manager.create_testcase({"name": "CSV用例"})
+
+        response = api_client.post(
+            f"/api/testcases/{testcase.id}/dataset/csv",
+            data={"file": (io.BytesIO(b"keyword,expected\nphone,10\n"), "search.csv")},
+            content_type="multipart/form-data",
+        )
+        preview = assert_api_response(response, 200)
+        assert preview["dataset"]["filename"] == "search.csv"
+        assert preview["rows"] == [{"keyword": "phone", "expected": "10"}]
+
+        assert api_client.delete(f"/api/testcases/{testcase.id}/dataset").status_code == 200
+        assert api_client.get(f"/api/testcases/{testcase.id}/dataset").status_code == 404
+
+    def test_should_reject_invalid_dataset(self, api_client, test_data_manager):
+        """测试无效的数据集配置和未绑定数据集的运行"""
+        testcase = test_data_manager.create_testcase({"name": "无数据集"})
+
+        response = api_client.put(
+            f"/api/testcases/{testcase.id}/dataset",
+            json={"type": "query", "query": "DROP TABLE users"},
+        )
+        assert response.status_code == 400
+
+        response = api_client.post(f"/api/testcases/{testcase.id}/dataset-runs", json={})
+        assert response.status_code == 400
+        assert api_client.get("/api/dataset-runs/missing").status_code == 404
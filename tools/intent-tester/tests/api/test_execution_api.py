@@ -728,3 +728,85 @@ class TestStopExecutionAPI:
         assert updated_execution.end_time is not None
         assert updated_execution.status == "stopped"
 
+
+
+class TestCoalesceExecutionAPI:
+    """重复执行请求合并测试"""
+
+    def test_should_attach_duplicate_request_to_inflight_execution(
+        self, api_client, create_test_testcase, assert_api_response
+    ):
+        """测试相同用例和参数的请求合并到进行中的执行"""
+        testcase = create_test_testcase(name="合并测试用例")
+        payload = {"testcase_id": testcase.id, "mode": "headless"}
+
+        first = assert_api_response(api_client.post("/api/executions", json=payload), 200)
+        second = assert_api_response(api_client.post("/api/executions", json=payload), 200)
+
+        assert first["coalesced"] is False
+        assert second["coalesced"] is True
+        assert second["execution_id"] == first["execution_id"]
+
+        from backend.models import ExecutionHistory
+
+        assert ExecutionHistory.query.filter_by(test_case_id=testcase.id).count() == 1
+
+    def test_should_not_coalesce_different_parameters(
+        self, api_client, create_test_testcase, assert_api_response
+    ):
+        """测试执行参数不同时不合并"""
+        testcase = create_test_testcase(name="合并测试用例")
+
+        first = assert_api_response(
+            api_client.post("/api/executions", json={"testcase_id": testcase.id, "mode": "headless"}),
+            200,
+        )
+        second = assert_api_response(
+            api_client.post("/api/executions", json={"testcase_id": testcase.id, "mode": "browser"}),
+            200,
+        )
+
+        assert second["coalesced"] is False
+        assert second["execution_id"] != first["execution_id"]
+
+    def test_linked_record_mirrors_primary_result(
+        self, api_client, create_test_testcase, assert_api_response
+    ):
+        """测试link模式创建关联记录，并在执行结束后同步结果"""
+        testcase = create_test_testcase(name="合并测试用例")
+        first = assert_api_response(
+            api_client.post("/api/executions", json={"testcase_id": testcase.id}), 200
+        )
+        linked = assert_api_response(
+            api_client.post(
+                "/api/executions", json={"testcase_id": testcase.id, "coalesce": "link"}
+            ),
+            200,
+        )
+
+        assert linked["coalesced"] is True
+        assert linked["status"] == "coalesced"
+        assert linked["coalesced_into"] == first["execution_id"]
+
+        api_client.post(
+            "/api/midscene/execution-result",
+            json={
+                "execution_id": first["execution_id"],
+                "testcase_id": testcase.id,
+                "status": "success",
+                "mode": "headless",
+                "steps": [{"status": "success"}],
+            },
+        )
+
+        data = assert_api_response(api_client.get(f"/api/executions/{linked['execution_id']}"), 200)
+        assert data["status"] == "success"
+        assert data["steps_passed"] == 1
+
+    def test_should_reject_invalid_coalesce_mode(self, api_client, create_test_testcase):
+        """测试无效的coalesce参数"""
+        testcase = create_test_testcase(name="合并测试用例")
+        response = api_client.post(
+            "/api/executions", json={"testcase_id": testcase.id, "coalesce": "maybe"}
+        )
+        assert response.status_code == 400
@@ -0,0 +1,115 @@
+"""
+执行日志API测试
+"""
+
+import pytest
+
+from backend.models import ExecutionHistory
+from backend.services import execution_log_store
+from backend.services.execution_log_store import ExecutionLogStore
+
+
+@pytest.fixture
+def log_store(tmp_path, monkeypatch):
+    store = ExecutionLogStore(str(tmp_path), segment_bytes=256)
+    monkeypatch.setattr(execution_log_store, "_execution_log_store", store)
+    return store
+
+
+class TestExecutionLogAPI:
+    """执行日志追加与读取API测试"""
+
+    def test_should_append_and_read_logs(
+        self, api_client, test_data_manager, assert_api_response, log_store
+    ):
+        """测试追加日志后可分页读取、读取尾部，并记录logs_path"""
+        execution = test_data_manager.create_execution()
+        entries = [{"level": "info", "message": f"步骤 {i}"} for i in range(30)]
+
+        info = assert_api_response(
+            api_client.post(
+                f"/api/executions/{execution.execution_id}/logs",
+                json={"entries": entries},
+            ),
+            200,
+        )
+        assert info["lines"] == 30
+        assert info["segments"] > 1
+        record = ExecutionHistory.query.get(execution.id)
+        assert record.logs_path == info["path"]
+
+        page = assert_api_response(
+            api_client.get(f"/api/executions/{execution.execution_id}/logs?max_bytes=200"),
+            200,
+        )
+        assert page["entries"][0]["message"] == "步骤 0"
+        assert page["eof"] is False
+
+        tail = assert_api_response(
+            api_client.get(f"/api/executions/{execution.execution_id}/logs/tail?lines=2"),
+            200,
+        )
+        assert [entry["message"] for entry in tail["entries"]] == ["步骤 28", "步骤 29"]
+
+    def test_should_serve_byte_ranges(
+        self, api_client, test_data_manager, log_store
+    ):
+        """测试原始日志下载和Range区间读取"""
+        execution = test_data_manager.create_execution()
+        log_store.append(
+            execution.execution_id,
+            [{"message": f"line {i}"} for i in range(20)],
+        )
+        full = api_client.get(f"/api/executions/{execution.execution_id}/logs/raw")
+        assert full.status_code == 200
+        body = full.get_data()
+        assert len(body) == log_store.info(execution.execution_id)["size"]
+
+        partial = api_client.get(
+            f"/api/executions/{execution.execution_id}/logs/raw",
+            headers={"Range": "bytes=100-199"},
+        )
+        assert partial.status_code == 206
+        assert partial.get_data() == body[100:200]
+        assert partial.headers["Content-Range"] == f"bytes 100-199/{len(body)}"
+
+        suffix = api_client.get(
+            f"/api/executions/{execution.execution_id}/logs/raw",
+            headers={"Range": "bytes=-50"},
+        )
+        assert suffix.get_data() == body[-50:]
+
+        out_of_range = api_client.get(
+            f"/api/executions/{execution.execution_id}/logs/raw",
+            headers={"Range": f"bytes={len(body)}-"},
+        )
+        assert out_of_range.status_code == 416
+
+    def test_should_validate_append_request(
+        self, api_client, test_data_manager, log_store
+    ):
+        """测试执行不存在或日志格式错误时的响应"""
+        missing = api_client.post(
+            "/api/executions/exec_missing/logs", json={"entries": [{"message": "x"}]}
+        )
+        assert missing.status_code == 404
+
+        execution = test_data_manager.create_execution()
+        invalid = api_client.post(
+            f"/api/executions/{execution.execution_id}/logs", json={"entries": ["x"]}
+        )
+        assert invalid.status_code == 400
+
+        assert api_client.get(f"/api/executions/{execution.execution_id}/logs/tail").status_code == 404
+
+    def test_delete_execution_removes_logs(
+        self, api_client, test_data_manager, log_store
+    ):
+        """测试删除执行记录时同时删除日志"""
+        execution = test_data_manager.create_execution()
+        log_store.append(execution.execution_id, [{"message": "x"}])
+
+        response = api_client.delete(f"/api/executions/{execution.execution_id}")
+
+        assert response.status_code == 200
+        assert log_store.info(execution.execution_id) is None
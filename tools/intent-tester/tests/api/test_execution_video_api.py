@@ -0,0 +1,131 @@
+"""
+执行录像API测试
+"""
+
+import io
+import json
+
+import pytest
+
+from backend.services import execution_video_store
+from backend.services.execution_video_store import ExecutionVideoStore
+
+
+@pytest.fixture
+def video_store(tmp_path, monkeypatch):
+    store = ExecutionVideoStore(str(tmp_path))
+    monkeypatch.setattr(execution_video_store, "_execution_video_store", store)
+    return store
+
+
+def upload(api_client, execution_id, video=b"0123456789", steps=None):
+    markers = {"steps": steps or [{"step_index": 0, "start_ms": 0, "end_ms": 800}]}
+    return api_client.post(
+        f"/api/executions/{execution_id}/video",
+        data={
+            "video": (io.BytesIO(video), "video.webm"),
+            "markers": json.dumps(markers),
+        },
+        content_type="multipart/form-data",
+    )
+
+
+class TestExecutionVideoAPI:
+    """执行录像上传、下载与关键帧API测试"""
+
+    def test_should_upload_and_download_video(
+        self, api_client, test_data_manager, assert_api_response, video_store
+    ):
+        """测试上传录像后可获取步骤标记，并按Range下载"""
+        execution = test_data_manager.create_execution()
+
+        info = assert_api_response(upload(api_client, execution.execution_id), 200)
+        assert info["size"] == 10
+        assert info["steps"][0]["end_ms"] == 800
+
+        fetched = assert_api_response(
+            api_client.get(f"/api/executions/{execution.execution_id}/video/info"), 200
+        )
+        assert fetched == info
+
+        response = api_client.get(
+            f"/api/executions/{execution.execution_id}/video",
+            headers={"Range": "bytes=2-5"},
+        )
+        assert response.status_code == 206
+        assert response.data == b"2345"
+        assert response.mimetype == "video/webm"
+
+    def test_should_reject_invalid_upload(self, api_client, test_data_manager, video_store):
+        """测试执行不存在、缺少文件、标记无效时拒绝上传"""
+        assert upload(api_client, "missing").status_code == 404
+
+        execution = test_data_manager.create_execution()
+        response = api_client.post(
+            f"/api/executions/{execution.execution_id}/video",
+            data={"markers": "{}"},
+            content_type="multipart/form-data",
+        )
+        assert response.status_code == 400
+
+        response = upload(
+            api_client,
+            execution.execution_id,
+            steps=[{"step_index": 0, "start_ms": 500, "end_ms": 100}],
+        )
+        assert response.status_code == 400
+
+    def test_should_extract_keyframe_on_demand(
+        self, api_client, test_data_manager, video_store, monkeypatch
+    ):
+        """测试查看步骤时抽取关键帧，无ffmpeg时返回503"""
+        execution = test_data_manager.create_execution()
+        upload(api_client, execution.execution_id)
+        url = f"/api/executions/{execution.execution_id}/steps/0/keyframe"
+
+        monkeypatch.setattr(execution_video_store.shutil, "which", lambda name: None)
+        assert api_client.get(url).status_code == 503
+
+        def fake_extract(video_path, offset_ms, output_path):
+            with open(output_path, "wb") as f:
+                f.write(b"jpeg")
+
+        monkeypatch.setattr(video_store, "_extract_frame", fake_extract)
+        response = api_client.get(url)
+        assert response.status_code == 200
+        assert response.mimetype == "image/jpeg"
+        assert response.data == b"jpeg"
+
+        assert (
+            api_client.get(
+                f"/api/executions/{execution.execution_id}/steps/3/keyframe"
+            ).status_code
+            == 404
+        )
+
+    def test_should_delete_video_with_execution(
+        self, api_client, test_data_manager, video_store
+    ):
+        """测试删除执行记录时一并删除录像"""
+        execution = test_data_manager.create_execution()
+        upload(api_client, execution.execution_id)
+
+        response = api_client.delete(f"/api/executions/{execution.execution_id}")
+        assert response.status_code == 200
+        assert video_store.info(execution.execution_id) is None
+
+    def test_testcase_capture_mode_is_validated(
+        self, api_client, test_data_manager, assert_api_response
+    ):
+        """测试用例的截图方式只能是screenshot或video"""
+        testcase = test_data_manager.create_testcase()
+        data = assert_api_response(
+            api_client.put(f"/api/testcases/{testcase.id}", json={"capture_mode": "video"}),
+            200,
+        )
+        assert data["capture_mode"] == "video"
+
+        response = api_client.put(
+            f"/api/testcases/{testcase.id}", json={"capture_mode": "gif"}
+        )
+        assert response.status_code == 400
@@ -0,0 +1,70 @@
+"""
+执行节点管理API测试
+"""
+
+import pytest
+
+
+class TestExecutorAPI:
+    """执行节点注册、心跳与排空API测试"""
+
+    def test_should_register_and_list_nodes(self, api_client, assert_api_response):
+        """测试注册节点后出现在节点列表中"""
+        response = api_client.post(
+            "/api/executors/register",
+            json={"node_id": "node-1", "server_url": "http://node-1:3001", "total_slots": 2},
+        )
+        data = assert_api_response(response, 200)
+        assert data["node_id"] == "node-1"
+        assert data["status"] == "active"
+
+        response = api_client.get("/api/executors")
+        data = assert_api_response(response, 200)
+        assert data["total"] == 1
+        assert data["items"][0]["headroom"] > 0
+
+    def test_should_reject_register_without_url(self, api_client):
+        """测试缺少server_url时注册失败"""
+        response = api_client.post("/api/executors/register", json={"node_id": "node-1"})
+        assert response.status_code == 400
+
+    def test_heartbeat_reports_drain_status(self, api_client, assert_api_response):
+        """测试心跳响应中返回排空状态"""
+        api_client.post(
+            "/api/executors/register",
+            json={"node_id": "node-1", "server_url": "http://node-1:3001", "total_slots": 2},
+        )
+        api_client.post("/api/executors/node-1/heartbeat", json={"free_slots": 1})
+        api_client.post("/api/executors/node-1/drain")
+
+        response = api_client.post(
+            "/api/executors/node-1/heartbeat", json={"free_slots": 1, "cpu_percent": 10}
+        )
+        data = assert_api_response(response, 200)
+        assert data["status"] == "draining"
+
+        # 运行中的执行全部结束后排空完成
+        response = api_client.post("/api/executors/node-1/heartbeat", json={"free_slots": 2})
+        data = assert_api_response(response, 200)
+        assert data["status"] == "drained"
+
+    def test_heartbeat_unknown_node_returns_404(self, api_client):
+        """测试未注册节点的心跳返回404"""
+        response = api_client.post("/api/executors/ghost/heartbeat", json={"free_slots": 1})
+        assert response.status_code == 404
+
+    def test_capacity_and_release(self, api_client, assert_api_response):
+        """测试容量信号接口和节点退出交还执行"""
+        api_client.post(
+            "/api/executors/register",
+            json={"node_id": "node-1", "server_url": "http://node-1:3001", "total_slots": 3},
+        )
+
+        capacity = assert_api_response(api_client.get("/api/executors/capacity"), 200)
+        assert capacity["total_slots"] == 3
+        assert capacity["queued"] == 0
+        assert capacity["nodes"] == {"active": 1}
+
+        released = assert_api_response(api_client.post("/api/executors/node-1/release"), 200)
+        assert released["requeued"] == []
+        assert api_client.post("/api/executors/ghost/release").status_code == 404
@@ -0,0 +1,88 @@
+"""
+前置夹具API测试
+"""
+
+import pytest
+
+LOGIN_STEPS = [{"action": "goto", "params": {"url": "https://example.com/login"}}]
+
+
+class TestFixtureAPI:
+    """前置夹具管理与快照回传API测试"""
+
+    def _create_fixture(self, api_client, assert_api_response, name="登录夹具"):
+        response = api_client.post(
+            "/api/fixtures", json={"name": name, "steps": LOGIN_STEPS}
+        )
+        return assert_api_response(response, 200)
+
+    def test_should_store_and_resolve_snapshot(self, api_client, assert_api_response):
+        """测试快照回传后解析结果携带快照"""
+        fixture = self._create_fixture(api_client, assert_api_response)
+
+        resolved = assert_api_response(
+            api_client.get(f"/api/fixtures/{fixture['id']}/resolve"), 200
+        )
+        assert resolved["snapshot"] is None
+
+        response = api_client.post(
+            f"/api/fixtures/{fixture['id']}/snapshot",
+            json={
+                "storage_state": {"cookies": [], "origins": []},
+                "url": "https://example.com/home",
+                "revision": resolved["revision"],
+            },
+        )
+        data = assert_api_response(response, 200)
+        assert data["snapshot_valid"] is True
+
+        resolved = assert_api_response(
+            api_client.get(f"/api/fixtures/{fixture['id']}/resolve"), 200
+        )
+        assert resolved["snapshot"]["url"] == "https://example.com/home"
+
+        response = api_client.delete(f"/api/fixtures/{fixture['id']}/snapshot")
+        assert assert_api_response(response, 200)["snapshot_valid"] is False
+
+    def test_should_reject_stale_snapshot(self, api_client, assert_api_response):
+        """测试修订号不一致的快照被拒绝"""
+        fixture = self._create_fixture(api_client, assert_api_response)
+
+        response = api_client.post(
+            f"/api/fixtures/{fixture['id']}/snapshot",
+            json={"storage_state": {"cookies": []}, "revision": "stale"},
+        )
+        assert response.status_code == 409
+
+    def test_should_attach_fixture_to_testcase(self, api_client, assert_api_response):
+        """测试测试用例引用夹具，删除夹具后引用被解除"""
+        fixture = self._create_fixture(api_client, assert_api_response)
+
+        response = api_client.post(
+            "/api/testcases",
+            json={
+                "name": "已登录用例",
+                "steps": [{"action": "ai_assert", "params": {"condition": "显示首页"}}],
+                "setup_fixture_id": fixture["id"],
+            },
+        )
+        testcase = assert_api_response(response, 200)
+        assert testcase["setup_fixture_id"] == fixture["id"]
+
+        api_client.delete(f"/api/fixtures/{fixture['id']}")
+        testcase = assert_api_response(
+            api_client.get(f"/api/testcases/{testcase['id']}"), 200
+        )
+        assert testcase["setup_fixture_id"] is None
+
+    def test_should_reject_unknown_fixture_on_testcase(self, api_client):
+        """测试引用不存在的夹具返回400"""
+        response = api_client.post(
+            "/api/testcases",
+            json={
+                "name": "无效夹具用例",
+                "steps": [{"action": "goto", "params": {"url": "https://example.com"}}],
+                "setup_fixture_id": 9999,
+            },
+        )
+        assert response.status_code == 400
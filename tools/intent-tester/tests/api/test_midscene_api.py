@@ -237,6 +237,46 @@ class TestMidSceneExecutionAPI:
         assert step_executions[2]["action"] == "ai_tap"
 
 
+    def test_should_record_step_retry_attempts(
+        self, api_client, create_test_testcase, create_test_execution, assert_api_response
+    ):
+        """测试按步骤重试策略执行的尝试次数和失败记录被保存"""
+        testcase = create_test_testcase(
+            {"name": "步骤重试用例", "steps": [{"action": "ai_tap", "params": {"locate": "按钮"}}]}
+        )
+        execution = create_test_execution({"test_case_id": testcase["id"], "status": "running"})
+        history = [
+            {"attempt": 1, "error_class": "element_not_found", "error_message": "Element not found"}
+        ]
+
+        response = api_client.post(
+            "/api/midscene/execution-result",
+            json={
+                "execution_id": execution["execution_id"],
+                "testcase_id": testcase["id"],
+                "status": "success",
+                "mode": "headless",
+                "step_results": [
+                    {
+                        "step_index": 0,
+                        "action": "ai_tap",
+                        "status": "success",
+                        "attempts": 2,
+                        "attempt_history": history,
+                    }
+                ],
+            },
+        )
+        assert_api_response(response, 200)
+
+        execution_data = assert_api_response(
+            api_client.get(f'/api/executions/{execution["execution_id"]}'), 200
+        )
+        step = execution_data["step_executions"][0]
+        assert step["attempts"] == 2
+        assert step["attempt_history"] == history
+
+
 class TestMidSceneExecutionStartAPI:
     """MidScene执行开始通知API测试"""
 
@@ -301,6 +341,119 @@ class TestMidSceneExecutionStartAPI:
         )
         assert response.status_code == 404
 
+    def test_should_coalesce_duplicate_node_requests_into_running_execution(
+        self, api_client, create_test_testcase, assert_api_response
+    ):
+        """测试执行节点直接收到的重复请求合并到运行中的相同执行"""
+        from backend.models import db, ExecutionHistory
+
+        testcase = create_test_testcase({"name": "重复执行合并测试用例"})
+
+        def start(execution_id, **extra):
+            response = api_client.post(
+                "/api/midscene/execution-start",
+                json={
+                    "execution_id": execution_id,
+                    "testcase_id": testcase["id"],
+                    "mode": "headless",
+                    **extra,
+                },
+            )
+            return assert_api_response(response, 200)
+
+        assert start("node-exec-1")["coalesced"] is False
+        data = start("node-exec-2")
+        assert data["coalesced"] is True
+        assert data["coalesced_into"] == "node-exec-1"
+        assert ExecutionHistory.query.filter_by(execution_id="node-exec-2").first() is None
+
+        # 参数不同或关闭合并时各自执行
+        assert start("node-exec-3", parameters={"user": "a"})["coalesced"] is False
+        assert start("node-exec-4", coalesce="off")["coalesced"] is False
+
+        # link模式创建关联记录，结果随运行中的执行同步
+        data = start("node-exec-5", coalesce="link")
+        assert data["coalesced_into"] == "node-exec-1"
+        linked = ExecutionHistory.query.filter_by(execution_id="node-exec-5").first()
+        assert linked.status == "coalesced"
+        assert linked.coalesced_into == "node-exec-1"
+
+        # 执行结束后的新请求不再合并
+        result = api_client.post(
+            "/api/midscene/execution-result",
+            json={
+                "execution_id": "node-exec-1",
+                "testcase_id": testcase["id"],
+                "status": "success",
+                "mode": "headless",
+                "steps": [],
+            },
+        )
+        assert_api_response(result, 200)
+        assert ExecutionHistory.query.filter_by(execution_id="node-exec-5").first().status == "success"
+        for execution_id in ("node-exec-3", "node-exec-4"):
+            record = ExecutionHistory.query.filter_by(execution_id=execution_id).first()
+            record.status = "success"
+        db.session.commit()
+        assert start("node-exec-6")["coalesced"] is False
+
+    def test_should_not_coalesce_into_undispatched_pending_execution(
+        self, api_client, create_test_testcase, assert_api_response
+    ):
+        """测试排队中尚未下发的执行不作为合并目标"""
+        from backend.models import TestCase
+        from backend.services.execution_coalescer import get_execution_coalescer
+
+        testcase_data = create_test_testcase({"name": "排队执行合并测试用例"})
+        testcase = TestCase.query.get(testcase_data["id"])
+        pending, _ = get_execution_coalescer().create_or_coalesce(testcase, {"mode": "headless"})
+        assert pending.status == "pending"
+
+        response = api_client.post(
+            "/api/midscene/execution-start",
+            json={"execution_id": "node-exec-7", "testcase_id": testcase.id, "mode": "headless"},
+        )
+        assert assert_api_response(response, 200)["coalesced"] is False
+
+    def test_should_leave_cancelled_execution_alone(
+        self, api_client, create_test_testcase, test_data_manager, assert_api_response
+    ):
+        """测试已取消的执行不会被开始通知和执行结果恢复"""
+        from backend.models import ExecutionHistory, StepExecution
+
+        testcase = create_test_testcase({"name": "已取消执行测试用例"})
+        test_data_manager.create_execution(
+            {
+                "execution_id": "cancelled-exec-1",
+                "test_case_id": testcase["id"],
+                "status": "cancelled",
+            }
+        )
+        payload = {
+            "execution_id": "cancelled-exec-1",
+            "testcase_id": testcase["id"],
+            "mode": "headless",
+        }
+
+        data = assert_api_response(
+            api_client.post("/api/midscene/execution-start", json=payload), 200
+        )
+        assert data["cancelled"] is True
+        assert data["status_updated"] is False
+
+        data = assert_api_response(
+            api_client.post(
+                "/api/midscene/execution-result",
+                json={**payload, "status": "success", "steps": [{"status": "success"}]},
+            ),
+            200,
+        )
+        assert data["cancelled"] is True
+
+        execution = ExecutionHistory.query.filter_by(execution_id="cancelled-exec-1").first()
+        assert execution.status == "cancelled"
+        assert StepExecution.query.filter_by(execution_id="cancelled-exec-1").count() == 0
+
 
 class TestMidSceneServiceIntegration:
     """MidScene服务集成测试"""
@@ -545,3 +698,57 @@ class TestMidSceneErrorHandling:
 
         # 应该能够处理重复结果（可能是更新或忽略）
         assert response2.status_code in [200, 409]  # 成功或冲突
+
+
+class TestModelUsageAPI:
+    """模型分级用量上报与汇总API测试"""
+
+    def test_should_record_and_aggregate_model_usage(
+        self, api_client, create_test_testcase, create_test_execution, assert_api_response
+    ):
+        """测试执行结果中的模型用量写入结果摘要，并可按级别汇总"""
+        testcase = create_test_testcase({"name": "模型分级用例"})
+        execution = create_test_execution(
+            {"test_case_id": testcase["id"], "status": "running"}
+        )
+
+        api_client.post(
+            "/api/midscene/execution-result",
+            json={
+                "execution_id": execution["execution_id"],
+                "testcase_id": testcase["id"],
+                "status": "success",
+                "mode": "headless",
+                "steps": [{"status": "success", "model_tier": "fast"}],
+                "model_usage": {
+                    "tiers": {
+                        "fast": {"model": "qwen-vl-plus", "steps": 2, "failures": 1, "latency_ms": 1600, "cost": 0.002},
+                        "max": {"model": "qwen-vl-max", "steps": 1, "failures": 0, "latency_ms": 4000, "cost": 0.01},
+                    },
+                    "escalations": 1,
+                },
+            },
+        )
+        result = assert_api_response(
+            api_client.get(f"/api/executions/{execution['execution_id']}"), 200
+        )
+        assert result["result_summary"]["model_usage"]["escalations"] == 1
+
+        report = assert_api_response(api_client.get("/api/executions/model-usage"), 200)
+        assert report["escalations"] >= 1
+        assert report["tiers"]["fast"]["avg_latency_ms"] == 800
+        assert report["tiers"]["max"]["models"] == ["qwen-vl-max"]
+
+        response = api_client.get("/api/executions/model-usage?days=0")
+        assert response.status_code == 400
+
+
+class TestSingleFlightAPI:
+    """Test cases for model call deduplication stats"""
+
+    def test_should_report_singleflight_stats(self, api_client):
+        response = api_client.get("/api/midscene/singleflight")
+
+        assert response.status_code == 200
+        stats = response.get_json()["data"]
+        assert {"calls", "executed", "deduplicated", "dedup_rate"} <= set(stats)
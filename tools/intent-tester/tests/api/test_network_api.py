@@ -0,0 +1,86 @@
+"""
+网络录制API测试
+"""
+
+from tests.services.test_network_recording_service import har_archive
+
+
+class TestNetworkRecordingAPI:
+    """网络模式配置与录制上传、下载API测试"""
+
+    def test_should_configure_network_mode(self, api_client, assert_api_response):
+        """测试创建和更新用例时校验网络模式配置"""
+        created = assert_api_response(
+            api_client.post(
+                "/api/testcases",
+                json={
+                    "name": "网络回放用例",
+                    "steps": [{"action": "goto", "params": {"url": "https://example.com"}}],
+                    "network_config": {"mode": "replay", "passthrough": ["**/api/orders**"]},
+                },
+            ),
+            200,
+        )
+        assert created["network_config"]["mode"] == "replay"
+        assert created["network_config"]["not_found"] == "fallback"
+
+        invalid = api_client.put(
+            f"/api/testcases/{created['id']}", json={"network_config": {"mode": "mock"}}
+        )
+        assert invalid.status_code == 400
+
+        updated = assert_api_response(
+            api_client.put(
+                f"/api/testcases/{created['id']}", json={"network_config": {"mode": "off"}}
+            ),
+            200,
+        )
+        assert updated["network_config"] is None
+
+    def test_should_upload_and_download_recording(
+        self, api_client, create_testcase_with_steps, assert_api_response
+    ):
+        """测试上传录制后可下载，ETag一致时返回304"""
+        testcase = create_testcase_with_steps()
+        url = f"/api/testcases/{testcase.id}/network-recording"
+        archive = har_archive(["https://staging.example.com/", "https://staging.example.com/a.css"])
+
+        assert api_client.get(url).status_code == 404
+
+        recording = assert_api_response(
+            api_client.post(
+                f"{url}?execution_id=exec_1",
+                data=archive,
+                content_type="application/zip",
+            ),
+            200,
+        )
+        assert recording["entry_count"] == 2
+        assert recording["hosts"] == ["staging.example.com"]
+
+        download = api_client.get(url)
+        assert download.status_code == 200
+        assert download.get_data() == archive
+        etag = download.headers["ETag"]
+        assert etag == f'"{recording["checksum"]}"'
+
+        cached = api_client.get(url, headers={"If-None-Match": etag})
+        assert cached.status_code == 304
+
+        info = assert_api_response(api_client.get(f"{url}/info"), 200)
+        assert info["replay_count"] == 2
+
+        assert api_client.delete(url).status_code == 200
+        assert api_client.get(url).status_code == 404
+
+    def test_should_reject_invalid_archive(self, api_client, create_testcase_with_steps):
+        """测试上传内容不是HAR压缩包时返回400"""
+        testcase = create_testcase_with_steps()
+
+        response = api_client.post(
+            f"/api/testcases/{testcase.id}/network-recording",
+            data=b"garbage",
+            content_type="application/zip",
+        )
+
+        assert response.status_code == 400
@@ -0,0 +1,92 @@
+"""
+回放轨迹API测试
+"""
+
+import json
+
+from backend.models import TestCase
+
+TAP_ENTRY = {
+    "action": "ai_tap",
+    "selectors": ["#submit"],
+    "point": {"x": 10, "y": 20},
+    "tag": "button",
+    "text": "提交",
+}
+
+
+class TestReplayTraceAPI:
+    """回放轨迹获取、回传与失效API测试"""
+
+    def test_should_record_and_resolve_trace(
+        self, api_client, create_testcase_with_steps, assert_api_response
+    ):
+        """测试首次获取只有修订号，回传后可获取轨迹"""
+        testcase = create_testcase_with_steps(step_count=2)
+        url = f"/api/testcases/{testcase.id}/replay-trace"
+
+        initial = assert_api_response(api_client.get(url), 200)
+        assert initial["trace"] is None
+
+        recorded = assert_api_response(
+            api_client.post(
+                url,
+                json={
+                    "revision": initial["revision"],
+                    "execution_id": "exec_1",
+                    "steps": {"0": TAP_ENTRY},
+                    "fallbacks": 1,
+                },
+            ),
+            200,
+        )
+        assert recorded["fallback_count"] == 1
+
+        resolved = assert_api_response(api_client.get(url), 200)
+        assert resolved["trace"]["steps"]["0"]["selectors"] == ["#submit"]
+        assert resolved["trace"]["source_execution_id"] == "exec_1"
+
+    def test_should_reject_trace_after_edit(
+        self, api_client, create_testcase_with_steps, assert_api_response, db_session
+    ):
+        """测试用例在执行期间被修改时拒绝回传的轨迹，修改后旧轨迹失效"""
+        testcase = create_testcase_with_steps(step_count=2)
+        url = f"/api/testcases/{testcase.id}/replay-trace"
+        revision = assert_api_response(api_client.get(url), 200)["revision"]
+        assert_api_response(
+            api_client.post(url, json={"revision": revision, "steps": {"0": TAP_ENTRY}}),
+            200,
+        )
+
+        record = TestCase.query.get(testcase.id)
+        record.steps = json.dumps([{"action": "goto", "params": {"url": "https://new.example.com"}}])
+        db_session.commit()
+
+        stale = api_client.post(url, json={"revision": revision, "steps": {"0": TAP_ENTRY}})
+        assert stale.status_code == 409
+
+        resolved = assert_api_response(api_client.get(url), 200)
+        assert resolved["trace"] is None
+        assert resolved["revision"] != revision
+
+    def test_should_validate_and_invalidate(
+        self, api_client, create_testcase_with_steps, assert_api_response
+    ):
+        """测试轨迹格式校验和手动失效"""
+        testcase = create_testcase_with_steps(step_count=1)
+        url = f"/api/testcases/{testcase.id}/replay-trace"
+        revision = assert_api_response(api_client.get(url), 200)["revision"]
+
+        invalid = api_client.post(
+            url, json={"revision": revision, "steps": {"0": {"action": "ai_tap"}}}
+        )
+        assert invalid.status_code == 400
+
+        assert_api_response(
+            api_client.post(url, json={"revision": revision, "steps": {"0": TAP_ENTRY}}),
+            200,
+        )
+        assert api_client.delete(url).status_code == 200
+        assert assert_api_response(api_client.get(url), 200)["trace"] is None
+
+        assert api_client.get("/api/testcases/99999/replay-trace").status_code == 404
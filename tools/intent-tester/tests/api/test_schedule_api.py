@@ -0,0 +1,90 @@
+"""
+定时执行计划API测试
+"""
+
+import pytest
+
+
+class TestScheduleAPI:
+    """执行计划管理、预览与负载API测试"""
+
+    def test_should_create_and_preview_schedule(
+        self, api_client, create_test_testcase, assert_api_response
+    ):
+        """测试创建计划并预览接下来的触发时间"""
+        testcase = create_test_testcase(name="定时用例")
+        response = api_client.post(
+            "/api/schedules",
+            json={
+                "name": "每日回归",
+                "cron_expression": "0 2 * * *",
+                "test_case_id": testcase.id,
+                "jitter_seconds": 300,
+            },
+        )
+        schedule = assert_api_response(response, 200)
+        assert schedule["cron_expression"] == "0 2 * * *"
+
+        response = api_client.get(
+            f"/api/schedules/{schedule['id']}/preview?count=2&after=2024-01-01T00:00:00Z"
+        )
+        data = assert_api_response(response, 200)
+        assert [run["fire_time"] for run in data["next_runs"]] == [
+            "2024-01-01T02:00:00.000000Z",
+            "2024-01-02T02:00:00.000000Z",
+        ]
+        assert data["next_runs"][0]["runs"][0]["test_case_id"] == testcase.id
+
+    def test_should_reject_invalid_cron(
+        self, api_client, create_test_testcase
+    ):
+        """测试无效cron表达式返回400"""
+        testcase = create_test_testcase(name="定时用例")
+        response = api_client.post(
+            "/api/schedules",
+            json={"name": "坏计划", "cron_expression": "61 * * * *", "test_case_id": testcase.id},
+        )
+        assert response.status_code == 400
+
+    def test_should_report_planned_load(
+        self, api_client, create_test_testcase, assert_api_response
+    ):
+        """测试负载查询返回每个时间槽的计划数"""
+        testcase = create_test_testcase(name="定时用例")
+        api_client.post(
+            "/api/schedules",
+            json={
+                "name": "每小时",
+                "cron_expression": "0 * * * *",
+                "test_case_id": testcase.id,
+                "jitter_seconds": 0,
+            },
+        )
+
+        response = api_client.get("/api/schedules/load?start=2024-01-01T00:00:00Z&hours=3")
+        data = assert_api_response(response, 200)
+        assert data["total_planned"] == 3
+        assert data["peak"] == 1
+        assert data["slots"][0]["slot_start"] == "2024-01-01T00:00:00.000000Z"
+
+    def test_should_update_and_delete_schedule(
+        self, api_client, create_test_testcase, assert_api_response
+    ):
+        """测试更新和删除计划"""
+        testcase = create_test_testcase(name="定时用例")
+        response = api_client.post(
+            "/api/schedules",
+            json={"name": "计划", "cron_expression": "0 2 * * *", "test_case_id": testcase.id},
+        )
+        schedule = assert_api_response(response, 200)
+
+        response = api_client.put(
+            f"/api/schedules/{schedule['id']}", json={"category": "Nightly"}
+        )
+        data = assert_api_response(response, 200)
+        assert data["category"] == "Nightly"
+        assert data["test_case_id"] is None
+
+        response = api_client.delete(f"/api/schedules/{schedule['id']}")
+        assert_api_response(response, 200)
+        assert api_client.get(f"/api/schedules/{schedule['id']}").status_code == 404
@@ -230,6 +230,26 @@ class TestAddStepAPI:
 
         assert_api_response(response, 400)
 
+    def test_should_add_step_with_retry_policy(
+        self, api_client, create_test_testcase, assert_api_response
+    ):
+        """测试添加带重试策略的步骤，并拒绝无效的重试策略"""
+        testcase = create_test_testcase(name="测试步骤重试策略", steps="[]")
+        step = {
+            "action": "ai_tap",
+            "params": {"locate": "提交按钮"},
+            "retry_policy": {"attempts": 3, "backoff_ms": 500, "renavigate": True},
+        }
+
+        data = assert_api_response(
+            api_client.post(f"/api/testcases/{testcase.id}/steps", json=step), 200
+        )
+        assert data["step"]["retry_policy"]["attempts"] == 3
+
+        step["retry_policy"] = {"attempts": 3, "retry_on": ["flaky"]}
+        response = api_client.post(f"/api/testcases/{testcase.id}/steps", json=step)
+        assert_api_response(response, 400)
+
     def test_should_validate_ai_actions_require_prompt_or_locate(
         self, api_client, create_test_testcase, assert_api_response
     ):
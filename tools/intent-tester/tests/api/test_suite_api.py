@@ -0,0 +1,163 @@
+"""
+套件运行API测试
+"""
+
+import pytest
+
+
+class TestSuiteRunAPI:
+    """套件运行创建、fail-fast与取消API测试"""
+
+    def test_should_create_suite_run_and_fail_fast(
+        self, api_client, test_data_manager, assert_api_response
+    ):
+        """测试套件运行在失败达到阈值后取消剩余执行"""
+        for i in range(3):
+            test_data_manager.create_testcase({"name": f"套件用例{i}", "category": "回归"})
+
+        response = api_client.post(
+            "/api/suites/runs", json={"category": "回归", "fail_fast": 1}
+        )
+        suite_run = assert_api_response(response, 200)
+        assert suite_run["total_count"] == 3
+
+        detail = assert_api_response(
+            api_client.get(f"/api/suites/runs/{suite_run['suite_run_id']}"), 200
+        )
+        first = detail["executions"][0]
+        assert first["queue_position"] == 0
+
+        api_client.post(
+            "/api/midscene/execution-result",
+            json={
+                "execution_id": first["execution_id"],
+                "testcase_id": first["test_case_id"],
+                "status": "failed",
+                "mode": "headless",
+                "steps": [{"status": "failed"}],
+            },
+        )
+
+        detail = assert_api_response(
+            api_client.get(f"/api/suites/runs/{suite_run['suite_run_id']}"), 200
+        )
+        assert detail["status"] == "cancelled"
+        assert detail["time_to_first_failure"] is not None
+        assert [e["status"] for e in detail["executions"][1:]] == ["cancelled", "cancelled"]
+
+    def test_should_preview_ranking(
+        self, api_client, test_data_manager, assert_api_response
+    ):
+        """测试排序预览"""
+        tc = test_data_manager.create_testcase({"name": "预览用例", "category": "预览"})
+
+        data = assert_api_response(api_client.get("/api/suites/ranking?category=预览"), 200)
+        assert data["items"][0]["test_case_id"] == tc.id
+
+    def test_should_cancel_suite_run(
+        self, api_client, test_data_manager, assert_api_response
+    ):
+        """测试手动取消套件运行"""
+        test_data_manager.create_testcase({"name": "取消用例", "category": "取消"})
+        suite_run = assert_api_response(
+            api_client.post("/api/suites/runs", json={"category": "取消"}), 200
+        )
+
+        data = assert_api_response(
+            api_client.post(f"/api/suites/runs/{suite_run['suite_run_id']}/cancel"), 200
+        )
+        assert data["status"] == "cancelled"
+        assert data["cancelled_count"] == 1
+
+    def test_should_reject_missing_selection(self, api_client):
+        """测试缺少用例选择时返回400"""
+        assert api_client.post("/api/suites/runs", json={}).status_code == 400
+
+    def test_should_report_duration_predictions(
+        self, api_client, test_data_manager, assert_api_response
+    ):
+        """测试耗时预测与LPT分配预览"""
+        for i in range(3):
+            test_data_manager.create_testcase({"name": f"耗时用例{i}", "category": "耗时"})
+
+        data = assert_api_response(
+            api_client.get("/api/suites/durations?category=耗时&shards=2"), 200
+        )
+        assert data["shard_count"] == 2
+        assert len(data["items"]) == 3
+        assert data["items"][0]["source"] == "estimate"
+
+        suite_run = assert_api_response(
+            api_client.post(
+                "/api/suites/runs",
+                json={"category": "耗时", "ordering": "duration_lpt", "shards": 2},
+            ),
+            200,
+        )
+        report = assert_api_response(
+            api_client.get(f"/api/suites/runs/{suite_run['suite_run_id']}/makespan"), 200
+        )
+        assert report["predicted_makespan"] == suite_run["predicted_makespan"]
+        assert report["actual_makespan"] is None
+
+        shard_view = assert_api_response(
+            api_client.get(f"/api/suites/runs/{suite_run['suite_run_id']}?shard=0"), 200
+        )
+        assert all(e["shard_index"] == 0 for e in shard_view["executions"])
+
+    def test_should_apply_resource_policy_to_suite_executions(
+        self, api_client, test_data_manager, assert_api_response
+    ):
+        """测试套件运行的资源策略下发到执行请求，执行结果中记录拦截统计"""
+        from backend.models import ExecutionHistory, TestCase
+        from backend.services.executor_registry import ExecutorRegistry
+
+        test_data_manager.create_testcase({"name": "资源策略用例", "category": "资源"})
+        suite_run = assert_api_response(
+            api_client.post(
+                "/api/suites/runs",
+                json={
+                    "category": "资源",
+                    "resource_policy": {"block_resource_types": ["font", "media"]},
+                },
+            ),
+            200,
+        )
+        assert suite_run["resource_policy"]["block_resource_types"] == ["font", "media"]
+
+        detail = assert_api_response(
+            api_client.get(f"/api/suites/runs/{suite_run['suite_run_id']}"), 200
+        )
+        first = detail["executions"][0]
+        execution = ExecutionHistory.query.filter_by(execution_id=first["execution_id"]).first()
+        payload = ExecutorRegistry().build_dispatch_payload(
+            execution, TestCase.query.get(first["test_case_id"])
+        )
+        assert payload["resource_policy"]["block_resource_types"] == ["font", "media"]
+
+        api_client.post(
+            "/api/midscene/execution-result",
+            json={
+                "execution_id": first["execution_id"],
+                "testcase_id": first["test_case_id"],
+                "status": "success",
+                "mode": "headless",
+                "steps": [{"status": "success"}],
+                "resource_stats": {"requests_total": 40, "requests_blocked": 12, "bytes_saved": 2048},
+            },
+        )
+        result = assert_api_response(
+            api_client.get(f"/api/executions/{first['execution_id']}"), 200
+        )
+        assert result["result_summary"]["resource_stats"]["requests_blocked"] == 12
+
+    def test_should_reject_invalid_resource_policy(self, api_client, test_data_manager):
+        """测试资源策略格式错误时拒绝创建套件运行"""
+        test_data_manager.create_testcase({"name": "资源策略用例", "category": "资源"})
+
+        response = api_client.post(
+            "/api/suites/runs",
+            json={"category": "资源", "resource_policy": {"block_resource_types": ["document"]}},
+        )
+
+        assert response.status_code == 400
@@ -0,0 +1,51 @@
+"""
+租户公平调度API测试
+"""
+
+
+class TestTenantAPI:
+    """租户份额配置和租户队列API测试"""
+
+    def test_should_configure_shares_and_show_queue(
+        self, api_client, test_data_manager, assert_api_response
+    ):
+        """测试配置租户份额后按租户查看排队位置和预估开始时间"""
+        testcase = test_data_manager.create_testcase({"name": "租户用例"})
+
+        share = assert_api_response(
+            api_client.put(
+                "/api/tenants/shares/payments", json={"weight": 3, "max_concurrency": 2}
+            ),
+            200,
+        )
+        assert share["weight"] == 3.0
+        shares = assert_api_response(api_client.get("/api/tenants/shares"), 200)
+        assert [s["tenant"] for s in shares["items"]] == ["payments"]
+
+        for tenant in ("payments", "search"):
+            response = api_client.post(
+                "/api/executions",
+                json={"testcase_id": testcase.id, "tenant": tenant, "coalesce": "off"},
+            )
+            assert response.status_code == 200
+
+        queue = assert_api_response(api_client.get("/api/tenants/queue?tenant=search"), 200)
+        assert len(queue["items"]) == 1
+        item = queue["items"][0]
+        assert item["tenant"] == "search"
+        assert item["tenant_position"] == 1
+        assert item["estimated_start_at"]
+
+        assert api_client.delete("/api/tenants/shares/payments").status_code == 200
+        assert api_client.delete("/api/tenants/shares/payments").status_code == 404
+
+    def test_should_reject_invalid_tenant_settings(self, api_client, test_data_manager):
+        """测试无效的份额配置和租户名称"""
+        response = api_client.put("/api/tenants/shares/payments", json={"weight": -1})
+        assert response.status_code == 400
+
+        response = api_client.post(
+            "/api/testcases",
+            json={"name": "租户过长", "steps": [], "tenant": "x" * 200},
+        )
+        assert response.status_code == 400
@@ -411,6 +411,27 @@ class TestUpdateTestCaseAPI:
         assert data["name"] == "更新后的Inactive测试用例"
         assert data["is_active"] is True
 
+    def test_should_update_resource_policy(
+        self, api_client, create_test_testcase, assert_api_response
+    ):
+        """测试更新资源拦截策略，格式错误时返回400"""
+        testcase = create_test_testcase()
+
+        data = assert_api_response(
+            api_client.put(
+                f"/api/testcases/{testcase.id}",
+                json={"resource_policy": {"block_resource_types": ["font", "media"]}},
+            ),
+            200,
+        )
+        assert data["resource_policy"]["block_resource_types"] == ["font", "media"]
+
+        response = api_client.put(
+            f"/api/testcases/{testcase.id}",
+            json={"resource_policy": {"block_resource_types": ["document"]}},
+        )
+        assert response.status_code == 400
+
 
 class TestDeleteTestCaseAPI:
     """删除测试用例API测试 (DELETE /api/testcases/<id>)"""
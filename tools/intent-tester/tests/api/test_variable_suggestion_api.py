@@ -0,0 +1,79 @@
+"""
+变量提示API测试
+"""
+
+import json
+
+from backend.models import db, TestCase, ExecutionVariable
+
+
+STEPS = [
+    {
+        "action": "aiQuery",
+        "params": {"query": "用户信息", "dataDemand": "{name: string, age: number}"},
+        "output_variable": "user",
+    },
+    {"action": "aiString", "params": {"query": "标题"}, "output_variable": "title"},
+    {"action": "aiInput", "params": {"text": "${user.name} ${title}", "locate": "输入框"}},
+]
+
+
+class TestVariableSuggestionAPI:
+    """执行变量提示和用例变量预测API测试"""
+
+    def _testcase(self, db_session):
+        testcase = TestCase(name="变量提示用例", steps=json.dumps(STEPS), is_active=True)
+        db_session.add(testcase)
+        db_session.commit()
+        return testcase
+
+    def test_should_predict_variables_for_step(
+        self, api_client, db_session, assert_api_response
+    ):
+        """测试按步骤预测可用变量和属性"""
+        testcase = self._testcase(db_session)
+
+        data = assert_api_response(
+            api_client.get(f"/api/v1/testcases/{testcase.id}/predicted-variables?step_index=1"),
+            200,
+        )
+        assert [v["name"] for v in data["predicted_variables"]] == ["user"]
+        assert data["predicted_variables"][0]["properties"][1]["path"] == "user.age"
+        assert data["unresolved_references"] == []
+
+        assert api_client.get("/api/v1/testcases/99999/predicted-variables").status_code == 404
+        response = api_client.get(f"/api/v1/testcases/{testcase.id}/predicted-variables?limit=0")
+        assert response.status_code == 400
+
+    def test_should_merge_actual_and_predicted_variables(
+        self, api_client, db_session, create_execution_history, assert_api_response
+    ):
+        """测试执行中已产生的变量使用实际值，尚未产生的按数据流预测"""
+        testcase = self._testcase(db_session)
+        execution = create_execution_history(test_case_id=testcase.id, status="running")
+        db.session.add(
+            ExecutionVariable(
+                execution_id=execution.execution_id,
+                variable_name="user",
+                variable_value=json.dumps({"name": "张三", "age": 30}),
+                data_type="object",
+                source_step_index=0,
+                source_api_method="aiQuery",
+            )
+        )
+        db_session.commit()
+
+        data = assert_api_response(
+            api_client.get(
+                f"/api/v1/executions/{execution.execution_id}/variable-suggestions?step_index=2"
+            ),
+            200,
+        )
+        variables = {v["name"]: v for v in data["variables"]}
+        assert variables["user"]["actual"] is True
+        assert '"张三"' in variables["user"]["preview_value"]
+        assert variables["title"]["actual"] is False
+        assert variables["title"]["data_type"] == "string"
+
+        response = api_client.get("/api/v1/executions/missing/variable-suggestions")
+        assert response.status_code == 404
@@ -0,0 +1,75 @@
+"""
+视觉断言API测试
+"""
+
+import base64
+import io
+
+import pytest
+from PIL import Image
+
+
+def png_base64(color, size=(20, 20)):
+    buffer = io.BytesIO()
+    Image.new("RGB", size, color).save(buffer, format="PNG")
+    return base64.b64encode(buffer.getvalue()).decode("ascii")
+
+
+class TestVisualAPI:
+    """视觉基线管理与断言API测试"""
+
+    def test_should_assert_against_saved_baseline(
+        self, api_client, test_data_manager, assert_api_response
+    ):
+        """测试基线保存后断言通过，变化后返回差异图"""
+        testcase = test_data_manager.create_testcase()
+        baseline = assert_api_response(
+            api_client.post(
+                "/api/visual/baselines",
+                json={
+                    "name": "登录页",
+                    "test_case_id": testcase.id,
+                    "image": png_base64((255, 255, 255)),
+                },
+            ),
+            200,
+        )
+        assert baseline["width"] == 20
+
+        same = assert_api_response(
+            api_client.post(
+                "/api/visual/assert",
+                json={
+                    "name": "登录页",
+                    "test_case_id": testcase.id,
+                    "image": png_base64((255, 255, 255)),
+                },
+            ),
+            200,
+        )
+        assert same["passed"] is True
+
+        changed = assert_api_response(
+            api_client.post(
+                "/api/visual/assert",
+                json={
+                    "name": "登录页",
+                    "test_case_id": testcase.id,
+                    "image": png_base64((0, 0, 0)),
+                },
+            ),
+            200,
+        )
+        assert changed["passed"] is False
+        assert base64.b64decode(changed["diff_image"]).startswith(b"\x89PNG")
+
+        image = api_client.get(f"/api/visual/baselines/{baseline['id']}/image")
+        assert image.status_code == 200
+        assert image.mimetype == "image/png"
+
+    def test_should_reject_invalid_image(self, api_client):
+        """测试非法图片数据返回400"""
+        response = api_client.post(
+            "/api/visual/assert", json={"name": "登录页", "image": "not-base64!"}
+        )
+        assert response.status_code == 400
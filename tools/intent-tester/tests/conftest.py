@@ -589,3 +589,11 @@ def execution_modes():
     """提供所有支持的执行模式列表"""
     return ["headless", "browser"]
 
+
+
+@pytest.fixture
+def page_change_cases():
+    """页面变化和就绪判定用例，与执行节点等待引擎的jest测试共用"""
+    path = os.path.join(os.path.dirname(__file__), "fixtures", "page_change_cases.json")
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
@@ -0,0 +1,109 @@
+/**
+ * 执行事件日志测试：环形缓冲区、落盘、增量补齐和保留期清理
+ */
+
+const fs = require('fs');
+const os = require('os');
+const path = require('path');
+const { ExecutionEventLog } = require('../../browser-automation/execution_event_log');
+
+describe('ExecutionEventLog', () => {
+  let directory;
+
+  beforeEach(() => {
+    directory = fs.mkdtempSync(path.join(os.tmpdir(), 'event-log-'));
+  });
+
+  afterEach(() => {
+    fs.rmSync(directory, { recursive: true, force: true });
+  });
+
+  test('缓冲区满时丢弃最早的事件，序号持续递增', () => {
+    const log = new ExecutionEventLog(3, directory);
+    for (let i = 0; i < 5; i++) {
+      log.append('exec-1', 'log', { i });
+    }
+
+    const result = log.since('exec-1', 0);
+    expect(result.events.map(event => event.seq)).toEqual([3, 4, 5]);
+    expect(result.first_seq).toBe(3);
+    expect(result.last_seq).toBe(5);
+    expect(result.truncated).toBe(true);
+    expect(result.completed).toBe(false);
+
+    expect(log.since('exec-1', 2).truncated).toBe(false);
+    expect(log.since('missing', 0)).toBeNull();
+  });
+
+  test('按序号分页增量补齐', () => {
+    const log = new ExecutionEventLog(10, directory);
+    for (let i = 0; i < 5; i++) {
+      log.append('exec-1', 'log', { i });
+    }
+
+    const page = log.since('exec-1', 1, 2);
+    expect(page.events.map(event => event.data.i)).toEqual([1, 2]);
+    expect(page.next_seq).toBe(3);
+    expect(page.has_more).toBe(true);
+
+    const rest = log.since('exec-1', page.next_seq, 10);
+    expect(rest.events.map(event => event.seq)).toEqual([4, 5]);
+    expect(rest.has_more).toBe(false);
+  });
+
+  test('执行结束后落盘，内存淘汰后从磁盘读取并追加迟到事件', () => {
+    const log = new ExecutionEventLog(10, directory);
+    log.append('exec-1', 'execution-start', {});
+    log.append('exec-1', 'execution-completed', {});
+    log.complete('exec-1');
+    log.append('exec-1', 'log', { late: true });
+
+    const filePath = path.join(directory, 'exec-1.jsonl');
+    expect(fs.readFileSync(filePath, 'utf8').trim().split('\n')).toHaveLength(3);
+
+    log.append('exec-2', 'execution-start', {});
+    log.evict(0);
+    // 只淘汰已落盘的日志
+    expect(log.logs.has('exec-1')).toBe(false);
+    expect(log.logs.has('exec-2')).toBe(true);
+
+    const result = log.since('exec-1', 1);
+    expect(result.completed).toBe(true);
+    expect(result.events.map(event => event.type)).toEqual(['execution-completed', 'log']);
+  });
+
+  test('执行ID中的路径字符不会写到目录之外', () => {
+    const log = new ExecutionEventLog(10, directory);
+    log.append('../escape', 'log', {});
+    log.complete('../escape');
+
+    expect(fs.readdirSync(directory)).toEqual(['.._escape.jsonl']);
+  });
+
+  test('删除已清理执行的事件日志，运行中的执行保留', () => {
+    const log = new ExecutionEventLog(10, directory);
+    log.append('done', 'log', {});
+    log.complete('done');
+    log.append('running', 'log', {});
+
+    expect(log.remove(['done', 'running', 'missing'])).toBe(1);
+    expect(log.since('done', 0)).toBeNull();
+    expect(log.since('running', 0).events).toHaveLength(1);
+  });
+
+  test('按保留期清理过期的落盘文件', () => {
+    const log = new ExecutionEventLog(10, directory);
+    ['old', 'new'].forEach(id => {
+      log.append(id, 'log', {});
+      log.complete(id);
+    });
+    const dayMs = 24 * 60 * 60 * 1000;
+    const oldTime = new Date(Date.now() - 40 * dayMs);
+    fs.utimesSync(path.join(directory, 'old.jsonl'), oldTime, oldTime);
+
+    expect(log.prune(30 * dayMs)).toBe(1);
+    expect(fs.readdirSync(directory)).toEqual(['new.jsonl']);
+    expect(log.since('old', 0)).toBeNull();
+    expect(new ExecutionEventLog(10, path.join(directory, 'missing')).prune(dayMs)).toBe(0);
+  });
+});
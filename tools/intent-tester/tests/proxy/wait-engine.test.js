@@ -0,0 +1,101 @@
+/**
+ * 等待引擎测试：与Python端（midscene_framework.wait_engine）共用默认参数和判定用例
+ */
+
+const fs = require('fs');
+const path = require('path');
+const { WAIT_DEFAULTS, hammingDistance, pageChanged, WaitEngine } = require('../../browser-automation/wait_engine');
+
+const cases = JSON.parse(
+  fs.readFileSync(path.join(__dirname, '..', 'fixtures', 'page_change_cases.json'), 'utf8')
+);
+
+describe('WaitEngine', () => {
+  const realNow = Date.now;
+  let now;
+
+  beforeEach(() => {
+    now = 0;
+    Date.now = () => now;
+  });
+
+  afterEach(() => {
+    Date.now = realNow;
+  });
+
+  // 等待时推进模拟时钟，记录每次等待的间隔
+  function fakePage(sleeps) {
+    return {
+      waitForTimeout: async ms => {
+        sleeps.push(ms);
+        now += ms;
+      }
+    };
+  }
+
+  const readyFingerprint = {
+    dhash: '0000000000000000',
+    dom: 'a',
+    element_count: 10,
+    ready_state: 'complete',
+    inflight_requests: 0,
+    network_idle_ms: 1000
+  };
+
+  test('默认参数来自共用的wait_defaults.json', () => {
+    const shared = JSON.parse(
+      fs.readFileSync(path.join(__dirname, '..', '..', 'midscene_framework', 'wait_defaults.json'), 'utf8')
+    );
+    expect(WAIT_DEFAULTS).toEqual(shared);
+
+    const engine = new WaitEngine();
+    expect(engine.initialInterval).toBe(shared.initial_interval_ms);
+    expect(engine.maxInterval).toBe(shared.max_interval_ms);
+    expect(engine.hashThreshold).toBe(shared.hash_threshold);
+  });
+
+  test('页面变化和就绪判定与Python端一致', () => {
+    cases.hamming_distance.forEach(([a, b, expected]) => {
+      expect(hammingDistance(a, b)).toBe(expected);
+    });
+    cases.changed.forEach(({ previous, current, expected }) => {
+      expect(pageChanged(previous, current)).toBe(expected);
+    });
+    const engine = new WaitEngine();
+    cases.ready.forEach(({ previous, current, expected }) => {
+      expect(engine.isReady(current, previous)).toBe(expected);
+    });
+  });
+
+  test('页面未变化时不重复调用模型，间隔指数增长并封顶', async () => {
+    const sleeps = [];
+    let modelCalls = 0;
+    const engine = new WaitEngine({ captureFingerprint: async () => readyFingerprint });
+    const agent = {
+      aiBoolean: async () => {
+        modelCalls += 1;
+        return false;
+      }
+    };
+
+    let error = null;
+    try {
+      await engine.wait(agent, fakePage(sleeps), '按钮出现', 10000);
+    } catch (e) {
+      error = e;
+    }
+
+    expect(error.waitReport.model_calls).toBe(1);
+    expect(modelCalls).toBe(1);
+    expect(sleeps.slice(0, 5)).toEqual([100, 200, 400, 800, 1600]);
+    expect(Math.max(...sleeps)).toBe(2000);
+  });
+
+  test('条件满足后记录典型等待时长', async () => {
+    const engine = new WaitEngine({ captureFingerprint: async () => readyFingerprint });
+    const report = await engine.wait({ aiBoolean: async () => true }, fakePage([]), '按钮出现', 10000);
+
+    expect(report.model_calls).toBe(1);
+    expect(engine.expectedWait(' 按钮出现 ')).toEqual({ expected_ms: report.elapsed_ms, samples: 1 });
+  });
+});
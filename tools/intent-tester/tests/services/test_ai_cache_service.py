@@ -0,0 +1,141 @@
+import json
+
+import pytest
+
+from backend.models import ExecutionHistory, TestCase
+from backend.services.ai_cache_service import AiCacheService, summarize_cache_stats
+from backend.services.executor_registry import ExecutorRegistry
+
+
+class FakeNodes:
+    """模拟执行节点的缓存接口"""
+
+    def __init__(self, caches_by_url):
+        self.caches_by_url = caches_by_url
+        self.evictions = []
+
+    def request(self, node, method, path, **kwargs):
+        caches = self.caches_by_url[node.server_url]
+        if method == "GET":
+            return {"caches": list(caches)}
+        payload = kwargs["json"]
+        self.evictions.append((node.node_id, payload))
+        deleted = [c["cache_id"] for c in caches if c["cache_id"] in payload["cache_ids"]]
+        return {"deleted": deleted, "freed_bytes": 100 * len(deleted)}
+
+
+def cache_entry(testcase, revision=None, size=100, tier="max"):
+    revision = revision or testcase.revision
+    suffix = "-fast" if tier == "fast" else ""
+    return {
+        "cache_id": f"playwright-testcase-{testcase.id}-{revision}{suffix}",
+        "testcase_id": testcase.id,
+        "revision": revision,
+        "tier": tier,
+        "size": size,
+        "entries": 3,
+    }
+
+
+@pytest.fixture
+def testcases(db_session):
+    created = []
+    for name in ("登录", "搜索"):
+        testcase = TestCase(name=name, steps=json.dumps([{"action": "ai_tap", "params": {"locate": name}}]))
+        db_session.add(testcase)
+        created.append(testcase)
+    db_session.commit()
+    return created
+
+
+@pytest.fixture
+def service(db_session, monkeypatch, testcases):
+    login, search = testcases
+    ExecutorRegistry().register_node("node-a", "http://a:3001", total_slots=2)
+    fake = FakeNodes(
+        {
+            "http://a:3001": [
+                cache_entry(login),
+                cache_entry(login, tier="fast", size=50),
+                cache_entry(search, revision="0000000000000000", size=300),
+                {"cache_id": "playwright-old-name", "testcase_id": None, "revision": None, "size": 80, "entries": 1},
+            ]
+        }
+    )
+    service = AiCacheService()
+    monkeypatch.setattr(service, "_node_request", fake.request)
+    service.fake = fake
+    return service
+
+
+class TestAiCacheService:
+    """Test cases for AiCacheService"""
+
+    def test_list_caches_classifies_and_reports_hit_rate(self, service, testcases, create_execution_history):
+        login, search = testcases
+        create_execution_history(
+            test_case_id=login.id,
+            result_summary=json.dumps({"cache_stats": {"cache_id": "x", "lookups": 4, "hits": 3}}),
+        )
+
+        result = service.list_caches()
+
+        states = {c["cache_id"]: c["state"] for c in result["caches"]}
+        assert states["playwright-old-name"] == "orphaned"
+        assert states[f"playwright-testcase-{search.id}-0000000000000000"] == "stale"
+        summary = {s["testcase_id"]: s for s in result["testcases"]}
+        assert summary[login.id]["size"] == 150
+        assert summary[login.id]["hit_rate"] == 0.75
+        assert summary[search.id]["stale_size"] == 300
+        assert summary[search.id]["hit_rate"] is None
+        assert result["orphaned_size"] == 80
+
+    def test_invalidate_deletes_all_tiers_of_testcase(self, service, testcases):
+        login, _ = testcases
+
+        result = service.invalidate(login)
+
+        assert len(result["deleted"]) == 2
+        node_id, payload = service.fake.evictions[0]
+        assert node_id == "node-a"
+        assert all(f"testcase-{login.id}-" in cache_id for cache_id in payload["cache_ids"])
+
+    def test_evict_includes_stale_and_orphaned(self, service, testcases):
+        _, search = testcases
+
+        service.evict(max_total_bytes=1024)
+
+        _, payload = service.fake.evictions[0]
+        assert sorted(payload["cache_ids"]) == sorted(
+            [f"playwright-testcase-{search.id}-0000000000000000", "playwright-old-name"]
+        )
+        assert payload["max_total_bytes"] == 1024
+        with pytest.raises(ValueError):
+            service.evict(max_age_days=-1)
+        with pytest.raises(ValueError):
+            service.evict(include_stale=False)
+
+    def test_warm_queues_missing_caches_within_free_slots(self, service, testcases):
+        login, search = testcases
+
+        result = service.warm()
+
+        assert result["already_warm"] == 1
+        assert [q["testcase_id"] for q in result["queued"]] == [search.id]
+        execution = ExecutionHistory.query.filter_by(
+            execution_id=result["queued"][0]["execution_id"]
+        ).first()
+        assert execution.status == "pending"
+        assert execution.executed_by == "ai-cache-warmer"
+
+        result = service.warm(max_executions=0)
+        assert result["queued"] == []
+
+    def test_summarize_cache_stats(self):
+        assert summarize_cache_stats({"cache_id": "c", "lookups": 2, "hits": 5}) == {
+            "cache_id": "c",
+            "entries_at_start": 0,
+            "lookups": 2,
+            "hits": 2,
+        }
+        assert summarize_cache_stats({"lookups": 1}) is None
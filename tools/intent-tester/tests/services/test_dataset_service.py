@@ -0,0 +1,209 @@
+import io
+import json
+import sqlite3
+
+import pytest
+
+from sqlalchemy.exc import OperationalError
+
+from backend.services.dataset_service import DatasetRunner, _begin_read_only, _query_engine
+from backend.services.executor_registry import ExecutorRegistry
+from backend.models import TestCase, ExecutionHistory, ExecutionVariable, DatasetRun
+
+
+class TestDatasetRunner:
+    """Test cases for data-driven dataset runs"""
+
+    @pytest.fixture
+    def runner(self, tmp_path):
+        return DatasetRunner(dataset_dir=str(tmp_path / "datasets"))
+
+    @pytest.fixture
+    def registry(self):
+        return ExecutorRegistry()
+
+    def _testcase(self, test_data_manager, data):
+        return TestCase.query.get(test_data_manager.create_testcase(data).id)
+
+    def _children(self, dataset_run, status=None):
+        query = ExecutionHistory.query.filter_by(dataset_run_id=dataset_run.dataset_run_id)
+        if status:
+            query = query.filter_by(status=status)
+        return query.order_by(ExecutionHistory.dataset_row_index).all()
+
+    def _finish(self, db_session, runner, executions, status="success"):
+        for execution in executions:
+            execution.status = status
+            runner.record_result(execution)
+        db_session.commit()
+
+    def test_validate_dataset(self, runner):
+        assert runner.validate_dataset({"type": "inline", "rows": [{"user": "a"}]})
+        with pytest.raises(ValueError):
+            runner.validate_dataset({"type": "inline", "rows": [{"bad name": 1}]})
+        with pytest.raises(ValueError):
+            runner.validate_dataset({"type": "query", "query": "DELETE FROM users"})
+        with pytest.raises(ValueError):
+            runner.validate_dataset({"type": "query", "query": "SELECT 1; DROP TABLE t"})
+        with pytest.raises(ValueError):
+            runner.validate_dataset({"type": "csv", "file": "../etc/passwd"})
+
+    def test_rows_fan_out_within_parallel_window(
+        self, db_session, runner, registry, test_data_manager
+    ):
+        registry.register_node("node-a", "http://a:3001", total_slots=4)
+        testcase = self._testcase(test_data_manager, {"name": "登录"})
+        rows = [{"username": f"user{i}", "password": f"pw{i}"} for i in range(5)]
+        runner.bind(testcase, {"type": "inline", "rows": rows})
+
+        dataset_run = runner.start_run(testcase, {"max_parallel": 2})
+
+        children = self._children(dataset_run)
+        assert [c.dataset_row_index for c in children] == [0, 1]
+        assert all(c.status == "pending" for c in children)
+        variables = {
+            v.variable_name: json.loads(v.variable_value)
+            for v in ExecutionVariable.query.filter_by(execution_id=children[1].execution_id)
+        }
+        assert variables == rows[1]
+
+        # 窗口已满时不再读取
+        assert runner.advance(dataset_run) == []
+
+        self._finish(db_session, runner, children[:1])
+        assert [c.dataset_row_index for c in runner.advance(dataset_run)] == [2]
+
+        while dataset_run.status == "running":
+            self._finish(db_session, runner, self._children(dataset_run, "pending"))
+            runner.advance(dataset_run)
+
+        dataset_run = DatasetRun.query.get(dataset_run.id)
+        assert dataset_run.status == "completed"
+        assert dataset_run.row_count == 5
+        assert dataset_run.passed_count == 5
+
+    def test_max_parallel_is_capped_by_available_slots(
+        self, db_session, runner, test_data_manager
+    ):
+        testcase = self._testcase(test_data_manager, {"name": "无节点"})
+        dataset_run = runner.start_run(
+            testcase,
+            {"dataset": {"type": "inline", "rows": [{"a": 1}, {"a": 2}]}, "max_parallel": 10},
+        )
+        assert dataset_run.max_parallel == 1
+        assert len(self._children(dataset_run)) == 1
+
+    def test_max_rows_and_failures(self, db_session, runner, registry, test_data_manager):
+        registry.register_node("node-a", "http://a:3001", total_slots=4)
+        testcase = self._testcase(test_data_manager, {"name": "部分行"})
+        dataset_run = runner.start_run(
+            testcase,
+            {"dataset": {"type": "inline", "rows": [{"a": i} for i in range(10)]}, "max_rows": 3},
+        )
+
+        children = self._children(dataset_run)
+        assert len(children) == 3
+        assert dataset_run.exhausted
+        self._finish(db_session, runner, children[:1], status="failed")
+        self._finish(db_session, runner, children[1:])
+
+        dataset_run = DatasetRun.query.get(dataset_run.id)
+        assert dataset_run.status == "completed"
+        assert (dataset_run.passed_count, dataset_run.failed_count) == (2, 1)
+        results = runner.row_results(dataset_run, status="failed")
+        assert results["total"] == 1
+        assert results["items"][0]["variables"] == {"a": 0}
+
+    def test_csv_is_read_in_batches(self, db_session, runner, test_data_manager):
+        testcase = self._testcase(test_data_manager, {"name": "CSV"})
+        content = "\ufeffusername,amount\nalice,1\n\nbob,\"2,5\"\ncarol,3\n"
+        spec = runner.store_csv(testcase, io.BytesIO(content.encode("utf-8")), "users.csv")
+
+        rows, cursor, exhausted = runner.read_rows(spec, None, 2)
+        assert rows == [{"username": "alice", "amount": "1"}, {"username": "bob", "amount": "2,5"}]
+        assert not exhausted
+
+        rows, cursor, exhausted = runner.read_rows(spec, json.loads(json.dumps(cursor)), 2)
+        assert rows == [{"username": "carol", "amount": "3"}]
+        assert exhausted
+
+    def test_invalid_csv_is_rejected(self, db_session, runner, test_data_manager, tmp_path):
+        testcase = self._testcase(test_data_manager, {"name": "坏CSV"})
+        with pytest.raises(ValueError):
+            runner.store_csv(testcase, io.BytesIO(b"user name,x\na,b\n"), "bad.csv")
+        assert testcase.dataset is None
+        assert list((tmp_path / "datasets").iterdir()) == []
+
+    def test_query_dataset_pages_through_results(
+        self, db_session, runner, test_data_manager, tmp_path, monkeypatch
+    ):
+        path = tmp_path / "data.db"
+        connection = sqlite3.connect(str(path))
+        connection.execute("CREATE TABLE users (id INTEGER, name TEXT)")
+        connection.executemany(
+            "INSERT INTO users VALUES (?, ?)", [(i, f"user{i}") for i in range(5)]
+        )
+        connection.commit()
+        connection.close()
+        monkeypatch.setenv("DATASET_DATABASE_URL", f"sqlite:///{path}")
+
+        spec = runner.validate_dataset(
+            {"type": "query", "query": "SELECT id, name FROM users ORDER BY id;"}
+        )
+        rows, cursor, exhausted = runner.read_rows(spec, None, 3)
+        assert [r["name"] for r in rows] == ["user0", "user1", "user2"]
+        assert not exhausted
+        rows, cursor, exhausted = runner.read_rows(spec, cursor, 3)
+        assert [r["id"] for r in rows] == [3, 4]
+        assert exhausted
+
+    def test_query_dataset_is_read_only(self, runner, tmp_path, monkeypatch):
+        path = tmp_path / "data.db"
+        connection = sqlite3.connect(str(path))
+        connection.execute("CREATE TABLE users (id INTEGER, name TEXT)")
+        connection.execute("INSERT INTO users VALUES (1, 'delete')")
+        connection.commit()
+        connection.close()
+        monkeypatch.setenv("DATASET_DATABASE_URL", f"sqlite:///{path}")
+
+        # 带写操作的WITH子句在校验时拒绝，字符串字面量中的关键字不受影响
+        with pytest.raises(ValueError, match="DELETE"):
+            runner.validate_dataset(
+                {
+                    "type": "query",
+                    "query": "WITH d AS (DELETE FROM users RETURNING *) SELECT * FROM d",
+                }
+            )
+        spec = runner.validate_dataset(
+            {"type": "query", "query": "SELECT id FROM users WHERE name = 'delete'"}
+        )
+        assert runner.read_rows(spec, None, 10)[0] == [{"id": 1}]
+
+        # 绕过关键字检查的写操作由只读连接拒绝
+        with _query_engine().connect() as db_connection:
+            _begin_read_only(db_connection)
+            with pytest.raises(OperationalError):
+                db_connection.exec_driver_sql("DELETE FROM users")
+            db_connection.rollback()
+        assert sqlite3.connect(str(path)).execute("SELECT COUNT(*) FROM users").fetchone() == (1,)
+
+    def test_cancel_and_dispatch_payload(
+        self, db_session, runner, registry, test_data_manager
+    ):
+        registry.register_node("node-a", "http://a:3001", total_slots=2)
+        testcase = self._testcase(test_data_manager, {"name": "取消"})
+        dataset_run = runner.start_run(
+            testcase, {"dataset": {"type": "inline", "rows": [{"q": i} for i in range(5)]}}
+        )
+
+        child, dispatched = self._children(dataset_run)
+        assert registry.build_dispatch_payload(child, testcase)["variables"] == {"q": 0}
+        dispatched.executor_node_id = "node-a"
+        db_session.commit()
+
+        # 已分发到节点的子执行由节点继续执行，只取消尚未分发的
+        dataset_run = runner.cancel_run(dataset_run.dataset_run_id)
+        assert dataset_run.status == "cancelled"
+        assert dataset_run.cancelled_count == 1
+        assert ExecutionHistory.query.get(dispatched.id).status == "pending"
+        assert runner.advance(dataset_run) == []
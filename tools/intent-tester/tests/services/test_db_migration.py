@@ -0,0 +1,55 @@
+from sqlalchemy import create_engine, inspect, text
+
+from backend.models import db
+from backend.utils.db_migration import upgrade_schema
+
+
+class TestUpgradeSchema:
+    """Test cases for upgrading databases created before new model columns"""
+
+    def _legacy_engine(self, tmp_path):
+        engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+        with engine.begin() as connection:
+            # 新增列之前的表结构（只保留部分原有列）
+            connection.execute(
+                text(
+                    "CREATE TABLE execution_history ("
+                    "id INTEGER PRIMARY KEY, execution_id VARCHAR(50) NOT NULL, "
+                    "test_case_id INTEGER NOT NULL, status VARCHAR(50) NOT NULL, "
+                    "start_time DATETIME NOT NULL, created_at DATETIME)"
+                )
+            )
+            connection.execute(
+                text(
+                    "INSERT INTO execution_history (execution_id, test_case_id, status, start_time) "
+                    "VALUES ('legacy-1', 1, 'success', '2024-01-01 00:00:00')"
+                )
+            )
+        return engine
+
+    def test_adds_missing_columns_and_indexes(self, tmp_path):
+        engine = self._legacy_engine(tmp_path)
+
+        changes = upgrade_schema(engine, db.metadata)
+
+        columns = {c["name"] for c in inspect(engine).get_columns("execution_history")}
+        model_columns = {c.name for c in db.metadata.tables["execution_history"].columns}
+        assert model_columns <= columns
+        assert "execution_history.request_fingerprint" in changes
+        assert "execution_history:idx_execution_fingerprint_status" in changes
+
+        # 只升级已有的表，缺失的表由create_all创建
+        assert "step_executions" not in inspect(engine).get_table_names()
+
+        # 有默认值的新列按默认值回填已有行
+        with engine.connect() as connection:
+            row = connection.execute(
+                text("SELECT tenant, requeue_count, deadline_at FROM execution_history")
+            ).one()
+        assert tuple(row) == ("default", 0, None)
+
+    def test_upgrade_is_idempotent(self, tmp_path):
+        engine = self._legacy_engine(tmp_path)
+
+        assert upgrade_schema(engine, db.metadata)
+        assert upgrade_schema(engine, db.metadata) == []
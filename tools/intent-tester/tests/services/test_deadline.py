@@ -0,0 +1,124 @@
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock
+
+from midscene_framework.deadline import Deadline, DeadlineExceeded
+from midscene_framework.retry_handler import RetryHandler, RetryConfig
+from backend.services.execution_coalescer import ExecutionCoalescer
+from backend.services.executor_registry import ExecutorRegistry
+from backend.models import db, ExecutionHistory
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestDeadline:
+    """Test cases for Deadline and its propagation into retries"""
+
+    def test_remaining_and_clamp(self):
+        clock = FakeClock()
+        deadline = Deadline.after(10, clock=clock)
+
+        assert deadline.clamp(90) == 10
+        clock.now += 7
+        assert deadline.remaining_ms() == 3000
+        assert deadline.clamp(1) == 1
+        clock.now += 5
+        assert deadline.expired()
+        with pytest.raises(DeadlineExceeded):
+            deadline.check()
+
+    def test_child_never_outlives_parent(self):
+        clock = FakeClock()
+        parent = Deadline.after(10, clock=clock)
+
+        assert parent.child(60).remaining() == 10
+        assert parent.child(3).remaining() == 3
+        assert parent.child(None) is parent
+
+    @pytest.mark.asyncio
+    async def test_retry_stops_when_backoff_exceeds_budget(self):
+        calls = []
+
+        async def flaky():
+            calls.append(1)
+            raise ConnectionError("connection reset")
+
+        config = RetryConfig(max_attempts=5, base_delay=5.0)
+        with pytest.raises(DeadlineExceeded):
+            await RetryHandler.retry_with_backoff(
+                flaky, config, deadline=Deadline.after(1)
+            )
+        assert len(calls) == 1
+
+    @pytest.mark.asyncio
+    async def test_expired_deadline_is_not_retried(self):
+        async def never_called():
+            raise AssertionError("should not run")
+
+        clock = FakeClock()
+        deadline = Deadline.after(1, clock=clock)
+        clock.now += 2
+
+        with pytest.raises(DeadlineExceeded):
+            await RetryHandler.retry_with_backoff(
+                never_called, RetryConfig(), deadline=deadline
+            )
+        assert not RetryHandler._should_retry(DeadlineExceeded("expired"))
+
+
+class TestExecutionDeadline:
+    """Execution deadlines on the web side"""
+
+    def test_parse_deadline_validates_budget(self):
+        now = datetime(2024, 1, 1, 12, 0, 0)
+
+        assert ExecutionCoalescer.parse_deadline({}) is None
+        assert ExecutionCoalescer.parse_deadline(
+            {"deadline_seconds": 120}, now=now
+        ) == now + timedelta(seconds=120)
+        with pytest.raises(ValueError):
+            ExecutionCoalescer.parse_deadline({"deadline_seconds": 0})
+        with pytest.raises(ValueError):
+            ExecutionCoalescer.parse_deadline({"deadline_seconds": "soon"})
+
+    def test_dispatch_payload_carries_remaining_budget(
+        self, db_session, test_data_manager
+    ):
+        testcase = test_data_manager.create_testcase()
+        proxy = test_data_manager.create_execution({"test_case_id": testcase.id})
+        execution = ExecutionHistory.query.get(proxy.id)
+        execution.deadline_at = datetime.utcnow() + timedelta(seconds=60)
+        db.session.commit()
+
+        payload = ExecutorRegistry().build_dispatch_payload(execution, execution.test_case)
+
+        assert 55000 < payload["deadline_ms"] <= 60000
+
+    def test_overdue_pending_execution_is_expired_not_dispatched(
+        self, db_session, test_data_manager, mocker
+    ):
+        post = mocker.patch(
+            "backend.services.executor_registry.requests.post",
+            return_value=MagicMock(status_code=200),
+        )
+        registry = ExecutorRegistry()
+        registry.register_node("node-a", "http://a:3001", total_slots=2)
+        testcase = test_data_manager.create_testcase()
+        proxy = test_data_manager.create_execution({"test_case_id": testcase.id})
+        execution = ExecutionHistory.query.get(proxy.id)
+        execution.deadline_at = datetime.utcnow() - timedelta(seconds=1)
+        db.session.commit()
+
+        result = registry.run_once()
+
+        assert result["expired"] == [execution.execution_id]
+        assert result["dispatched"] == []
+        assert execution.status == "failed"
+        assert "截止时间" in execution.error_message
+        post.assert_not_called()
@@ -0,0 +1,134 @@
+import json
+import pytest
+from datetime import datetime, timedelta
+
+from backend.services.duration_predictor import DurationPredictor, normalize_action
+from backend.services.suite_service import SuiteRunner
+from backend.models import TestCase, SuiteRun
+
+
+class TestDurationPredictor:
+    """Test cases for DurationPredictor service"""
+
+    @pytest.fixture
+    def predictor(self):
+        return DurationPredictor()
+
+    def test_history_prediction_weights_recent_runs(
+        self, db_session, predictor, test_data_manager
+    ):
+        tc = test_data_manager.create_testcase()
+        now = datetime.utcnow()
+        # 旧的执行很快，最近的执行变慢
+        for days_ago, duration in [(5, 10), (4, 10), (3, 10), (1, 100)]:
+            test_data_manager.create_execution(
+                {
+                    "test_case_id": tc.id,
+                    "status": "success",
+                    "duration": duration,
+                    "start_time": now - timedelta(days=days_ago),
+                }
+            )
+
+        prediction = predictor.predict([TestCase.query.get(tc.id)])[tc.id]
+
+        assert prediction["source"] == "history"
+        assert prediction["samples"] == 4
+        assert prediction["seconds"] == pytest.approx(0.3 * 100 + 0.7 * 10)
+
+    def test_fallback_estimate_from_steps(self, db_session, predictor, test_data_manager):
+        tc = test_data_manager.create_testcase(
+            {
+                "steps": [
+                    {"action": "goto", "params": {"url": "https://a.com"}},
+                    {"action": "ai_tap", "params": {"locate": "按钮"}},
+                    {"action": "sleep", "params": {"time": 3000}},
+                ]
+            }
+        )
+
+        prediction = predictor.predict([TestCase.query.get(tc.id)])[tc.id]
+
+        assert prediction["source"] == "estimate"
+        assert prediction["seconds"] == pytest.approx(5 + 4 + 8 + 3)
+
+    def test_estimate_normalizes_action_names(self, db_session, predictor, test_data_manager):
+        """Steps from the editor use `type` and camelCase names like aiTap / aiWaitFor"""
+        assert normalize_action({"type": "aiWaitFor"}) == "ai_wait_for"
+        assert normalize_action({"action": "aiQuery", "type": "ignored"}) == "ai_query"
+        assert normalize_action({"action": "ai_tap"}) == "ai_tap"
+        assert normalize_action({}) == ""
+
+        tc = test_data_manager.create_testcase(
+            {
+                "steps": [
+                    {"type": "aiTap", "params": {"locate": "按钮"}},
+                    {"action": "aiQuery", "params": {"query": "列表"}},
+                    {"type": "sleep", "params": {"time": 2000}},
+                ]
+            }
+        )
+
+        prediction = predictor.predict([TestCase.query.get(tc.id)])[tc.id]
+        assert prediction["seconds"] == pytest.approx(5 + 8 + 10 + 2)
+
+    def test_errored_runs_count_as_history(self, db_session, predictor, test_data_manager):
+        tc = test_data_manager.create_testcase()
+        test_data_manager.create_execution(
+            {"test_case_id": tc.id, "status": "error", "duration": 42}
+        )
+
+        prediction = predictor.predict([TestCase.query.get(tc.id)])[tc.id]
+        assert prediction["source"] == "history"
+        assert prediction["seconds"] == pytest.approx(42)
+
+    def test_lpt_balances_shards(self, predictor):
+        items = [
+            {"test_case_id": i, "predicted_duration": d}
+            for i, d in enumerate([10, 10, 10, 10, 40], start=1)
+        ]
+
+        # 原始顺序下最长用例最后开始，总耗时被拖长
+        assert predictor.simulate(items, 2)["makespan"] == 60
+        plan = predictor.simulate(predictor.lpt_order(items), 2)
+        assert plan["makespan"] == 40
+        assert plan["assignments"][5] != plan["assignments"][1]
+
+
+class TestSuiteDurationPlanning:
+    """Suite runs planned by predicted duration"""
+
+    def test_lpt_suite_run_reports_makespan(self, db_session, test_data_manager):
+        runner = SuiteRunner()
+        durations = {}
+        for name, seconds in [("short", 10), ("mid", 20), ("long", 60)]:
+            tc = test_data_manager.create_testcase({"name": name, "category": "P"})
+            test_data_manager.create_execution(
+                {"test_case_id": tc.id, "status": "success", "duration": seconds}
+            )
+            durations[tc.id] = seconds
+
+        suite_run = runner.start_suite_run(
+            {"category": "P", "ordering": "duration_lpt", "shards": 2}
+        )
+        executions = runner.get_suite_executions(suite_run.suite_run_id)
+
+        assert [durations[e.test_case_id] for e in executions] == [60, 20, 10]
+        assert suite_run.predicted_makespan == 60
+        assert {e.shard_index for e in executions} == {0, 1}
+
+        start = datetime.utcnow()
+        for execution in executions:
+            execution.status = "success"
+            execution.start_time = start
+            execution.duration = durations[execution.test_case_id]
+            execution.end_time = start + timedelta(seconds=execution.duration)
+            runner.record_result(execution)
+        db_session.commit()
+
+        suite_run = SuiteRun.query.get(suite_run.id)
+        report = runner.makespan_report(suite_run)
+        assert suite_run.status == "completed"
+        assert report["actual_makespan"] == 60
+        assert report["error_percent"] == 0
+        assert sorted(shard["predicted_load"] for shard in report["shards"]) == [30, 60]
@@ -0,0 +1,71 @@
+import json
+import pytest
+
+from backend.services.execution_coalescer import ExecutionCoalescer
+from backend.models import TestCase, ExecutionHistory
+
+
+class TestExecutionCoalescer:
+    """Test cases for ExecutionCoalescer service"""
+
+    @pytest.fixture
+    def coalescer(self):
+        return ExecutionCoalescer()
+
+    def test_fingerprint_tracks_revision_and_parameters(
+        self, db_session, coalescer, test_data_manager
+    ):
+        proxy = test_data_manager.create_testcase()
+        testcase = TestCase.query.get(proxy.id)
+
+        base = coalescer.compute_fingerprint(testcase, {"mode": "headless"})
+        assert base == coalescer.compute_fingerprint(
+            testcase, {"mode": "headless", "executed_by": "someone-else"}
+        )
+        assert base != coalescer.compute_fingerprint(
+            testcase, {"mode": "headless", "parameters": {"env": "staging"}}
+        )
+
+        # 修改步骤后修订号变化，不再合并到旧修订的执行
+        testcase.steps = json.dumps([{"action": "goto", "params": {"url": "https://b.com"}}])
+        db_session.commit()
+        assert base != coalescer.compute_fingerprint(testcase, {"mode": "headless"})
+
+    def test_finished_execution_is_not_coalesced(
+        self, db_session, coalescer, test_data_manager
+    ):
+        proxy = test_data_manager.create_testcase()
+        testcase = TestCase.query.get(proxy.id)
+
+        first, _ = coalescer.create_or_coalesce(testcase, {})
+        first.status = "success"
+        db_session.commit()
+
+        second, coalesced = coalescer.create_or_coalesce(testcase, {})
+        assert coalesced is False
+        assert second.execution_id != first.execution_id
+
+    def test_off_mode_always_creates(self, db_session, coalescer, test_data_manager):
+        proxy = test_data_manager.create_testcase()
+        testcase = TestCase.query.get(proxy.id)
+
+        coalescer.create_or_coalesce(testcase, {})
+        _, coalesced = coalescer.create_or_coalesce(testcase, {"coalesce": "off"})
+
+        assert coalesced is False
+        assert ExecutionHistory.query.filter_by(test_case_id=testcase.id).count() == 2
+
+    def test_propagate_result(self, db_session, coalescer, test_data_manager):
+        proxy = test_data_manager.create_testcase()
+        testcase = TestCase.query.get(proxy.id)
+
+        primary, _ = coalescer.create_or_coalesce(testcase, {})
+        linked, _ = coalescer.create_or_coalesce(testcase, {"coalesce": "link"})
+
+        primary.status = "failed"
+        primary.error_message = "boom"
+        assert coalescer.propagate_result(primary) == 1
+        db_session.commit()
+
+        assert linked.status == "failed"
+        assert linked.error_message == "boom"
@@ -0,0 +1,87 @@
+import gzip
+import os
+
+import pytest
+
+from backend.services.execution_log_store import ExecutionLogStore
+
+
+def entries(start, count):
+    return [{"level": "info", "message": f"line {i}"} for i in range(start, start + count)]
+
+
+class TestExecutionLogStore:
+    """Test cases for ExecutionLogStore"""
+
+    @pytest.fixture
+    def store(self, tmp_path):
+        # 分段上限很小，便于覆盖跨分段读取
+        return ExecutionLogStore(str(tmp_path), segment_bytes=200)
+
+    def test_append_rolls_segments_and_compresses(self, store, tmp_path):
+        info = store.append("exec_1", entries(0, 10))
+        info = store.append("exec_1", entries(10, 10))
+
+        assert info["lines"] == 20
+        assert info["segments"] > 1
+        files = sorted(f for f in os.listdir(tmp_path / "exec_1") if f.endswith(".gz"))
+        assert len(files) == info["segments"]
+        # 每次追加都是独立的gzip成员，拼接后仍可整体解压
+        with gzip.open(tmp_path / "exec_1" / files[0], "rb") as f:
+            assert f.read().startswith(b'{"level": "info", "message": "line 0"}')
+
+    def test_read_entries_pages_on_line_boundaries(self, store):
+        store.append("exec_1", entries(0, 20))
+
+        collected = []
+        offset = 0
+        while True:
+            page = store.read_entries("exec_1", offset, max_bytes=100)
+            collected.extend(page["entries"])
+            assert page["next_offset"] > offset or page["eof"]
+            offset = page["next_offset"]
+            if page["eof"]:
+                break
+
+        assert [entry["message"] for entry in collected] == [f"line {i}" for i in range(20)]
+
+    def test_read_entries_returns_single_oversized_line(self, store):
+        store.append("exec_1", [{"message": "x" * 500}, {"message": "short"}])
+
+        page = store.read_entries("exec_1", 0, max_bytes=10)
+
+        assert len(page["entries"]) == 1
+        assert page["entries"][0]["message"] == "x" * 500
+        assert not page["eof"]
+
+    def test_tail_spans_segments(self, store):
+        store.append("exec_1", entries(0, 20))
+
+        result = store.tail("exec_1", lines=7)
+
+        assert [entry["message"] for entry in result["entries"]] == [
+            f"line {i}" for i in range(13, 20)
+        ]
+        # 从tail返回的offset继续读取，结果与tail一致
+        page = store.read_entries("exec_1", result["offset"], max_bytes=10000)
+        assert page["entries"] == result["entries"]
+
+    def test_read_bytes_matches_logical_stream(self, store):
+        store.append("exec_1", entries(0, 20))
+        full = b"".join(store.iter_range("exec_1"))
+
+        assert len(full) == store.info("exec_1")["size"]
+        assert store.read_bytes("exec_1", 150, 120) == full[150:270]
+
+    def test_missing_log_and_delete(self, store):
+        assert store.info("exec_missing") is None
+        assert store.tail("exec_missing") is None
+
+        store.append("exec_1", entries(0, 3))
+        assert store.delete_many(["exec_1", "exec_missing"]) == 1
+        assert store.info("exec_1") is None
+
+    def test_execution_id_cannot_escape_root(self, store, tmp_path):
+        assert os.path.dirname(store.log_dir("../../etc")) == str(tmp_path)
+        with pytest.raises(ValueError):
+            store.log_dir("..")
@@ -0,0 +1,92 @@
+import os
+
+import pytest
+
+from backend.services import execution_video_store
+from backend.services.execution_video_store import (
+    ExecutionVideoStore,
+    KeyframeUnavailableError,
+    validate_capture_mode,
+)
+
+MARKERS = [
+    {"step_index": 1, "start_ms": 1200, "end_ms": 2500},
+    {"step_index": 0, "start_ms": 100, "end_ms": 1100},
+]
+
+
+class TestExecutionVideoStore:
+    """Test cases for ExecutionVideoStore"""
+
+    @pytest.fixture
+    def store(self, tmp_path):
+        return ExecutionVideoStore(str(tmp_path))
+
+    def test_save_sorts_markers_and_reports_info(self, store):
+        info = store.save("exec_1", b"webm-bytes", MARKERS, duration_ms=3000)
+
+        assert info["size"] == len(b"webm-bytes")
+        assert info["duration_ms"] == 3000
+        assert [m["step_index"] for m in info["steps"]] == [0, 1]
+        assert store.info("exec_1") == info
+        assert store.step_marker("exec_1", 1)["end_ms"] == 2500
+        assert store.step_marker("exec_1", 5) is None
+
+    def test_save_rejects_invalid_input(self, store):
+        with pytest.raises(ValueError):
+            store.save("exec_1", b"", MARKERS)
+        with pytest.raises(ValueError):
+            store.save("exec_1", b"data", [{"step_index": 0, "start_ms": 10}])
+        with pytest.raises(ValueError):
+            store.save("exec_1", b"data", [{"step_index": 0, "start_ms": 10, "end_ms": 5}])
+        with pytest.raises(ValueError):
+            store.video_dir("..")
+
+    def test_keyframe_is_extracted_once_and_cached(self, store, monkeypatch):
+        store.save("exec_1", b"webm-bytes", MARKERS)
+        calls = []
+
+        def fake_extract(video_path, offset_ms, output_path):
+            calls.append(offset_ms)
+            with open(output_path, "wb") as f:
+                f.write(b"jpeg")
+
+        monkeypatch.setattr(store, "_extract_frame", fake_extract)
+
+        path = store.keyframe("exec_1", 1)
+        assert store.keyframe("exec_1", 1) == path
+        # 关键帧取步骤结束时的画面，只抽取一次
+        assert calls == [2500]
+        with open(path, "rb") as f:
+            assert f.read() == b"jpeg"
+        assert store.keyframe("exec_1", 9) is None
+        assert store.keyframe("missing", 0) is None
+
+    def test_keyframe_requires_ffmpeg(self, store, monkeypatch):
+        store.save("exec_1", b"webm-bytes", MARKERS)
+        monkeypatch.setattr(execution_video_store.shutil, "which", lambda name: None)
+
+        with pytest.raises(KeyframeUnavailableError):
+            store.keyframe("exec_1", 0)
+
+    def test_resaving_discards_cached_keyframes(self, store, tmp_path):
+        store.save("exec_1", b"old", MARKERS)
+        cached = tmp_path / "exec_1" / "keyframe-0.jpg"
+        cached.write_bytes(b"stale")
+
+        store.save("exec_1", b"new", MARKERS)
+        assert not cached.exists()
+
+    def test_delete_many(self, store):
+        store.save("exec_1", b"a", MARKERS)
+        store.save("exec_2", b"b", MARKERS)
+
+        assert store.delete_many(["exec_1", "exec_2", "exec_3"]) == 2
+        assert store.info("exec_1") is None
+        assert not os.listdir(store.root_dir)
+
+    def test_validate_capture_mode(self):
+        assert validate_capture_mode(None) == "screenshot"
+        assert validate_capture_mode("video") == "video"
+        with pytest.raises(ValueError):
+            validate_capture_mode("gif")
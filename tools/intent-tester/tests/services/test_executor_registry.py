@@ -0,0 +1,294 @@
+import pytest
+import requests
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock
+
+from backend.services.executor_registry import ExecutorRegistry
+from backend.models import ExecutionHistory, ExecutorNode
+
+
+@pytest.fixture
+def registry():
+    return ExecutorRegistry(heartbeat_timeout=30)
+
+
+class TestExecutorRegistry:
+    """Test cases for ExecutorRegistry service"""
+
+    def test_register_and_reregister_node(self, db_session, registry):
+        """Re-registering a node refreshes its url and capacity"""
+        registry.register_node("node-a", "http://a:3001/", total_slots=2)
+        node = registry.register_node("node-a", "http://a2:3001", total_slots=4)
+
+        assert ExecutorNode.query.count() == 1
+        assert node.server_url == "http://a2:3001"
+        assert node.total_slots == 4
+        assert node.free_slots == 4
+        assert node.status == "active"
+
+    def test_register_rejects_invalid_input(self, db_session, registry):
+        with pytest.raises(ValueError):
+            registry.register_node("", "http://a:3001")
+        with pytest.raises(ValueError):
+            registry.register_node("node-a", "http://a:3001", total_slots=0)
+
+    def test_select_node_prefers_most_headroom(self, db_session, registry):
+        """The node with the most free capacity (after load) is selected"""
+        registry.register_node("busy", "http://busy:3001", total_slots=4)
+        registry.register_node("idle", "http://idle:3001", total_slots=4)
+        registry.heartbeat("busy", free_slots=1, cpu_percent=20)
+        registry.heartbeat("idle", free_slots=3, cpu_percent=20)
+
+        assert registry.select_node().node_id == "idle"
+
+        # 高CPU负载会降低剩余容量分数
+        registry.heartbeat("idle", free_slots=3, cpu_percent=95)
+        assert registry.select_node().node_id == "busy"
+
+    def test_select_node_skips_draining_and_full_nodes(self, db_session, registry):
+        registry.register_node("full", "http://full:3001", total_slots=1)
+        registry.register_node("drain", "http://drain:3001", total_slots=2)
+        registry.heartbeat("full", free_slots=0)
+        registry.drain_node("drain")
+
+        assert registry.select_node() is None
+
+        registry.resume_node("drain")
+        assert registry.select_node().node_id == "drain"
+
+    def test_drain_completes_when_node_is_idle(self, db_session, registry):
+        registry.register_node("node-a", "http://a:3001", total_slots=2)
+        registry.heartbeat("node-a", free_slots=1)
+
+        assert registry.drain_node("node-a").status == "draining"
+        assert registry.heartbeat("node-a", free_slots=2).status == "drained"
+
+    def test_reap_stale_nodes_requeues_executions(
+        self, db_session, registry, test_data_manager
+    ):
+        """Executions on a node that stopped heartbeating go back to the queue"""
+        registry.register_node("node-a", "http://a:3001", total_slots=2)
+        execution = test_data_manager.create_execution({"status": "running"})
+        record = ExecutionHistory.query.filter_by(
+            execution_id=execution.execution_id
+        ).first()
+        record.executor_node_id = "node-a"
+        record.dispatched_at = datetime.utcnow()
+        db_session.commit()
+
+        requeued = registry.reap_stale_nodes(now=datetime.utcnow() + timedelta(seconds=60))
+
+        assert requeued == [execution.execution_id]
+        record = ExecutionHistory.query.filter_by(
+            execution_id=execution.execution_id
+        ).first()
+        assert record.status == "pending"
+        assert record.executor_node_id is None
+        assert record.requeue_count == 1
+        assert ExecutorNode.query.filter_by(node_id="node-a").first().status == "offline"
+
+    def test_dispatch_pending_assigns_nodes(
+        self, db_session, registry, test_data_manager, mocker
+    ):
+        """Pending executions are sent to nodes until capacity runs out"""
+        post = mocker.patch(
+            "backend.services.executor_registry.requests.post",
+            return_value=MagicMock(status_code=200),
+        )
+        registry.register_node("node-a", "http://a:3001", total_slots=1)
+        testcase = test_data_manager.create_testcase()
+        first = test_data_manager.create_execution({"test_case_id": testcase.id})
+        test_data_manager.create_execution({"test_case_id": testcase.id})
+
+        dispatched = registry.dispatch_pending()
+
+        assert dispatched == [
+            {"execution_id": first.execution_id, "node_id": "node-a"}
+        ]
+        payload = post.call_args.kwargs["json"]
+        assert post.call_args.args[0] == "http://a:3001/api/execute-testcase"
+        assert payload["execution_id"] == first.execution_id
+        assert payload["testcase"]["id"] == testcase.id
+        assert ExecutionHistory.query.filter_by(executor_node_id="node-a").count() == 1
+
+    def test_unreachable_node_marked_offline(
+        self, db_session, registry, test_data_manager, mocker
+    ):
+        """Only connection failures are treated as node loss"""
+        mocker.patch(
+            "backend.services.executor_registry.requests.post",
+            side_effect=requests.exceptions.ConnectionError("refused"),
+        )
+        registry.register_node("node-a", "http://a:3001", total_slots=1)
+        test_data_manager.create_execution()
+
+        assert registry.dispatch_pending() == []
+        assert ExecutorNode.query.filter_by(node_id="node-a").first().status == "offline"
+        assert ExecutionHistory.query.filter_by(status="pending").count() == 1
+
+    def test_delete_event_logs_notifies_live_nodes(self, db_session, registry, mocker):
+        """Cleaned-up executions have their event logs removed on every reachable node"""
+        post = mocker.patch(
+            "backend.services.executor_registry.requests.post",
+            side_effect=lambda url, **kwargs: (
+                MagicMock(json=lambda: {"deleted": 1})
+                if url.startswith("http://a")
+                else MagicMock(raise_for_status=MagicMock(side_effect=requests.HTTPError("404")))
+            ),
+        )
+        registry.register_node("node-a", "http://a:3001", total_slots=1)
+        registry.register_node("node-b", "http://b:3001", total_slots=1)
+        registry.register_node("node-c", "http://c:3001", total_slots=1)
+        ExecutorNode.query.filter_by(node_id="node-c").first().status = "offline"
+
+        assert registry.delete_event_logs(["exec-1", "exec-2"]) == 1
+        assert [c.args[0] for c in post.call_args_list] == [
+            "http://a:3001/api/execution-events/delete",
+            "http://b:3001/api/execution-events/delete",
+        ]
+        assert post.call_args.kwargs["json"] == {"execution_ids": ["exec-1", "exec-2"]}
+        assert registry.delete_event_logs([]) == 0
+
+    def test_rejecting_node_is_skipped_for_the_round(
+        self, db_session, registry, test_data_manager, mocker
+    ):
+        """A 503 (draining / no free slot) leaves the node online and tries the next node"""
+        mocker.patch(
+            "backend.services.executor_registry.requests.post",
+            side_effect=lambda url, **kwargs: MagicMock(
+                status_code=503 if url.startswith("http://a") else 200
+            ),
+        )
+        registry.register_node("node-a", "http://a:3001", total_slots=4)
+        registry.register_node("node-b", "http://b:3001", total_slots=1)
+        testcase = test_data_manager.create_testcase()
+        first = test_data_manager.create_execution({"test_case_id": testcase.id})
+        test_data_manager.create_execution({"test_case_id": testcase.id})
+
+        assert registry.dispatch_pending() == [
+            {"execution_id": first.execution_id, "node_id": "node-b"}
+        ]
+        assert ExecutorNode.query.filter_by(node_id="node-a").first().status == "active"
+        assert ExecutionHistory.query.filter_by(
+            status="pending", executor_node_id=None
+        ).count() == 1
+
+    def test_dispatch_to_draining_node_keeps_running_executions(
+        self, db_session, registry, test_data_manager, mocker
+    ):
+        """A node that started draining before the registry heard about it keeps its runs"""
+        response = MagicMock(status_code=503)
+        response.json.return_value = {"success": False, "node_status": "draining"}
+        mocker.patch(
+            "backend.services.executor_registry.requests.post", return_value=response
+        )
+        registry.register_node("node-a", "http://a:3001", total_slots=2)
+        testcase = test_data_manager.create_testcase()
+        running = test_data_manager.create_execution(
+            {"test_case_id": testcase.id, "status": "running"}
+        )
+        record = ExecutionHistory.query.filter_by(execution_id=running.execution_id).first()
+        record.executor_node_id = "node-a"
+        record.dispatched_at = datetime.utcnow()
+        db_session.commit()
+        registry.heartbeat("node-a", free_slots=1, running_executions=[running.execution_id])
+        queued = test_data_manager.create_execution({"test_case_id": testcase.id})
+
+        assert registry.dispatch_pending() == []
+
+        record = ExecutionHistory.query.filter_by(execution_id=running.execution_id).first()
+        assert record.status == "running"
+        assert record.executor_node_id == "node-a"
+        assert record.requeue_count in (None, 0)
+        assert ExecutorNode.query.filter_by(node_id="node-a").first().status == "draining"
+        queued_record = ExecutionHistory.query.filter_by(execution_id=queued.execution_id).first()
+        assert queued_record.status == "pending" and queued_record.executor_node_id is None
+
+    def test_heartbeat_reclaims_requeued_executions_still_running(
+        self, db_session, registry, test_data_manager
+    ):
+        """A node coming back keeps the runs it still reports instead of running them twice"""
+        registry.register_node("node-a", "http://a:3001", total_slots=2)
+        execution = test_data_manager.create_execution({"status": "running"})
+        record = ExecutionHistory.query.filter_by(execution_id=execution.execution_id).first()
+        record.executor_node_id = "node-a"
+        record.dispatched_at = datetime.utcnow()
+        db_session.commit()
+        registry.reap_stale_nodes(now=datetime.utcnow() + timedelta(seconds=60))
+
+        node = registry.heartbeat(
+            "node-a", free_slots=1, running_executions=[execution.execution_id]
+        )
+
+        assert node.status == "active"
+        record = ExecutionHistory.query.filter_by(execution_id=execution.execution_id).first()
+        assert record.executor_node_id == "node-a"
+        assert registry._next_pending_executions(10) == []
+
+    def test_heartbeat_requeues_dispatches_the_node_never_started(
+        self, db_session, registry, test_data_manager
+    ):
+        registry.register_node("node-a", "http://a:3001", total_slots=2)
+        execution = test_data_manager.create_execution()
+        record = ExecutionHistory.query.filter_by(execution_id=execution.execution_id).first()
+        record.executor_node_id = "node-a"
+        record.dispatched_at = datetime.utcnow() - timedelta(seconds=60)
+        db_session.commit()
+
+        registry.heartbeat("node-a", free_slots=2, running_executions=[])
+
+        record = ExecutionHistory.query.filter_by(execution_id=execution.execution_id).first()
+        assert record.executor_node_id is None
+        assert record.requeue_count == 1
+
+    def test_release_node_requeues_unfinished_executions(
+        self, db_session, registry, test_data_manager
+    ):
+        """A node exiting after a drain timeout hands its executions back to the queue"""
+        registry.register_node("node-a", "http://a:3001", total_slots=2)
+        execution = test_data_manager.create_execution({"status": "running"})
+        record = ExecutionHistory.query.filter_by(
+            execution_id=execution.execution_id
+        ).first()
+        record.executor_node_id = "node-a"
+        db_session.commit()
+
+        registry.drain_node("node-a")
+        assert registry.release_node("node-a") == [execution.execution_id]
+        assert ExecutorNode.query.filter_by(node_id="node-a").first().status == "offline"
+        assert ExecutionHistory.query.filter_by(status="pending").count() == 1
+
+    def test_capacity_reports_backlog_and_waits(
+        self, db_session, registry, test_data_manager, monkeypatch
+    ):
+        monkeypatch.setenv("EXECUTOR_TARGET_DRAIN_SECONDS", "60")
+        registry.register_node("node-a", "http://a:3001", total_slots=2)
+        testcase = test_data_manager.create_testcase()
+        now = datetime.utcnow()
+
+        dispatched = test_data_manager.create_execution(
+            {"test_case_id": testcase.id, "status": "running"}
+        )
+        record = ExecutionHistory.query.filter_by(
+            execution_id=dispatched.execution_id
+        ).first()
+        record.executor_node_id = "node-a"
+        record.created_at = now - timedelta(seconds=30)
+        record.dispatched_at = now - timedelta(seconds=10)
+        record.predicted_duration = 40
+        for _ in range(3):
+            queued = test_data_manager.create_execution({"test_case_id": testcase.id})
+            ExecutionHistory.query.filter_by(
+                execution_id=queued.execution_id
+            ).first().predicted_duration = 60
+        db_session.commit()
+
+        capacity = registry.capacity(now=now)
+
+        assert capacity["queued"] == 3
+        assert capacity["running"] == 1
+        assert capacity["total_slots"] == 2
+        assert capacity["avg_queue_wait_seconds"] == 20
+        assert capacity["backlog_seconds"] == 210
+        assert capacity["predicted_drain_seconds"] == 105
+        assert capacity["desired_slots"] == 4
@@ -0,0 +1,118 @@
+import uuid
+from collections import Counter
+from datetime import datetime, timedelta
+
+import pytest
+
+from backend.models import db, ExecutionHistory
+from backend.services.executor_registry import ExecutorRegistry
+from backend.services.fair_share import FairShareScheduler, resolve_tenant
+
+
+class TestFairShareScheduler:
+    """Test cases for weighted fair queuing across tenants"""
+
+    @pytest.fixture
+    def scheduler(self):
+        return FairShareScheduler()
+
+    @pytest.fixture
+    def testcase_id(self, test_data_manager):
+        return test_data_manager.create_testcase({"name": "公平调度"}).id
+
+    def _queue(
+        self, db_session, testcase_id, tenant, count, created_at=None, status="pending", **fields
+    ):
+        created_at = created_at or datetime.utcnow()
+        executions = []
+        for position in range(count):
+            execution = ExecutionHistory(
+                execution_id=str(uuid.uuid4()),
+                test_case_id=testcase_id,
+                status=status,
+                start_time=created_at,
+                created_at=created_at,
+                queue_position=position,
+                tenant=tenant,
+                predicted_duration=60,
+                **fields,
+            )
+            db.session.add(execution)
+            executions.append(execution)
+        db_session.commit()
+        return executions
+
+    def test_single_run_is_not_stuck_behind_large_suite(
+        self, db_session, scheduler, testcase_id
+    ):
+        earlier = datetime.utcnow() - timedelta(minutes=5)
+        suite = self._queue(db_session, testcase_id, "team-a", 100, created_at=earlier)
+        (adhoc,) = self._queue(db_session, testcase_id, "team-b", 1)
+
+        ordered = scheduler.order_pending(limit=3)
+
+        assert ordered[:2] == [suite[0], adhoc]
+        # 同一租户内保持套件的排队顺序
+        assert ordered[2] == suite[1]
+
+    def test_weights_split_slots(self, db_session, scheduler, testcase_id):
+        scheduler.set_share("team-a", {"weight": 2})
+        self._queue(db_session, testcase_id, "team-a", 10)
+        self._queue(db_session, testcase_id, "team-b", 10)
+
+        counts = Counter(e.tenant for e in scheduler.order_pending(limit=6))
+        assert counts == {"team-a": 4, "team-b": 2}
+
+    def test_idle_shares_are_borrowed_up_to_cap(self, db_session, scheduler, testcase_id):
+        scheduler.set_share("team-b", {"weight": 5})
+        self._queue(db_session, testcase_id, "team-a", 5)
+        assert len(scheduler.order_pending()) == 5
+
+        scheduler.set_share("team-a", {"max_concurrency": 2})
+        self._queue(
+            db_session, testcase_id, "team-a", 1, status="running", executor_node_id="node-a"
+        )
+        assert len(scheduler.order_pending()) == 1
+
+    def test_queue_status_estimates_start_times(
+        self, db_session, scheduler, testcase_id
+    ):
+        ExecutorRegistry().register_node("node-a", "http://a:3001", total_slots=2)
+        earlier = datetime.utcnow() - timedelta(minutes=5)
+        self._queue(db_session, testcase_id, "team-a", 4, created_at=earlier)
+        self._queue(db_session, testcase_id, "team-b", 2)
+
+        status = scheduler.queue_status()
+
+        assert status["capacity"] == 2
+        waits = {
+            (item["tenant"], item["tenant_position"]): item["estimated_wait_seconds"]
+            for item in status["items"]
+        }
+        assert waits[("team-a", 1)] == 0 and waits[("team-b", 1)] == 0
+        assert waits[("team-a", 2)] == 60 and waits[("team-b", 2)] == 60
+        assert waits[("team-a", 4)] == 120
+
+        tenants = {t["tenant"]: t for t in status["tenants"]}
+        assert tenants["team-a"]["fair_slots"] == 1.0
+        assert tenants["team-b"]["queued"] == 2
+
+        only_b = scheduler.queue_status(tenant="team-b")
+        assert [item["tenant_position"] for item in only_b["items"]] == [1, 2]
+        assert [t["tenant"] for t in only_b["tenants"]] == ["team-b"]
+
+    def test_capped_tenant_waits_for_own_slots(self, db_session, scheduler, testcase_id):
+        ExecutorRegistry().register_node("node-a", "http://a:3001", total_slots=4)
+        scheduler.set_share("team-a", {"max_concurrency": 1})
+        self._queue(db_session, testcase_id, "team-a", 3)
+
+        waits = [item["estimated_wait_seconds"] for item in scheduler.queue_status()["items"]]
+        assert waits == [0, 60, 120]
+
+    def test_resolve_tenant(self, db_session, test_data_manager):
+        assert resolve_tenant({}) == "default"
+        assert resolve_tenant({"tenant": " payments "}) == "payments"
+        with pytest.raises(ValueError):
+            resolve_tenant({"tenant": "x" * 101})
+        with pytest.raises(ValueError):
+            FairShareScheduler.set_share("team-a", {"weight": 0})
@@ -0,0 +1,84 @@
+import json
+import pytest
+from datetime import datetime, timedelta
+
+from backend.services.fixture_service import FixtureService
+from backend.models import SetupFixture, TestCase
+from backend.models.models import steps_revision
+
+LOGIN_STEPS = [
+    {"action": "goto", "params": {"url": "https://example.com/login"}},
+    {"action": "ai_input", "params": {"text": "admin", "locate": "用户名输入框"}},
+]
+
+
+class TestFixtureService:
+    """Test cases for FixtureService"""
+
+    @pytest.fixture
+    def service(self):
+        return FixtureService()
+
+    @pytest.fixture
+    def fixture(self, db_session, service):
+        return service.create_fixture({"name": "登录", "steps": LOGIN_STEPS})
+
+    def test_resolve_without_snapshot_returns_steps(self, service, fixture):
+        resolved = service.resolve(fixture)
+
+        assert resolved["snapshot"] is None
+        assert resolved["steps"] == LOGIN_STEPS
+        assert resolved["revision"] == fixture.revision
+        assert fixture.hit_count == 0
+
+    def test_resolve_with_snapshot_counts_hit(self, service, fixture):
+        service.store_snapshot(
+            fixture, {"cookies": [{"name": "sid"}]}, "https://example.com/home", fixture.revision
+        )
+
+        resolved = service.resolve(fixture)
+
+        assert resolved["snapshot"]["storage_state"] == {"cookies": [{"name": "sid"}]}
+        assert resolved["snapshot"]["url"] == "https://example.com/home"
+        assert fixture.hit_count == 1
+
+    def test_snapshot_expires_after_ttl(self, service, fixture):
+        service.store_snapshot(fixture, {"cookies": []}, None, fixture.revision)
+        fixture.captured_at = datetime.utcnow() - timedelta(seconds=fixture.ttl_seconds + 1)
+
+        assert not fixture.has_valid_snapshot()
+        assert service.resolve(fixture)["snapshot"] is None
+
+    def test_step_change_invalidates_snapshot(self, service, fixture):
+        service.store_snapshot(fixture, {"cookies": []}, None, fixture.revision)
+        old_revision = fixture.revision
+
+        service.update_fixture(fixture, {"steps": LOGIN_STEPS[:1]})
+
+        assert fixture.revision != old_revision
+        assert fixture.snapshot_state is None
+        assert not fixture.has_valid_snapshot()
+
+    def test_description_change_keeps_snapshot(self, service, fixture):
+        service.store_snapshot(fixture, {"cookies": []}, None, fixture.revision)
+
+        service.update_fixture(fixture, {"description": "管理员登录"})
+
+        assert fixture.has_valid_snapshot()
+
+    def test_revision_ignores_key_order_and_matches_testcase(self, service, fixture):
+        reordered = json.dumps([dict(reversed(list(step.items()))) for step in LOGIN_STEPS])
+
+        assert steps_revision(reordered) == fixture.revision
+        assert TestCase(name="登录", steps=json.dumps(LOGIN_STEPS)).revision == fixture.revision
+
+    def test_stale_revision_snapshot_rejected(self, service, fixture):
+        with pytest.raises(ValueError):
+            service.store_snapshot(fixture, {"cookies": []}, None, "stale-revision")
+        assert SetupFixture.query.get(fixture.id).snapshot_state is None
+
+    def test_create_validates_steps_and_ttl(self, db_session, service):
+        with pytest.raises(ValueError):
+            service.create_fixture({"name": "空夹具", "steps": []})
+        with pytest.raises(ValueError):
+            service.create_fixture({"name": "无效TTL", "steps": LOGIN_STEPS, "ttl_seconds": 0})
@@ -0,0 +1,81 @@
+import json
+from datetime import datetime, timedelta
+
+from backend.services.model_usage import aggregate_usage, summarize_usage
+
+
+def usage(fast_steps, max_steps, escalations=0):
+    return {
+        "tiers": {
+            "fast": {"model": "qwen-vl-plus", "steps": fast_steps, "failures": 1, "latency_ms": fast_steps * 800, "cost": fast_steps * 0.001},
+            "max": {"model": "qwen-vl-max", "steps": max_steps, "failures": 0, "latency_ms": max_steps * 3000, "cost": max_steps * 0.01},
+        },
+        "escalations": escalations,
+    }
+
+
+class TestModelUsage:
+    """Test cases for model tier usage reporting"""
+
+    def test_summarize_usage_normalizes_report(self):
+        summary = summarize_usage(
+            {
+                "tiers": {
+                    "fast": {"model": "m", "steps": 3, "failures": -1, "latency_ms": "x", "cost": 0.5},
+                    "huge": {"steps": 1},
+                },
+                "escalations": 2,
+            }
+        )
+
+        assert summary == {
+            "tiers": {"fast": {"model": "m", "steps": 3, "failures": 0, "latency_ms": 0, "cost": 0.5}},
+            "escalations": 2,
+        }
+        assert summarize_usage(None) is None
+        assert summarize_usage({"tiers": {"huge": {}}}) is None
+
+    def test_aggregate_usage_sums_recent_executions(self, create_execution_history):
+        create_execution_history(result_summary=json.dumps({"model_usage": usage(4, 2, 1)}))
+        create_execution_history(result_summary=json.dumps({"model_usage": usage(6, 3)}))
+        create_execution_history(result_summary=json.dumps({"total": 1}))
+        create_execution_history(
+            start_time=datetime.utcnow() - timedelta(days=30),
+            result_summary=json.dumps({"model_usage": usage(100, 100)}),
+        )
+
+        report = aggregate_usage(days=7)
+
+        assert report["executions"] == 2
+        assert report["escalations"] == 1
+        fast = report["tiers"]["fast"]
+        assert fast["steps"] == 10
+        assert fast["failure_rate"] == 0.2
+        assert fast["avg_latency_ms"] == 800
+        assert fast["models"] == ["qwen-vl-plus"]
+        assert report["tiers"]["max"]["cost"] == 0.05
+
+    def test_summarize_usage_keeps_payload_stats(self):
+        report = usage(1, 0)
+        report["payload"] = {"screenshots": 2, "optimized": 2, "cropped": -1, "original_bytes": 4000, "sent_bytes": 1000}
+
+        assert summarize_usage(report)["payload"] == {
+            "screenshots": 2,
+            "optimized": 2,
+            "cropped": 0,
+            "original_bytes": 4000,
+            "sent_bytes": 1000,
+        }
+        assert "payload" not in summarize_usage(usage(1, 0))
+
+    def test_aggregate_usage_reports_payload_reduction(self, create_execution_history):
+        with_payload = usage(2, 0)
+        with_payload["payload"] = {"screenshots": 2, "optimized": 2, "cropped": 1, "original_bytes": 4000, "sent_bytes": 1000}
+        create_execution_history(result_summary=json.dumps({"model_usage": with_payload}))
+        create_execution_history(result_summary=json.dumps({"model_usage": usage(1, 1)}))
+
+        payload = aggregate_usage(days=7)["payload"]
+
+        assert payload["screenshots"] == 2
+        assert payload["cropped"] == 1
+        assert payload["byte_reduction"] == 0.75
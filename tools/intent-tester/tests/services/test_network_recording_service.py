@@ -0,0 +1,94 @@
+import io
+import json
+import zipfile
+
+import pytest
+
+from backend.services.network_recording_service import NetworkRecordingService
+
+
+def har_archive(urls):
+    har = {
+        "log": {
+            "version": "1.2",
+            "entries": [{"request": {"method": "GET", "url": url}} for url in urls],
+        }
+    }
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as bundle:
+        bundle.writestr("har.har", json.dumps(har))
+    return buffer.getvalue()
+
+
+class TestNetworkRecordingService:
+    """Test cases for NetworkRecordingService"""
+
+    @pytest.fixture
+    def service(self):
+        return NetworkRecordingService()
+
+    def test_validate_config_normalizes(self, service):
+        assert service.validate_config(None) is None
+        assert service.validate_config({"mode": "off"}) is None
+        assert service.validate_config({"mode": "replay", "passthrough": ["**/api/**"]}) == {
+            "mode": "replay",
+            "passthrough": ["**/api/**"],
+            "not_found": "fallback",
+        }
+
+    @pytest.mark.parametrize(
+        "config",
+        [
+            "replay",
+            {"mode": "mock"},
+            {"mode": "replay", "passthrough": "**/api/**"},
+            {"mode": "replay", "not_found": "ignore"},
+            {"mode": "record", "url_filter": ""},
+        ],
+    )
+    def test_validate_config_rejects_invalid(self, service, config):
+        with pytest.raises(ValueError):
+            service.validate_config(config)
+
+    def test_inspect_archive_counts_entries_and_hosts(self, service):
+        summary = service.inspect_archive(
+            har_archive(
+                [
+                    "https://staging.example.com/",
+                    "https://cdn.example.com/app.js",
+                    "https://staging.example.com/api/user",
+                ]
+            )
+        )
+
+        assert summary == {
+            "entry_count": 3,
+            "hosts": ["cdn.example.com", "staging.example.com"],
+        }
+
+    def test_inspect_archive_rejects_invalid(self, service):
+        with pytest.raises(ValueError, match="zip"):
+            service.inspect_archive(b"not a zip")
+
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w") as bundle:
+            bundle.writestr("readme.txt", "x")
+        with pytest.raises(ValueError, match="HAR"):
+            service.inspect_archive(buffer.getvalue())
+
+    def test_store_recording_replaces_existing(self, service, db_session, create_testcase_with_steps):
+        testcase = create_testcase_with_steps()
+
+        first_checksum = service.store_recording(
+            testcase, har_archive(["https://a.example.com/"]), "exec_1"
+        ).checksum
+        second = service.store_recording(
+            testcase, har_archive(["https://a.example.com/", "https://a.example.com/x"]), "exec_2"
+        )
+
+        recording = service.get_recording(testcase)
+        assert recording.id == second.id
+        assert recording.entry_count == 2
+        assert recording.source_execution_id == "exec_2"
+        # 替换后内容标识变化，执行节点不会继续使用旧的本地缓存
+        assert recording.checksum != first_checksum
@@ -0,0 +1,40 @@
+import pytest
+
+from midscene_framework.page_change import PageFingerprint, hamming_distance
+
+
+def fingerprint(data):
+    return PageFingerprint.from_dict(data) if data is not None else None
+
+
+class TestPageChange:
+    """Test cases for page fingerprint change detection"""
+
+    def test_hamming_distance(self):
+        assert hamming_distance("0000000000000000", "0000000000000000") == 0
+        assert hamming_distance("0000000000000000", "000000000000000f") == 4
+        assert hamming_distance("ffff", "0000") == 16
+        assert hamming_distance("", "0000") == 64
+
+    def test_first_fingerprint_is_a_change(self):
+        assert PageFingerprint("0" * 16, "abc").changed_since(None)
+
+    def test_small_visual_noise_is_not_a_change(self):
+        previous = PageFingerprint("0" * 16, "abc")
+        spinner_moved = PageFingerprint("0" * 15 + "3", "abc")
+
+        assert not spinner_moved.changed_since(previous)
+
+    def test_dom_or_large_visual_change_is_a_change(self):
+        previous = PageFingerprint("0" * 16, "abc")
+
+        assert PageFingerprint("0" * 16, "abd").changed_since(previous)
+        assert PageFingerprint("f" * 4 + "0" * 12, "abc").changed_since(previous)
+
+    def test_matches_shared_cases(self, page_change_cases):
+        """Same verdicts as the executor's JS page-change check"""
+        for a, b, expected in page_change_cases["hamming_distance"]:
+            assert hamming_distance(a, b) == expected, (a, b)
+        for case in page_change_cases["changed"]:
+            current = fingerprint(case["current"])
+            assert current.changed_since(fingerprint(case["previous"])) == case["expected"], case
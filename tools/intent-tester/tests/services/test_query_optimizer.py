@@ -98,7 +98,7 @@ class TestQueryOptimizer:
 
 
 
-    def test_cleanup_old_data(self, db_session, test_data_manager):
+    def test_cleanup_old_data(self, db_session, test_data_manager, mocker):
         """Test data cleanup"""
         # Create old execution (> 90 days)
         old_date = datetime.utcnow() - timedelta(days=91)
@@ -131,10 +131,17 @@ class TestQueryOptimizer:
         )
         
         # Run cleanup
+        delete_event_logs = mocker.patch(
+            "backend.services.executor_registry.ExecutorRegistry.delete_event_logs",
+            return_value=1,
+        )
         stats = QueryOptimizer.cleanup_old_data(days_to_keep=90)
         
         assert stats["executions_deleted"] == 1
         assert stats["step_executions_deleted"] == 1
+        # Event logs on executor nodes are removed together with the records
+        delete_event_logs.assert_called_once_with(["old-exec-001"])
+        assert stats["event_logs_deleted"] == 1
         
         # Verify old execution is gone
         assert db_session.query(ExecutionHistory).filter_by(execution_id="old-exec-001").first() is None
@@ -0,0 +1,71 @@
+import json
+
+import pytest
+
+from backend.services.replay_trace_service import ReplayTraceService
+from backend.models import ReplayTrace
+
+TAP_ENTRY = {
+    "action": "ai_tap",
+    "selectors": ["#login", "button:has-text(\"登录\")"],
+    "point": {"x": 120, "y": 48},
+    "tag": "button",
+    "text": "登录",
+}
+
+
+class TestReplayTraceService:
+    """Test cases for ReplayTraceService"""
+
+    @pytest.fixture
+    def service(self):
+        return ReplayTraceService()
+
+    @pytest.fixture
+    def testcase(self, create_testcase_with_steps):
+        return create_testcase_with_steps(step_count=3)
+
+    def test_record_and_resolve(self, service, testcase):
+        trace = service.record(testcase, {"1": TAP_ENTRY}, testcase.revision, "exec_1")
+
+        resolved = service.resolve(testcase)
+        assert resolved.id == trace.id
+        assert resolved.to_dict()["steps"]["1"]["selectors"] == TAP_ENTRY["selectors"]
+        assert resolved.to_dict()["valid"] is True
+
+    def test_record_accumulates_stats_for_same_revision(self, service, testcase):
+        service.record(testcase, {"1": TAP_ENTRY}, testcase.revision, replayed=0, fallbacks=1)
+        trace = service.record(testcase, {"1": TAP_ENTRY}, testcase.revision, replayed=2, fallbacks=0)
+
+        assert trace.replay_count == 2
+        assert trace.fallback_count == 1
+        assert ReplayTrace.query.filter_by(test_case_id=testcase.id).count() == 1
+
+    def test_edit_invalidates_trace(self, service, testcase, db_session):
+        service.record(testcase, {"1": TAP_ENTRY}, testcase.revision)
+
+        steps = json.loads(testcase.steps)
+        steps[1]["description"] = "修改后的步骤"
+        testcase.steps = json.dumps(steps)
+        db_session.commit()
+
+        assert service.resolve(testcase) is None
+        assert ReplayTrace.query.filter_by(test_case_id=testcase.id).count() == 0
+
+    def test_record_rejects_stale_revision(self, service, testcase):
+        with pytest.raises(ValueError, match="不一致"):
+            service.record(testcase, {"1": TAP_ENTRY}, "stale")
+
+    @pytest.mark.parametrize(
+        "steps",
+        [
+            {},
+            {"9": TAP_ENTRY},
+            {"1": {**TAP_ENTRY, "action": "navigate"}},
+            {"1": {"action": "ai_tap", "selectors": []}},
+            {"1": {**TAP_ENTRY, "point": {"x": "a"}}},
+        ],
+    )
+    def test_record_validates_steps(self, service, testcase, steps):
+        with pytest.raises(ValueError):
+            service.record(testcase, steps, testcase.revision)
@@ -0,0 +1,88 @@
+import json
+
+import pytest
+
+from backend.models import ExecutionHistory, SuiteRun
+from backend.services.resource_policy import (
+    effective_policy,
+    merge_policies,
+    summarize_stats,
+    validate_policy,
+)
+
+
+class TestResourcePolicy:
+    """Test cases for resource policy validation and merging"""
+
+    def test_validate_policy_normalizes(self):
+        assert validate_policy(None) is None
+        assert validate_policy({}) is None
+        assert validate_policy(
+            {"block_resource_types": ["media", "font", "font"], "block_url_patterns": [" *analytics* "]}
+        ) == {
+            "block_resource_types": ["font", "media"],
+            "block_url_patterns": ["*analytics*"],
+            "allow_url_patterns": [],
+        }
+
+    @pytest.mark.parametrize(
+        "policy",
+        [
+            ["font"],
+            {"block_resource_types": ["document"]},
+            {"block_resource_types": "font"},
+            {"block_url_patterns": [""]},
+            {"allow_url_patterns": [1]},
+        ],
+    )
+    def test_validate_policy_rejects_invalid(self, policy):
+        with pytest.raises(ValueError):
+            validate_policy(policy)
+
+    def test_merge_unions_blocks_and_prefers_specific_allow_list(self):
+        suite = {
+            "block_resource_types": ["media"],
+            "block_url_patterns": ["*ads*"],
+            "allow_url_patterns": ["https://suite.example.com/*"],
+        }
+        testcase = {
+            "block_resource_types": ["font", "media"],
+            "block_url_patterns": [],
+            "allow_url_patterns": ["https://case.example.com/*"],
+        }
+
+        assert merge_policies(suite, testcase) == {
+            "block_resource_types": ["font", "media"],
+            "block_url_patterns": ["*ads*"],
+            "allow_url_patterns": ["https://case.example.com/*"],
+        }
+        assert merge_policies(None, None) is None
+
+    def test_effective_policy_includes_suite_run(self, db_session, create_testcase_with_steps):
+        testcase = create_testcase_with_steps(
+            resource_policy=json.dumps({"block_resource_types": ["font"]})
+        )
+        db_session.add(
+            SuiteRun(
+                suite_run_id="suite-1",
+                resource_policy=json.dumps({"block_url_patterns": ["*analytics*"]}),
+            )
+        )
+        db_session.commit()
+        execution = ExecutionHistory(suite_run_id="suite-1")
+
+        policy = effective_policy(execution, testcase)
+
+        assert policy["block_resource_types"] == ["font"]
+        assert policy["block_url_patterns"] == ["*analytics*"]
+        assert effective_policy(None, testcase)["block_url_patterns"] == []
+
+    def test_summarize_stats_ignores_invalid_values(self):
+        summary = summarize_stats(
+            {"requests_blocked": 3, "bytes_saved": -5, "blocked_by_type": {"font": 2}}
+        )
+
+        assert summary["requests_blocked"] == 3
+        assert summary["bytes_saved"] == 0
+        assert summary["blocked_by_type"] == {"font": 2}
+        assert summarize_stats("bad") is None
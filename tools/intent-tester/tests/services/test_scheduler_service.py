@@ -0,0 +1,173 @@
+import pytest
+from datetime import datetime, timedelta
+
+from backend.services.scheduler_service import ExecutionScheduler
+from backend.utils.cron_expression import CronExpression
+from backend.models import ExecutionHistory
+
+
+class TestCronExpression:
+    """Test cases for the cron expression parser"""
+
+    def test_next_after_daily(self):
+        cron = CronExpression("0 2 * * *")
+        assert cron.next_after(datetime(2024, 1, 1, 1, 59)) == datetime(2024, 1, 1, 2, 0)
+        assert cron.next_after(datetime(2024, 1, 1, 2, 0)) == datetime(2024, 1, 2, 2, 0)
+
+    def test_steps_ranges_and_lists(self):
+        cron = CronExpression("*/15 9-17 * * 1-5")
+        # 2024-01-06 是周六，下一次触发应是周一 09:00
+        assert cron.next_after(datetime(2024, 1, 5, 17, 50)) == datetime(2024, 1, 8, 9, 0)
+        assert cron.next_runs(datetime(2024, 1, 8, 9, 0), 2) == [
+            datetime(2024, 1, 8, 9, 15),
+            datetime(2024, 1, 8, 9, 30),
+        ]
+        assert CronExpression("0 0 1,15 * *").next_after(
+            datetime(2024, 1, 2)
+        ) == datetime(2024, 1, 15)
+
+    def test_day_of_month_or_weekday(self):
+        # 日和周同时受限时满足任意一个即触发；7 同样表示周日
+        cron = CronExpression("0 0 13 * 7")
+        assert cron.next_after(datetime(2024, 1, 1)) == datetime(2024, 1, 7)
+        assert cron.next_after(datetime(2024, 1, 7)) == datetime(2024, 1, 13)
+
+    def test_aliases(self):
+        assert CronExpression("@hourly").next_after(
+            datetime(2024, 1, 1, 10, 30)
+        ) == datetime(2024, 1, 1, 11, 0)
+
+    @pytest.mark.parametrize(
+        "expression", ["", "* * * *", "60 * * * *", "*/0 * * * *", "a * * * *", "5-1 * * * *"]
+    )
+    def test_invalid_expressions(self, expression):
+        with pytest.raises(ValueError):
+            CronExpression(expression)
+
+    def test_leap_day(self):
+        # 2月29日当天也能正常搜索触发时间
+        cron = CronExpression("*/5 * * * *")
+        assert list(
+            cron.iter_between(datetime(2028, 2, 29, 10), datetime(2028, 2, 29, 10, 15))
+        ) == [datetime(2028, 2, 29, 10, 0), datetime(2028, 2, 29, 10, 5), datetime(2028, 2, 29, 10, 10)]
+        assert CronExpression("0 0 29 2 *").next_after(
+            datetime(2024, 2, 29, 12)
+        ) == datetime(2028, 2, 29)
+
+    def test_never_firing_expression(self):
+        with pytest.raises(ValueError):
+            CronExpression("0 0 30 2 *").next_after(datetime(2024, 1, 1))
+
+
+class TestExecutionScheduler:
+    """Test cases for ExecutionScheduler service"""
+
+    @pytest.fixture
+    def scheduler(self):
+        return ExecutionScheduler(slot_seconds=60, slot_budget=2, misfire_grace_seconds=300)
+
+    def _create_suite(self, test_data_manager, count, category="Nightly"):
+        return [
+            test_data_manager.create_testcase({"name": f"Suite-{i}", "category": category})
+            for i in range(count)
+        ]
+
+    def test_jitter_is_deterministic_and_within_window(
+        self, db_session, scheduler, test_data_manager
+    ):
+        testcases = self._create_suite(test_data_manager, 5)
+        schedule = scheduler.create_schedule(
+            {"name": "nightly", "cron_expression": "0 2 * * *", "category": "Nightly",
+             "jitter_seconds": 600}
+        )
+
+        offsets = [scheduler.jitter_offset(schedule, tc.id) for tc in testcases]
+        assert offsets == [scheduler.jitter_offset(schedule, tc.id) for tc in testcases]
+        assert all(0 <= offset < 600 for offset in offsets)
+        assert len(set(offsets)) > 1
+
+    def test_plan_respects_slot_budget(self, db_session, scheduler, test_data_manager):
+        """Runs firing at the same time never exceed the per-slot budget"""
+        self._create_suite(test_data_manager, 7)
+        scheduler.create_schedule(
+            {"name": "nightly", "cron_expression": "0 2 * * *", "category": "Nightly",
+             "jitter_seconds": 0}
+        )
+
+        start = datetime(2024, 1, 1, 2, 0)
+        runs = scheduler.plan(start, start + timedelta(hours=1))
+        slots = scheduler.slot_load(start, start + timedelta(hours=1))
+
+        assert len(runs) == 7
+        assert all(slot["planned"] <= 2 for slot in slots)
+        assert [slot["planned"] for slot in slots] == [2, 2, 2, 1]
+        assert runs[-1]["planned_time"] == datetime(2024, 1, 1, 2, 3)
+        assert all(run["fire_time"] == start for run in runs)
+
+    def test_preview_lists_next_fire_times(self, db_session, scheduler, test_data_manager):
+        testcase = test_data_manager.create_testcase()
+        schedule = scheduler.create_schedule(
+            {"name": "hourly", "cron_expression": "@hourly", "test_case_id": testcase.id,
+             "jitter_seconds": 120}
+        )
+
+        previews = scheduler.preview(schedule, count=3, after=datetime(2024, 1, 1, 10, 30))
+
+        assert [item["fire_time"] for item in previews] == [
+            datetime(2024, 1, 1, 11, 0),
+            datetime(2024, 1, 1, 12, 0),
+            datetime(2024, 1, 1, 13, 0),
+        ]
+        offset = scheduler.jitter_offset(schedule, testcase.id)
+        assert previews[0]["runs"][0]["planned_time"] == datetime(2024, 1, 1, 11, 0) + timedelta(
+            seconds=offset
+        )
+
+    def test_tick_creates_pending_executions_once(
+        self, db_session, scheduler, test_data_manager
+    ):
+        testcases = self._create_suite(test_data_manager, 3)
+        schedule = scheduler.create_schedule(
+            {"name": "nightly", "cron_expression": "0 2 * * *", "category": "Nightly",
+             "jitter_seconds": 0}
+        )
+        schedule.created_at = datetime(2024, 1, 1)
+        db_session.commit()
+
+        now = datetime(2024, 1, 1, 2, 0, 30)
+        created = scheduler.tick(now)
+
+        # 预算为每槽2个，第三个用例顺延到下一个时间槽
+        assert len(created) == 2
+        assert scheduler.tick(now) == []
+
+        created_later = scheduler.tick(datetime(2024, 1, 1, 2, 1, 5))
+        assert len(created_later) == 1
+
+        executions = ExecutionHistory.query.filter_by(schedule_id=schedule.id).all()
+        assert sorted(e.test_case_id for e in executions) == sorted(tc.id for tc in testcases)
+        assert all(e.status == "pending" for e in executions)
+        assert all(e.scheduled_for == datetime(2024, 1, 1, 2, 0) for e in executions)
+
+    def test_tick_skips_fire_times_before_schedule_creation(
+        self, db_session, scheduler, test_data_manager
+    ):
+        testcase = test_data_manager.create_testcase()
+        schedule = scheduler.create_schedule(
+            {"name": "daily", "cron_expression": "0 2 * * *", "test_case_id": testcase.id,
+             "jitter_seconds": 0}
+        )
+        schedule.created_at = datetime(2024, 1, 1, 2, 1)
+        db_session.commit()
+
+        assert scheduler.tick(datetime(2024, 1, 1, 2, 2)) == []
+
+    def test_validation(self, db_session, scheduler):
+        with pytest.raises(ValueError):
+            scheduler.create_schedule({"name": "x", "cron_expression": "bad", "category": "c"})
+        with pytest.raises(ValueError):
+            scheduler.create_schedule({"name": "x", "cron_expression": "* * * * *"})
+        with pytest.raises(ValueError):
+            scheduler.create_schedule(
+                {"name": "x", "cron_expression": "* * * * *", "test_case_id": 99999}
+            )
@@ -0,0 +1,209 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from midscene_framework import (
+    DataExtractionMethod,
+    ExtractionRequest,
+    MidSceneDataExtractor,
+    PageFingerprint,
+    SingleFlight,
+)
+from midscene_framework.deadline import Deadline, DeadlineExceeded
+
+
+class FakeClient:
+    """同一页面上的客户端：aiString调用在线程中阻塞一段时间"""
+
+    def __init__(self, dom="dom-1", delay=0.2, error=None):
+        self.dom = dom
+        self.delay = delay
+        self.error = error
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def page_fingerprint(self):
+        return PageFingerprint("0" * 16, self.dom, url="http://example.com/")
+
+    def ai_string(self, query, options=None):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return f"answer to {query}"
+
+
+def string_request(query="标题是什么"):
+    return ExtractionRequest(
+        method=DataExtractionMethod.AI_STRING,
+        params={"query": query},
+        retry_config={"max_attempts": 1},
+    )
+
+
+class TestSingleFlight:
+    """Test cases for deduplicating identical concurrent model calls"""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_identical_calls_share_one_request(self):
+        singleflight = SingleFlight()
+        client = FakeClient()
+        extractors = [
+            MidSceneDataExtractor(midscene_client=client, singleflight=singleflight)
+            for _ in range(5)
+        ]
+
+        results = await asyncio.gather(
+            *(extractor.extract_data(string_request()) for extractor in extractors)
+        )
+
+        assert client.calls == 1
+        assert all(r.success and r.data == "answer to 标题是什么" for r in results)
+        assert sum(r.metadata["deduplicated"] for r in results) == 4
+        assert singleflight.get_stats() == {
+            "calls": 5,
+            "executed": 1,
+            "deduplicated": 4,
+            "dedup_rate": 0.8,
+            "inflight": 0,
+        }
+
+    @pytest.mark.asyncio
+    async def test_different_pages_or_params_are_not_shared(self):
+        singleflight = SingleFlight()
+        same_page = FakeClient(delay=0.1)
+        other_page = FakeClient(dom="dom-2", delay=0.1)
+
+        await asyncio.gather(
+            MidSceneDataExtractor(same_page, singleflight=singleflight).extract_data(string_request()),
+            MidSceneDataExtractor(same_page, singleflight=singleflight).extract_data(string_request("价格")),
+            MidSceneDataExtractor(other_page, singleflight=singleflight).extract_data(string_request()),
+        )
+
+        assert same_page.calls == 2
+        assert other_page.calls == 1
+        assert singleflight.get_stats()["deduplicated"] == 0
+
+    @pytest.mark.asyncio
+    async def test_completed_calls_are_not_cached(self):
+        singleflight = SingleFlight()
+        client = FakeClient(delay=0)
+        extractor = MidSceneDataExtractor(client, singleflight=singleflight)
+
+        await extractor.extract_data(string_request())
+        await extractor.extract_data(string_request())
+
+        assert client.calls == 2
+        assert singleflight.inflight() == 0
+
+    @pytest.mark.asyncio
+    async def test_failure_is_shared_with_waiters(self):
+        singleflight = SingleFlight()
+        client = FakeClient(error=ValueError("模型返回格式错误"))
+
+        results = await asyncio.gather(
+            *(
+                MidSceneDataExtractor(client, singleflight=singleflight).extract_data(string_request())
+                for _ in range(3)
+            )
+        )
+
+        assert client.calls == 1
+        assert all(not r.success and "模型返回格式错误" in r.error for r in results)
+
+    @pytest.mark.asyncio
+    async def test_waiter_respects_its_own_deadline(self):
+        singleflight = SingleFlight()
+
+        async def slow():
+            await asyncio.sleep(0.3)
+            return "done"
+
+        leader = asyncio.ensure_future(singleflight.do("key", slow))
+        await asyncio.sleep(0)
+        with pytest.raises(DeadlineExceeded):
+            await singleflight.do("key", slow, deadline=Deadline.after(0.05))
+
+        assert await leader == ("done", False)
+
+    @pytest.mark.asyncio
+    async def test_leader_deadline_is_not_shared_with_waiters(self):
+        singleflight = SingleFlight()
+        calls = []
+
+        def call(deadline):
+            async def fn():
+                calls.append(deadline)
+                await asyncio.sleep(0.1)
+                deadline.check("模型调用")
+                return "done"
+
+            return fn
+
+        short, long = Deadline.after(0.05), Deadline.after(5)
+        leader = asyncio.ensure_future(singleflight.do("key", call(short), deadline=short))
+        await asyncio.sleep(0)
+        waiter = asyncio.ensure_future(singleflight.do("key", call(long), deadline=long))
+
+        with pytest.raises(DeadlineExceeded):
+            await leader
+        # 执行者超过自己的截止时间后，等待者用自己的预算重新发起调用
+        assert await waiter == ("done", False)
+        assert calls == [short, long]
+        assert singleflight.inflight() == 0
+
+    @pytest.mark.asyncio
+    async def test_cancelled_leader_is_not_shared_with_waiters(self):
+        singleflight = SingleFlight()
+
+        async def slow():
+            await asyncio.sleep(0.1)
+            return "done"
+
+        leader = asyncio.ensure_future(singleflight.do("key", slow))
+        await asyncio.sleep(0)
+        waiter = asyncio.ensure_future(singleflight.do("key", slow))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+
+        assert await waiter == ("done", False)
+        assert leader.cancelled()
+
+    def test_calls_are_shared_across_event_loops(self):
+        singleflight = SingleFlight()
+        client = FakeClient(delay=0.3)
+        results = []
+
+        def run():
+            extractor = MidSceneDataExtractor(client, singleflight=singleflight)
+            results.append(asyncio.run(extractor.extract_data(string_request())))
+
+        threads = [threading.Thread(target=run) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert client.calls == 1
+        assert all(r.success for r in results)
+
+    @pytest.mark.asyncio
+    async def test_client_without_fingerprint_is_not_deduplicated(self):
+        class NoFingerprintClient(FakeClient):
+            page_fingerprint = None
+
+        singleflight = SingleFlight()
+        client = NoFingerprintClient(delay=0.1)
+
+        await asyncio.gather(
+            *(
+                MidSceneDataExtractor(client, singleflight=singleflight).extract_data(string_request())
+                for _ in range(2)
+            )
+        )
+
+        assert client.calls == 2
+        assert singleflight.get_stats()["calls"] == 0
@@ -0,0 +1,70 @@
+import pytest
+
+from midscene_framework.deadline import DeadlineExceeded
+from midscene_framework.step_retry import StepRetryPolicy, classify_error
+
+
+class TestStepRetryPolicy:
+    """Test cases for per-step retry policies"""
+
+    def test_unconfigured_step_has_no_policy(self):
+        assert StepRetryPolicy.from_step({"action": "ai_tap"}) is None
+        assert StepRetryPolicy.from_step({"action": "ai_tap", "retry_count": 0}) is None
+
+    def test_legacy_retry_count(self):
+        policy = StepRetryPolicy.from_step({"action": "ai_tap", "retry_count": 2})
+        assert policy.attempts == 3
+        assert "element_not_found" in policy.retry_on
+        assert "assertion" not in policy.retry_on
+
+    def test_backoff_is_exponential_and_capped(self):
+        policy = StepRetryPolicy.from_step(
+            {
+                "retry_policy": {
+                    "attempts": 5,
+                    "backoff_ms": 1000,
+                    "backoff_multiplier": 3,
+                    "max_backoff_ms": 5000,
+                }
+            }
+        )
+        assert [policy.delay_seconds(a) for a in (1, 2, 3)] == [1.0, 3.0, 5.0]
+
+    def test_should_retry_by_error_class_and_attempts(self):
+        policy = StepRetryPolicy.from_step(
+            {"retry_policy": {"attempts": 2, "retry_on": ["timeout"], "renavigate": "https://a"}}
+        )
+        assert policy.should_retry("timeout", 1)
+        assert not policy.should_retry("timeout", 2)
+        assert not policy.should_retry("assertion", 1)
+        assert policy.renavigate == "https://a"
+
+        any_policy = StepRetryPolicy.from_step({"retry_policy": {"attempts": 2, "retry_on": "any"}})
+        assert any_policy.should_retry("other", 1)
+        assert not any_policy.should_retry("deadline", 1)
+
+    @pytest.mark.parametrize(
+        "retry_policy",
+        [
+            {"attempts": 0},
+            {"attempts": 11},
+            {"backoff_ms": -1},
+            {"backoff_multiplier": 0.5},
+            {"retry_on": ["flaky"]},
+            {"renavigate": 1},
+            {"max_attempts": 3},
+        ],
+    )
+    def test_invalid_policies(self, retry_policy):
+        with pytest.raises(ValueError):
+            StepRetryPolicy.from_step({"retry_policy": retry_policy})
+
+    def test_classify_error(self):
+        assert classify_error(DeadlineExceeded("x")) == "deadline"
+        assert classify_error("步骤 2超过截止时间") == "deadline"
+        assert classify_error("Navigation timeout of 30000 ms exceeded") == "timeout"
+        assert classify_error("net::ERR_CONNECTION_RESET") == "network"
+        assert classify_error("AI model service error") == "ai_service"
+        assert classify_error("Element not found: 登录按钮") == "element_not_found"
+        assert classify_error("Assertion failed: 页面未找到订单") == "assertion"
+        assert classify_error("boom") == "other"
@@ -0,0 +1,148 @@
+import pytest
+from datetime import datetime, timedelta
+
+from backend.services.suite_service import SuiteRunner
+from backend.models import TestCase, ExecutionHistory, SuiteRun
+
+
+class TestSuiteRunner:
+    """Test cases for SuiteRunner service"""
+
+    @pytest.fixture
+    def runner(self):
+        return SuiteRunner()
+
+    def _age_testcase(self, db_session, testcase_id, days=30):
+        """让用例的修改时间早于历史执行，避免被视为最近修改"""
+        testcase = TestCase.query.get(testcase_id)
+        testcase.created_at = testcase.updated_at = datetime.utcnow() - timedelta(days=days)
+        db_session.commit()
+
+    def _add_history(self, test_data_manager, testcase_id, statuses, days_ago=1):
+        for status in statuses:
+            test_data_manager.create_execution(
+                {
+                    "test_case_id": testcase_id,
+                    "status": status,
+                    "start_time": datetime.utcnow() - timedelta(days=days_ago),
+                }
+            )
+
+    def test_flaky_cases_rank_first(self, db_session, runner, test_data_manager):
+        stable = test_data_manager.create_testcase({"name": "stable", "category": "S"})
+        flaky = test_data_manager.create_testcase({"name": "flaky", "category": "S"})
+        for tc in (stable, flaky):
+            self._age_testcase(db_session, tc.id)
+        self._add_history(test_data_manager, stable.id, ["success"] * 5)
+        self._add_history(test_data_manager, flaky.id, ["failed", "success", "failed"])
+
+        ranking = runner.rank_testcases(runner.resolve_testcases(category="S"))
+
+        assert [item["test_case_id"] for item in ranking] == [flaky.id, stable.id]
+        assert ranking[0]["failure_probability"] > ranking[1]["failure_probability"]
+
+    def test_old_failures_decay(self, db_session, runner, test_data_manager):
+        recent = test_data_manager.create_testcase({"name": "recent", "category": "S"})
+        old = test_data_manager.create_testcase({"name": "old", "category": "S"})
+        for tc in (recent, old):
+            self._age_testcase(db_session, tc.id, days=60)
+        self._add_history(test_data_manager, recent.id, ["failed"], days_ago=1)
+        self._add_history(test_data_manager, old.id, ["failed"], days_ago=40)
+
+        scores = {
+            item["test_case_id"]: item["failure_probability"]
+            for item in runner.failure_scores(runner.resolve_testcases(category="S"))
+        }
+        assert scores[recent.id] > scores[old.id]
+
+    def test_recently_changed_cases_get_bonus(self, db_session, runner, test_data_manager):
+        unchanged = test_data_manager.create_testcase({"name": "unchanged", "category": "S"})
+        changed = test_data_manager.create_testcase({"name": "changed", "category": "S"})
+        self._age_testcase(db_session, unchanged.id)
+        self._age_testcase(db_session, changed.id)
+        self._add_history(test_data_manager, unchanged.id, ["success"] * 3)
+        self._add_history(test_data_manager, changed.id, ["success"] * 3)
+
+        testcase = TestCase.query.get(changed.id)
+        testcase.updated_at = datetime.utcnow()
+        db_session.commit()
+
+        ranking = runner.rank_testcases(runner.resolve_testcases(category="S"))
+        assert ranking[0]["test_case_id"] == changed.id
+        assert ranking[0]["recently_changed"] is True
+
+    def test_start_suite_run_queues_in_rank_order(
+        self, db_session, runner, test_data_manager
+    ):
+        stable = test_data_manager.create_testcase({"name": "stable", "category": "S"})
+        flaky = test_data_manager.create_testcase({"name": "flaky", "category": "S"})
+        for tc in (stable, flaky):
+            self._age_testcase(db_session, tc.id)
+        self._add_history(test_data_manager, flaky.id, ["failed"])
+        self._add_history(test_data_manager, stable.id, ["success"])
+
+        suite_run = runner.start_suite_run({"category": "S"})
+        executions = runner.get_suite_executions(suite_run.suite_run_id)
+
+        assert suite_run.total_count == 2
+        assert [e.test_case_id for e in executions] == [flaky.id, stable.id]
+        assert [e.queue_position for e in executions] == [0, 1]
+        assert all(e.status == "pending" for e in executions)
+
+    def test_fail_fast_cancels_remaining_queue(self, db_session, runner, test_data_manager):
+        for i in range(4):
+            test_data_manager.create_testcase({"name": f"case-{i}", "category": "S"})
+
+        suite_run = runner.start_suite_run({"category": "S", "fail_fast": 1})
+        first = runner.get_suite_executions(suite_run.suite_run_id)[0]
+        first.status = "failed"
+        runner.record_result(first)
+        db_session.commit()
+
+        suite_run = SuiteRun.query.get(suite_run.id)
+        assert suite_run.status == "cancelled"
+        assert suite_run.failed_count == 1
+        assert suite_run.cancelled_count == 3
+        assert suite_run.first_failure_at is not None
+        assert ExecutionHistory.query.filter_by(
+            suite_run_id=suite_run.suite_run_id, status="pending"
+        ).count() == 0
+
+    def test_fail_fast_keeps_dispatched_executions(self, db_session, runner, test_data_manager):
+        for i in range(3):
+            test_data_manager.create_testcase({"name": f"case-{i}", "category": "S"})
+
+        suite_run = runner.start_suite_run({"category": "S", "fail_fast": 1})
+        first, dispatched, queued = runner.get_suite_executions(suite_run.suite_run_id)
+        dispatched.executor_node_id = "node-a"
+        first.status = "failed"
+        runner.record_result(first)
+        db_session.commit()
+
+        # 已分发到节点的执行由节点继续执行，只取消尚未分发的
+        assert ExecutionHistory.query.get(dispatched.id).status == "pending"
+        assert ExecutionHistory.query.get(queued.id).status == "cancelled"
+        assert SuiteRun.query.get(suite_run.id).cancelled_count == 1
+
+        dispatched.status = "success"
+        runner.record_result(dispatched)
+        db_session.commit()
+        assert SuiteRun.query.get(suite_run.id).passed_count == 1
+
+    def test_suite_completes_when_all_finished(self, db_session, runner, test_data_manager):
+        test_data_manager.create_testcase({"name": "only", "category": "S"})
+        suite_run = runner.start_suite_run({"category": "S", "fail_fast": 2})
+        execution = runner.get_suite_executions(suite_run.suite_run_id)[0]
+
+        execution.status = "success"
+        runner.record_result(execution)
+        db_session.commit()
+
+        assert SuiteRun.query.get(suite_run.id).status == "completed"
+        assert SuiteRun.query.get(suite_run.id).passed_count == 1
+
+    def test_invalid_input(self, db_session, runner):
+        with pytest.raises(ValueError):
+            runner.start_suite_run({})
+        with pytest.raises(ValueError):
+            runner.start_suite_run({"category": "missing"})
@@ -0,0 +1,79 @@
+import json
+
+import pytest
+
+from backend.models import db, TestCase
+from backend.services.variable_suggestion_index import VariableSuggestionService
+
+
+STEPS = [
+    {"action": "goto", "params": {"url": "${base_url}/login"}},
+    {
+        "action": "aiQuery",
+        "params": {"query": "商品信息", "dataDemand": "{name: string, price: number}"},
+        "output_variable": "product",
+    },
+    {"action": "set_variable", "params": {"name": "limit", "value": {"max": 3}}},
+    {"action": "aiInput", "params": {"text": "${product.name}", "locate": "搜索框"}},
+    {"action": "aiNumber", "params": {"query": "价格"}, "output_variable": "product"},
+    {"action": "aiAssert", "params": {"condition": "${product} < ${missing.value}"}},
+]
+
+
+class TestVariableSuggestionService:
+    """Test cases for the static dataflow variable-suggestion index"""
+
+    @pytest.fixture
+    def service(self):
+        return VariableSuggestionService()
+
+    @pytest.fixture
+    def testcase(self, db_session):
+        testcase = TestCase(
+            name="变量提示",
+            steps=json.dumps(STEPS),
+            dataset=json.dumps({"type": "inline", "rows": [{"base_url": "https://a"}]}),
+            is_active=True,
+        )
+        db_session.add(testcase)
+        db_session.commit()
+        return testcase
+
+    def test_available_variables_follow_step_order(self, service, testcase):
+        index = service.get_index(testcase)
+
+        assert [v["name"] for v in index.available(0)] == ["base_url"]
+        assert [v["name"] for v in index.available(3)] == ["limit", "product", "base_url"]
+
+        product = index.available(3)[1]
+        assert product["data_type"] == "object"
+        assert product["source_step_index"] == 1
+        assert [p["path"] for p in product["properties"]] == ["product.name", "product.price"]
+        assert index.available(3)[0]["properties"][0]["path"] == "limit.max"
+
+        # 后面步骤重新定义的同名变量覆盖之前的定义
+        redefined = [v for v in index.available(5) if v["name"] == "product"]
+        assert len(redefined) == 1 and redefined[0]["data_type"] == "number"
+        assert redefined[0]["reference_count"] == 2
+
+        assert index.unresolved_references == [
+            {"step_index": 5, "variable": "missing", "reference": "missing.value"}
+        ]
+
+    def test_index_is_cached_by_revision(self, db_session, service, testcase):
+        first = service.get_index(testcase)
+        assert service.get_index(testcase) is first
+        assert service.get_stats() == {"cached": 1, "hits": 1, "builds": 1}
+
+        testcase.steps = json.dumps(STEPS[:2])
+        db.session.commit()
+        rebuilt = service.get_index(testcase)
+        assert rebuilt is not first
+        assert rebuilt.step_count == 2
+
+    def test_predicted_variables_options(self, service, testcase):
+        data = service.predicted_variables(testcase, step_index=3, include_properties=False, limit=2)
+
+        assert data["revision"] == testcase.revision
+        assert [v["name"] for v in data["predicted_variables"]] == ["limit", "product"]
+        assert all(v["properties"] == [] for v in data["predicted_variables"])
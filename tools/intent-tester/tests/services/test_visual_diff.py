@@ -0,0 +1,128 @@
+import pytest
+import numpy as np
+
+from backend.services.visual_diff import VisualDiffService
+from backend.models import VisualBaseline
+
+
+def make_image(width=40, height=30, color=(255, 255, 255)):
+    pixels = np.zeros((height, width, 3), dtype=np.uint8)
+    pixels[:, :] = color
+    return pixels
+
+
+class TestVisualDiffService:
+    """Test cases for VisualDiffService"""
+
+    @pytest.fixture
+    def service(self):
+        return VisualDiffService()
+
+    def test_identical_images_pass(self, service):
+        png = service.encode_png(make_image())
+
+        result = service.compare(png, png)
+
+        assert result["passed"]
+        assert result["diff_pixels"] == 0
+        assert result["diff_image"] is None
+
+    def test_changed_block_fails_with_diff_image(self, service):
+        baseline = make_image()
+        current = baseline.copy()
+        current[10:20, 5:15] = (0, 0, 0)
+
+        result = service.compare(
+            service.encode_png(baseline), service.encode_png(current)
+        )
+
+        assert not result["passed"]
+        assert result["bounding_box"] == {"x": 5, "y": 10, "width": 10, "height": 10}
+        diff = service.load_image(result["diff_image"])
+        assert tuple(diff[15, 10]) == (255, 0, 0)
+
+    def test_ignore_region_masks_dynamic_content(self, service):
+        baseline = make_image()
+        current = baseline.copy()
+        current[0:5, 0:40] = (10, 10, 10)  # 时间戳区域
+
+        result = service.compare(
+            service.encode_png(baseline),
+            service.encode_png(current),
+            ignore_regions=[{"x": 0, "y": 0, "width": 40, "height": 5}],
+        )
+
+        assert result["passed"]
+        assert result["compared_pixels"] == 40 * 25
+
+    def test_small_noise_within_pixel_threshold(self, service):
+        baseline = make_image(color=(200, 200, 200))
+        current = make_image(color=(208, 195, 200))
+
+        result = service.compare(service.encode_png(baseline), service.encode_png(current))
+
+        assert result["passed"]
+
+    def test_anti_aliased_edge_shift_ignored(self, service):
+        # 黑白边缘之间有一列灰色过渡，过渡列向右平移一像素
+        baseline = make_image()
+        baseline[:, :20] = (0, 0, 0)
+        baseline[:, 20] = (128, 128, 128)
+        current = baseline.copy()
+        current[:, 20] = (0, 0, 0)
+        current[:, 21] = (128, 128, 128)
+
+        strict = service.compare(
+            service.encode_png(baseline), service.encode_png(current),
+            tolerance=0, detect_anti_aliasing=False,
+        )
+        lenient = service.compare(
+            service.encode_png(baseline), service.encode_png(current), tolerance=0
+        )
+
+        assert not strict["passed"]
+        assert lenient["passed"]
+        assert lenient["anti_aliased_pixels"] > 0
+
+    def test_solid_colour_flip_is_not_anti_aliasing(self, service):
+        # 文字笔画变化：纯黑像素变成纯白，邻域中两种颜色都存在，仍应算差异
+        baseline = make_image()
+        baseline[10:20, 10:12] = (0, 0, 0)
+        current = make_image()
+        current[10:20, 12:14] = (0, 0, 0)
+
+        result = service.compare(
+            service.encode_png(baseline), service.encode_png(current), tolerance=0
+        )
+
+        assert not result["passed"]
+
+    def test_size_mismatch_and_region_crop(self, service):
+        baseline = make_image(10, 10)
+        full = make_image(40, 30)
+
+        mismatch = service.compare(service.encode_png(baseline), service.encode_png(full))
+        cropped = service.compare(
+            service.encode_png(baseline),
+            service.encode_png(full),
+            region={"x": 5, "y": 5, "width": 10, "height": 10},
+        )
+
+        assert mismatch["reason"] == "size_mismatch"
+        assert cropped["passed"]
+
+    def test_assert_visual_creates_then_compares_baseline(self, db_session, service):
+        first = service.encode_png(make_image())
+        changed = make_image()
+        changed[:, :] = (0, 0, 0)
+
+        created = service.assert_visual("首页", first)
+        compared = service.assert_visual("首页", service.encode_png(changed))
+
+        assert created["reason"] == "baseline_created"
+        assert not compared["passed"]
+        baseline = VisualBaseline.query.filter_by(name="首页").one()
+        assert baseline.last_mismatch_ratio == 1.0
+
+        with pytest.raises(ValueError):
+            service.assert_visual("不存在", first, options={"create_if_missing": False})
@@ -0,0 +1,117 @@
+import pytest
+
+from midscene_framework.deadline import DeadlineExceeded
+from midscene_framework.page_change import PageFingerprint
+from midscene_framework.wait_engine import WaitEngine, WaitConfig
+
+
+class FakeTime:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def clock(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def ready_page(dhash="0" * 16, dom="a", elements=10):
+    return PageFingerprint(
+        dhash=dhash,
+        dom=dom,
+        element_count=elements,
+        ready_state="complete",
+        inflight_requests=0,
+        network_idle_ms=1000,
+    )
+
+
+class TestWaitEngine:
+    """Test cases for the adaptive WaitEngine"""
+
+    @pytest.fixture
+    def fake_time(self):
+        return FakeTime()
+
+    @pytest.fixture
+    def engine(self, fake_time):
+        return WaitEngine(WaitConfig(), clock=fake_time.clock, sleep=fake_time.sleep)
+
+    def test_intervals_grow_exponentially_then_cap(self, engine, fake_time):
+        report = engine.wait("永不满足", lambda: ready_page(), lambda: False, timeout=10)
+
+        assert not report.satisfied
+        assert fake_time.sleeps[:5] == pytest.approx([0.1, 0.2, 0.4, 0.8, 1.6])
+        assert max(fake_time.sleeps) == 2.0
+
+    def test_unchanged_page_is_not_re_evaluated(self, engine):
+        calls = []
+
+        report = engine.wait(
+            "按钮出现", lambda: ready_page(), lambda: calls.append(1) or False, timeout=10
+        )
+
+        # 页面一直未变化，只有第一次就绪探测调用了模型
+        assert len(calls) == 1
+        assert report.model_calls == 1
+        assert report.unchanged_probes > 0
+
+    def test_model_waits_for_readiness(self, engine, fake_time):
+        loading = PageFingerprint(
+            dhash="0" * 16, dom="loading", element_count=5,
+            ready_state="loading", inflight_requests=3, network_idle_ms=0,
+        )
+        pages = iter([loading, loading, ready_page(), ready_page()])
+
+        def probe():
+            return next(pages, ready_page())
+
+        report = engine.wait("列表加载完成", probe, lambda: True, timeout=10)
+
+        assert report.satisfied
+        assert report.model_calls == 1
+        assert report.unready_probes >= 2
+
+    def test_learned_expectation_delays_first_model_call(self, engine, fake_time):
+        engine.record_wait("报表生成", 4.0)
+        call_times = []
+
+        def evaluate():
+            call_times.append(fake_time.now)
+            return True
+
+        report = engine.wait("报表生成", lambda: ready_page(), evaluate, timeout=10)
+
+        assert report.expected_seconds == 4.0
+        assert call_times[0] >= 2.0
+        assert engine.expected_wait("报表生成").samples == 2
+
+    def test_probe_failure_falls_back_to_direct_evaluation(self, engine):
+        def probe():
+            raise ConnectionError("no fingerprint endpoint")
+
+        report = engine.wait("页面加载", probe, lambda: True, timeout=5)
+
+        assert report.satisfied
+        assert report.model_calls == 1
+
+    def test_readiness_matches_shared_cases(self, engine, page_change_cases):
+        """Same readiness verdicts as the executor's JS WaitEngine"""
+        for case in page_change_cases["ready"]:
+            previous = case["previous"] and PageFingerprint.from_dict(case["previous"])
+            ready = engine.is_ready(PageFingerprint.from_dict(case["current"]), previous)
+            assert ready == case["expected"], case
+
+    def test_deadline_expiry_ends_the_wait(self, engine):
+        """Probe failures fall back to the model, but deadline expiry is not swallowed"""
+
+        def expired():
+            raise DeadlineExceeded("截止时间已到")
+
+        with pytest.raises(DeadlineExceeded):
+            engine.wait("按钮出现", expired, lambda: False, timeout=10)
+        with pytest.raises(DeadlineExceeded):
+            engine.wait("按钮出现", lambda: ready_page(), expired, timeout=10)